@@ -0,0 +1,67 @@
+"""
+Сравнение пропускной способности: новый ChatOpenAI на каждый запрос
+(поведение до реестра) против клиентов из LLMClientRegistry.
+
+    python benchmarks/bench_client_registry.py --requests 500 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import time
+
+from langchain_core.messages import HumanMessage
+from langchain_openai import ChatOpenAI
+
+from lightunillm import LLMClientRegistry, LLMModel
+from lightunillm.typization import LLMProvider, ProviderType
+
+from mock_server import MockServer
+
+
+async def _run(make_model, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    messages = [HumanMessage(content="What is the capital of France?")]
+
+    async def one() -> None:
+        async with semaphore:
+            await make_model().ainvoke(messages)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return requests / (time.perf_counter() - started)
+
+
+async def main(requests: int, concurrency: int) -> None:
+    async with MockServer() as server:
+        provider = LLMProvider(
+            model_id="mock",
+            base_url=server.base_url,
+            api_key="mock",
+            provider=ProviderType.openai,
+        )
+
+        def fresh() -> ChatOpenAI:
+            return ChatOpenAI(api_key=provider.api_key, base_url=provider.base_url, model=provider.model_id)
+
+        registry = LLMClientRegistry()
+        llm_model = LLMModel(registry=registry)
+
+        def pooled() -> ChatOpenAI:
+            llm_model.switch_model(provider)
+            return llm_model.model
+
+        for name, factory in (("before (new client per call)", fresh), ("after (client registry)", pooled)):
+            connections = server.connections
+            rps = await _run(factory, requests, concurrency)
+            print(f"{name:32} {rps:10.1f} req/s  {server.connections - connections:6d} TCP connections")
+
+        await registry.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.requests, args.concurrency))
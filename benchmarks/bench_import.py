@@ -0,0 +1,94 @@
+"""
+Время импорта и потребление памяти при холодном старте процесса.
+
+Каждый сценарий выполняется в новом интерпретаторе --runs раз, выводятся
+медиана времени импорта, RSS процесса после импорта и загруженные тяжёлые
+зависимости. С --json результаты печатаются одной строкой JSON, чтобы
+отслеживать их между коммитами.
+
+    python benchmarks/bench_import.py --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ("langchain_core", "langchain_openai", "langchain_ollama", "openai", "ollama", "jinja2", "httpx", "tiktoken")
+
+SCENARIOS = {
+    "python": "pass",
+    "import lightunillm": "import lightunillm",
+    "LLMProvider": "from lightunillm.typization import LLMProvider",
+    "PromptLoader": "from lightunillm import PromptLoader",
+    "AIBaseHandler": "from lightunillm import AIBaseHandler",
+    "AIBaseHandler + ollama client": (
+        "from lightunillm import AIBaseHandler\n"
+        "from lightunillm.typization import LLMProvider, ProviderType\n"
+        "AIBaseHandler(None, LLMProvider(model_id='m', base_url='http://127.0.0.1:1', api_key='k', provider=ProviderType.ollama))"
+    ),
+    "AIBaseHandler + openai client": (
+        "from lightunillm import AIBaseHandler\n"
+        "from lightunillm.typization import LLMProvider, ProviderType\n"
+        "AIBaseHandler(None, LLMProvider(model_id='m', base_url='http://127.0.0.1:1/v1', api_key='k', provider=ProviderType.openai))"
+    ),
+}
+
+PROBE = """
+import sys, time
+started = time.perf_counter()
+exec(compile({code!r}, "<scenario>", "exec"))
+elapsed = time.perf_counter() - started
+
+rss = 0
+try:
+    with open("/proc/self/statm") as file:
+        rss = int(file.read().split()[1]) * __import__("os").sysconf("SC_PAGE_SIZE")
+except OSError:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(__import__("json").dumps({{"seconds": elapsed, "rss": rss, "heavy": heavy}}))
+"""
+
+
+def measure(code: str, runs: int) -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = os.environ | {"PYTHONPATH": os.pathsep.join(filter(None, (root, os.environ.get("PYTHONPATH"))))}
+
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(code=code, heavy=HEAVY_MODULES)],
+            check=True, capture_output=True, text=True, env=env
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    return {
+        "ms": statistics.median(sample["seconds"] for sample in samples) * 1000,
+        "rss_mb": statistics.median(sample["rss"] for sample in samples) / 2 ** 20,
+        "heavy": samples[-1]["heavy"],
+    }
+
+
+def main(runs: int, as_json: bool) -> None:
+    results = {name: measure(code, runs) for name, code in SCENARIOS.items()}
+
+    if as_json:
+        print(json.dumps(results))
+        return
+
+    for name, result in results.items():
+        print(f"{name:32} {result['ms']:8.1f} ms  {result['rss_mb']:7.1f} MB  {', '.join(result['heavy']) or '-'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    main(args.runs, args.json)
@@ -0,0 +1,62 @@
+"""
+Накладные расходы инструментирования на один запрос ``send_request``
+без приёмников метрик и с ``MetricsAggregator``. Модель подменяется
+локальной заглушкой, поэтому измеряется только код LightUniLLM.
+
+    python benchmarks/bench_instrumentation.py --requests 20000
+"""
+
+import argparse
+import asyncio
+import time
+
+from langchain_core.messages import AIMessage
+
+from lightunillm import AIBaseHandler, Instrumentation, MetricsAggregator
+from lightunillm.typization import LLMProvider, ProviderType
+
+
+class FakeModel:
+    """Модель, которая сразу возвращает готовый ответ."""
+
+    def __init__(self):
+        self.response = AIMessage(
+            content="Paris",
+            response_metadata={"token_usage": {"completion_tokens": 1, "prompt_tokens": 10, "total_tokens": 11}},
+        )
+
+    async def ainvoke(self, messages) -> AIMessage:
+        return self.response
+
+
+async def run(handler: AIBaseHandler, requests: int) -> float:
+    started = time.perf_counter_ns()
+    for _ in range(requests):
+        await handler.send_request("What is the capital of France?", "Answer briefly.")
+    return (time.perf_counter_ns() - started) / requests / 1000
+
+
+async def main(requests: int) -> None:
+    provider = LLMProvider(model_id="mock", base_url="http://127.0.0.1:1/v1", api_key="mock", provider=ProviderType.openai)
+    model = FakeModel()
+
+    instrumentation = Instrumentation()
+    handler = AIBaseHandler(prompt_storage=None, llm_provider=provider, instrumentation=instrumentation)
+    handler.llm_model.get_configured_model = lambda options=None, llm_provider=None: model
+
+    await run(handler, 100)
+    print(f"{'no sinks':24} {await run(handler, requests):8.1f} us/request")
+
+    aggregator = MetricsAggregator()
+    instrumentation.add_sink(aggregator)
+    print(f"{'MetricsAggregator':24} {await run(handler, requests):8.1f} us/request")
+
+    print(aggregator.snapshot()["lightunillm_request_seconds"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.requests))
@@ -0,0 +1,109 @@
+"""
+Стоимость разбора потокового JSON ответа: IncrementalJSONParser против
+повторного разбора накопленного буфера на каждом фрагменте (закрытие
+незавершённых скобок и json.loads), а также стоимость частичных экземпляров
+stream_structured: PartialValidator против валидации всего накопленного
+дерева на каждом дочитанном значении.
+
+    python benchmarks/bench_json_stream.py --items 2000 --chunk 4
+"""
+
+import argparse
+import json
+import time
+
+from pydantic import BaseModel
+
+from lightunillm.utils.json_stream import IncrementalJSONParser, PartialValidator, partial_model
+
+
+class Item(BaseModel):
+    id: int
+    title: str
+    score: float
+
+
+class Document(BaseModel):
+    answer: str
+    items: list[Item]
+
+
+def reparse(buffer: str) -> object:
+    closers, in_string, escape = [], False, False
+
+    for char in buffer:
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]":
+            closers.pop()
+
+    text = buffer + ('"' if in_string else "")
+    try:
+        return json.loads(text + "".join(reversed(closers)))
+    except json.JSONDecodeError:
+        return None
+
+
+def main(items: int, chunk: int) -> None:
+    document = json.dumps({
+        "answer": "Paris",
+        "items": [{"id": index, "title": f"item {index}", "score": index / 7} for index in range(items)],
+    })
+    chunks = [document[index:index + chunk] for index in range(0, len(document), chunk)]
+
+    started = time.perf_counter()
+    parser = IncrementalJSONParser()
+    for piece in chunks:
+        parser.feed(piece)
+    assert parser.close() == json.loads(document)
+    incremental = time.perf_counter() - started
+
+    started = time.perf_counter()
+    buffer = ""
+    for piece in chunks:
+        buffer += piece
+        reparse(buffer)
+    naive = time.perf_counter() - started
+
+    started = time.perf_counter()
+    parser, validator, completed = IncrementalJSONParser(), PartialValidator(Document), 0
+    for piece in chunks:
+        parser.feed(piece)
+        if parser.completed != completed:
+            completed = parser.completed
+            validator.validate(parser)
+    validated = time.perf_counter() - started
+
+    started = time.perf_counter()
+    parser, partial_type, completed = IncrementalJSONParser(), partial_model(Document), 0
+    for piece in chunks:
+        value = parser.feed(piece)
+        if parser.completed != completed:
+            completed = parser.completed
+            partial_type.model_validate(value)
+    revalidated = time.perf_counter() - started
+
+    print(f"{len(document)} chars in {len(chunks)} chunks")
+    print(f"{'incremental':12} {incremental * 1000:10.1f} ms")
+    print(f"{'reparse':12} {naive * 1000:10.1f} ms")
+    print("partial instances on every completed value (parsing included)")
+    print(f"{'incremental':12} {validated * 1000:10.1f} ms")
+    print(f"{'revalidate':12} {revalidated * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--chunk", type=int, default=4)
+    args = parser.parse_args()
+
+    main(args.items, args.chunk)
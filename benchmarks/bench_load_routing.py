@@ -0,0 +1,115 @@
+"""
+Маршрутизация по нагрузке между репликами: RoundRobinRouter против
+LoadAwareRouter (least_outstanding и ewma).
+
+Поднимается несколько локальных mock-серверов с разной задержкой (--latencies),
+часть из них может отвечать 503 (--failing). Запросы отправляются через
+AIBaseHandler с --concurrency одновременных клиентов, сравниваются
+пропускная способность, p50/p99 задержки и доля запросов на каждую реплику.
+
+    python benchmarks/bench_load_routing.py --latencies 0.02,0.02,0.02,0.2 --failing 0 --requests 2000 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import time
+
+from lightunillm import AIBaseHandler, LLMClientRegistry, RetryPolicy, LoadAwareRouter, RoundRobinRouter
+from lightunillm.core.abstracts import ProviderRouterAbstract
+from lightunillm.typization import LLMProvider, ProviderType
+
+from mock_server import MockServer
+
+
+class FailingServer(MockServer):
+    """Реплика, которая отвечает 503 на все запросы."""
+
+    def _route(self, method: str, path: str, body: dict) -> tuple[str, dict]:
+        return "503 Service Unavailable", {"error": {"message": "replica is down"}}
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run(
+    router: ProviderRouterAbstract,
+    servers: list[MockServer],
+    requests: int,
+    concurrency: int
+) -> tuple[float, list[float], list[int]]:
+    provider = LLMProvider(
+        model_id="mock",
+        base_url=servers[0].base_url,
+        api_key="mock",
+        provider=ProviderType.openai,
+        replicas=[server.base_url for server in servers[1:]],
+    )
+    handler = AIBaseHandler(
+        prompt_storage=None,
+        llm_provider=provider,
+        client_registry=LLMClientRegistry(),
+        retry_policy=RetryPolicy(max_attempts=1),
+        router=router,
+    )
+
+    before = [server.requests for server in servers]
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await handler.send_request("What is the capital of France?", "You are a geography assistant.")
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one() for _ in range(requests)))
+        throughput = requests / (time.perf_counter() - started)
+    finally:
+        await handler.llm_model.registry.aclose()
+
+    return throughput, latencies, [server.requests - count for server, count in zip(servers, before)]
+
+
+async def main(latencies: list[float], failing: int, requests: int, concurrency: int) -> None:
+    servers = [
+        (FailingServer if index >= len(latencies) - failing else MockServer)(latency=latency)
+        for index, latency in enumerate(latencies)
+    ]
+    for server in servers:
+        await server.start()
+
+    try:
+        print(f"replicas: {', '.join(f'{latency * 1000:.0f}ms' for latency in latencies)}"
+              + (f" (last {failing} failing)" if failing else ""))
+
+        for name, router in (
+            ("round robin", RoundRobinRouter()),
+            ("least outstanding", LoadAwareRouter(strategy="least_outstanding")),
+            ("ewma", LoadAwareRouter(strategy="ewma")),
+        ):
+            throughput, samples, shares = await run(router, servers, requests, concurrency)
+            distribution = " ".join(f"{count / sum(shares):4.0%}" for count in shares)
+            print(
+                f"{name:18} {throughput:8.0f} req/s  "
+                f"p50 {percentile(samples, 0.5) * 1000:7.1f}ms  "
+                f"p99 {percentile(samples, 0.99) * 1000:7.1f}ms  "
+                f"attempts per replica: {distribution}"
+            )
+    finally:
+        for server in servers:
+            await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latencies", default="0.02,0.02,0.02,0.2")
+    parser.add_argument("--failing", type=int, default=0)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    asyncio.run(main([float(value) for value in args.latencies.split(",")], args.failing, args.requests, args.concurrency))
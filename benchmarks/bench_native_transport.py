@@ -0,0 +1,83 @@
+"""
+Нагрузка на CPU клиента: LangChain (ChatOpenAI/ChatOllama) против нативного
+транспорта (TransportType.native) для OpenAI-совместимого API и Ollama.
+
+Mock-сервер запускается отдельным процессом, поэтому ``time.process_time``
+учитывает только клиент: обработчик, HTTP клиент и разбор потока. Выводится
+время CPU на 1000 токенов потока (``stream_chunks``) и на один обычный запрос
+(``send_request``).
+
+    python benchmarks/bench_native_transport.py --tokens 256 --streams 200 --requests 500 --concurrency 4
+"""
+
+import argparse
+import asyncio
+import time
+
+from lightunillm import AIBaseHandler, LLMClientRegistry, RetryPolicy
+from lightunillm.typization import LLMProvider, ProviderType, TransportType
+
+from mock_server import spawn
+
+
+async def measure(handler: AIBaseHandler, count: int, concurrency: int, stream: bool) -> tuple[float, int]:
+    semaphore = asyncio.Semaphore(concurrency)
+    tokens = 0
+
+    async def one() -> None:
+        nonlocal tokens
+        async with semaphore:
+            if stream:
+                async for chunk in handler.stream_chunks("What is the capital of France?", "You are a geography assistant."):
+                    tokens += bool(chunk.content)
+            else:
+                await handler.send_request("What is the capital of France?", "You are a geography assistant.")
+
+    await asyncio.gather(*(one() for _ in range(min(count, 10))))
+
+    started, tokens = time.process_time(), 0
+    await asyncio.gather(*(one() for _ in range(count)))
+
+    return time.process_time() - started, tokens
+
+
+async def main(streams: int, requests: int, concurrency: int, port: int) -> None:
+    for provider, base_url in (
+        (ProviderType.openai, f"http://127.0.0.1:{port}/v1"),
+        (ProviderType.ollama, f"http://127.0.0.1:{port}"),
+    ):
+        for transport in (TransportType.langchain, TransportType.native):
+            registry = LLMClientRegistry()
+            handler = AIBaseHandler(
+                prompt_storage=None,
+                llm_provider=LLMProvider(
+                    model_id="mock", base_url=base_url, api_key="mock", provider=provider, transport=transport
+                ),
+                client_registry=registry,
+                retry_policy=RetryPolicy(max_attempts=1),
+            )
+
+            stream_cpu, tokens = await measure(handler, streams, concurrency, stream=True)
+            request_cpu, _ = await measure(handler, requests, concurrency, stream=False)
+            await registry.aclose()
+
+            print(
+                f"{provider.value:7} {transport.value:10} "
+                f"stream {stream_cpu / tokens * 1e6:8.1f} ms CPU / 1k tokens  "
+                f"request {request_cpu / requests * 1e3:7.2f} ms CPU"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=256)
+    parser.add_argument("--streams", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    server, port = spawn(tokens=args.tokens)
+    try:
+        asyncio.run(main(args.streams, args.requests, args.concurrency, port))
+    finally:
+        server.terminate()
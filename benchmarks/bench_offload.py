@@ -0,0 +1,171 @@
+"""
+Разбор большого структурированного вывода: в цикле событий, в пуле
+(``OffloadExecutor``, потоки или процессы) и на нескольких циклах событий
+(``ShardedRunner``).
+
+Mock-сервер отдаёт JSON по схеме ``Report`` с --tokens / 8 элементами в
+каждом списке (--tokens 256 - 32 города по 32 района, около 60 КБ), поэтому
+разбор и валидация ответа нагружают CPU. Для каждого варианта выводятся
+пропускная способность и задержка цикла событий основного процесса
+(p50/p99 опоздания таймера с периодом --tick): при разборе в цикле событий
+остальные запросы и таймеры ждут его завершения.
+
+    python benchmarks/bench_offload.py --tokens 256 --requests 400 --concurrency 32 --workers 4
+"""
+
+import argparse
+import asyncio
+import time
+
+from pydantic import BaseModel
+
+from lightunillm import AIBaseHandler, LLMClientRegistry, OffloadExecutor, RetryPolicy, ShardedRunner
+from lightunillm.typization import LLMProvider, ProviderType, TransportType
+
+from mock_server import spawn
+
+HUMAN_MESSAGE = "Describe the cities of France."
+SYSTEM_MESSAGE = "You are a geography assistant."
+
+
+class District(BaseModel):
+    name: str
+    population: int
+    area: float
+
+
+class City(BaseModel):
+    name: str
+    population: int
+    capital: bool
+    districts: list[District]
+
+
+class Report(BaseModel):
+    country: str
+    cities: list[City]
+
+
+def provider(args: argparse.Namespace) -> LLMProvider:
+    base_url = f"http://127.0.0.1:{args.port}" + ("" if args.provider == ProviderType.ollama else "/v1")
+    return LLMProvider(
+        model_id="mock", base_url=base_url, api_key="mock", provider=args.provider, transport=args.transport
+    )
+
+
+class LoopLag:
+    """Опоздание таймера цикла событий относительно периода tick."""
+
+    def __init__(self, tick: float):
+        self.tick = tick
+        self.lags: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.tick)
+            self.lags.append(time.perf_counter() - started - self.tick)
+
+    def __enter__(self) -> "LoopLag":
+        self._task = asyncio.ensure_future(self._run())
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._task.cancel()
+
+    def percentile(self, q: float) -> float:
+        ordered = sorted(self.lags)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000 if ordered else 0.0
+
+
+async def request(handler: AIBaseHandler, _: int) -> int:
+    result = await handler.send_request_with_structured_output(Report, HUMAN_MESSAGE, SYSTEM_MESSAGE)
+    if result.parsed is None:
+        raise ValueError(f"Structured output was not parsed: {result.parsing_error}")
+    return len(result.parsed.cities)
+
+
+async def in_loop(args: argparse.Namespace, offload: OffloadExecutor | None) -> int:
+    registry = LLMClientRegistry()
+    handler = AIBaseHandler(
+        prompt_storage=None, llm_provider=provider(args), client_registry=registry,
+        retry_policy=RetryPolicy(max_attempts=1), offload=offload
+    )
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(index: int) -> int:
+        async with semaphore:
+            return await request(handler, index)
+
+    try:
+        await asyncio.gather(*(one(index) for index in range(args.warmup)))
+        return sum(await asyncio.gather(*(one(index) for index in range(args.requests))))
+    finally:
+        await registry.aclose()
+
+
+class ShardSetup:
+    """Создаёт обработчик в шарде; сериализуется pickle для процессов."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+
+    async def __call__(self) -> AIBaseHandler:
+        return AIBaseHandler(
+            prompt_storage=None, llm_provider=provider(self.args), retry_policy=RetryPolicy(max_attempts=1)
+        )
+
+
+async def sharded(args: argparse.Namespace) -> int:
+    runner = ShardedRunner(
+        request, setup=ShardSetup(args), shards=args.workers,
+        concurrency=max(1, args.concurrency // args.workers), mode=args.mode
+    )
+    return sum([result async for _, result in runner.map(range(args.requests))])
+
+
+async def measure(name: str, call, args: argparse.Namespace) -> None:
+    with LoopLag(args.tick) as lag:
+        started = time.perf_counter()
+        items = await call()
+        elapsed = time.perf_counter() - started
+
+    print(
+        f"{name:18} {args.requests / elapsed:8.1f} req/s  {items / args.requests:6.0f} cities/response  "
+        f"loop lag p50 {lag.percentile(0.5):7.2f}ms  p99 {lag.percentile(0.99):7.2f}ms",
+        flush=True
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    await measure("inline", lambda: in_loop(args, None), args)
+
+    offload = OffloadExecutor(args.workers, mode=args.mode, min_chars=0)
+    try:
+        await measure(f"offload/{offload.mode}", lambda: in_loop(args, offload), args)
+    finally:
+        offload.shutdown()
+
+    await measure(f"sharded/{args.workers}", lambda: sharded(args), args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=4, help="воркеров пула и шардов")
+    parser.add_argument("--mode", choices=("auto", "thread", "process"), default="auto")
+    parser.add_argument("--provider", type=ProviderType, default=ProviderType.openai)
+    parser.add_argument("--transport", type=TransportType, default=TransportType.native)
+    parser.add_argument("--tokens", type=int, default=256, help="токенов в ответе, 1 элемент списка на 8 токенов")
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка mock-сервера, секунды")
+    parser.add_argument("--tick", type=float, default=0.005, help="период таймера задержки цикла событий, секунды")
+    args = parser.parse_args()
+
+    server, args.port = spawn(tokens=args.tokens, latency=args.latency)
+    try:
+        asyncio.run(main(args))
+    finally:
+        server.terminate()
@@ -0,0 +1,129 @@
+"""
+Симуляция кеша префиксов на репликах бэкенда (vLLM automatic prefix caching).
+
+Каждая реплика хранит LRU из --cache-size префиксов системного промпта.
+Промпты выбираются по закону Ципфа из --templates шаблонов, у каждого
+шаблона общее начало и переменный хвост. Сравнивается доля попаданий в кеш
+при распределении запросов по кругу, случайно и через PrefixRouter, а также
+при обслуживании очереди одной реплики в порядке поступления и с
+группировкой по ключу префикса в ProviderScheduler.
+
+    python benchmarks/bench_prefix_routing.py --replicas 4 --templates 64 --requests 20000
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+from collections import OrderedDict
+
+from lightunillm.core.ProviderScheduler import ProviderScheduler
+from lightunillm.core.routing import PrefixRouter
+from lightunillm.typization import LLMProvider, ProviderType
+
+
+class PrefixCache:
+    """LRU кеш префиксов одной реплики."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.entries: OrderedDict[str, None] = OrderedDict()
+
+    def access(self, key: str) -> bool:
+        hit = key in self.entries
+        self.entries[key] = None
+        self.entries.move_to_end(key)
+
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+        return hit
+
+
+def workload(templates: int, requests: int, seed: int) -> list[tuple[str, str]]:
+    rng = random.Random(seed)
+    sources = [f"You are assistant #{index}. " + "Follow the policy carefully. " * 8 + "User: {{ name }}"
+               for index in range(templates)]
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(templates)]
+
+    return [
+        (source, source.replace("{{ name }}", f"user-{rng.randrange(10_000)}"))
+        for source in rng.choices(sources, weights, k=requests)
+    ]
+
+
+def simulate_routing(providers: list[LLMProvider], requests: list[tuple[str, str]], cache_size: int, seed: int) -> dict:
+    router = PrefixRouter()
+    rng = random.Random(seed)
+    round_robin = itertools.cycle(range(len(providers)))
+    index = {id(llm_provider): position for position, llm_provider in enumerate(providers)}
+
+    policies = {
+        "round-robin": lambda key: next(round_robin),
+        "random": lambda key: rng.randrange(len(providers)),
+        "prefix": lambda key: index[id(router.order(providers, key)[0])],
+    }
+
+    results = {}
+    for name, choose in policies.items():
+        caches = [PrefixCache(cache_size) for _ in providers]
+        hits = 0
+
+        for source, system_message in requests:
+            key = router.key(system_message, source)
+            hits += caches[choose(key)].access(key)
+
+        results[name] = hits / len(requests)
+
+    return results
+
+
+async def simulate_queue(requests: list[tuple[str, str]], cache_size: int, grouped: bool) -> float:
+    router = PrefixRouter()
+    scheduler = ProviderScheduler(max_in_flight=1)
+    cache = PrefixCache(cache_size)
+    hits = 0
+
+    async def request(key: str) -> None:
+        nonlocal hits
+        async with scheduler.slot(100, group=key if grouped else None):
+            hits += cache.access(key)
+            await asyncio.sleep(0)
+
+    async with scheduler.slot(100):
+        tasks = [asyncio.create_task(request(router.key(system_message, source))) for source, system_message in requests]
+        await asyncio.sleep(0)
+
+    await asyncio.gather(*tasks)
+    return hits / len(requests)
+
+
+async def main(replicas: int, templates: int, requests: int, cache_size: int, burst: int, seed: int) -> None:
+    providers = [
+        LLMProvider(model_id="llama", base_url=f"http://replica-{index}:8000/v1", api_key="-", provider=ProviderType.openai)
+        for index in range(replicas)
+    ]
+    traffic = workload(templates, requests, seed)
+
+    print(f"routing: {replicas} replicas, {templates} templates, {requests} requests, cache {cache_size} prefixes/replica")
+    for name, ratio in simulate_routing(providers, traffic, cache_size, seed).items():
+        print(f"  {name:12} hit ratio {ratio:6.1%}")
+
+    print(f"queue: bursts of {burst} requests on one replica, cache {cache_size} prefixes")
+    for grouped in (False, True):
+        ratios = [await simulate_queue(traffic[start:start + burst], cache_size, grouped)
+                  for start in range(0, min(len(traffic), burst * 20), burst)]
+        print(f"  {'grouped' if grouped else 'fifo':12} hit ratio {sum(ratios) / len(ratios):6.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--replicas", type=int, default=4)
+    parser.add_argument("--templates", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--cache-size", type=int, default=8)
+    parser.add_argument("--burst", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.replicas, args.templates, args.requests, args.cache_size, args.burst, args.seed))
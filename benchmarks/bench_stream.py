@@ -0,0 +1,83 @@
+"""
+Накладные расходы потокового режима на один токен: прямой перебор
+``astream`` модели, быстрый режим (``stream_chunks`` + ``StreamAccumulator``)
+и прежний режим (``get_llm_stream`` + ``response |= chunk``).
+
+    python benchmarks/bench_stream.py --tokens 100000
+"""
+
+import argparse
+import asyncio
+import time
+from typing import AsyncIterator
+
+from langchain_core.messages import AIMessageChunk
+
+from lightunillm import AIBaseHandler
+from lightunillm.typization import LLMProvider, ProviderType, StreamAccumulator
+
+
+class FakeStreamingModel:
+    """Модель, которая отдаёт заранее подготовленные фрагменты без сети."""
+
+    def __init__(self, tokens: int):
+        self.chunks = [AIMessageChunk(content="tok ") for _ in range(tokens - 1)]
+        self.chunks.append(AIMessageChunk(
+            content="",
+            response_metadata={"finish_reason": "stop"},
+            usage_metadata={"input_tokens": 10, "output_tokens": tokens, "total_tokens": tokens + 10},
+        ))
+
+    async def astream(self, messages) -> AsyncIterator[AIMessageChunk]:
+        for chunk in self.chunks:
+            yield chunk
+
+
+async def raw(model: FakeStreamingModel) -> int:
+    content = []
+    async for chunk in model.astream([]):
+        content.append(chunk.content)
+    return len("".join(content))
+
+
+async def fast(handler: AIBaseHandler) -> int:
+    response = StreamAccumulator()
+    async for chunk in handler.stream_chunks("human", "system"):
+        response |= chunk
+    return len(response.content)
+
+
+async def legacy(handler: AIBaseHandler) -> int:
+    response = None
+    async for chunk in handler.get_llm_stream("human", "system"):
+        if response is None:
+            response = chunk
+        else:
+            response |= chunk
+    return len(response.content)
+
+
+async def main(tokens: int) -> None:
+    provider = LLMProvider(model_id="mock", base_url="http://127.0.0.1:1/v1", api_key="mock", provider=ProviderType.openai)
+    model = FakeStreamingModel(tokens)
+
+    handler = AIBaseHandler(prompt_storage=None, llm_provider=provider)
+    handler.llm_model.get_configured_model = lambda options=None, llm_provider=None: model
+
+    for name, run in (
+        ("raw astream", lambda: raw(model)),
+        ("stream_chunks + StreamAccumulator", lambda: fast(handler)),
+        ("get_llm_stream + |=", lambda: legacy(handler)),
+    ):
+        started = time.perf_counter_ns()
+        length = await run()
+        elapsed = time.perf_counter_ns() - started
+        print(f"{name:36} {elapsed / tokens:10.0f} ns/token  {length:10d} chars")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=100_000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.tokens))
@@ -0,0 +1,63 @@
+"""
+Накладные расходы на подготовку запроса со структурированным выводом:
+``with_structured_output`` и ``LLMWithStructuredOutput[output_model]`` на
+каждый вызов (поведение до кеширования) против раннаблов из
+``LLMClientRegistry.structured`` и ``LLMWithStructuredOutput.of``.
+
+    python benchmarks/bench_structured_output.py --calls 20000
+"""
+
+import argparse
+import time
+
+from pydantic import BaseModel, Field
+
+from lightunillm import LLMClientRegistry
+from lightunillm.typization import LLMProvider, LLMWithStructuredOutput, ProviderType, GenerationOptions
+
+
+class Address(BaseModel):
+    city: str
+    street: str
+    house: int
+
+
+class Response(BaseModel):
+    answer: str = Field(description="Ответ на вопрос")
+    confidence: float
+    tags: list[str]
+    address: Address | None = None
+
+
+def before(registry: LLMClientRegistry, provider: LLMProvider, options: GenerationOptions) -> None:
+    registry.configure(provider, options).with_structured_output(Response, include_raw=True, strict=True)
+    LLMWithStructuredOutput[Response]
+
+
+def after(registry: LLMClientRegistry, provider: LLMProvider, options: GenerationOptions) -> None:
+    registry.structured(provider, Response, options)
+    LLMWithStructuredOutput.of(Response)
+
+
+def main(calls: int) -> None:
+    provider = LLMProvider(model_id="mock", base_url="http://127.0.0.1:1/v1", api_key="mock", provider=ProviderType.openai)
+    options = GenerationOptions(temperature=0.0)
+    registry = LLMClientRegistry()
+
+    for name, run in (("before (rebuild per call)", before), ("after (cached runnable)", after)):
+        run(registry, provider, options)
+
+        started = time.perf_counter_ns()
+        for _ in range(calls):
+            run(registry, provider, options)
+        elapsed = time.perf_counter_ns() - started
+
+        print(f"{name:28} {elapsed / calls / 1000:10.1f} us/call")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20_000)
+    args = parser.parse_args()
+
+    main(args.calls)
@@ -0,0 +1,318 @@
+"""
+Набор бенчмарков основных операций обработчика на локальном mock-сервере.
+
+Сценарии: send_request, get_llm_stream, send_request_with_structured_output,
+PromptLoader.get_prompt и switch_model - для каждого провайдера (--providers)
+и транспорта (--transports). Mock-сервер запускается отдельным процессом с
+заданными задержкой, скоростью генерации и долей ошибок, поэтому время CPU
+учитывает только клиента. Для каждого сценария выводятся пропускная
+способность, p50/p90/p99 задержки, время CPU на запрос, доля ошибок и RSS
+процесса.
+
+С --output результаты сохраняются в JSON (вместе с параметрами запуска),
+с --baseline сравниваются с сохранённым ранее файлом: сценарии, где
+пропускная способность упала или p99 и CPU на запрос выросли больше чем на
+--tolerance, помечаются, и процесс завершается с кодом 1.
+
+    python benchmarks/bench_suite.py --requests 500 --concurrency 16 --tokens 64 --output results.json
+    python benchmarks/bench_suite.py --baseline results.json --tolerance 0.2
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from typing import Awaitable, Callable
+
+from pydantic import BaseModel
+
+from lightunillm import AIBaseHandler, LLMClientRegistry, RetryPolicy, PromptStorageAbstract
+from lightunillm.typization import LLMProvider, Prompt, ProviderType, TransportType
+
+from mock_server import spawn
+
+PROMPT_ID = "geography"
+SYSTEM_MESSAGE = "You are a geography assistant. Answer in the language of the question."
+HUMAN_MESSAGE = "What is the capital of {{ country }}?"
+
+# Метрики, по которым сравнение с baseline считается регрессией: (ключ, больше - лучше)
+REGRESSION_METRICS = (("throughput", True), ("p99_ms", False), ("cpu_ms", False))
+
+
+class Answer(BaseModel):
+    city: str
+    country: str
+    population: int
+    confidence: float
+
+
+class MemoryPromptStorage(PromptStorageAbstract):
+    """Хранилище с одним промптом, провайдер которого указывает на mock-сервер."""
+
+    def __init__(self, llm_provider: LLMProvider):
+        self.llm_provider = llm_provider
+
+    async def get_prompt(self, prompt_id: any) -> Prompt:
+        return Prompt(system_message=SYSTEM_MESSAGE, human_message=HUMAN_MESSAGE)
+
+    async def get_llm_provider(self, prompt_id: any) -> LLMProvider:
+        return self.llm_provider
+
+    async def get_version(self, prompt_id: any) -> any:
+        return 1
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2 ** 20 if sys.platform == "darwin" else 2 ** 10)
+
+
+def percentile(ordered: list[float], q: float) -> float | None:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+
+
+def scenarios(handler: AIBaseHandler) -> dict[str, Callable[[], Awaitable]]:
+    human_message = HUMAN_MESSAGE.replace("{{ country }}", "France")
+
+    async def send_request() -> None:
+        await handler.send_request(human_message, SYSTEM_MESSAGE)
+
+    async def get_llm_stream() -> None:
+        async for _ in handler.get_llm_stream(human_message, SYSTEM_MESSAGE):
+            pass
+
+    async def send_request_with_structured_output() -> None:
+        result = await handler.send_request_with_structured_output(Answer, human_message, SYSTEM_MESSAGE)
+        if result.parsed is None:
+            raise ValueError(f"Structured output was not parsed: {result.parsing_error}")
+
+    async def get_prompt() -> None:
+        await handler.prompt_loader.get_prompt(PROMPT_ID, country="France")
+
+    async def switch_model() -> None:
+        await handler.switch_model(PROMPT_ID)
+
+    return {
+        "send_request": send_request,
+        "get_llm_stream": get_llm_stream,
+        "send_request_with_structured_output": send_request_with_structured_output,
+        "get_prompt": get_prompt,
+        "switch_model": switch_model,
+    }
+
+
+async def measure(call: Callable[[], Awaitable], requests: int, concurrency: int, warmup: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def one() -> None:
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await call()
+            except Exception:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(warmup)))
+    latencies.clear()
+    errors = 0
+
+    gc.collect()
+    rss_before = rss_mb()
+    cpu_started, started = time.process_time(), time.perf_counter()
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+
+    elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+    latencies.sort()
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "error_rate": errors / requests,
+        "throughput": requests / elapsed,
+        "p50_ms": percentile(latencies, 0.5) * 1000 if latencies else None,
+        "p90_ms": percentile(latencies, 0.9) * 1000 if latencies else None,
+        "p99_ms": percentile(latencies, 0.99) * 1000 if latencies else None,
+        "cpu_ms": cpu / requests * 1000,
+        "rss_mb": rss_mb(),
+        "rss_delta_mb": rss_mb() - rss_before,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+async def run(args: argparse.Namespace, port: int) -> list[dict]:
+    results = []
+
+    for provider in args.providers:
+        for transport in args.transports:
+            base_url = f"http://127.0.0.1:{port}" + ("" if provider == ProviderType.ollama else "/v1")
+            llm_provider = LLMProvider(
+                model_id="mock", base_url=base_url, api_key="mock", provider=provider, transport=transport
+            )
+            registry = LLMClientRegistry()
+            handler = AIBaseHandler(
+                prompt_storage=MemoryPromptStorage(llm_provider),
+                llm_provider=llm_provider,
+                client_registry=registry,
+                retry_policy=RetryPolicy(max_attempts=args.attempts),
+            )
+
+            try:
+                for name, call in scenarios(handler).items():
+                    if args.scenarios and name not in args.scenarios:
+                        continue
+
+                    result = {"scenario": name, "provider": provider.value, "transport": transport.value}
+                    result |= await measure(call, args.requests, args.concurrency, args.warmup)
+                    results.append(result)
+
+                    if not args.quiet:
+                        print(format_result(result), flush=True)
+            finally:
+                await registry.aclose()
+
+    return results
+
+
+def key(result: dict) -> tuple[str, str, str]:
+    return result["scenario"], result["provider"], result["transport"]
+
+
+def format_result(result: dict, baseline: dict | None = None) -> str:
+    def ms(value: float | None) -> str:
+        return "      -" if value is None else f"{value:7.2f}"
+
+    line = (
+        f"{result['scenario']:36} {result['provider']:7} {result['transport']:10}"
+        f"{result['throughput']:9.0f} req/s  p50 {ms(result['p50_ms'])}ms  p99 {ms(result['p99_ms'])}ms  "
+        f"cpu {result['cpu_ms']:6.3f}ms  errors {result['error_rate']:5.1%}  rss {result['rss_mb']:6.1f}MB"
+    )
+
+    if baseline is not None:
+        changes = []
+        for metric, _ in REGRESSION_METRICS:
+            if result[metric] is not None and baseline.get(metric):
+                changes.append(f"{metric} {result[metric] / baseline[metric] - 1:+.0%}")
+        line += "  [" + ", ".join(changes) + "]"
+
+    return line
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    """Возвращает описания регрессий относительно baseline."""
+    previous = {key(result): result for result in baseline}
+    regressions = []
+
+    for result in results:
+        before = previous.get(key(result))
+        if before is None:
+            continue
+
+        print(format_result(result, before))
+
+        for metric, higher_is_better in REGRESSION_METRICS:
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+
+            change = new / old - 1
+            if (change < -tolerance) if higher_is_better else (change > tolerance):
+                regressions.append(f"{' / '.join(key(result))}: {metric} {old:.3f} -> {new:.3f} ({change:+.0%})")
+
+    return regressions
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(args: argparse.Namespace) -> int:
+    server, port = spawn(
+        tokens=args.tokens, latency=args.latency, token_rate=args.token_rate,
+        error_rate=args.error_rate, error_status=args.error_status, seed=args.seed
+    )
+    try:
+        results = asyncio.run(run(args, port))
+    finally:
+        server.terminate()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": {
+                name: value for name, value in vars(args).items() if name not in ("output", "baseline", "json", "quiet")
+            },
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    if args.json:
+        print(json.dumps(report))
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file)["results"], args.tolerance)
+
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500, help="запросов на сценарий")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--attempts", type=int, default=1, help="RetryPolicy.max_attempts")
+    parser.add_argument("--providers", type=lambda value: [ProviderType(item) for item in value.split(",")],
+                        default=[ProviderType.openai, ProviderType.ollama])
+    parser.add_argument("--transports", type=lambda value: [TransportType(item) for item in value.split(",")],
+                        default=[TransportType.langchain, TransportType.native])
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=None)
+    parser.add_argument("--tokens", type=int, default=64, help="токенов в ответе mock-сервера")
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка mock-сервера, секунды")
+    parser.add_argument("--token-rate", type=float, default=0.0, help="токенов в секунду, 0 - без задержки")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="сохранить результаты в JSON файл")
+    parser.add_argument("--json", action="store_true", help="напечатать результаты одной строкой JSON")
+    parser.add_argument("--baseline", help="сравнить с результатами из JSON файла")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="допустимое ухудшение для --baseline")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    sys.exit(main(args))
@@ -0,0 +1,148 @@
+"""
+Стоимость объектов результата: модели pydantic против лёгкого ``StreamChunk``.
+
+Для каждого варианта выводятся время создания одного объекта (ns), память,
+которую он удерживает (байт по tracemalloc), и количество объектов,
+отслеживаемых сборщиком мусора. Внутренние пути - фрагмент потока и расход
+токенов ответа, граница API - последний фрагмент ``get_llm_stream`` и
+результат ``send_batch`` с расходом, а также его суммирование в ``usage``.
+Отдельно сравнивается создание результатов конструктором с валидацией и
+``model_construct``: библиотека создаёт их конструктором, потому что в
+pydantic 2 ``model_construct`` выполняется на Python и медленнее валидации
+в pydantic-core.
+
+Лёгкий расход токенов без валидации сюда не входит: перевод в
+``LLMTokenUsage`` на границе API съедал выигрыш внутренних путей, а
+результат ``send_batch`` удерживал больше памяти.
+
+    python benchmarks/bench_types.py --number 100000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from typing import Callable
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from lightunillm.typization import (
+    LLMTokenUsage, PromptAsyncResult, PromptStatus, PromptSyncResult, ProviderType, StreamChunk
+)
+
+CHUNK = AIMessageChunk(
+    content="", usage_metadata={"input_tokens": 120, "output_tokens": 480, "total_tokens": 600},
+    response_metadata={"finish_reason": "stop"}
+)
+MESSAGE = AIMessage(
+    content="Paris", response_metadata={"token_usage": {"completion_tokens": 480, "prompt_tokens": 120, "total_tokens": 600}}
+)
+USAGE = LLMTokenUsage.from_message(MESSAGE, ProviderType.openai)
+
+
+def batch_result(usage: LLMTokenUsage | None) -> PromptSyncResult:
+    return PromptSyncResult(
+        content="Paris",
+        token_usages=[usage] if usage else [],
+        status=PromptStatus.success,
+        error=None
+    )
+
+
+def accumulate(total: PromptSyncResult) -> Callable[[], PromptSyncResult]:
+    result = batch_result(LLMTokenUsage.from_message(MESSAGE, ProviderType.openai))
+    return lambda: total.accumulate(result)
+
+
+def cases() -> dict[str, dict[str, Callable[[], object]]]:
+    return {
+        "stream chunk": {
+            "PromptAsyncResult": lambda: PromptAsyncResult[str](content="Paris", status=PromptStatus.success, done=False),
+            "StreamChunk": lambda: StreamChunk("Paris", False, PromptStatus.success, None),
+        },
+        # Расход каждого ответа на внутренних путях: планировщик, учёт расхода, метрики
+        "stream usage": {
+            "LLMTokenUsage": lambda: LLMTokenUsage.from_message(CHUNK, ProviderType.openai, True),
+        },
+        "request usage": {
+            "LLMTokenUsage": lambda: LLMTokenUsage.from_message(MESSAGE, ProviderType.openai),
+        },
+        # Граница API: последний фрагмент get_llm_stream и результат send_batch
+        "stream last chunk -> PromptAsyncResult": {
+            "StreamChunk.to_result": lambda: StreamChunk(
+                "", True, PromptStatus.success, LLMTokenUsage.from_message(CHUNK, ProviderType.openai, True)
+            ).to_result(),
+        },
+        "batch result": {
+            "PromptSyncResult": lambda: batch_result(LLMTokenUsage.from_message(MESSAGE, ProviderType.openai)),
+        },
+        "result construction": {
+            "PromptAsyncResult()": lambda: PromptAsyncResult(
+                content="Paris", token_usages=[USAGE], status=PromptStatus.success, done=True
+            ),
+            "PromptAsyncResult.model_construct": lambda: PromptAsyncResult.model_construct(
+                content="Paris", token_usages=[USAGE], status=PromptStatus.success, done=True
+            ),
+            "PromptSyncResult()": lambda: PromptSyncResult(
+                content="Paris", token_usages=[USAGE], status=PromptStatus.success, error=None
+            ),
+            "PromptSyncResult.model_construct": lambda: PromptSyncResult.model_construct(
+                content="Paris", token_usages=[USAGE], status=PromptStatus.success, error=None
+            ),
+            "LLMTokenUsage()": lambda: LLMTokenUsage(
+                completion_tokens=480, prompt_tokens=120, total_tokens=600, provider=ProviderType.openai
+            ),
+            "LLMTokenUsage.model_construct": lambda: LLMTokenUsage.model_construct(
+                completion_tokens=480, prompt_tokens=120, total_tokens=600, provider=ProviderType.openai
+            ),
+        },
+        "batch accumulate": {
+            "PromptSyncResult": accumulate(PromptSyncResult()),
+        },
+    }
+
+
+def timing(factory: Callable[[], object], number: int) -> float:
+    for _ in range(min(number, 1000)):
+        factory()
+
+    started = time.perf_counter_ns()
+    for _ in range(number):
+        factory()
+    return (time.perf_counter_ns() - started) / number
+
+
+def retained(factory: Callable[[], object], number: int) -> tuple[float, float]:
+    """Байт и объектов сборщика мусора на один удерживаемый объект."""
+    keep: list[object] = [None] * number
+
+    gc.collect()
+    objects = len(gc.get_objects())
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    for index in range(number):
+        keep[index] = factory()
+
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    tracked = len(gc.get_objects()) - objects
+
+    return (after - before) / number, tracked / number
+
+
+def main(number: int) -> None:
+    for path, variants in cases().items():
+        print(path)
+        for name, factory in variants.items():
+            ns = timing(factory, number)
+            size, tracked = retained(factory, min(number, 20000))
+            print(f"  {name:33} {ns:9.0f} ns/object  {size:7.0f} B/object  {tracked:5.1f} gc objects/object", flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=100000, help="объектов на вариант")
+    args = parser.parse_args()
+
+    main(args.number)
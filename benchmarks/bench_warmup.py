@@ -0,0 +1,112 @@
+"""
+Задержка первого запроса обработчика без прогрева и после ``lightunillm.warm_up``.
+
+Хранилище промптов отвечает с задержкой --storage-latency, mock-сервер -
+с задержкой --latency на запрос. Для каждого варианта создаётся новый реестр
+клиентов и новые обработчики, поэтому первый запрос без прогрева ждёт
+хранилище, создание клиента и установку соединения. Выводятся время
+прогрева и задержка первого запроса и p50 следующих --requests запросов.
+
+    python benchmarks/bench_warmup.py --handlers 8 --storage-latency 0.05 --latency 0.01
+"""
+
+import argparse
+import asyncio
+import time
+
+from lightunillm import AIHandlerInterface, LLMClientRegistry, RetryPolicy, warm_up
+from lightunillm.typization import LLMProvider, Prompt, PromptSyncResult, ProviderType, TransportType
+
+from bench_suite import MemoryPromptStorage
+from mock_server import spawn
+
+
+class SlowPromptStorage(MemoryPromptStorage):
+    """Хранилище с задержкой каждого обращения, как у удалённой базы."""
+
+    def __init__(self, llm_provider: LLMProvider, latency: float):
+        super().__init__(llm_provider)
+        self.latency = latency
+
+    async def get_prompt(self, prompt_id: any) -> Prompt:
+        await asyncio.sleep(self.latency)
+        return await super().get_prompt(prompt_id)
+
+    async def get_llm_provider(self, prompt_id: any) -> LLMProvider:
+        await asyncio.sleep(self.latency)
+        return await super().get_llm_provider(prompt_id)
+
+
+class GeographyHandler(AIHandlerInterface):
+    prompt_id = "geography"
+
+    async def apply(self, country: str = "France") -> PromptSyncResult:
+        await self.switch_model()
+        prompt = await self.prompt_loader.get_prompt(self.prompt_id, country=country)
+        response = await self.send_request(prompt.human_message, prompt.system_message)
+        return PromptSyncResult(content=response.content)
+
+    async def stream(self, country: str = "France"):
+        yield await self.apply(country)
+
+
+async def run(args: argparse.Namespace, warm: bool) -> None:
+    base_url = f"http://127.0.0.1:{args.port}" + ("" if args.provider == ProviderType.ollama else "/v1")
+    llm_provider = LLMProvider(
+        model_id="mock", base_url=base_url, api_key="mock", provider=args.provider, transport=args.transport
+    )
+    registry = LLMClientRegistry()
+    handlers = [
+        GeographyHandler(
+            prompt_storage=SlowPromptStorage(llm_provider, args.storage_latency), llm_provider=None,
+            client_registry=registry, retry_policy=RetryPolicy(max_attempts=1)
+        )
+        for _ in range(args.handlers)
+    ]
+
+    warm_up_ms = 0.0
+    if warm:
+        started = time.perf_counter()
+        errors = await warm_up(handlers, connections=args.handlers)
+        warm_up_ms = (time.perf_counter() - started) * 1000
+        if errors:
+            raise RuntimeError(f"Warm-up failed: {errors}")
+
+    async def timed(handler: GeographyHandler) -> float:
+        started = time.perf_counter()
+        await handler.apply()
+        return (time.perf_counter() - started) * 1000
+
+    try:
+        first = await asyncio.gather(*(timed(handler) for handler in handlers))
+        steady = sorted([await timed(handlers[index % len(handlers)]) for index in range(args.requests)])
+    finally:
+        await registry.aclose()
+
+    print(
+        f"{'warm' if warm else 'cold':5} warm-up {warm_up_ms:8.2f}ms  first request max {max(first):8.2f}ms  "
+        f"steady p50 {steady[len(steady) // 2]:7.2f}ms",
+        flush=True
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    await run(args, warm=False)
+    await run(args, warm=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--handlers", type=int, default=8, help="обработчиков, их первые запросы конкурентны")
+    parser.add_argument("--requests", type=int, default=50, help="последовательных запросов после первых")
+    parser.add_argument("--provider", type=ProviderType, default=ProviderType.openai)
+    parser.add_argument("--transport", type=TransportType, default=TransportType.langchain)
+    parser.add_argument("--storage-latency", type=float, default=0.05, help="задержка хранилища, секунды")
+    parser.add_argument("--latency", type=float, default=0.01, help="задержка mock-сервера, секунды")
+    args = parser.parse_args()
+
+    server, args.port = spawn(tokens=8, latency=args.latency)
+    try:
+        asyncio.run(main(args))
+    finally:
+        server.terminate()
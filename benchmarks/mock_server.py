@@ -0,0 +1,375 @@
+"""
+Локальный mock-сервер OpenAI-совместимого API и API Ollama для бенчмарков.
+
+Отвечает на ``POST .../chat/completions`` (в том числе потоком SSE при
+``stream: true`` с usage при ``stream_options.include_usage``) и
+``POST /api/chat`` (поток NDJSON по умолчанию, как Ollama). Длина ответа в
+токенах - max_tokens (num_predict для Ollama) из запроса или ``--tokens``.
+
+Для структурированного вывода (``response_format`` с json_schema,
+``format`` со схемой у Ollama или ``tools``) возвращается JSON, подходящий
+под схему запроса. Задержка до ответа (``--latency``), скорость генерации
+(``--token-rate`` токенов в секунду) и доля ответов с ошибкой
+(``--error-rate``, статус ``--error-status``) настраиваются.
+
+Запуск отдельно:
+    python benchmarks/mock_server.py --port 8765 --tokens 256 --token-rate 500 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+STATUS_TEXT = {200: "OK", 404: "Not Found", 429: "Too Many Requests", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+def example(schema: dict, defs: dict | None = None, items: int = 1) -> object:
+    """
+    Возвращает значение, подходящее под JSON схему (подмножество, которое генерирует pydantic).
+    Массивы содержат items элементов.
+    """
+    defs = schema.get("$defs", defs or {})
+
+    if "$ref" in schema:
+        return example(defs[schema["$ref"].rsplit("/", 1)[-1]], defs, items)
+
+    if "anyOf" in schema:
+        options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+        return example(options[0] if options else {"type": "null"}, defs, items)
+
+    if "enum" in schema:
+        return schema["enum"][0]
+
+    match schema.get("type"):
+        case "object":
+            return {name: example(field, defs, items) for name, field in schema.get("properties", {}).items()}
+        case "array":
+            return [example(schema.get("items", {}), defs, items) for _ in range(items)]
+        case "integer":
+            return 1
+        case "number":
+            return 1.0
+        case "boolean":
+            return True
+        case "null":
+            return None
+        case _:
+            return "Paris"
+
+
+class MockServer:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        tokens: int = 1,
+        token_rate: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: int | None = None
+    ):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.tokens = tokens
+        self.token_rate = token_rate
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+        self.connections = 0
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._server: asyncio.Server | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    @property
+    def ollama_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> "MockServer":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+
+    async def __aenter__(self) -> "MockServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        self._writers.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                self.requests += 1
+
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+
+                body = json.loads(body) if body else {}
+                if self.error_rate and self._random.random() < self.error_rate:
+                    self.errors += 1
+                    status, payload = self._error(path)
+                elif method == "POST" and self._is_stream(path, body):
+                    await self._stream(writer, path, body)
+                    continue
+                else:
+                    status, payload = self._route(method, path, body)
+                    if self.token_rate and status.startswith("200"):
+                        await asyncio.sleep(self._completion_tokens(body) / self.token_rate)
+
+                data = json.dumps(payload).encode()
+
+                writer.write(
+                    f"HTTP/1.1 {status}\r\n"
+                    f"content-type: application/json\r\n"
+                    f"content-length: {len(data)}\r\n"
+                    f"connection: keep-alive\r\n\r\n".encode() + (b"" if method == "HEAD" else data)
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _route(self, method: str, path: str, body: dict) -> tuple[str, dict]:
+        if method == "POST" and path.endswith("/chat/completions"):
+            return "200 OK", self._chat_completion(body)
+
+        if method == "POST" and path.endswith("/api/chat"):
+            return "200 OK", self._ollama_chat(body)
+
+        if method == "POST" and path.endswith("/api/generate") and not body.get("prompt"):
+            # Загрузка модели без генерации (прогрев Ollama)
+            return "200 OK", {"model": body.get("model", "mock"), "response": "", "done": True, "done_reason": "load"}
+
+        return "404 Not Found", {"error": {"message": f"{method} {path} not found"}}
+
+    def _error(self, path: str) -> tuple[str, dict]:
+        status = f"{self.error_status} {STATUS_TEXT.get(self.error_status, 'Error')}"
+        if path.endswith("/api/chat"):
+            return status, {"error": "injected error"}
+
+        return status, {"error": {"message": "injected error", "type": "server_error", "code": self.error_status}}
+
+    @staticmethod
+    def _is_stream(path: str, body: dict) -> bool:
+        if path.endswith("/api/chat"):
+            return body.get("stream", True)
+
+        return path.endswith("/chat/completions") and body.get("stream", False)
+
+    @staticmethod
+    def _schema(body: dict) -> dict | None:
+        response_format = body.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            return response_format["json_schema"]["schema"]
+
+        if isinstance(body.get("format"), dict):
+            return body["format"]
+
+        return None
+
+    @staticmethod
+    def _tool(body: dict) -> dict | None:
+        tools = body.get("tools")
+        return tools[0]["function"] if tools else None
+
+    def _completion_tokens(self, body: dict) -> int:
+        return body.get("max_tokens") or (body.get("options") or {}).get("num_predict") or self.tokens
+
+    def _example(self, schema: dict, body: dict) -> object:
+        """Пример по схеме; размер массивов растёт с количеством токенов ответа (1 элемент на 8 токенов)."""
+        return example(schema, items=max(1, self._completion_tokens(body) // 8))
+
+    def _pieces(self, body: dict) -> list[str]:
+        """Фрагменты ответа по одному на токен: текст или JSON по схеме, разбитый по 4 символа."""
+        schema = self._schema(body)
+        if schema is None:
+            return ["Paris "] * self._completion_tokens(body)
+
+        text = json.dumps(self._example(schema, body))
+        return [text[index:index + 4] for index in range(0, len(text), 4)]
+
+    def _chat_completion(self, body: dict) -> dict:
+        message: dict = {"role": "assistant"}
+        finish_reason = "stop"
+
+        if (tool := self._tool(body)) is not None:
+            arguments = json.dumps(self._example(tool.get("parameters", {}), body))
+            message |= {"content": None, "tool_calls": [{
+                "id": "call_mock", "type": "function", "function": {"name": tool["name"], "arguments": arguments},
+            }]}
+            finish_reason, tokens = "tool_calls", len(arguments) // 4 + 1
+        else:
+            pieces = self._pieces(body)
+            message["content"], tokens = "".join(pieces).rstrip(), len(pieces)
+
+        return {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": tokens, "total_tokens": 10 + tokens},
+        }
+
+    def _ollama_chat(self, body: dict) -> dict:
+        message: dict = {"role": "assistant", "content": ""}
+
+        if (tool := self._tool(body)) is not None:
+            arguments = self._example(tool.get("parameters", {}), body)
+            message["tool_calls"] = [{"function": {"name": tool["name"], "arguments": arguments}}]
+            tokens = len(json.dumps(arguments)) // 4 + 1
+        else:
+            pieces = self._pieces(body)
+            message["content"], tokens = "".join(pieces).rstrip(), len(pieces)
+
+        return {
+            "model": body.get("model", "mock"),
+            "created_at": "2025-01-01T00:00:00Z",
+            "message": message,
+            "done": True,
+            "done_reason": "stop",
+            "prompt_eval_count": 10,
+            "eval_count": tokens,
+        }
+
+    def _events(self, path: str, body: dict) -> tuple[str, list[bytes]]:
+        pieces = self._pieces(body)
+        tokens = len(pieces)
+        model = body.get("model", "mock")
+
+        if path.endswith("/api/chat"):
+            # ChatOllama читает потоком и обычные запросы, вызов инструмента приходит одним событием
+            if self._tool(body) is not None:
+                return "application/x-ndjson", [json.dumps(self._ollama_chat(body)).encode() + b"\n"]
+
+            last = self._ollama_chat(body) | {"message": {"role": "assistant", "content": ""}, "eval_count": tokens}
+            events = [
+                {"model": model, "created_at": "2025-01-01T00:00:00Z",
+                 "message": {"role": "assistant", "content": piece}, "done": False}
+                for piece in pieces
+            ]
+            return "application/x-ndjson", [json.dumps(event).encode() + b"\n" for event in [*events, last]]
+
+        def chunk(delta: dict, finish_reason: str | None = None, usage: dict | None = None) -> bytes:
+            event = {
+                "id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": 0, "model": model,
+                "choices": [] if usage else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                "usage": usage,
+            }
+            return b"data: " + json.dumps(event).encode() + b"\n\n"
+
+        events = [chunk({"role": "assistant", "content": ""})]
+        events.extend(chunk({"content": piece}) for piece in pieces)
+        events.append(chunk({}, "stop"))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            events.append(chunk({}, usage={"prompt_tokens": 10, "completion_tokens": tokens, "total_tokens": 10 + tokens}))
+        events.append(b"data: [DONE]\n\n")
+
+        return "text/event-stream", events
+
+    async def _stream(self, writer: asyncio.StreamWriter, path: str, body: dict) -> None:
+        content_type, events = self._events(path, body)
+
+        writer.write(
+            f"HTTP/1.1 200 OK\r\n"
+            f"content-type: {content_type}\r\n"
+            f"transfer-encoding: chunked\r\n"
+            f"connection: keep-alive\r\n\r\n".encode()
+        )
+
+        # Каждое событие - отдельный фрагмент chunked encoding, как у реального сервера.
+        # При заданной скорости генерации события отправляются с интервалом одного токена.
+        interval = 1 / self.token_rate if self.token_rate else 0.0
+        for index, event in enumerate(events):
+            writer.write(b"%x\r\n%s\r\n" % (len(event), event))
+            if interval:
+                await writer.drain()
+                await asyncio.sleep(interval)
+            elif index % 64 == 63:
+                await writer.drain()
+
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+def spawn(**options) -> tuple[subprocess.Popen, int]:
+    """
+    Запускает mock-сервер отдельным процессом, чтобы время CPU бенчмарка учитывало только клиента.
+
+    Args:
+        **options: Параметры командной строки сервера (tokens=256, token_rate=500, error_rate=0.01).
+
+    Returns:
+        tuple[subprocess.Popen, int]: Процесс сервера (остановить через terminate) и порт.
+    """
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    arguments = [sys.executable, os.path.abspath(__file__), "--port", str(port)]
+    for name, value in options.items():
+        if value is not None:
+            arguments += [f"--{name.replace('_', '-')}", str(value)]
+
+    server = subprocess.Popen(arguments, stdout=subprocess.PIPE, text=True)
+    server.stdout.readline()
+
+    return server, port
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    server = await MockServer(
+        args.host, args.port, args.latency, args.tokens, args.token_rate, args.error_rate, args.error_status, args.seed
+    ).start()
+    print(f"mock server listening on {server.base_url}", flush=True)
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка до ответа, секунды")
+    parser.add_argument("--tokens", type=int, default=1, help="токенов в ответе по умолчанию")
+    parser.add_argument("--token-rate", type=float, default=0.0, help="токенов в секунду, 0 - без задержки")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов с ошибкой")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    asyncio.run(_serve(args))
@@ -1,23 +1,196 @@
-import lightunillm.typization as typization
-import lightunillm.core.interfaces as interfaces
-import lightunillm.core.abstracts as abstracts
+"""
+Атрибуты пакета загружаются лениво (PEP 562): ``import lightunillm`` не
+импортирует ни одного модуля пакета, а ``from lightunillm import X``
+загружает только модуль, в котором определён X, и его зависимости.
+"""
 
-from lightunillm.core.interfaces import AIHandlerInterface
-from lightunillm.core.abstracts import PromptStorageAbstract
-from lightunillm.utils import PromptLoader
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import lightunillm.typization as typization
+    import lightunillm.core.interfaces as interfaces
+    import lightunillm.core.abstracts as abstracts
+    import lightunillm.storages as storages
+    import lightunillm.exceptions as exceptions
+
+    from lightunillm.core.interfaces import AIHandlerInterface
+    from lightunillm.core.abstracts import PromptStorageAbstract, MetricsSinkAbstract, ProviderRouterAbstract, TokenizerAbstract, HistoryPolicyAbstract
+    from lightunillm.utils import PromptLoader, ResponseCache, RequestCoalescer, MetricsAggregator, PrometheusExporter, OpenTelemetrySink, OffloadExecutor
+    from lightunillm.storages import SQLitePromptStorage, FilePromptStorage
+
+    from lightunillm.core.AIBaseHandler import (
+        AIBaseHandler,
+        LLMModel
+    )
+    from lightunillm.core.LLMClientRegistry import (
+        LLMClientRegistry,
+        PoolLimits,
+        use_registry
+    )
+    from lightunillm.core.resilience import (
+        RetryPolicy,
+        HedgePolicy
+    )
+    from lightunillm.core.Conversation import Conversation
+    from lightunillm.core.BatchJob import (
+        BatchJob,
+        BatchProgress
+    )
+    from lightunillm.core.ConversationStore import ConversationStore
+    from lightunillm.core.ShardedRunner import ShardedRunner
+    from lightunillm.core.warmup import warm_up
+    from lightunillm.core.history import (
+        SlidingWindowPolicy,
+        SummarizingPolicy
+    )
+    from lightunillm.core.context import (
+        ContextManager,
+        ContextPolicy,
+        TokenCounter
+    )
+    from lightunillm.core.routing import (
+        PrefixRouter,
+        RoundRobinRouter,
+        LoadAwareRouter
+    )
+    from lightunillm.core.accounting import (
+        UsageLedger,
+        UsageBudget,
+        ModelPrice
+    )
+    from lightunillm.core.instrumentation import (
+        Instrumentation,
+        Span
+    )
+    from lightunillm.core.ProviderScheduler import (
+        ProviderScheduler,
+        Priority,
+        use_priority
+    )
+
+
+_SUBMODULES = {
+    "typization": "lightunillm.typization",
+    "interfaces": "lightunillm.core.interfaces",
+    "abstracts": "lightunillm.core.abstracts",
+    "storages": "lightunillm.storages",
+    "exceptions": "lightunillm.exceptions",
+}
+
+_ATTRIBUTES = {
+    "AIHandlerInterface": "lightunillm.core.interfaces",
+    "PromptStorageAbstract": "lightunillm.core.abstracts",
+    "MetricsSinkAbstract": "lightunillm.core.abstracts",
+    "ProviderRouterAbstract": "lightunillm.core.abstracts",
+    "TokenizerAbstract": "lightunillm.core.abstracts",
+    "HistoryPolicyAbstract": "lightunillm.core.abstracts",
+    "PromptLoader": "lightunillm.utils.PromptLoader",
+    "ResponseCache": "lightunillm.utils.ResponseCache",
+    "RequestCoalescer": "lightunillm.utils.RequestCoalescer",
+    "MetricsAggregator": "lightunillm.utils.MetricsAggregator",
+    "PrometheusExporter": "lightunillm.utils.exporters",
+    "OpenTelemetrySink": "lightunillm.utils.exporters",
+    "OffloadExecutor": "lightunillm.utils.offload",
+    "SQLitePromptStorage": "lightunillm.storages.SQLitePromptStorage",
+    "FilePromptStorage": "lightunillm.storages.FilePromptStorage",
+    "AIBaseHandler": "lightunillm.core.AIBaseHandler",
+    "LLMModel": "lightunillm.core.AIBaseHandler",
+    "LLMClientRegistry": "lightunillm.core.LLMClientRegistry",
+    "PoolLimits": "lightunillm.core.LLMClientRegistry",
+    "use_registry": "lightunillm.core.LLMClientRegistry",
+    "RetryPolicy": "lightunillm.core.resilience",
+    "HedgePolicy": "lightunillm.core.resilience",
+    "Conversation": "lightunillm.core.Conversation",
+    "ConversationStore": "lightunillm.core.ConversationStore",
+    "BatchJob": "lightunillm.core.BatchJob",
+    "BatchProgress": "lightunillm.core.BatchJob",
+    "ShardedRunner": "lightunillm.core.ShardedRunner",
+    "warm_up": "lightunillm.core.warmup",
+    "SlidingWindowPolicy": "lightunillm.core.history",
+    "SummarizingPolicy": "lightunillm.core.history",
+    "ContextManager": "lightunillm.core.context",
+    "ContextPolicy": "lightunillm.core.context",
+    "TokenCounter": "lightunillm.core.context",
+    "PrefixRouter": "lightunillm.core.routing",
+    "RoundRobinRouter": "lightunillm.core.routing",
+    "LoadAwareRouter": "lightunillm.core.routing",
+    "UsageLedger": "lightunillm.core.accounting",
+    "UsageBudget": "lightunillm.core.accounting",
+    "ModelPrice": "lightunillm.core.accounting",
+    "Instrumentation": "lightunillm.core.instrumentation",
+    "Span": "lightunillm.core.instrumentation",
+    "ProviderScheduler": "lightunillm.core.ProviderScheduler",
+    "Priority": "lightunillm.core.ProviderScheduler",
+    "use_priority": "lightunillm.core.ProviderScheduler",
+}
+
+
+def __getattr__(name: str):
+    if name in _SUBMODULES:
+        value = importlib.import_module(_SUBMODULES[name])
+    elif name in _ATTRIBUTES:
+        value = getattr(importlib.import_module(_ATTRIBUTES[name]), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    # Следующие обращения не проходят через __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
 
-from lightunillm.core.AIBaseHandler import (
-    AIBaseHandler,
-    LLMModel
-)
 
 __all__ = [
     "interfaces",
     "abstracts",
+    "storages",
+    "exceptions",
     "typization",
     "AIBaseHandler",
     "LLMModel",
+    "LLMClientRegistry",
+    "PoolLimits",
+    "use_registry",
+    "RetryPolicy",
+    "HedgePolicy",
+    "ProviderScheduler",
+    "Priority",
+    "use_priority",
+    "PrefixRouter",
+    "RoundRobinRouter",
+    "LoadAwareRouter",
+    "Conversation",
+    "ConversationStore",
+    "BatchJob",
+    "BatchProgress",
+    "ShardedRunner",
+    "warm_up",
+    "SlidingWindowPolicy",
+    "SummarizingPolicy",
+    "ContextManager",
+    "ContextPolicy",
+    "TokenCounter",
     "PromptLoader",
+    "ResponseCache",
+    "RequestCoalescer",
+    "OffloadExecutor",
+    "UsageLedger",
+    "UsageBudget",
+    "ModelPrice",
+    "Instrumentation",
+    "Span",
+    "MetricsSinkAbstract",
+    "MetricsAggregator",
+    "PrometheusExporter",
+    "OpenTelemetrySink",
     "PromptStorageAbstract",
+    "ProviderRouterAbstract",
+    "TokenizerAbstract",
+    "HistoryPolicyAbstract",
+    "SQLitePromptStorage",
+    "FilePromptStorage",
     "AIHandlerInterface"
 ]
\ No newline at end of file
@@ -1,38 +1,226 @@
+from __future__ import annotations
+
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.messages import AIMessage, AIMessageChunk
-from typing import Type, TypeVar, AsyncIterable
-from langchain_openai import ChatOpenAI
-from langchain_ollama import ChatOllama
+from contextlib import AsyncExitStack, asynccontextmanager, aclosing
+import time
+from typing import TYPE_CHECKING, Type, TypeVar, AsyncIterable, AsyncIterator, Iterable, AsyncContextManager, Awaitable, Callable
 from pydantic import BaseModel
 
-from lightunillm.typization import LLMWithStructuredOutput, LLMProvider, ProviderType, PromptAsyncResult, PromptStatus, LLMTokenUsage
+from lightunillm.typization import LLMWithStructuredOutput, LLMProvider, ProviderType, PromptAsyncResult, PromptSyncResult, PromptStatus, LLMTokenUsage, GenerationOptions, Prompt, StreamChunk, StreamAccumulator
 from lightunillm.core.abstracts.PromptStorageAbstract import PromptStorageAbstract
+from lightunillm.core.abstracts.ProviderRouterAbstract import ProviderRouterAbstract
+from lightunillm.core.LLMClientRegistry import LLMClientRegistry
+from lightunillm.core.ProviderScheduler import ProviderScheduler, Priority, Ticket, resolve_priority
+from lightunillm.core.resilience import ResilientExecutor, RetryPolicy, HedgePolicy
+from lightunillm.core.context import ContextManager, output_schema_text
+from lightunillm.core.Conversation import Conversation
+from lightunillm.core.accounting import UsageLedger
+from lightunillm.core.instrumentation import (
+    Instrumentation, Span, NOOP_SPAN,
+    REQUEST, ATTEMPT, QUEUE_WAIT, TIME_TO_FIRST_TOKEN, RESPONSE_CACHE, COALESCED
+)
 from lightunillm.utils.PromptLoader import PromptLoader
+from lightunillm.utils.concurrency import bounded_map
+from lightunillm.utils.json_stream import IncrementalJSONParser, PartialValidator
+from lightunillm.utils.ResponseCache import ResponseCache, request_fingerprint
+from lightunillm.utils.RequestCoalescer import RequestCoalescer
+
+if TYPE_CHECKING:
+    from langchain_core.runnables import Runnable
+    from langchain_ollama import ChatOllama
+    from langchain_openai import ChatOpenAI
+
+    from lightunillm.utils.offload import OffloadExecutor
 
 T = TypeVar('T', bound=BaseModel)
+R = TypeVar('R')
 
 
 class LLMModel:
 
-    def __init__(self, llm_provider: LLMProvider | None = None):
+    def __init__(
+        self,
+        llm_provider: LLMProvider | None = None,
+        registry: LLMClientRegistry | None = None,
+        instrumentation: Instrumentation | None = None
+    ):
+        # Не `registry or ...`: пустой реестр ложен (__len__)
+        self.registry = registry if registry is not None else LLMClientRegistry.default()
+        self.instrumentation = instrumentation or Instrumentation.default()
         self.llm_provider = llm_provider
+        self.fallback_providers: list[LLMProvider] = []
+        self.prompt_id: any = None
+        self.pool: list[LLMProvider] = self.expand_replicas([llm_provider]) if llm_provider else []
         self.model: ChatOpenAI | ChatOllama | None = self.get_model() if llm_provider else None
 
     def get_model(self) -> ChatOpenAI | ChatOllama:
-        """ Возвращает языковую модель OpenAI
+        """ Возвращает языковую модель из реестра клиентов
 
             Returns:
-                ChatOpenAI: инициализированная языковая модель
+                ChatOpenAI | ChatOllama: прогретая языковая модель
         """
-        
-        match self.llm_provider.provider:
-            case ProviderType.ollama:
-                return ChatOllama(api_key=self.llm_provider.api_key, base_url=self.llm_provider.base_url, model=self.llm_provider.model_id, num_ctx=self.llm_provider.num_ctx)
-            case _:
-                return ChatOpenAI(api_key=self.llm_provider.api_key, base_url=self.llm_provider.base_url, model=self.llm_provider.model_id)
 
-    def switch_model(self, llm_provider: LLMProvider) -> None:
+        return self.registry.get(self.llm_provider)
+
+    @property
+    def providers(self) -> list[LLMProvider]:
+        """ Основной и резервные провайдеры в порядке переключения, вместе с репликами """
+
+        return self.pool
+
+    @staticmethod
+    def expand_replicas(providers: list[LLMProvider]) -> list[LLMProvider]:
+        """ Раскрывает реплики провайдеров (LLMProvider.replicas) в отдельных провайдеров
+
+            Реплика отличается от исходного провайдера только base_url и следует
+            сразу за ним, поэтому без роутера используется для переключения при сбоях.
+
+            Args:
+                providers (list[LLMProvider]): провайдеры в порядке переключения
+
+            Returns:
+                list[LLMProvider]: провайдеры и их реплики
+        """
+
+        expanded: list[LLMProvider] = []
+
+        for llm_provider in providers:
+            expanded.append(llm_provider)
+            if llm_provider.replicas:
+                expanded.extend(
+                    llm_provider.model_copy(update={"base_url": base_url, "replicas": None})
+                    for base_url in llm_provider.replicas
+                )
+
+        return expanded
+
+    def get_configured_model(
+        self,
+        options: GenerationOptions | None = None,
+        llm_provider: LLMProvider | None = None
+    ) -> ChatOpenAI | ChatOllama:
+        """ Возвращает языковую модель с параметрами генерации конкретного запроса
+
+            Общий экземпляр модели при этом не изменяется, поэтому один обработчик
+            можно безопасно использовать из множества конкурентных корутин.
+
+            Args:
+                options (GenerationOptions | None): параметры генерации
+                llm_provider (LLMProvider | None): провайдер, по умолчанию основной
+
+            Returns:
+                ChatOpenAI | ChatOllama: языковая модель, которую нельзя изменять
+        """
+
+        return self.registry.configure(llm_provider or self.llm_provider, options)
+
+    def get_structured_model(
+        self,
+        output_model: Type[BaseModel],
+        options: GenerationOptions | None = None,
+        llm_provider: LLMProvider | None = None,
+        stream: bool = False
+    ) -> Runnable:
+        """ Возвращает языковую модель со структурированным выводом в output_model
+
+            Раннабл кешируется в реестре клиентов на клиент, параметры генерации и модель вывода.
+
+            Args:
+                output_model (Type[BaseModel]): модель структурированного вывода
+                options (GenerationOptions | None): параметры генерации
+                llm_provider (LLMProvider | None): провайдер, по умолчанию основной
+                stream (bool): модель для потокового вывода JSON текстом
+
+            Returns:
+                Runnable: раннабл, возвращающий словарь с ключами raw, parsed, parsing_error,
+                    или, при stream=True, модель с потоком текста JSON
+        """
+
+        return self.registry.structured(llm_provider or self.llm_provider, output_model, options, stream)
+
+    @property
+    def scheduler(self) -> ProviderScheduler:
+        return self.registry.scheduler(self.llm_provider)
+
+    def slot(
+        self,
+        prompt_chars: int,
+        options: GenerationOptions | None = None,
+        priority: Priority = Priority.normal,
+        llm_provider: LLMProvider | None = None,
+        group: str | None = None,
+        prompt_id: any = None
+    ) -> AsyncContextManager[Ticket]:
+        """ Ожидает разрешения планировщика провайдера на выполнение запроса
+
+            Args:
+                prompt_chars (int): длина промпта в символах для оценки расхода токенов
+                options (GenerationOptions | None): параметры генерации запроса
+                priority (Priority): приоритет запроса
+                llm_provider (LLMProvider | None): провайдер, по умолчанию основной
+                group (str | None): группа запроса в очереди (ключ маршрутизации)
+                prompt_id (any): идентификатор промпта запроса для меток метрик
+
+            Returns:
+                AsyncContextManager[Ticket]: разрешение, действующее до выхода из блока
+        """
+
+        llm_provider = llm_provider or self.llm_provider
+        scheduler = self.registry.scheduler(llm_provider)
+        tokens = scheduler.estimate_tokens(prompt_chars, options.max_tokens if options else None)
+
+        return self._timed_slot(scheduler, tokens, priority, llm_provider, group, prompt_id)
+
+    @asynccontextmanager
+    async def _timed_slot(
+        self,
+        scheduler: ProviderScheduler,
+        tokens: int,
+        priority: Priority,
+        llm_provider: LLMProvider,
+        group: str | None = None,
+        prompt_id: any = None
+    ) -> AsyncIterator[Ticket]:
+        """ Как scheduler.slot, но удерживает пул соединений провайдера и записывает время ожидания в очереди
+
+            Аренда пула берётся до ожидания в очереди: клиент запроса уже получен,
+            и вытеснение его из реестра не должно закрыть соединения до конца запроса.
+        """
+
+        with self.registry.lease(llm_provider):
+            if not self.instrumentation.enabled or not scheduler.enabled:
+                async with scheduler.slot(tokens, priority, group) as ticket:
+                    yield ticket
+                return
+
+            started = time.perf_counter()
+            async with scheduler.slot(tokens, priority, group) as ticket:
+                self.instrumentation.observe(
+                    QUEUE_WAIT,
+                    time.perf_counter() - started,
+                    Instrumentation.labels(llm_provider, "queue", prompt_id) | {"priority": priority.name}
+                )
+                yield ticket
+
+    def switch_model(
+        self,
+        llm_provider: LLMProvider,
+        fallback_providers: list[LLMProvider] | None = None,
+        prompt_id: any = None
+    ) -> None:
+        """ Переключает модель на провайдера и резервных провайдеров
+
+            Args:
+                llm_provider (LLMProvider): основной провайдер
+                fallback_providers (list[LLMProvider] | None): резервные провайдеры в порядке переключения
+                prompt_id (any): промпт, для которого загружены провайдеры. Запросы модели учитываются
+                    в метриках и ledger под этим prompt_id, None - без prompt_id
+        """
         self.llm_provider = llm_provider
+        self.fallback_providers = list(fallback_providers or [])
+        self.prompt_id = prompt_id
+        self.pool = self.expand_replicas([llm_provider, *self.fallback_providers])
         self.model = self.get_model()
 
 
@@ -41,16 +229,53 @@ class AIBaseHandler:
     
     DEFAULT_TEMPERATURE = 0.7
 
-    def __init__(self, prompt_storage: PromptStorageAbstract, llm_provider: LLMProvider | None = None, *args, **kwargs):
+    def __init__(
+        self,
+        prompt_storage: PromptStorageAbstract,
+        llm_provider: LLMProvider | None = None,
+        *args,
+        client_registry: LLMClientRegistry | None = None,
+        retry_policy: RetryPolicy | None = None,
+        hedge_policy: HedgePolicy | None = None,
+        response_cache: ResponseCache | None = None,
+        instrumentation: Instrumentation | None = None,
+        router: ProviderRouterAbstract | None = None,
+        context_manager: ContextManager | None = None,
+        coalescer: RequestCoalescer | None = None,
+        ledger: UsageLedger | None = None,
+        offload: OffloadExecutor | None = None,
+        **kwargs
+    ):
         """
         Инициализирует объект AIHandler.
         
         Args:
+            client_registry (LLMClientRegistry | None): Реестр клиентов. По умолчанию общий для процесса.
+            retry_policy (RetryPolicy | None): Политика повторов. По умолчанию RetryPolicy().
+            hedge_policy (HedgePolicy | None): Политика дублирующих запросов. По умолчанию выключена.
+            response_cache (ResponseCache | None): Кеш ответов для детерминированных запросов. По умолчанию выключен.
+            instrumentation (Instrumentation | None): Точка инструментирования. По умолчанию общая для процесса.
+            router (ProviderRouterAbstract | None): Стратегия выбора провайдера из списка провайдеров промпта
+                и их реплик. По умолчанию провайдеры используются в порядке хранилища.
+            context_manager (ContextManager | None): Проверка длины промпта и подбор num_ctx до отправки запроса.
+                По умолчанию выключена.
+            coalescer (RequestCoalescer | None): Объединение одинаковых конкурентных запросов. По умолчанию выключено.
+            ledger (UsageLedger | None): Учёт расхода токенов и стоимости с квотами по prompt_id. По умолчанию выключен.
+            offload (OffloadExecutor | None): Пул для рендеринга шаблонов и разбора структурированного вывода
+                вне цикла событий. По умолчанию всё выполняется в цикле событий.
             *args: Аргументы для передачи в LLMModel.
             **kwargs: Ключевые аргументы для передачи в LLMModel.
         """
-        self.llm_model = LLMModel(llm_provider)
-        self.prompt_loader = PromptLoader(prompt_storage)
+        self.instrumentation = instrumentation or Instrumentation.default()
+        self.llm_model = LLMModel(llm_provider, registry=client_registry, instrumentation=self.instrumentation)
+        self.prompt_loader = PromptLoader(prompt_storage, instrumentation=self.instrumentation, offload=offload)
+        self.executor = ResilientExecutor(retry_policy, hedge_policy)
+        self.response_cache = response_cache
+        self.router = router
+        self.context_manager = context_manager
+        self.coalescer = coalescer
+        self.ledger = ledger
+        self.offload = offload
 
     def _prepare_messages(self, system_content: str, human_content: str) -> list:
         """
@@ -68,29 +293,274 @@ class AIBaseHandler:
             HumanMessage(content=human_content)
         ]
 
-    def _set_temperature(self, temperature: float) -> None:
+    def _get_options(
+        self,
+        options: GenerationOptions | None,
+        temperature: float | None,
+        num_ctx: int | None = None
+    ) -> GenerationOptions:
+        """
+        Собирает параметры генерации для одного запроса.
+        
+        Args:
+            options (GenerationOptions | None): Явно заданные параметры, имеют приоритет.
+            temperature (float | None): Температура для модели.
+            num_ctx (int | None): Размер контекста (только для Ollama).
+            
+        Returns:
+            GenerationOptions: Неизменяемые параметры запроса.
+        """
+        return GenerationOptions(temperature=temperature, num_ctx=num_ctx).merge(options)
+
+    def _get_cache_key(
+        self,
+        messages: list,
+        options: GenerationOptions,
+        output_model: Type[BaseModel] | None = None
+    ) -> str | None:
+        """
+        Возвращает ключ кеша ответов или None, если запрос не кешируется.
+        
+        Args:
+            messages (list): Сообщения запроса.
+            options (GenerationOptions): Параметры генерации запроса.
+            output_model (Type[BaseModel] | None): Модель для структурированного вывода.
+            
+        Returns:
+            str | None: Ключ кеша.
+        """
+        if self.response_cache is None or not self.response_cache.is_cacheable(options):
+            return None
+
+        return request_fingerprint(messages, self.llm_model.llm_provider, options, output_model)
+
+    def _routing_key(self, system_message: str) -> str | None:
+        """
+        Возвращает ключ маршрутизации запроса или None без роутера.
+        
+        Если промпт текущего prompt_id есть в кеше загрузчика, роутеру передаётся
+        исходный шаблон системного сообщения.
+        
+        Args:
+            system_message (str): Отрендеренное системное сообщение.
+            
+        Returns:
+            str | None: Ключ маршрутизации.
+        """
+        if self.router is None:
+            return None
+
+        return self.router.key(system_message, self._system_template())
+
+    def _system_template(self) -> str | None:
+        """
+        Возвращает исходный шаблон системного сообщения текущего prompt_id, если он есть в кеше загрузчика.
+        """
+        prompt_id = self.llm_model.prompt_id
+        prompt = self.prompt_loader.cached_prompt(prompt_id) if prompt_id is not None else None
+
+        return prompt.system_message if prompt is not None else None
+
+    def _fit_context(
+        self,
+        system_message: str,
+        human_message: str,
+        options: GenerationOptions,
+        output_model: Type[BaseModel] | None = None
+    ) -> tuple[str, str, GenerationOptions]:
+        """
+        Проверяет длину промпта по окнам всех провайдеров запроса и подбирает num_ctx, если задан context_manager.
+        
+        Args:
+            system_message (str): Системное сообщение.
+            human_message (str): Пользовательское сообщение.
+            options (GenerationOptions): Параметры генерации запроса.
+            output_model (Type[BaseModel] | None): Модель структурированного вывода, её схема входит в промпт.
+            
+        Returns:
+            tuple[str, str, GenerationOptions]: Сообщения и параметры запроса.
+            
+        Raises:
+            ContextWindowExceededError: Если промпт не помещается в контекстное окно модели.
+        """
+        if self.context_manager is None:
+            return system_message, human_message, options
+
+        return self.context_manager.fit_all(
+            self.llm_model.providers, system_message, human_message, options, self._system_template(),
+            extra_text=output_schema_text(output_model) if output_model is not None else None
+        )
+
+    def _span(self, kind: str) -> Span:
+        """
+        Создаёт спан запроса с метками основного провайдера.
+        
+        Args:
+            kind (str): Вид запроса (request, structured, stream).
+            
+        Returns:
+            Span: Спан запроса, пустой без приёмников метрик.
+        """
+        if not self.instrumentation.enabled:
+            return NOOP_SPAN
+
+        return self.instrumentation.span(
+            REQUEST, Instrumentation.labels(self.llm_model.llm_provider, kind, self.llm_model.prompt_id)
+        )
+
+    async def _cache_get(self, cache_key: str | None, span: Span) -> str | None:
+        """
+        Ищет ответ в кеше ответов и отмечает результат в спане запроса.
+        
+        Попадание учитывается в ledger как запрос из кеша без токенов и стоимости.
+        
+        Args:
+            cache_key (str | None): Ключ кеша, None если запрос не кешируется.
+            span (Span): Спан запроса.
+            
+        Returns:
+            str | None: Сохранённый ответ или None.
+        """
+        if cache_key is None:
+            return None
+
+        cached = await self.response_cache.get(cache_key)
+
+        if self.instrumentation.enabled:
+            span.set_label("cache", "miss" if cached is None else "hit")
+            self.instrumentation.increment(RESPONSE_CACHE, 1.0, dict(span.labels))
+
+        if cached is not None and self.ledger is not None:
+            llm_provider = self.llm_model.llm_provider
+            usage = LLMTokenUsage(
+                completion_tokens=0, prompt_tokens=0, total_tokens=0, provider=llm_provider.provider, cached=True
+            )
+            self.ledger.record(usage, llm_provider, self.llm_model.prompt_id)
+
+        return cached
+
+    async def _coalesce(
+        self,
+        kind: str,
+        fetch: Callable[[], Awaitable[R]],
+        messages: list,
+        options: GenerationOptions,
+        span: Span,
+        cache_key: str | None = None,
+        output_model: Type[BaseModel] | None = None
+    ) -> R:
         """
-        Устанавливает температуру для модели.
+        Выполняет fetch или присоединяется к такому же выполняющемуся запросу, если задан coalescer.
         
         Args:
-            temperature (float): Значение температуры для модели.
+            kind (str): Вид запроса, входит в ключ.
+            fetch (Callable[[], Awaitable[R]]): Запрос к модели.
+            messages (list): Сообщения запроса.
+            options (GenerationOptions): Параметры генерации запроса.
+            span (Span): Спан запроса.
+            cache_key (str | None): Ключ кеша ответов, если уже вычислен.
+            output_model (Type[BaseModel] | None): Модель для структурированного вывода.
+            
+        Returns:
+            R: Результат запроса.
         """
-        self.llm_model.model.temperature = temperature
+        if self.coalescer is None or not self.coalescer.is_coalescable(options):
+            return await fetch()
+
+        key = f"{kind}:{cache_key or request_fingerprint(messages, self.llm_model.llm_provider, options, output_model)}"
+
+        if self.instrumentation.enabled:
+            span.set_label("coalesced", "follower" if key in self.coalescer else "leader")
+            self.instrumentation.increment(COALESCED, 1.0, dict(span.labels))
 
-    def _set_num_ctx(self, num_ctx: int) -> None:
+        return await self.coalescer.do(key, fetch)
+
+    async def _execute(
+        self,
+        call: Callable[[LLMProvider, ChatOpenAI | ChatOllama, Ticket], Awaitable[R]],
+        options: GenerationOptions,
+        prompt_chars: int,
+        priority: Priority,
+        stack: AsyncExitStack | None = None,
+        kind: str = "request",
+        routing_key: str | None = None
+    ) -> R:
         """
-        Устанавливает количество контекста для модели.
+        Выполняет запрос с повторами, дублированием и переключением на резервных провайдеров.
         
         Args:
-            num_ctx (int): Значение количества контекста для модели.
+            call (Callable): Одна попытка запроса к провайдеру сконфигурированной моделью.
+            options (GenerationOptions): Параметры генерации запроса.
+            prompt_chars (int): Длина промпта в символах.
+            priority (Priority): Приоритет в очереди провайдера.
+            stack (AsyncExitStack | None): Если указан, слот планировщика удачной попытки
+                удерживается до закрытия stack (нужно для потоков). Дублирование при этом отключается.
+            kind (str): Вид запроса для меток метрик.
+            routing_key (str | None): Ключ маршрутизации для роутера и группировки в очереди провайдера.
+            
+        Returns:
+            R: Результат первой успешной попытки.
+
+        Raises:
+            BudgetExceededError: Если задан ledger и промпт исчерпал квоту.
         """
-        match self.llm_model.llm_provider.provider:
-            case ProviderType.ollama:
-                self.llm_model.model.num_ctx = num_ctx
-            case _:
-                pass
+        instrumentation = self.instrumentation
+
+        ledger = self.ledger
+        prompt_id = self.llm_model.prompt_id
+        if ledger is not None:
+            await ledger.acquire(prompt_id)
+
+        providers = self.llm_model.providers
+        if self.router is not None:
+            providers = self.router.order(providers, routing_key)
+
+        router = self.router
+
+        async def attempt(llm_provider: LLMProvider) -> R:
+            model = self.llm_model.get_configured_model(options, llm_provider)
+
+            async with AsyncExitStack() as attempt_stack:
+                if router is not None:
+                    router.on_start(llm_provider)
+                    attempt_stack.push(lambda _, error, __: router.on_end(llm_provider, error))
+
+                ticket = await attempt_stack.enter_async_context(
+                    self.llm_model.slot(prompt_chars, options, priority, llm_provider, routing_key, prompt_id)
+                )
+                started = time.perf_counter()
 
-    async def send_request(self, human_message: str, system_message: str, temperature: float = DEFAULT_TEMPERATURE, num_ctx: int = 2048) -> AIMessage:
+                if instrumentation.enabled:
+                    labels = Instrumentation.labels(llm_provider, kind, prompt_id)
+                    with instrumentation.span(ATTEMPT, dict(labels)) as span:
+                        result = await call(llm_provider, model, ticket)
+                    if ledger is not None:
+                        ledger.record(ticket.usage, llm_provider, prompt_id)
+                    instrumentation.record_usage(ticket.usage, labels, span.duration)
+                else:
+                    result = await call(llm_provider, model, ticket)
+                    if ledger is not None:
+                        ledger.record(ticket.usage, llm_provider, prompt_id)
+
+                if router is not None:
+                    router.on_response(llm_provider, time.perf_counter() - started)
+
+                if stack is not None:
+                    stack.push_async_exit(attempt_stack.pop_all())
+
+                return result
+
+        return await self.executor.run(providers, attempt, hedge=stack is None)
+
+    async def send_request(
+        self,
+        human_message: str,
+        system_message: str,
+        temperature: float = DEFAULT_TEMPERATURE,
+        num_ctx: int | None = None,
+        options: GenerationOptions | None = None,
+        priority: Priority | None = None
+    ) -> AIMessage:
         """
         Отправляет запрос к модели и возвращает ответ.
         
@@ -98,22 +568,194 @@ class AIBaseHandler:
             human_message (str): Пользовательское сообщение.
             system_message (str): Системное сообщение.
             temperature (float, optional): Температура для модели. По умолчанию 0.7.
+            num_ctx (int | None, optional): Размер контекста. По умолчанию из LLMProvider.
+            options (GenerationOptions | None, optional): Параметры генерации для этого запроса.
+            priority (Priority | None, optional): Приоритет в очереди провайдера. По умолчанию normal.
             
         Returns:
             AIMessage: Ответ от модели.
         """
-        self._set_num_ctx(num_ctx)
-        self._set_temperature(temperature)
-
+        options = self._get_options(options, temperature, num_ctx)
+        system_message, human_message, options = self._fit_context(system_message, human_message, options)
         messages = self._prepare_messages(system_message, human_message)
 
-        return await self.llm_model.model.ainvoke(messages)
+        response, _ = await self._send_messages(messages, options, resolve_priority(priority, Priority.normal))
+        return response
+
+    async def _send_messages(
+        self,
+        messages: list,
+        options: GenerationOptions,
+        priority: Priority,
+        kind: str = "request"
+    ) -> tuple[AIMessage, LLMTokenUsage | None]:
+        """
+        Отправляет готовую цепочку сообщений с кешем ответов, объединением запросов и повторами.
+        
+        Args:
+            messages (list): Сообщения запроса, первым - системное.
+            options (GenerationOptions): Параметры генерации запроса.
+            priority (Priority): Приоритет в очереди провайдера.
+            kind (str): Вид запроса для меток метрик.
+            
+        Returns:
+            tuple[AIMessage, LLMTokenUsage | None]: Ответ от модели и расход токенов
+                провайдера, который ответил (основного для ответа из кеша).
+        """
+        async def call(
+            llm_provider: LLMProvider, model: ChatOpenAI | ChatOllama, ticket: Ticket
+        ) -> tuple[AIMessage, LLMTokenUsage | None]:
+            response = await model.ainvoke(messages)
+            ticket.observe(LLMTokenUsage.from_message(response, llm_provider.provider))
+
+            return response, ticket.usage
+
+        async def fetch() -> tuple[AIMessage, LLMTokenUsage | None]:
+            response, usage = await self._execute(
+                call, options, sum(len(message.content) for message in messages), priority,
+                kind=kind, routing_key=self._routing_key(messages[0].content)
+            )
+
+            if cache_key is not None:
+                await self.response_cache.set(cache_key, ResponseCache.dump_message(response))
+
+            return response, usage
+
+        with self._span(kind) as span:
+            cache_key = self._get_cache_key(messages, options)
+            if (cached := await self._cache_get(cache_key, span)) is not None:
+                response = ResponseCache.load_message(cached)
+                return response, LLMTokenUsage.from_message(response, self.llm_model.llm_provider.provider)
+
+            return await self._coalesce(kind, fetch, messages, options, span, cache_key)
+
+    async def chat(
+        self,
+        conversation: Conversation,
+        human_message: str,
+        temperature: float = DEFAULT_TEMPERATURE,
+        options: GenerationOptions | None = None,
+        priority: Priority | None = None
+    ) -> AIMessage:
+        """
+        Выполняет ход диалога: добавляет реплику пользователя, применяет политику истории,
+        отправляет окно диалога и добавляет ответ модели в диалог.
+        
+        Если запрос не удался, реплика пользователя удаляется из диалога.
+        
+        Args:
+            conversation (Conversation): Диалог.
+            human_message (str): Реплика пользователя.
+            temperature (float, optional): Температура для модели. По умолчанию 0.7.
+            options (GenerationOptions | None, optional): Параметры генерации для этого запроса.
+            priority (Priority | None, optional): Приоритет в очереди провайдера. По умолчанию interactive.
+            
+        Returns:
+            AIMessage: Ответ от модели.
+        """
+        async with conversation.lock:
+            options = await self._begin_turn(conversation, human_message, temperature, options)
+
+            try:
+                response, _ = await self._send_messages(
+                    conversation.messages(), options, resolve_priority(priority, Priority.interactive), "chat"
+                )
+            except BaseException:
+                conversation.pop()
+                raise
+
+            conversation.add_assistant(response.content)
+            return response
+
+    async def chat_stream(
+        self,
+        conversation: Conversation,
+        human_message: str,
+        temperature: float = DEFAULT_TEMPERATURE,
+        options: GenerationOptions | None = None,
+        priority: Priority | None = None
+    ) -> AsyncIterator[StreamChunk]:
+        """
+        Потоковый ход диалога. Ответ добавляется в диалог, когда поток прочитан целиком
+        и завершился успешно, иначе реплика пользователя удаляется.
+        
+        Args:
+            conversation (Conversation): Диалог.
+            human_message (str): Реплика пользователя.
+            temperature (float, optional): Температура для модели. По умолчанию 0.7.
+            options (GenerationOptions | None, optional): Параметры генерации для этого запроса.
+            priority (Priority | None, optional): Приоритет в очереди провайдера. По умолчанию interactive.
+            
+        Returns:
+            AsyncIterator[StreamChunk]: Потоковый ответ от модели.
+        """
+        async with conversation.lock:
+            options = await self._begin_turn(conversation, human_message, temperature, options)
+
+            accumulator = StreamAccumulator()
+            chunks = self._stream(
+                conversation.messages(), options, resolve_priority(priority, Priority.interactive), "chat"
+            )
+
+            try:
+                async with aclosing(chunks):
+                    async for chunk in chunks:
+                        accumulator.add(chunk)
+                        yield chunk
+            except BaseException:
+                conversation.pop()
+                raise
+
+            if accumulator.status == PromptStatus.success:
+                conversation.add_assistant(accumulator.content)
+            else:
+                conversation.pop()
+
+    async def _begin_turn(
+        self,
+        conversation: Conversation,
+        human_message: str,
+        temperature: float,
+        options: GenerationOptions | None
+    ) -> GenerationOptions:
+        """
+        Добавляет реплику пользователя, применяет политику истории и проверяет окно диалога.
+        
+        Args:
+            conversation (Conversation): Диалог.
+            human_message (str): Реплика пользователя.
+            temperature (float): Температура для модели.
+            options (GenerationOptions | None): Параметры генерации для этого запроса.
+            
+        Returns:
+            GenerationOptions: Параметры запроса (с подобранным num_ctx, если задан context_manager).
+        """
+        if not conversation.model_id and self.llm_model.llm_provider is not None:
+            conversation.model_id = self.llm_model.llm_provider.model_id
+
+        conversation.add_user(human_message)
+        options = self._get_options(options, temperature)
+
+        try:
+            await conversation.compact()
+
+            if self.context_manager is not None:
+                _, _, options = self.context_manager.fit_all(
+                    self.llm_model.providers, "", "", options, extra_tokens=conversation.tokens
+                )
+        except BaseException:
+            conversation.pop()
+            raise
+
+        return options
 
     async def get_llm_stream(
         self,
         human_message: str,
         system_message: str,
-        temperature: float = DEFAULT_TEMPERATURE
+        temperature: float = DEFAULT_TEMPERATURE,
+        options: GenerationOptions | None = None,
+        priority: Priority | None = None
     ) -> AsyncIterable[PromptAsyncResult]:
         """
         Отправляет запрос к модели и возвращает потоковый ответ.
@@ -122,44 +764,152 @@ class AIBaseHandler:
             human_message (str): Пользовательское сообщение.
             system_message (str): Системное сообщение.
             temperature (float, optional): Температура для модели. По умолчанию 0.7.
+            options (GenerationOptions | None, optional): Параметры генерации для этого запроса.
+            priority (Priority | None, optional): Приоритет в очереди провайдера. По умолчанию interactive.
             
         Returns:
             AsyncIterable[PromptAsyncResult]: Потоковый ответ от модели.
         """
-        self._set_temperature(temperature)
+        async with aclosing(self.stream_chunks(human_message, system_message, temperature, options, priority)) as chunks:
+            async for chunk in chunks:
+                yield chunk.to_result()
+
+    async def stream_chunks(
+        self,
+        human_message: str,
+        system_message: str,
+        temperature: float = DEFAULT_TEMPERATURE,
+        options: GenerationOptions | None = None,
+        priority: Priority | None = None
+    ) -> AsyncIterator[StreamChunk]:
+        """
+        Быстрый потоковый режим: как get_llm_stream, но возвращает лёгкие StreamChunk без валидации.
+        
+        Для накопления ответа используйте StreamAccumulator.
+        
+        Args:
+            human_message (str): Пользовательское сообщение.
+            system_message (str): Системное сообщение.
+            temperature (float, optional): Температура для модели. По умолчанию 0.7.
+            options (GenerationOptions | None, optional): Параметры генерации для этого запроса.
+            priority (Priority | None, optional): Приоритет в очереди провайдера. По умолчанию interactive.
+            
+        Returns:
+            AsyncIterator[StreamChunk]: Потоковый ответ от модели.
+        """
+        options = self._get_options(options, temperature)
+        system_message, human_message, options = self._fit_context(system_message, human_message, options)
         messages = self._prepare_messages(system_message, human_message)
 
-        stream = self.llm_model.model.astream(messages)
-
-        is_done: bool = False
-        done_reason: str | None = None
-        async for chunk in stream:
-            chunk: AIMessageChunk
-
-            if not is_done:
-                match self.llm_model.llm_provider.provider:
-                    case ProviderType.ollama:
-                        is_done = chunk.response_metadata.get("done", False)
-                        done_reason = chunk.response_metadata.get("done_reason", None)
-                    case _:
-                        is_done = not not chunk.response_metadata.get("finish_reason", False)
-                        done_reason = chunk.response_metadata.get("finish_reason", None)
-
-            token_usages = LLMTokenUsage.from_message(chunk, self.llm_model.llm_provider.provider, True)
-
-            yield PromptAsyncResult(
-                content=chunk.content,
-                token_usages=[token_usages] if token_usages else [],
-                status=PromptStatus.success if done_reason in ("stop", None) else PromptStatus.error,
-                done=is_done
+        priority = resolve_priority(priority, Priority.interactive)
+
+        if self.coalescer is not None and self.coalescer.is_coalescable(options):
+            key = f"stream:{request_fingerprint(messages, self.llm_model.llm_provider, options)}"
+            chunks = self.coalescer.stream(key, lambda: self._stream(messages, options, priority, "stream"))
+        else:
+            chunks = self._stream(messages, options, priority, "stream")
+
+        async with aclosing(chunks):
+            async for chunk in chunks:
+                yield chunk
+
+    async def _stream(
+        self,
+        messages: list,
+        options: GenerationOptions,
+        priority: Priority,
+        kind: str,
+        output_model: Type[BaseModel] | None = None
+    ) -> AsyncIterator[StreamChunk]:
+        """
+        Открывает поток ответа модели с повторами до первого фрагмента.
+        
+        Args:
+            messages (list): Сообщения запроса.
+            options (GenerationOptions): Параметры генерации запроса.
+            priority (Priority): Приоритет в очереди провайдера.
+            kind (str): Вид запроса для меток метрик.
+            output_model (Type[BaseModel] | None): Модель, по схеме которой модель отдаёт JSON.
+            
+        Returns:
+            AsyncIterator[StreamChunk]: Фрагменты ответа.
+        """
+        async def open_stream(
+            llm_provider: LLMProvider, model: ChatOpenAI | ChatOllama, ticket: Ticket
+        ) -> tuple[LLMProvider, Ticket, AsyncIterator[AIMessageChunk], AIMessageChunk | None]:
+            if output_model is not None:
+                model = self.llm_model.get_structured_model(output_model, options, llm_provider, stream=True)
+
+            stream = aiter(model.astream(messages))
+            try:
+                return llm_provider, ticket, stream, await anext(stream, None)
+            except BaseException:
+                await stream.aclose()
+                raise
+
+        prompt_id = self.llm_model.prompt_id
+
+        # Повторы и переключение провайдера возможны только до получения первого фрагмента
+        async with AsyncExitStack() as stack:
+            span = stack.enter_context(self._span(kind))
+
+            llm_provider, ticket, stream, chunk = await self._execute(
+                open_stream, options, sum(len(message.content) for message in messages),
+                priority, stack=stack, kind=kind, routing_key=self._routing_key(messages[0].content)
             )
+            stack.push_async_callback(stream.aclose)
+            provider = llm_provider.provider
+
+            first_token_at = time.perf_counter()
+
+            instrumentation = self.instrumentation if self.instrumentation.enabled else None
+            if instrumentation is not None:
+                labels = Instrumentation.labels(llm_provider, kind, prompt_id)
+                instrumentation.observe(TIME_TO_FIRST_TOKEN, span.duration, labels)
+
+            match provider:
+                case ProviderType.ollama:
+                    done_key, reason_key = "done", "done_reason"
+                case _:
+                    done_key, reason_key = "finish_reason", "finish_reason"
+
+            is_done: bool = False
+            status: PromptStatus = PromptStatus.success
+            while chunk is not None:
+                chunk: AIMessageChunk
+
+                if not is_done and (metadata := chunk.response_metadata):
+                    is_done = bool(metadata.get(done_key, False))
+                    done_reason = metadata.get(reason_key, None)
+                    status = PromptStatus.success if done_reason in ("stop", None) else PromptStatus.error
+
+                token_usage = None
+                if chunk.usage_metadata:
+                    token_usage = LLMTokenUsage.from_message(chunk, provider, True)
+                    ticket.observe(token_usage)
+                    if self.ledger is not None:
+                        self.ledger.record(token_usage, llm_provider, prompt_id)
+
+                    if instrumentation is not None or self.router is not None:
+                        duration = time.perf_counter() - first_token_at
+
+                        if instrumentation is not None:
+                            instrumentation.record_usage(token_usage, labels, duration)
+                        if self.router is not None and duration and token_usage.completion_tokens and not token_usage.cached:
+                            self.router.on_throughput(llm_provider, token_usage.completion_tokens / duration)
+
+                yield StreamChunk(chunk.content, is_done, status, token_usage)
+
+                chunk = await anext(stream, None)
 
     async def send_request_with_structured_output(
         self,
         output_model: Type[T],
         human_message: str,
         system_message: str,
-        temperature: float = DEFAULT_TEMPERATURE
+        temperature: float = DEFAULT_TEMPERATURE,
+        options: GenerationOptions | None = None,
+        priority: Priority | None = None
     ) -> LLMWithStructuredOutput[T]:
         """
         Отправляет запрос к модели и возвращает структурированный ответ.
@@ -169,23 +919,243 @@ class AIBaseHandler:
             human_message (str): Пользовательское сообщение.
             system_message (str): Системное сообщение.
             temperature (float, optional): Температура для модели. По умолчанию 0.7.
+            options (GenerationOptions | None, optional): Параметры генерации для этого запроса.
+            priority (Priority | None, optional): Приоритет в очереди провайдера. По умолчанию normal.
             
         Returns:
             LLMWithStructuredOutput[T]: Структурированный ответ от модели.
         """
-        self._set_temperature(temperature)
+        options = self._get_options(options, temperature)
+        system_message, human_message, options = self._fit_context(system_message, human_message, options, output_model)
+
+        result, _ = await self._send_structured(
+            output_model, system_message, human_message, options, resolve_priority(priority, Priority.normal)
+        )
+        return result
+
+    async def _send_structured(
+        self,
+        output_model: Type[T],
+        system_message: str,
+        human_message: str,
+        options: GenerationOptions,
+        priority: Priority
+    ) -> tuple[LLMWithStructuredOutput[T], LLMTokenUsage | None]:
+        """
+        Отправляет запрос со структурированным выводом с кешем ответов, объединением запросов и повторами.
+        
+        Args:
+            output_model (Type[T]): Модель для структурированного вывода.
+            system_message (str): Системное сообщение.
+            human_message (str): Пользовательское сообщение.
+            options (GenerationOptions): Параметры генерации запроса.
+            priority (Priority): Приоритет в очереди провайдера.
+            
+        Returns:
+            tuple[LLMWithStructuredOutput[T], LLMTokenUsage | None]: Структурированный ответ
+                и расход токенов провайдера, который ответил (основного для ответа из кеша).
+        """
+        messages = self._prepare_messages(system_message, human_message)
+
+        result_type = LLMWithStructuredOutput.of(output_model)
+
+        async def call(
+            llm_provider: LLMProvider, model: ChatOpenAI | ChatOllama, ticket: Ticket
+        ) -> tuple[LLMWithStructuredOutput[T], LLMTokenUsage | None]:
+            if self.offload is not None:
+                # Модель отдаёт JSON по схеме текстом, разбор и валидация выполняются в пуле
+                raw = await self.llm_model.get_structured_model(output_model, options, llm_provider, stream=True).ainvoke(messages)
+                parsed, parsing_error = await self.offload.parse(output_model, raw.content)
+                response = {"raw": raw, "parsed": parsed, "parsing_error": parsing_error}
+            else:
+                response = await self.llm_model.get_structured_model(output_model, options, llm_provider).ainvoke(messages)
+
+            result = result_type(**response)
+            ticket.observe(LLMTokenUsage.from_structured_output(result, llm_provider.provider))
+
+            return result, ticket.usage
+
+        async def fetch() -> tuple[LLMWithStructuredOutput[T], LLMTokenUsage | None]:
+            result, usage = await self._execute(
+                call, options, len(system_message) + len(human_message), priority,
+                kind="structured", routing_key=self._routing_key(system_message)
+            )
+
+            if cache_key is not None and result.parsed is not None and result.parsing_error is None:
+                await self.response_cache.set(cache_key, ResponseCache.dump_structured(result))
+
+            return result, usage
+
+        with self._span("structured") as span:
+            cache_key = self._get_cache_key(messages, options, output_model)
+            if (cached := await self._cache_get(cache_key, span)) is not None:
+                result = ResponseCache.load_structured(cached, output_model)
+                return result, LLMTokenUsage.from_structured_output(result, self.llm_model.llm_provider.provider)
+
+            return await self._coalesce("structured", fetch, messages, options, span, cache_key, output_model)
+
+    async def stream_structured(
+        self,
+        output_model: Type[T],
+        human_message: str,
+        system_message: str,
+        temperature: float = DEFAULT_TEMPERATURE,
+        options: GenerationOptions | None = None,
+        priority: Priority | None = None,
+        partial_strings: bool = False
+    ) -> AsyncIterator[PromptAsyncResult[T]]:
+        """
+        Отправляет запрос к модели и возвращает структурированный ответ по мере генерации.
+        
+        Ответ разбирается потоковым парсером JSON, накопленный текст повторно не разбирается,
+        а дочитанные поля и элементы списков повторно не валидируются (``PartialValidator``).
+        Каждый раз, когда в ответе дочитано очередное значение, возвращается частичный
+        экземпляр ``partial_model(output_model)``, в котором все поля необязательны.
+        Последний результат (done=True) содержит экземпляр output_model, провалидированный
+        целиком, и расход токенов. Если ответ не удалось разобрать, status=error,
+        а content - последний частичный экземпляр.
+        
+        Args:
+            output_model (Type[T]): Модель для структурированного вывода.
+            human_message (str): Пользовательское сообщение.
+            system_message (str): Системное сообщение.
+            temperature (float, optional): Температура для модели. По умолчанию 0.7.
+            options (GenerationOptions | None, optional): Параметры генерации для этого запроса.
+            priority (Priority | None, optional): Приоритет в очереди провайдера. По умолчанию interactive.
+            partial_strings (bool, optional): Возвращать недочитанные строки. Тогда частичный
+                экземпляр возвращается на каждом фрагменте.
+            
+        Returns:
+            AsyncIterator[PromptAsyncResult[T]]: Частичные экземпляры и итоговый результат.
+        """
+        options = self._get_options(options, temperature)
+        system_message, human_message, options = self._fit_context(system_message, human_message, options, output_model)
         messages = self._prepare_messages(system_message, human_message)
 
-        kwargs = {
-            "include_raw": True
-        } | ({} if self.llm_model.llm_provider.provider == ProviderType.ollama else {"strict": True})
+        parser = IncrementalJSONParser(partial_strings)
+        validator = PartialValidator(output_model)
+
+        partial: BaseModel | None = None
+        token_usages: list[LLMTokenUsage] = []
+        status: PromptStatus = PromptStatus.success
+        completed = 0
+
+        chunks = self._stream(
+            messages, options, resolve_priority(priority, Priority.interactive), "structured_stream", output_model
+        )
+        async with aclosing(chunks):
+            async for chunk in chunks:
+                if chunk.usage is not None:
+                    token_usages.append(chunk.usage)
+
+                if chunk.status == PromptStatus.error:
+                    status = PromptStatus.error
+
+                if not chunk.content:
+                    continue
+
+                try:
+                    value = parser.feed(chunk.content)
+                except ValueError:
+                    status = PromptStatus.error
+                    break
+
+                if value is None or (parser.completed == completed and not partial_strings):
+                    continue
+                completed = parser.completed
+
+                if (validated := validator.validate(parser)) is None:
+                    continue
+                partial = validated
+
+                yield PromptAsyncResult(content=partial, token_usages=[], status=status, done=False)
+
+        content: BaseModel | None = partial
+        if status == PromptStatus.success:
+            try:
+                content = output_model.model_validate(parser.close())
+            except ValueError:
+                status = PromptStatus.error
+
+        yield PromptAsyncResult(
+            content=content,
+            token_usages=token_usages,
+            status=status,
+            done=True
+        )
+
+    async def send_batch(
+        self,
+        inputs: Iterable[Prompt | dict] | AsyncIterable[Prompt | dict],
+        output_model: Type[T] | None = None,
+        prompt_id: any = None,
+        concurrency: int = 16,
+        ordered: bool = False,
+        temperature: float = DEFAULT_TEMPERATURE,
+        options: GenerationOptions | None = None,
+        usage: PromptSyncResult | None = None
+    ) -> AsyncIterator[tuple[int, PromptSyncResult]]:
+        """
+        Отправляет батч запросов к модели с ограничением конкурентности.
+        
+        Входы читаются лениво, поэтому память не растёт с размером батча.
+        Ошибка отдельного запроса не прерывает батч и возвращается как результат со статусом error.
         
-        response = await self.llm_model.model.with_structured_output(
-            output_model,
-            **kwargs
-        ).ainvoke(messages)
+        Args:
+            inputs (Iterable[Prompt | dict] | AsyncIterable[Prompt | dict]): Готовые промпты
+                или, если указан prompt_id, аргументы шаблона промпта.
+            output_model (Type[T] | None, optional): Модель для структурированного вывода.
+                Если не указана, содержимым результата будет текст ответа.
+            prompt_id (any, optional): Идентификатор промпта. Модель переключается и шаблоны
+                загружаются один раз на весь батч.
+            concurrency (int, optional): Максимальное количество одновременных запросов. По умолчанию 16.
+            ordered (bool, optional): Возвращать результаты в порядке входов. По умолчанию в порядке завершения.
+            temperature (float, optional): Температура для модели. По умолчанию 0.7.
+            options (GenerationOptions | None, optional): Параметры генерации для всех запросов батча.
+            usage (PromptSyncResult | None, optional): Результат, в который суммируется расход токенов батча.
+            
+        Returns:
+            AsyncIterator[tuple[int, PromptSyncResult]]: Пары (индекс входа, результат).
+        """
+        if prompt_id is not None:
+            await self.switch_model(prompt_id)
+            inputs = self.prompt_loader.render_many(prompt_id, inputs)
+
+        options = self._get_options(options, temperature)
 
-        return LLMWithStructuredOutput[output_model](**response)
+        # Без провайдера каждый запрос завершается ошибкой ResilientExecutor и возвращается как результат с ошибкой.
+        # Расход токенов размечается провайдером, который ответил, а не основным.
+        async def run(prompt: Prompt) -> PromptSyncResult:
+            try:
+                system_message, human_message, fitted = self._fit_context(
+                    prompt.system_message, prompt.human_message, options, output_model
+                )
+
+                if output_model is None:
+                    message, token_usage = await self._send_messages(
+                        self._prepare_messages(system_message, human_message), fitted, Priority.batch
+                    )
+                    content, error = message.content, None
+                else:
+                    response, token_usage = await self._send_structured(
+                        output_model, system_message, human_message, fitted, Priority.batch
+                    )
+                    content, error = response.parsed, response.parsing_error
+            except Exception as exc:
+                return PromptSyncResult(status=PromptStatus.error, error=str(exc))
+
+            return PromptSyncResult(
+                content=content,
+                token_usages=[token_usage] if token_usage else [],
+                status=PromptStatus.success if error is None else PromptStatus.error,
+                error=None if error is None else str(error)
+            )
+
+        async for index, result in bounded_map(run, inputs, concurrency, ordered):
+            if usage is not None:
+                usage.accumulate(result)
+
+            yield index, result
 
     async def switch_model(self, prompt_id: any = None) -> None:
         """
@@ -195,6 +1165,8 @@ class AIBaseHandler:
             prompt_id (any): Идентификатор промпта.
         """
 
-        llm_provider = await self.prompt_loader.get_llm_provider(prompt_id if prompt_id else self.prompt_id)
+        prompt_id = prompt_id if prompt_id else self.prompt_id
+
+        llm_providers = await self.prompt_loader.get_llm_providers(prompt_id)
 
-        self.llm_model.switch_model(llm_provider)
+        self.llm_model.switch_model(llm_providers[0], llm_providers[1:], prompt_id)
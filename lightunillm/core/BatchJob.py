@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import asyncio
+import csv
+import json
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, Any, Callable, Iterator
+
+from lightunillm.typization import LLMTokenUsage, PromptStatus, PromptSyncResult
+
+if TYPE_CHECKING:
+    from lightunillm.core.interfaces.AIHandlerInterface import AIHandlerInterface
+
+logger = logging.getLogger(__name__)
+
+
+class BatchProgress:
+    """Прогресс пакетного задания: обработанные строки, скорость и оценка оставшегося времени."""
+
+    __slots__ = ("done", "total", "success", "errors", "resumed", "started", "elapsed")
+
+    def __init__(self, done: int = 0, total: int | None = None, success: int = 0, errors: int = 0):
+        self.done = done
+        self.total = total
+        self.success = success
+        self.errors = errors
+        self.resumed = done
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Строк в секунду в текущем запуске."""
+        return (self.done - self.resumed) / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def eta(self) -> float | None:
+        """Оценка оставшегося времени в секундах или None, если она пока неизвестна."""
+        if self.total is None or not self.rate:
+            return None
+        return max(0, self.total - self.done) / self.rate
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "done": self.done,
+            "total": self.total,
+            "success": self.success,
+            "errors": self.errors,
+            "resumed": self.resumed,
+            "elapsed": self.elapsed,
+            "rate": self.rate,
+            "eta": self.eta,
+        }
+
+    def __str__(self) -> str:
+        total = "?" if self.total is None else self.total
+        eta = "?" if self.eta is None else f"{self.eta:.0f}s"
+        return f"{self.done}/{total} rows ({self.errors} errors), {self.rate:.1f} rows/s, ETA {eta}"
+
+
+class BatchJob:
+    """
+    Возобновляемое пакетное задание: строки входного файла через ``AIHandlerInterface.apply``.
+
+    Каждая строка входа (JSON Lines или CSV) - ключевые аргументы apply,
+    который рендерит промпт через ``PromptLoader`` и отправляет запрос.
+    Строки читаются лениво и выполняются через ``apply_many`` с ограничением
+    конкурентности в порядке входа, результаты ``PromptSyncResult``
+    дописываются в выходной файл JSON Lines с номером строки входа.
+
+    Периодически выходной файл сбрасывается на диск и сохраняется контрольная
+    точка: количество обработанных строк, размер выходного файла, счётчики и
+    суммарный расход токенов. Перезапущенное задание дочитывает полные строки
+    выхода после контрольной точки, отбрасывает недописанную и пропускает
+    уже обработанные строки входа, поэтому обработанные строки не
+    отправляются повторно. Память не зависит от размера входа.
+    """
+
+    def __init__(
+        self,
+        handler: AIHandlerInterface,
+        input_path: str,
+        output_path: str,
+        checkpoint_path: str | None = None,
+        concurrency: int = 16,
+        checkpoint_every: int = 1000,
+        checkpoint_interval: float = 30.0,
+        progress_interval: float = 10.0,
+        id_field: str | None = None,
+        transform: Callable[[dict], dict] | None = None,
+        on_progress: Callable[[BatchProgress], None] | None = None
+    ):
+        """
+        Args:
+            handler (AIHandlerInterface): Обработчик, чей apply вызывается для каждой строки.
+            input_path (str): Входной файл ``.jsonl`` или ``.csv``.
+            output_path (str): Выходной файл JSON Lines.
+            checkpoint_path (str | None): Файл контрольной точки. По умолчанию ``<output_path>.checkpoint``.
+            concurrency (int): Максимальное количество одновременных вызовов apply.
+            checkpoint_every (int): Сохранять контрольную точку каждые checkpoint_every строк.
+            checkpoint_interval (float): И не реже чем раз в checkpoint_interval секунд.
+            progress_interval (float): Интервал сообщений о прогрессе в секундах.
+            id_field (str | None): Поле строки входа, которое копируется в результат для сопоставления.
+            transform (Callable[[dict], dict] | None): Преобразование строки входа в аргументы apply.
+            on_progress (Callable[[BatchProgress], None] | None): Вызывается с прогрессом вместо записи в лог.
+        """
+        self.handler = handler
+        self.input_path = input_path
+        self.output_path = output_path
+        self.checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+        self.concurrency = concurrency
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_interval = checkpoint_interval
+        self.progress_interval = progress_interval
+        self.id_field = id_field
+        self.transform = transform
+        self.on_progress = on_progress
+
+        self.usage = PromptSyncResult()
+
+    async def run(self) -> BatchProgress:
+        """
+        Выполняет задание или продолжает прерванное.
+
+        Returns:
+            BatchProgress: Итоговый прогресс.
+
+        Raises:
+            ValueError: Если выходной файл короче, чем записано в контрольной точке.
+        """
+        progress, offset = await asyncio.to_thread(self._resume)
+        progress.total = await asyncio.to_thread(self._count_rows)
+
+        if progress.done:
+            logger.info("Resuming batch job %s from row %d", self.input_path, progress.done)
+
+        pending: dict[int, Any] = {}
+
+        def rows() -> Iterator[dict]:
+            for number, row in enumerate(self._read_rows(progress.done), progress.done):
+                pending[number] = row.get(self.id_field) if self.id_field is not None else None
+                yield self.transform(row) if self.transform is not None else row
+
+        with open(self.output_path, "ab") as output:
+            output.truncate(offset)
+            output.seek(offset)
+
+            next_checkpoint = progress.done + self.checkpoint_every
+            checkpoint_at = progress_at = time.monotonic()
+
+            async for _, result in self.handler.apply_many(
+                rows(), self.concurrency, ordered=True, usage=self.usage
+            ):
+                number = progress.done
+                output.write(self._dump(number, pending.pop(number), result))
+
+                progress.done += 1
+                if result.status == PromptStatus.error:
+                    progress.errors += 1
+                else:
+                    progress.success += 1
+
+                now = time.monotonic()
+                progress.elapsed = now - progress.started
+
+                if progress.done >= next_checkpoint or now - checkpoint_at >= self.checkpoint_interval:
+                    await asyncio.to_thread(self._checkpoint, output, progress)
+                    next_checkpoint, checkpoint_at = progress.done + self.checkpoint_every, now
+
+                if now - progress_at >= self.progress_interval:
+                    self._report(progress)
+                    progress_at = now
+
+            progress.elapsed = time.monotonic() - progress.started
+            await asyncio.to_thread(self._checkpoint, output, progress)
+
+        self._report(progress)
+        return progress
+
+    def _resume(self) -> tuple[BatchProgress, int]:
+        """Восстанавливает прогресс по контрольной точке и полным строкам выхода после неё."""
+        progress, offset = BatchProgress(), 0
+
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as file:
+                checkpoint = json.load(file)
+        except FileNotFoundError:
+            checkpoint = None
+
+        if checkpoint is not None:
+            progress = BatchProgress(checkpoint["done"], None, checkpoint["success"], checkpoint["errors"])
+            offset = checkpoint["offset"]
+            self.usage.token_usages = [LLMTokenUsage.model_validate(usage) for usage in checkpoint["token_usages"]]
+
+        try:
+            file = open(self.output_path, "rb")
+        except FileNotFoundError:
+            if offset:
+                raise ValueError(f"Output {self.output_path!r} is missing but checkpoint {self.checkpoint_path!r} exists")
+            return progress, 0
+
+        with file:
+            file.seek(0, os.SEEK_END)
+            if file.tell() < offset:
+                raise ValueError(f"Output {self.output_path!r} is shorter than its checkpoint {self.checkpoint_path!r}")
+
+            # Строки, дописанные после контрольной точки; недописанная последняя строка отбрасывается
+            file.seek(offset)
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+
+                record = json.loads(line)
+                self.usage.accumulate(PromptSyncResult.model_validate(record))
+                progress.done = record["row"] + 1
+                if record["status"] == PromptStatus.error.value:
+                    progress.errors += 1
+                else:
+                    progress.success += 1
+                offset += len(line)
+
+        progress.resumed = progress.done
+        return progress, offset
+
+    def _checkpoint(self, output, progress: BatchProgress) -> None:
+        output.flush()
+        os.fsync(output.fileno())
+
+        checkpoint = {
+            "input": self.input_path,
+            "done": progress.done,
+            "success": progress.success,
+            "errors": progress.errors,
+            "offset": output.tell(),
+            "token_usages": [usage.model_dump(mode="json") for usage in self.usage.token_usages],
+        }
+
+        temporary = f"{self.checkpoint_path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(checkpoint, file, ensure_ascii=False)
+        os.replace(temporary, self.checkpoint_path)
+
+    def _read_rows(self, skip: int) -> Iterator[dict]:
+        """Читает строки входа, пропуская первые skip (уже обработанные) без разбора."""
+        if self.input_path.endswith(".csv"):
+            with open(self.input_path, newline="", encoding="utf-8") as file:
+                reader = csv.DictReader(file)
+                for number, row in enumerate(reader):
+                    if number >= skip:
+                        yield row
+            return
+
+        with open(self.input_path, "rb") as file:
+            number = 0
+            for line in file:
+                if not line.strip():
+                    continue
+                if number >= skip:
+                    yield json.loads(line)
+                number += 1
+
+    def _count_rows(self) -> int:
+        """Оценка количества строк входа по количеству переводов строки."""
+        count, last = 0, b"\n"
+
+        with open(self.input_path, "rb") as file:
+            while chunk := file.read(1 << 20):
+                count += chunk.count(b"\n")
+                last = chunk[-1:]
+
+        count += last != b"\n"
+        return count - 1 if self.input_path.endswith(".csv") else count
+
+    def _dump(self, number: int, row_id: Any, result: PromptSyncResult) -> bytes:
+        record: dict[str, Any] = {"row": number}
+        if self.id_field is not None:
+            record["id"] = row_id
+        record |= result.model_dump(mode="json")
+
+        return json.dumps(record, ensure_ascii=False).encode() + b"\n"
+
+    def _report(self, progress: BatchProgress) -> None:
+        if self.on_progress is not None:
+            self.on_progress(progress)
+        else:
+            logger.info("Batch job %s: %s", self.input_path, progress)
@@ -0,0 +1,221 @@
+import asyncio
+import json
+from collections import deque
+from typing import Any, Iterator
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+from lightunillm.core.abstracts.HistoryPolicyAbstract import HistoryPolicyAbstract
+from lightunillm.core.context import TokenCounter
+
+ROLES = {"human": HumanMessage, "ai": AIMessage}
+
+
+class Conversation:
+    """
+    Многоходовый диалог с моделью.
+
+    Хранит окно диалога - реплики, которые отправляются модели, - вместе с
+    количеством токенов каждой реплики. Токены считаются один раз при
+    добавлении реплики, сумма по окну поддерживается инкрементально, объекты
+    сообщений создаются один раз, поэтому работа на ход пропорциональна
+    новой реплике. Размер окна ограничивает политика истории
+    (``HistoryPolicyAbstract``). Вышедшие из окна реплики дописываются в
+    файл spill_path (JSON Lines), если он задан, иначе отбрасываются.
+
+    Ходы одного диалога выполняются последовательно под ``lock``. ``version``
+    увеличивается при каждом изменении окна или краткого содержания.
+    """
+
+    __slots__ = (
+        "system_message", "summary", "policy", "counter", "model_id", "spill_path",
+        "tokens", "evicted", "version", "lock", "_window", "_system", "_system_tokens"
+    )
+
+    def __init__(
+        self,
+        system_message: str = "",
+        policy: HistoryPolicyAbstract | None = None,
+        model_id: str = "",
+        counter: TokenCounter | None = None,
+        spill_path: str | None = None
+    ):
+        """
+        Args:
+            system_message (str): Системное сообщение диалога.
+            policy (HistoryPolicyAbstract | None): Политика ограничения истории. По умолчанию история не ограничена.
+            model_id (str): Модель, по токенизатору которой считаются токены.
+            counter (TokenCounter | None): Счётчик токенов. По умолчанию общий для процесса.
+            spill_path (str | None): Файл, в который дописываются вышедшие из окна реплики.
+        """
+        self.system_message = system_message
+        self.summary: str | None = None
+        self.policy = policy
+        self.counter = counter or TokenCounter.default()
+        self.model_id = model_id
+        self.spill_path = spill_path
+
+        self.evicted = 0
+        self.version = 0
+        self.lock = asyncio.Lock()
+
+        self._window: deque[tuple[BaseMessage, int]] = deque()
+        self._system: SystemMessage | None = None
+        self._system_tokens = 0
+        self.tokens = 0
+
+        self._update_system()
+
+    def __len__(self) -> int:
+        return len(self._window)
+
+    @property
+    def window(self) -> deque[tuple[BaseMessage, int]]:
+        """Окно диалога: пары (сообщение, количество токенов), от старых к новым. Не изменяйте напрямую."""
+        return self._window
+
+    def add(self, role: str, content: str) -> BaseMessage:
+        """
+        Добавляет реплику в конец диалога.
+
+        Args:
+            role (str): human или ai.
+            content (str): Текст реплики.
+
+        Returns:
+            BaseMessage: Созданное сообщение.
+        """
+        message = ROLES[role](content=content)
+        tokens = self.counter.count(content, self.model_id)
+
+        self._window.append((message, tokens))
+        self.tokens += tokens
+        self.version += 1
+
+        return message
+
+    def add_user(self, content: str) -> BaseMessage:
+        return self.add("human", content)
+
+    def add_assistant(self, content: str) -> BaseMessage:
+        return self.add("ai", content)
+
+    def pop(self) -> BaseMessage:
+        """Удаляет последнюю реплику (например, реплику пользователя после неудачного запроса)."""
+        message, tokens = self._window.pop()
+        self.tokens -= tokens
+        self.version += 1
+
+        return message
+
+    async def evict(self, count: int) -> list[BaseMessage]:
+        """
+        Удаляет count самых старых реплик из окна и дописывает их в spill_path.
+
+        Args:
+            count (int): Количество реплик.
+
+        Returns:
+            list[BaseMessage]: Удалённые сообщения от старых к новым.
+        """
+        evicted: list[BaseMessage] = []
+
+        for _ in range(min(count, len(self._window))):
+            message, tokens = self._window.popleft()
+            self.tokens -= tokens
+            evicted.append(message)
+
+        self.evicted += len(evicted)
+        self.version += len(evicted)
+
+        if evicted and self.spill_path is not None:
+            lines = "".join(
+                json.dumps({"role": message.type, "content": message.content}, ensure_ascii=False) + "\n"
+                for message in evicted
+            )
+            await asyncio.to_thread(self._append_spill, lines)
+
+        return evicted
+
+    def set_summary(self, summary: str | None) -> None:
+        """Задаёт краткое содержание реплик, вышедших из окна. Оно добавляется к системному сообщению."""
+        self.summary = summary
+        self._update_system()
+
+    async def compact(self) -> None:
+        """Применяет политику истории к окну."""
+        if self.policy is not None:
+            await self.policy.apply(self)
+
+    def messages(self) -> list[BaseMessage]:
+        """
+        Возвращает сообщения для запроса: системное (с кратким содержанием) и окно диалога.
+
+        Returns:
+            list[BaseMessage]: Сообщения от системного к последней реплике.
+        """
+        messages: list[BaseMessage] = [self._system] if self._system is not None else []
+        messages.extend(message for message, _ in self._window)
+
+        return messages
+
+    def history(self) -> Iterator[tuple[str, str]]:
+        """
+        Возвращает всю историю: реплики из spill_path и окна.
+
+        Returns:
+            Iterator[tuple[str, str]]: Пары (роль, текст) от старых к новым.
+        """
+        if self.spill_path is not None and self.evicted:
+            with open(self.spill_path, encoding="utf-8") as file:
+                for line in file:
+                    record = json.loads(line)
+                    yield record["role"], record["content"]
+
+        for message, _ in self._window:
+            yield message.type, message.content
+
+    def to_dict(self) -> dict[str, Any]:
+        """Сериализует диалог (без политики и счётчика) для сохранения."""
+        return {
+            "system_message": self.system_message,
+            "summary": self.summary,
+            "model_id": self.model_id,
+            "spill_path": self.spill_path,
+            "evicted": self.evicted,
+            "window": [[message.type, message.content, tokens] for message, tokens in self._window],
+        }
+
+    @classmethod
+    def from_dict(
+        cls,
+        data: dict[str, Any],
+        policy: HistoryPolicyAbstract | None = None,
+        counter: TokenCounter | None = None
+    ) -> "Conversation":
+        """Восстанавливает диалог из ``to_dict`` без повторного подсчёта токенов."""
+        conversation = cls(data["system_message"], policy, data["model_id"], counter, data["spill_path"])
+        conversation.evicted = data["evicted"]
+        conversation.set_summary(data["summary"])
+
+        for role, content, tokens in data["window"]:
+            conversation._window.append((ROLES[role](content=content), tokens))
+            conversation.tokens += tokens
+
+        return conversation
+
+    def _update_system(self) -> None:
+        content = self.system_message
+        if self.summary:
+            content = f"{content}\n\nSummary of the earlier conversation:\n{self.summary}" if content else self.summary
+
+        tokens = self.counter.count(content, self.model_id, cache=True) if content else 0
+
+        self.tokens += tokens - self._system_tokens
+        self._system_tokens = tokens
+        self._system = SystemMessage(content=content) if content else None
+        self.version += 1
+
+    def _append_spill(self, lines: str) -> None:
+        with open(self.spill_path, "a", encoding="utf-8") as file:
+            file.write(lines)
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import os
+from collections import OrderedDict
+from typing import Callable
+
+from lightunillm.core.abstracts.HistoryPolicyAbstract import HistoryPolicyAbstract
+from lightunillm.core.context import TokenCounter
+from lightunillm.core.Conversation import Conversation
+
+
+class ConversationStore:
+    """
+    Хранилище диалогов по идентификатору сессии с ограниченной памятью.
+
+    В памяти держится не больше max_in_memory диалогов (LRU). Вытесненные
+    диалоги сохраняются в directory (по файлу JSON на сессию) и загружаются
+    обратно при следующем обращении, без directory - отбрасываются. Диалоги,
+    в которых сейчас выполняется ход (занят ``Conversation.lock``) или
+    выполнился ход во время записи снимка, не вытесняются. Вместе с
+    политикой истории, ограничивающей окно каждого диалога, это ограничивает
+    память при тысячах одновременных сессий.
+    """
+
+    def __init__(
+        self,
+        max_in_memory: int = 1024,
+        directory: str | None = None,
+        policy: HistoryPolicyAbstract | None = None,
+        counter: TokenCounter | None = None
+    ):
+        """
+        Args:
+            max_in_memory (int): Максимальное количество диалогов в памяти.
+            directory (str | None): Каталог для вытесненных диалогов. None - вытесненные диалоги теряются.
+            policy (HistoryPolicyAbstract | None): Политика истории для загруженных с диска диалогов.
+            counter (TokenCounter | None): Счётчик токенов для загруженных с диска диалогов.
+        """
+        self.max_in_memory = max_in_memory
+        self.directory = directory
+        self.policy = policy
+        self.counter = counter
+
+        self._memory: OrderedDict[str, Conversation] = OrderedDict()
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    async def get(self, session_id: str, factory: Callable[[], Conversation] | None = None) -> Conversation | None:
+        """
+        Возвращает диалог сессии из памяти или с диска.
+
+        Args:
+            session_id (str): Идентификатор сессии.
+            factory (Callable[[], Conversation] | None): Создаёт новый диалог, если сессии нет.
+
+        Returns:
+            Conversation | None: Диалог или None, если сессии нет и factory не задана.
+        """
+        conversation = self._memory.get(session_id)
+
+        if conversation is not None:
+            self._memory.move_to_end(session_id)
+            return conversation
+
+        path = self._path(session_id)
+        if path is not None and os.path.exists(path):
+            data = await asyncio.to_thread(self._read, path)
+            conversation = self._memory.get(session_id) or Conversation.from_dict(data, self.policy, self.counter)
+        elif factory is not None:
+            conversation = factory()
+        else:
+            return None
+
+        await self.put(session_id, conversation)
+        return conversation
+
+    async def put(self, session_id: str, conversation: Conversation) -> None:
+        """
+        Добавляет диалог в хранилище, вытесняя давно не использованные.
+
+        Args:
+            session_id (str): Идентификатор сессии.
+            conversation (Conversation): Диалог.
+        """
+        self._memory[session_id] = conversation
+        self._memory.move_to_end(session_id)
+
+        if len(self._memory) > self.max_in_memory:
+            await self._evict()
+
+    async def delete(self, session_id: str) -> None:
+        """Удаляет диалог сессии из памяти и с диска."""
+        self._memory.pop(session_id, None)
+
+        path = self._path(session_id)
+        if path is not None and os.path.exists(path):
+            await asyncio.to_thread(os.remove, path)
+
+    async def flush(self) -> None:
+        """Сохраняет все диалоги из памяти на диск (например, при остановке процесса)."""
+        if self.directory is None:
+            return
+
+        for session_id, conversation in list(self._memory.items()):
+            await asyncio.to_thread(self._write, self._path(session_id), conversation.to_dict())
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    async def _evict(self) -> None:
+        for session_id, conversation in list(self._memory.items()):
+            if len(self._memory) <= self.max_in_memory:
+                break
+
+            if conversation.lock.locked():
+                continue
+
+            # Диалог остаётся в памяти, пока пишется снимок: ход, выполненный за это время,
+            # меняет version, и тогда диалог не вытесняется, чтобы не потерять ход
+            version = conversation.version
+            if self.directory is not None:
+                await asyncio.to_thread(self._write, self._path(session_id), conversation.to_dict())
+
+            if self._memory.get(session_id) is conversation and not conversation.lock.locked() \
+                    and conversation.version == version:
+                del self._memory[session_id]
+
+    def _path(self, session_id: str) -> str | None:
+        if self.directory is None:
+            return None
+
+        if os.sep in session_id or (os.altsep and os.altsep in session_id) or session_id.startswith("."):
+            raise ValueError(f"Invalid session id: {session_id!r}")
+
+        return os.path.join(self.directory, f"{session_id}.json")
+
+    @staticmethod
+    def _read(path: str) -> dict:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+
+    @staticmethod
+    def _write(path: str, data: dict) -> None:
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(data, file, ensure_ascii=False)
+        os.replace(temporary, path)
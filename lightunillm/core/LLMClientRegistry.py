@@ -0,0 +1,474 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, ClassVar, Iterator, Type
+
+from pydantic import BaseModel
+
+from lightunillm.typization import LLMProvider, ProviderType, TransportType, GenerationOptions
+from lightunillm.core.ProviderScheduler import ProviderScheduler
+from lightunillm.core.native import NativeChatModel, json_schema_format
+from lightunillm.utils.cache import SingleFlight
+
+if TYPE_CHECKING:
+    import httpx
+    from langchain_core.runnables import Runnable
+    from langchain_ollama import ChatOllama
+    from langchain_openai import ChatOpenAI
+
+
+ClientKey = tuple[ProviderType, TransportType, str, str, str, int]
+
+current_registry: ContextVar[LLMClientRegistry | None] = ContextVar("lightunillm_client_registry", default=None)
+
+
+def _import_backend(module: str, name: str, package: str) -> type:
+    """
+    Импортирует класс клиента провайдера при первом использовании.
+
+    Бэкенды (langchain_openai, langchain_ollama) загружаются сотни миллисекунд,
+    поэтому процесс загружает только те, провайдеры которых действительно использует.
+    """
+    try:
+        return getattr(importlib.import_module(module), name)
+    except ImportError as exc:
+        raise ImportError(f"{name} requires '{package}': pip install {package}") from exc
+
+
+class PoolLimits(BaseModel):
+    """Лимиты HTTP пула соединений, общего для одного base_url."""
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+
+    def to_httpx(self) -> httpx.Limits:
+        import httpx
+
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+
+class _ClientEntry:
+    __slots__ = ("client", "base_url", "last_used", "configured", "structured")
+
+    def __init__(self, client: ChatOpenAI | ChatOllama | NativeChatModel, base_url: str):
+        self.client = client
+        self.base_url = base_url
+        self.last_used = time.monotonic()
+        self.configured: OrderedDict[GenerationOptions, ChatOpenAI | ChatOllama | NativeChatModel] = OrderedDict()
+        self.structured: OrderedDict[tuple[GenerationOptions | None, type, bool], Runnable] = OrderedDict()
+
+
+class LLMClientRegistry:
+    """
+    Процессный реестр клиентов языковых моделей.
+
+    Клиенты ``ChatOpenAI``/``ChatOllama`` (или ``NativeChatModel`` для
+    ``TransportType.native``) создаются один раз на набор полей ``LLMProvider``
+    (provider, transport, base_url, model_id, api_key, num_ctx) и затем
+    переиспользуются. Клиенты OpenAI и нативные клиенты с одинаковым base_url
+    разделяют один ``httpx.AsyncClient``, поэтому keep-alive соединения не
+    теряются между запросами. Неиспользуемые клиенты вытесняются по ``idle_ttl``.
+    Раннаблы структурированного вывода кешируются на клиент и модель вывода.
+
+    Запросы удерживают пул своего base_url через ``lease``: пул вытесненного
+    клиента закрывается, только когда завершатся все запросы, которые его используют.
+
+    Реестр (как и пулы httpx) рассчитан на работу внутри одного event loop.
+    """
+
+    _default: ClassVar["LLMClientRegistry | None"] = None
+
+    def __init__(
+        self,
+        limits: PoolLimits | None = None,
+        idle_ttl: float | None = 300.0,
+        max_clients: int = 256,
+        max_configured: int = 32,
+        max_structured: int = 64,
+    ):
+        """
+        Args:
+            limits (PoolLimits | None): Лимиты пула соединений на один base_url.
+            idle_ttl (float | None): Время простоя в секундах, после которого клиент вытесняется.
+                None отключает вытеснение по времени.
+            max_clients (int): Максимальное количество клиентов в реестре (LRU).
+            max_configured (int): Максимальное количество сконфигурированных копий на один клиент (LRU).
+            max_structured (int): Максимальное количество раннаблов структурированного вывода на один клиент (LRU).
+        """
+        self.limits = limits or PoolLimits()
+        self.idle_ttl = idle_ttl
+        self.max_clients = max_clients
+        self.max_configured = max_configured
+        self.max_structured = max_structured
+
+        self._clients: OrderedDict[ClientKey, _ClientEntry] = OrderedDict()
+        self._pools: dict[str, httpx.AsyncClient] = {}
+        self._schedulers: dict[tuple[str, str], ProviderScheduler] = {}
+        self._leases: dict[httpx.AsyncClient, int] = {}
+        self._retired: set[httpx.AsyncClient] = set()
+        self._closing: set[asyncio.Task] = set()
+        self._warming: SingleFlight = SingleFlight()
+        self._last_eviction = time.monotonic()
+
+    @classmethod
+    def default(cls) -> "LLMClientRegistry":
+        """
+        Возвращает реестр, заданный ``use_registry`` в текущем контексте, иначе общий для процесса.
+
+        Клиенты и пулы соединений привязаны к циклу событий, поэтому каждый цикл
+        (шард ``ShardedRunner``) должен использовать свой реестр.
+        """
+        registry = current_registry.get()
+        if registry is not None:
+            return registry
+
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+
+    @staticmethod
+    def key(llm_provider: LLMProvider) -> ClientKey:
+        return (
+            llm_provider.provider,
+            llm_provider.transport,
+            llm_provider.base_url,
+            llm_provider.model_id,
+            llm_provider.api_key,
+            llm_provider.num_ctx,
+        )
+
+    def get(self, llm_provider: LLMProvider) -> ChatOpenAI | ChatOllama | NativeChatModel:
+        """
+        Возвращает прогретый клиент для провайдера, создавая его при необходимости.
+
+        Args:
+            llm_provider (LLMProvider): Описание провайдера.
+
+        Returns:
+            ChatOpenAI | ChatOllama | NativeChatModel: Клиент языковой модели.
+        """
+        return self._entry(llm_provider).client
+
+    def configure(self, llm_provider: LLMProvider, options: GenerationOptions | None = None) -> ChatOpenAI | ChatOllama | NativeChatModel:
+        """
+        Возвращает клиент с применёнными параметрами генерации.
+
+        Общий клиент не изменяется: для каждого набора параметров создаётся
+        поверхностная копия, разделяющая с ним HTTP клиентов, и кешируется.
+
+        Args:
+            llm_provider (LLMProvider): Описание провайдера.
+            options (GenerationOptions | None): Параметры генерации.
+
+        Returns:
+            ChatOpenAI | ChatOllama | NativeChatModel: Клиент, который нельзя изменять.
+        """
+        entry = self._entry(llm_provider)
+
+        fields = options.to_model_fields(llm_provider.provider) if options else None
+        if not fields:
+            return entry.client
+
+        client = entry.configured.get(options)
+        if client is None:
+            client = entry.client.model_copy(update=fields)
+            entry.configured[options] = client
+
+            if len(entry.configured) > self.max_configured:
+                entry.configured.popitem(last=False)
+        else:
+            entry.configured.move_to_end(options)
+
+        return client
+
+    def structured(
+        self,
+        llm_provider: LLMProvider,
+        output_model: Type[BaseModel],
+        options: GenerationOptions | None = None,
+        stream: bool = False
+    ) -> Runnable:
+        """
+        Возвращает клиент, привязанный к структурированному выводу в output_model.
+
+        ``with_structured_output`` строит схему инструмента/JSON из pydantic модели
+        и создаёт парсер, поэтому результат кешируется на клиент, параметры
+        генерации и модель вывода.
+
+        Для потокового режима (stream=True) возвращается модель, которая отдаёт
+        JSON по схеме output_model обычным текстом: ``response_format`` для OpenAI
+        и ``format`` для Ollama. Вызовы инструментов не подходят, потому что
+        Ollama возвращает их одним фрагментом.
+
+        Args:
+            llm_provider (LLMProvider): Описание провайдера.
+            output_model (Type[BaseModel]): Модель структурированного вывода.
+            options (GenerationOptions | None): Параметры генерации.
+            stream (bool): Вернуть модель для потокового структурированного вывода.
+
+        Returns:
+            Runnable: Раннабл, возвращающий словарь с ключами raw, parsed, parsing_error,
+                или, при stream=True, модель с потоком текста JSON.
+        """
+        entry = self._entry(llm_provider)
+
+        key = (options, output_model, stream)
+        runnable = entry.structured.get(key)
+
+        if runnable is None:
+            model = self.configure(llm_provider, options)
+
+            if stream and llm_provider.provider == ProviderType.ollama:
+                runnable = model.bind(format=output_model.model_json_schema())
+            elif stream:
+                # Схема словарём, а не моделью: иначе ChatOpenAI валидирует каждый фрагмент и ответ моделью в цикле событий
+                runnable = model.bind(response_format=json_schema_format(output_model))
+            else:
+                kwargs = {"include_raw": True} | ({} if llm_provider.provider == ProviderType.ollama else {"strict": True})
+                runnable = model.with_structured_output(output_model, **kwargs)
+
+            entry.structured[key] = runnable
+
+            if len(entry.structured) > self.max_structured:
+                entry.structured.popitem(last=False)
+        else:
+            entry.structured.move_to_end(key)
+
+        return runnable
+
+    def scheduler(self, llm_provider: LLMProvider) -> ProviderScheduler:
+        """
+        Возвращает планировщик запросов для провайдера.
+
+        Планировщик общий для всех клиентов с одинаковыми base_url и model_id,
+        лимиты берутся из полей LLMProvider и обновляются при их изменении.
+
+        Args:
+            llm_provider (LLMProvider): Описание провайдера.
+
+        Returns:
+            ProviderScheduler: Планировщик запросов.
+        """
+        key = (llm_provider.base_url, llm_provider.model_id)
+        scheduler = self._schedulers.get(key)
+
+        if scheduler is None:
+            scheduler = self._schedulers[key] = ProviderScheduler()
+
+        scheduler.max_in_flight = llm_provider.max_in_flight
+        scheduler.requests_per_minute = llm_provider.requests_per_minute
+        scheduler.tokens_per_minute = llm_provider.tokens_per_minute
+
+        return scheduler
+
+    @contextmanager
+    def lease(self, llm_provider: LLMProvider) -> Iterator[None]:
+        """
+        Удерживает пул соединений base_url провайдера на время запроса.
+
+        Пока у пула есть аренды, вытеснение клиента (LRU или ``idle_ttl``) не
+        закрывает его, а откладывает закрытие до завершения последней аренды.
+
+        Args:
+            llm_provider (LLMProvider): Описание провайдера.
+        """
+        pool = self._pools.get(llm_provider.base_url)
+        if pool is None:
+            yield
+            return
+
+        self._leases[pool] = self._leases.get(pool, 0) + 1
+        try:
+            yield
+        finally:
+            leases = self._leases.pop(pool, 1) - 1
+            if leases:
+                self._leases[pool] = leases
+            elif pool in self._retired:
+                self._retired.discard(pool)
+                self._close_pool(pool)
+
+    async def warm_up(
+        self,
+        llm_provider: LLMProvider,
+        connections: int = 1,
+        probe: bool = False,
+        timeout: float = 10.0
+    ) -> None:
+        """
+        Создаёт клиент и планировщик провайдера и открывает соединения пула заранее.
+
+        Соединения открываются конкурентными запросами ``HEAD base_url``: статус
+        ответа не важен, после ответа соединение остаётся в пуле keep-alive.
+        Клиент ``ChatOllama`` (транспорт langchain) использует собственный пул,
+        его соединения не прогреваются. С probe для Ollama отправляется пустой
+        запрос генерации, который загружает модель в память сервера.
+        Конкурентные прогревы одного пула и загрузки одной модели выполняются один раз.
+
+        Args:
+            llm_provider (LLMProvider): Описание провайдера.
+            connections (int): Количество соединений, не больше max_keepalive_connections.
+            probe (bool): Загрузить модель Ollama пробным запросом.
+            timeout (float): Тайм-аут каждого запроса в секундах.
+
+        Raises:
+            httpx.HTTPError: Если сервер недоступен или пробный запрос завершился ошибкой.
+        """
+        self._entry(llm_provider)
+        self.scheduler(llm_provider)
+
+        pool = self._http_client(llm_provider.base_url)
+        base_url = llm_provider.base_url.rstrip("/")
+        requests = []
+
+        if llm_provider.transport == TransportType.native or llm_provider.provider != ProviderType.ollama:
+            # Соединения общие для base_url, поэтому прогрев выполняется один раз на пул
+            connections = min(connections, self.limits.max_keepalive_connections)
+            requests.append(self._warming.do(
+                ("connect", base_url, connections),
+                lambda: asyncio.gather(*(pool.head(base_url, timeout=timeout) for _ in range(connections)))
+            ))
+
+        if probe and llm_provider.provider == ProviderType.ollama:
+            async def load() -> None:
+                # Пустой prompt только загружает модель; num_ctx как у запросов, иначе модель перезагрузится
+                response = await pool.post(f"{base_url}/api/generate", timeout=timeout, json={
+                    "model": llm_provider.model_id, "options": {"num_ctx": llm_provider.num_ctx},
+                })
+                response.raise_for_status()
+
+            requests.append(self._warming.do(("load", base_url, llm_provider.model_id, llm_provider.num_ctx), load))
+
+        with self.lease(llm_provider):
+            await asyncio.gather(*requests)
+
+    def _entry(self, llm_provider: LLMProvider) -> _ClientEntry:
+        self._maybe_evict_idle()
+
+        key = self.key(llm_provider)
+        entry = self._clients.get(key)
+
+        if entry is None:
+            entry = _ClientEntry(self._create(llm_provider), llm_provider.base_url)
+            self._clients[key] = entry
+
+            while len(self._clients) > self.max_clients:
+                _, evicted = self._clients.popitem(last=False)
+                self._release_pool(evicted.base_url)
+        else:
+            self._clients.move_to_end(key)
+            entry.last_used = time.monotonic()
+
+        return entry
+
+    def _create(self, llm_provider: LLMProvider) -> ChatOpenAI | ChatOllama | NativeChatModel:
+        if llm_provider.transport == TransportType.native:
+            return NativeChatModel(llm_provider, self._http_client(llm_provider.base_url))
+
+        match llm_provider.provider:
+            case ProviderType.ollama:
+                ChatOllama = _import_backend("langchain_ollama", "ChatOllama", "langchain-ollama")
+                return ChatOllama(
+                    api_key=llm_provider.api_key,
+                    base_url=llm_provider.base_url,
+                    model=llm_provider.model_id,
+                    num_ctx=llm_provider.num_ctx,
+                    client_kwargs={"limits": self.limits.to_httpx()},
+                )
+            case _:
+                ChatOpenAI = _import_backend("langchain_openai", "ChatOpenAI", "langchain-openai")
+                return ChatOpenAI(
+                    api_key=llm_provider.api_key,
+                    base_url=llm_provider.base_url,
+                    model=llm_provider.model_id,
+                    http_async_client=self._http_client(llm_provider.base_url),
+                    max_retries=0,
+                )
+
+    def _http_client(self, base_url: str) -> httpx.AsyncClient:
+        pool = self._pools.get(base_url)
+
+        if pool is None or pool.is_closed:
+            import httpx
+
+            pool = httpx.AsyncClient(limits=self.limits.to_httpx(), follow_redirects=True)
+            self._pools[base_url] = pool
+
+        return pool
+
+    def evict_idle(self, now: float | None = None) -> int:
+        """
+        Вытесняет клиентов, простаивающих дольше ``idle_ttl``.
+
+        Returns:
+            int: Количество вытесненных клиентов.
+        """
+        if self.idle_ttl is None:
+            return 0
+
+        now = time.monotonic() if now is None else now
+        self._last_eviction = now
+
+        expired = [key for key, entry in self._clients.items() if now - entry.last_used > self.idle_ttl]
+        for key in expired:
+            self._release_pool(self._clients.pop(key).base_url)
+
+        return len(expired)
+
+    def _maybe_evict_idle(self) -> None:
+        if self.idle_ttl is not None and time.monotonic() - self._last_eviction > self.idle_ttl / 4:
+            self.evict_idle()
+
+    def _release_pool(self, base_url: str) -> None:
+        if any(entry.base_url == base_url for entry in self._clients.values()):
+            return
+
+        pool = self._pools.pop(base_url, None)
+        if pool is None:
+            return
+
+        if pool in self._leases:
+            # Пул ещё используют запросы: его закроет последний из них
+            self._retired.add(pool)
+        else:
+            self._close_pool(pool)
+
+    def _close_pool(self, pool: httpx.AsyncClient) -> None:
+        try:
+            task = asyncio.get_running_loop().create_task(pool.aclose())
+        except RuntimeError:
+            return
+
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def aclose(self) -> None:
+        """Закрывает все пулы соединений и очищает реестр."""
+        self._clients.clear()
+        pools = [*self._pools.values(), *self._retired]
+        self._pools, self._retired, self._leases = {}, set(), {}
+
+        await asyncio.gather(*(pool.aclose() for pool in pools), *self._closing)
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+
+@contextmanager
+def use_registry(registry: LLMClientRegistry) -> Iterator[None]:
+    """Задаёт реестр клиентов по умолчанию внутри блока (и порождённых в нём задач)."""
+    token = current_registry.set(registry)
+    try:
+        yield
+    finally:
+        current_registry.reset(token)
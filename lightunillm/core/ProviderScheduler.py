@@ -0,0 +1,280 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import AsyncIterator, Iterator
+
+from lightunillm.typization import LLMTokenUsage
+
+
+class Priority(IntEnum):
+    """Приоритет запроса в очереди планировщика. Меньшее значение обслуживается раньше."""
+
+    interactive = 0
+    normal = 1
+    batch = 2
+
+
+current_priority: ContextVar[Priority | None] = ContextVar("lightunillm_priority", default=None)
+
+
+def resolve_priority(priority: Priority | None, default: Priority) -> Priority:
+    """Возвращает явный приоритет, иначе приоритет из контекста, иначе default."""
+    if priority is not None:
+        return priority
+
+    contextual = current_priority.get()
+    return default if contextual is None else contextual
+
+
+@contextmanager
+def use_priority(priority: Priority) -> Iterator[None]:
+    """Задаёт приоритет по умолчанию для запросов внутри блока (и порождённых в нём задач)."""
+    token = current_priority.set(priority)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+class Ticket:
+    """Разрешение на выполнение одного запроса."""
+
+    __slots__ = ("tokens", "record", "admitted", "usage")
+
+    def __init__(self, tokens: int, record: list | None = None, admitted: bool = False):
+        self.tokens = tokens
+        self.record = record
+        self.admitted = admitted
+        self.usage: LLMTokenUsage | None = None
+
+    def observe(self, usage: LLMTokenUsage | None) -> None:
+        """Сообщает фактический расход токенов запроса."""
+        self.usage = usage
+
+
+class ProviderScheduler:
+    """
+    Планировщик запросов к одному провайдеру.
+
+    Ограничивает количество одновременных запросов, запросов в минуту и токенов
+    в минуту. Ожидающие запросы обслуживаются по приоритету, поэтому
+    интерактивные запросы опережают батчевые. Расход токенов оценивается
+    по длине промпта и скользящему среднему фактического расхода прошлых
+    ответов, а после завершения запроса уточняется по ``LLMTokenUsage``.
+
+    Ожидающие запросы одного приоритета с одинаковой группой (ключом префикса
+    промпта) выстраиваются подряд за первым ожидающим запросом группы, чтобы
+    бэкенд обслуживал их вместе и переиспользовал кеш префиксов. Чтобы
+    популярная группа не задерживала остальные бесконечно, подряд ставится
+    не больше MAX_GROUP_RUN запросов группы.
+    """
+
+    WINDOW = 60.0
+    CHARS_PER_TOKEN = 4
+    DEFAULT_COMPLETION_TOKENS = 256
+    MAX_GROUP_RUN = 32
+
+    def __init__(
+        self,
+        max_in_flight: int | None = None,
+        requests_per_minute: int | None = None,
+        tokens_per_minute: int | None = None
+    ):
+        """
+        Args:
+            max_in_flight (int | None): Максимальное количество одновременных запросов.
+            requests_per_minute (int | None): Максимальное количество запросов в минуту.
+            tokens_per_minute (int | None): Максимальное количество токенов в минуту.
+        """
+        self.max_in_flight = max_in_flight
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+
+        self.in_flight = 0
+        self.completion_tokens_ewma: float | None = None
+
+        self._waiters: list[tuple[int, int, int, int, asyncio.Future, list | None]] = []
+        self._sequence = itertools.count()
+        self._groups: dict[tuple, list] = {}
+        self._window: deque[list] = deque()
+        self._window_tokens = 0
+        self._timer: asyncio.TimerHandle | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return any(limit is not None for limit in (self.max_in_flight, self.requests_per_minute, self.tokens_per_minute))
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for *_, future, _ in self._waiters if not future.done())
+
+    def estimate_tokens(self, prompt_chars: int, max_tokens: int | None = None) -> int:
+        """
+        Оценивает расход токенов запроса.
+
+        Args:
+            prompt_chars (int): Длина промпта в символах.
+            max_tokens (int | None): Ограничение длины ответа, если задано.
+
+        Returns:
+            int: Оценка суммарного расхода токенов.
+        """
+        completion = max_tokens or self.completion_tokens_ewma or self.DEFAULT_COMPLETION_TOKENS
+        return prompt_chars // self.CHARS_PER_TOKEN + int(completion)
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        tokens: int,
+        priority: Priority = Priority.normal,
+        group: str | None = None
+    ) -> AsyncIterator[Ticket]:
+        """
+        Ожидает разрешения на запрос и освобождает его по выходу из блока.
+
+        Args:
+            tokens (int): Оценка расхода токенов запроса.
+            priority (Priority): Приоритет запроса.
+            group (str | None): Группа запроса для упорядочивания очереди (ключ префикса промпта).
+
+        Returns:
+            AsyncIterator[Ticket]: Разрешение, в которое можно передать фактический расход.
+        """
+        ticket = await self.acquire(tokens, priority, group)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    async def acquire(self, tokens: int, priority: Priority = Priority.normal, group: str | None = None) -> Ticket:
+        if not self.enabled:
+            return Ticket(tokens)
+
+        if not self._waiters and self._can_admit(tokens, time.monotonic()):
+            return self._admit(tokens)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, self._waiter(tokens, priority, group, future))
+        self._dispatch()
+
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(future.result())
+            else:
+                future.cancel()
+                self._dispatch()
+            raise
+
+    def release(self, ticket: Ticket) -> None:
+        if ticket.usage is not None:
+            completion = ticket.usage.completion_tokens
+            self.completion_tokens_ewma = completion if self.completion_tokens_ewma is None \
+                else 0.8 * self.completion_tokens_ewma + 0.2 * completion
+
+            # Запрос дольше окна: запись уже вытеснена из окна, и её токены вычитать больше некому
+            if ticket.record is not None and ticket.record[2] and ticket.usage.total_tokens:
+                self._window_tokens += ticket.usage.total_tokens - ticket.record[1]
+                ticket.record[1] = ticket.usage.total_tokens
+
+        if ticket.admitted:
+            ticket.admitted = False
+            self.in_flight -= 1
+            self._dispatch()
+
+    def _waiter(self, tokens: int, priority: Priority, group: str | None, future: asyncio.Future) -> tuple:
+        sequence = next(self._sequence)
+
+        if group is None:
+            return priority, sequence, sequence, tokens, future, None
+
+        key = (priority, group)
+        run = self._groups.get(key)
+
+        # run = [позиция серии в очереди, ожидающих в серии, поставлено в серию, ключ группы]
+        if run is None or run[2] >= self.MAX_GROUP_RUN:
+            run = self._groups[key] = [sequence, 0, 0, key]
+
+        run[1] += 1
+        run[2] += 1
+
+        return priority, run[0], sequence, tokens, future, run
+
+    def _pop_waiter(self) -> None:
+        *_, run = heapq.heappop(self._waiters)
+
+        if run is not None:
+            run[1] -= 1
+            if run[1] == 0 and self._groups.get(run[3]) is run:
+                del self._groups[run[3]]
+
+    def _admit(self, tokens: int) -> Ticket:
+        self.in_flight += 1
+
+        # record = [время допуска, токены, запись в окне]
+        record = None
+        if self.requests_per_minute is not None or self.tokens_per_minute is not None:
+            record = [time.monotonic(), tokens, True]
+            self._window.append(record)
+            self._window_tokens += tokens
+
+        return Ticket(tokens, record, admitted=True)
+
+    def _prune(self, now: float) -> None:
+        while self._window and self._window[0][0] <= now - self.WINDOW:
+            record = self._window.popleft()
+            self._window_tokens -= record[1]
+            record[2] = False
+
+    def _can_admit(self, tokens: int, now: float) -> bool:
+        if self.max_in_flight is not None and self.in_flight >= self.max_in_flight:
+            return False
+
+        self._prune(now)
+
+        if self.requests_per_minute is not None and len(self._window) >= self.requests_per_minute:
+            return False
+
+        if self.tokens_per_minute is not None and self._window and self._window_tokens + tokens > self.tokens_per_minute:
+            return False
+
+        return True
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+
+        while self._waiters:
+            *_, tokens, future, _ = self._waiters[0]
+
+            if future.done():
+                self._pop_waiter()
+                continue
+
+            if not self._can_admit(tokens, now):
+                break
+
+            self._pop_waiter()
+            future.set_result(self._admit(tokens))
+
+        if self._waiters and self._window:
+            self._schedule_timer(self._window[0][0] + self.WINDOW - now)
+
+    def _schedule_timer(self, delay: float) -> None:
+        loop = asyncio.get_running_loop()
+
+        if self._timer is not None:
+            if self._timer.when() <= loop.time() + delay:
+                return
+            self._timer.cancel()
+
+        self._timer = loop.call_later(max(delay, 0.0), self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
@@ -0,0 +1,222 @@
+import asyncio
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, TypeVar
+
+from lightunillm.core.LLMClientRegistry import LLMClientRegistry, use_registry
+from lightunillm.utils.concurrency import aiter_any, bounded_map
+from lightunillm.utils.offload import OffloadMode, resolve_mode
+
+X = TypeVar('X')
+Y = TypeVar('Y')
+
+# Сообщение шарда о завершении работы
+_SHARD_DONE = "lightunillm_shard_done"
+
+
+def _portable(exc: BaseException) -> BaseException:
+    """Исключение, которое можно передать между процессами."""
+    try:
+        pickle.loads(pickle.dumps(exc))
+        return exc
+    except Exception:
+        return RuntimeError(f"{type(exc).__name__}: {exc}")
+
+
+async def _shard(
+    worker: Callable[..., Awaitable[Any]],
+    setup: Callable[[], Awaitable[Any]] | None,
+    concurrency: int,
+    inputs: "queue.Queue | multiprocessing.Queue",
+    outputs: "queue.Queue | multiprocessing.Queue",
+    portable: bool
+) -> None:
+    registry = LLMClientRegistry()
+
+    async def items() -> AsyncIterator[tuple[int, Any]]:
+        while (message := await asyncio.to_thread(inputs.get)) is not None:
+            yield message
+
+    try:
+        with use_registry(registry):
+            state = await setup() if setup is not None else None
+
+            async def run(message: tuple[int, Any]) -> tuple[int, bool, Any]:
+                index, item = message
+                try:
+                    return index, True, await (worker(item) if setup is None else worker(state, item))
+                except Exception as exc:
+                    return index, False, _portable(exc) if portable else exc
+
+            async for _, result in bounded_map(run, items(), concurrency):
+                outputs.put(result)
+    except BaseException as exc:
+        outputs.put((-1, False, _portable(exc) if portable else exc))
+    finally:
+        await registry.aclose()
+        outputs.put(_SHARD_DONE)
+
+
+def _shard_main(*args) -> None:
+    asyncio.run(_shard(*args))
+
+
+class ShardedRunner:
+    """
+    Выполнение корутины для потока входов на нескольких циклах событий (шардах).
+
+    Один цикл событий упирается в ядро на разборе JSON, валидации pydantic и
+    рендеринге шаблонов, и сетевой ввод-вывод ждёт CPU. Каждый шард - поток
+    (на сборках без GIL) или процесс со своим циклом событий и своим
+    ``LLMClientRegistry`` (через ``use_registry``), поэтому клиенты, пулы
+    соединений и планировщики не разделяются между циклами. Входы раздаются
+    через общую ограниченную очередь: свободный шард берёт следующий, память
+    не зависит от размера входа.
+
+    setup выполняется один раз в каждом шарде (например, создаёт обработчик),
+    его результат передаётся worker первым аргументом. Для процессов worker,
+    setup, входы и результаты должны сериализоваться pickle, а функции -
+    импортироваться по имени модуля.
+
+    Шард, завершившийся аварийно (OOM, сигнал, segfault), не сообщает о
+    завершении, поэтому выход опрашивается с интервалом POLL_INTERVAL и
+    проверяется, живы ли шарды.
+    """
+
+    POLL_INTERVAL = 0.5
+
+    def __init__(
+        self,
+        worker: Callable[..., Awaitable[Y]],
+        setup: Callable[[], Awaitable[Any]] | None = None,
+        shards: int | None = None,
+        concurrency: int = 16,
+        mode: OffloadMode = "auto",
+        mp_context: str = "spawn"
+    ):
+        """
+        Args:
+            worker (Callable[..., Awaitable[Y]]): Корутина worker(item) или worker(state, item), если задан setup.
+            setup (Callable[[], Awaitable[Any]] | None): Инициализация шарда.
+            shards (int | None): Количество шардов. По умолчанию количество ядер.
+            concurrency (int): Максимальное количество одновременных вызовов worker в шарде.
+            mode (Literal["auto", "thread", "process"]): Потоки, процессы или выбор по наличию GIL.
+            mp_context (str): Способ запуска процессов (spawn, forkserver, fork).
+        """
+        self.worker = worker
+        self.setup = setup
+        self.shards = shards or os.cpu_count() or 1
+        self.concurrency = concurrency
+        self.mode = resolve_mode(mode)
+        self.mp_context = mp_context
+
+    async def map(self, inputs: Iterable[X] | AsyncIterable[X]) -> AsyncIterator[tuple[int, Y]]:
+        """
+        Применяет worker ко входам на всех шардах.
+
+        Args:
+            inputs (Iterable[X] | AsyncIterable[X]): Входы.
+
+        Returns:
+            AsyncIterator[tuple[int, Y]]: Пары (индекс входа, результат) в порядке завершения.
+
+        Raises:
+            Exception: Первое исключение worker, setup или итератора входов. Шарды при этом
+                дорабатывают начатые вызовы и останавливаются.
+            RuntimeError: Если шард завершился, не закончив работу.
+        """
+        if self.mode == "thread":
+            context = None
+            input_queue, output_queue = queue.Queue(self.shards * self.concurrency * 2), queue.Queue()
+        else:
+            context = multiprocessing.get_context(self.mp_context)
+            input_queue, output_queue = context.Queue(self.shards * self.concurrency * 2), context.Queue()
+
+        args = (self.worker, self.setup, self.concurrency, input_queue, output_queue, context is not None)
+        shards = [
+            threading.Thread(target=_shard_main, args=args, name=f"lightunillm-shard-{index}", daemon=True)
+            if context is None else context.Process(target=_shard_main, args=args, daemon=True)
+            for index in range(self.shards)
+        ]
+        for shard in shards:
+            shard.start()
+
+        async def feed() -> None:
+            try:
+                async for index, item in aenumerate(aiter_any(inputs)):
+                    await asyncio.to_thread(input_queue.put, (index, item))
+            finally:
+                if not asyncio.current_task().cancelling():
+                    for _ in shards:
+                        await asyncio.to_thread(input_queue.put, None)
+
+        feeder = asyncio.ensure_future(feed())
+        running = len(shards)
+        suspect = False
+
+        try:
+            while running:
+                try:
+                    message = await asyncio.to_thread(output_queue.get, True, self.POLL_INTERVAL)
+                except queue.Empty:
+                    dead = [shard for shard in shards if not shard.is_alive()]
+                    if len(dead) <= len(shards) - running:
+                        continue
+
+                    # Сообщения завершившегося процесса могут быть ещё в пути, поэтому шард
+                    # считается потерянным, только если за интервал опроса от него ничего не пришло
+                    if not suspect:
+                        suspect = True
+                        continue
+
+                    exit_codes = [getattr(shard, "exitcode", None) for shard in dead]
+                    raise RuntimeError(f"Shard exited without finishing its work (exit codes: {exit_codes})")
+
+                suspect = False
+                if message == _SHARD_DONE:
+                    running -= 1
+                    continue
+
+                index, ok, value = message
+                if not ok:
+                    raise value
+
+                yield index, value
+
+            # Ошибка чтения входов
+            await feeder
+        finally:
+            feeder.cancel()
+            await self._stop(shards, input_queue, output_queue)
+
+    @staticmethod
+    async def _stop(shards: list, input_queue, output_queue) -> None:
+        # Необработанные входы отбрасываются, шарды получают сигнал остановки и дорабатывают начатое.
+        # Выход вычитывается до завершения шардов: процесс не завершится, пока его очередь не передана.
+        while True:
+            try:
+                input_queue.get_nowait()
+            except queue.Empty:
+                break
+
+        for _ in shards:
+            await asyncio.to_thread(input_queue.put, None)
+
+        while any(shard.is_alive() for shard in shards):
+            try:
+                output_queue.get_nowait()
+            except queue.Empty:
+                await asyncio.sleep(0.05)
+
+        for shard in shards:
+            shard.join()
+
+
+async def aenumerate(items: AsyncIterable[X]) -> AsyncIterator[tuple[int, X]]:
+    index = 0
+    async for item in items:
+        yield index, item
+        index += 1
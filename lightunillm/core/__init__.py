@@ -1,9 +1,20 @@
-from lightunillm.core import abstracts
-from lightunillm.core import interfaces
-from lightunillm.core import typization
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from lightunillm.core import abstracts
+    from lightunillm.core import interfaces
+
+
+def __getattr__(name: str):
+    # interfaces загружает AIBaseHandler со всеми зависимостями, поэтому подпакеты загружаются по требованию
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    return importlib.import_module(f"{__name__}.{name}")
+
 
 __all__ = [
     "abstracts",
-    "interfaces",
-    "typization"
+    "interfaces"
 ]
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from lightunillm.core.Conversation import Conversation
+
+
+class HistoryPolicyAbstract(ABC):
+    """
+    Политика ограничения истории диалога.
+
+    Вызывается после добавления каждой реплики пользователя и приводит окно
+    диалога (сообщения, которые отправляются модели) к бюджету токенов:
+    отбрасывает старые реплики, сворачивает их в краткое содержание и т.п.
+    Реплики, вышедшие из окна, удаляются через ``Conversation.evict``.
+    """
+
+    @abstractmethod
+    async def apply(self, conversation: Conversation) -> None:
+        """Приводит окно диалога к бюджету политики."""
+        pass
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from lightunillm.core.instrumentation import Span
+
+
+class MetricsSinkAbstract(ABC):
+    """
+    Приёмник метрик и спанов инструментирования.
+
+    Методы вызываются синхронно в event loop запроса, поэтому не должны
+    блокировать. Исключения приёмника не прерывают запрос.
+    """
+
+    @abstractmethod
+    def observe(self, name: str, value: float, labels: dict[str, str]) -> None:
+        """Добавляет значение в гистограмму name."""
+        pass
+
+    @abstractmethod
+    def increment(self, name: str, value: float, labels: dict[str, str]) -> None:
+        """Увеличивает счётчик name на value."""
+        pass
+
+    def on_span_start(self, span: Span) -> None:
+        """Вызывается при открытии спана. По умолчанию ничего не делает."""
+        pass
+
+    def on_span_end(self, span: Span) -> None:
+        """Вызывается при закрытии спана. По умолчанию записывает длительность в гистограмму ``<name>_seconds``."""
+        self.observe(f"{span.name}_seconds", span.duration, span.labels)
@@ -1,6 +1,8 @@
+import asyncio
 from abc import ABC, abstractmethod
+from typing import Iterable
 
-from lightunillm.typization import Prompt, LLMProvider
+from lightunillm.typization import Prompt, LLMProvider, PromptBundle
 
 class PromptStorageAbstract(ABC):
     @abstractmethod
@@ -10,3 +12,66 @@ class PromptStorageAbstract(ABC):
     @abstractmethod
     async def get_llm_provider(self, prompt_id: any) -> LLMProvider:
         pass
+
+    async def get_llm_providers(self, prompt_id: any) -> list[LLMProvider]:
+        """
+        Возвращает провайдеров для prompt_id в порядке переключения при сбоях.
+
+        Первый провайдер основной, остальные используются для переключения и
+        дублирующих запросов. По умолчанию - только get_llm_provider.
+        """
+        return [await self.get_llm_provider(prompt_id)]
+
+    async def get_version(self, prompt_id: any) -> any:
+        """
+        Возвращает версию (etag) промпта и провайдера для prompt_id.
+
+        Используется PromptLoader для ревалидации кеша: если версия не изменилась,
+        повторная загрузка не выполняется. None отключает ревалидацию.
+        """
+        return None
+
+    async def get_prompt_bundle(self, prompt_id: any) -> PromptBundle:
+        """
+        Возвращает промпт, провайдеров и версию для prompt_id за один вызов.
+
+        По умолчанию собирается из get_prompt, get_llm_providers и get_version,
+        хранилища с общим источником данных должны переопределять его одним запросом.
+        """
+        prompt, llm_providers, version = await asyncio.gather(
+            self.get_prompt(prompt_id),
+            self.get_llm_providers(prompt_id),
+            self.get_version(prompt_id)
+        )
+
+        return PromptBundle(prompt=prompt, llm_providers=llm_providers, version=version)
+
+    async def get_prompt_bundles(self, prompt_ids: Iterable[any]) -> dict[any, PromptBundle]:
+        """
+        Возвращает наборы для нескольких prompt_id. По умолчанию - конкурентные вызовы get_prompt_bundle.
+        """
+        prompt_ids = list(prompt_ids)
+        bundles = await asyncio.gather(*(self.get_prompt_bundle(prompt_id) for prompt_id in prompt_ids))
+
+        return dict(zip(prompt_ids, bundles))
+
+    async def get_prompts(self, prompt_ids: Iterable[any]) -> dict[any, Prompt]:
+        """
+        Возвращает промпты для нескольких prompt_id. По умолчанию - конкурентные вызовы get_prompt.
+        """
+        prompt_ids = list(prompt_ids)
+        prompts = await asyncio.gather(*(self.get_prompt(prompt_id) for prompt_id in prompt_ids))
+
+        return dict(zip(prompt_ids, prompts))
+
+    async def list_prompt_ids(self) -> list[any]:
+        """
+        Возвращает все prompt_id хранилища. Используется PromptLoader.preload без явного списка.
+
+        По умолчанию хранилище не поддерживает перечисление.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support listing prompt ids")
+
+    async def aclose(self) -> None:
+        """Освобождает ресурсы хранилища (соединения, пулы)."""
+        pass
@@ -0,0 +1,68 @@
+from abc import ABC, abstractmethod
+
+from lightunillm.typization import LLMProvider
+
+
+class ProviderRouterAbstract(ABC):
+    """
+    Стратегия выбора провайдера для запроса.
+
+    Обработчик передаёт роутеру список провайдеров промпта (основной и резервные)
+    и получает их в порядке попыток: первый используется для запроса, остальные -
+    для переключения при сбоях и дублирующих запросов. Методы вызываются
+    синхронно в event loop запроса и не должны блокировать.
+
+    О каждой попытке запроса роутер узнаёт через on_start, on_response,
+    on_throughput и on_end, что позволяет учитывать нагрузку и задержки
+    провайдеров. По умолчанию эти методы ничего не делают.
+    """
+
+    def key(self, system_message: str, template: str | None = None) -> str | None:
+        """
+        Возвращает ключ маршрутизации запроса. Запросы с одинаковым ключом
+        группируются в очереди провайдера. По умолчанию ключа нет.
+
+        Args:
+            system_message (str): Отрендеренное системное сообщение.
+            template (str | None): Исходный шаблон системного сообщения, если известен.
+        """
+        return None
+
+    @abstractmethod
+    def order(self, providers: list[LLMProvider], key: str | None = None) -> list[LLMProvider]:
+        """
+        Возвращает провайдеров в порядке попыток для запроса с ключом key.
+
+        Args:
+            providers (list[LLMProvider]): Провайдеры промпта в исходном порядке.
+            key (str | None): Ключ маршрутизации запроса.
+        """
+        pass
+
+    def on_start(self, llm_provider: LLMProvider) -> None:
+        """Попытка запроса к llm_provider начата (до ожидания в очереди провайдера)."""
+        pass
+
+    def on_response(self, llm_provider: LLMProvider, latency: float) -> None:
+        """
+        Получен ответ провайдера: весь ответ для обычных запросов или первый фрагмент для потоковых.
+
+        Args:
+            llm_provider (LLMProvider): Провайдер попытки.
+            latency (float): Время от отправки запроса (после очереди) до ответа в секундах.
+        """
+        pass
+
+    def on_throughput(self, llm_provider: LLMProvider, tokens_per_second: float) -> None:
+        """Скорость генерации потокового ответа провайдера, токенов в секунду."""
+        pass
+
+    def on_end(self, llm_provider: LLMProvider, error: BaseException | None = None) -> None:
+        """
+        Попытка запроса завершена, для потоковых запросов - после закрытия потока.
+
+        Args:
+            llm_provider (LLMProvider): Провайдер попытки.
+            error (BaseException | None): Ошибка попытки, None при успехе.
+        """
+        pass
@@ -0,0 +1,39 @@
+from abc import ABC, abstractmethod
+
+
+class TokenizerAbstract(ABC):
+    """
+    Токенизатор для локальной оценки длины промпта.
+
+    Методы вызываются синхронно в event loop запроса, поэтому должны быть быстрыми.
+    """
+
+    # Имеет ли смысл кешировать результаты count (для дешёвых оценок - нет)
+    cacheable: bool = True
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        """Возвращает количество токенов в text."""
+        pass
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """
+        Возвращает начало text не длиннее max_tokens токенов.
+
+        По умолчанию - двоичный поиск длины по count.
+        """
+        if max_tokens <= 0:
+            return ""
+
+        if self.count(text) <= max_tokens:
+            return text
+
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.count(text[:middle]) <= max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+
+        return text[:low]
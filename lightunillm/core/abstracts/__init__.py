@@ -1,5 +1,13 @@
 from lightunillm.core.abstracts.PromptStorageAbstract import PromptStorageAbstract
+from lightunillm.core.abstracts.MetricsSinkAbstract import MetricsSinkAbstract
+from lightunillm.core.abstracts.ProviderRouterAbstract import ProviderRouterAbstract
+from lightunillm.core.abstracts.TokenizerAbstract import TokenizerAbstract
+from lightunillm.core.abstracts.HistoryPolicyAbstract import HistoryPolicyAbstract
 
 __all__ = [
-    "PromptStorageAbstract"
-]
\ No newline at end of file
+    "PromptStorageAbstract",
+    "MetricsSinkAbstract",
+    "ProviderRouterAbstract",
+    "TokenizerAbstract",
+    "HistoryPolicyAbstract"
+]
@@ -0,0 +1,368 @@
+import asyncio
+import fnmatch
+import logging
+import math
+import time
+from typing import Any, Callable, Literal
+
+from pydantic import BaseModel
+
+from lightunillm.typization import LLMProvider, LLMTokenUsage
+from lightunillm.exceptions import BudgetExceededError
+
+logger = logging.getLogger(__name__)
+
+
+UsageKey = tuple[str, str, str]
+
+
+def _prompt_key(prompt_id: Any) -> str:
+    return "" if prompt_id is None else str(prompt_id)
+
+
+class ModelPrice(BaseModel):
+    """Цена модели в единицах валюты за миллион токенов."""
+
+    input: float = 0.0
+    output: float = 0.0
+
+    def cost(self, prompt_tokens: int, completion_tokens: int) -> float:
+        return (prompt_tokens * self.input + completion_tokens * self.output) / 1_000_000
+
+
+class UsageBudget(BaseModel):
+    """
+    Квота расхода промпта: токены и/или стоимость за скользящее окно.
+
+    Квота проверяется перед отправкой запроса: пока израсходованное в окне
+    меньше лимита, запрос допускается, поэтому последний допущенный запрос
+    может превысить квоту на размер своего ответа. При превышении запрос
+    отклоняется (``refuse``) или ожидает, пока старые записи выйдут из окна
+    (``throttle``), но не дольше max_wait.
+    """
+
+    max_tokens: int | None = None
+    max_cost: float | None = None
+    window: float | None = None
+    action: Literal["refuse", "throttle"] = "refuse"
+    max_wait: float | None = None
+
+
+class UsageCounter:
+    """Счётчики расхода: запросы, токены промпта и ответа, стоимость."""
+
+    __slots__ = ("requests", "prompt_tokens", "completion_tokens", "cost", "cached")
+
+    def __init__(self):
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.cached = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, prompt_tokens: int, completion_tokens: int, cost: float, cached: bool) -> None:
+        self.requests += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cost += cost
+        self.cached += cached
+
+    def merge(self, other: "UsageCounter") -> None:
+        self.requests += other.requests
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cost += other.cost
+        self.cached += other.cached
+
+    def reset(self) -> None:
+        self.requests = self.prompt_tokens = self.completion_tokens = self.cached = 0
+        self.cost = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "cost": self.cost,
+            "cached": self.cached,
+        }
+
+
+class _Series:
+    """Счётчики за всё время и кольцо корзин фиксированной ширины для скользящих окон."""
+
+    __slots__ = ("total", "buckets", "slots", "width")
+
+    def __init__(self, count: int, width: float):
+        self.total = UsageCounter()
+        self.buckets = [UsageCounter() for _ in range(count)]
+        self.slots = [-1] * count
+        self.width = width
+
+    def add(self, now: float, prompt_tokens: int, completion_tokens: int, cost: float, cached: bool) -> None:
+        self.total.add(prompt_tokens, completion_tokens, cost, cached)
+
+        slot = int(now // self.width)
+        index = slot % len(self.buckets)
+        if self.slots[index] != slot:
+            self.buckets[index].reset()
+            self.slots[index] = slot
+        self.buckets[index].add(prompt_tokens, completion_tokens, cost, cached)
+
+    def live(self, now: float, window: float) -> list[tuple[int, UsageCounter]]:
+        """Корзины, попадающие в окно window секунд до now, от старых к новым."""
+        newest = int(now // self.width)
+        oldest = newest - min(len(self.buckets), math.ceil(window / self.width)) + 1
+
+        return sorted(
+            (slot, bucket) for slot, bucket in zip(self.slots, self.buckets) if oldest <= slot <= newest
+        )
+
+    def window(self, now: float, window: float | None) -> UsageCounter:
+        if window is None:
+            return self.total
+
+        counter = UsageCounter()
+        for _, bucket in self.live(now, window):
+            counter.merge(bucket)
+        return counter
+
+
+class UsageLedger:
+    """
+    Учёт расхода токенов и стоимости с квотами по prompt_id.
+
+    Вместо хранения ``LLMTokenUsage`` каждого запроса расход суммируется в
+    счётчики по ключу (provider, model, prompt_id): за всё время и в кольце
+    корзин шириной resolution секунд, покрывающем window секунд. Память
+    зависит только от количества ключей, а не от количества запросов.
+
+    Стоимость считается по таблице цен ``ModelPrice``, которая задаётся по
+    шаблонам fnmatch для model_id (позже заданные имеют приоритет, как в
+    ``TokenCounter``), и записывается в ``LLMTokenUsage.total_cost``, если
+    провайдер её не вернул. Квоты ``UsageBudget`` проверяются обработчиком
+    перед отправкой запроса.
+    """
+
+    def __init__(
+        self,
+        prices: dict[str, ModelPrice] | None = None,
+        budgets: dict[Any, UsageBudget] | None = None,
+        window: float = 3600.0,
+        resolution: float = 60.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            prices (dict[str, ModelPrice] | None): Цены по шаблонам model_id.
+            budgets (dict[Any, UsageBudget] | None): Квоты по prompt_id.
+            window (float): Самое длинное скользящее окно в секундах (для агрегации и квот).
+            resolution (float): Ширина корзины окна в секундах.
+            clock (Callable[[], float]): Источник времени в секундах.
+        """
+        self.window = window
+        self.resolution = resolution
+        self.clock = clock
+
+        self._bucket_count = max(1, math.ceil(window / resolution))
+        self._prices: list[tuple[str, ModelPrice]] = []
+        self._resolved: dict[str, ModelPrice | None] = {}
+        self._budgets: dict[str, UsageBudget] = {}
+        self._series: dict[UsageKey, _Series] = {}
+        self._prompts: dict[str, _Series] = {}
+
+        for pattern, price in (prices or {}).items():
+            self.set_price(pattern, price)
+        for prompt_id, budget in (budgets or {}).items():
+            self.set_budget(prompt_id, budget)
+
+    def set_price(self, pattern: str, price: ModelPrice) -> None:
+        """
+        Задаёт цену моделей, чей model_id подходит под pattern.
+
+        Args:
+            pattern (str): Шаблон fnmatch для model_id.
+            price (ModelPrice): Цена за миллион токенов.
+        """
+        self._prices.insert(0, (pattern, price))
+        self._resolved.clear()
+
+    def price(self, model_id: str) -> ModelPrice | None:
+        """Возвращает цену модели или None, если она не задана."""
+        if model_id in self._resolved:
+            return self._resolved[model_id]
+
+        price = next((price for pattern, price in self._prices if fnmatch.fnmatchcase(model_id, pattern)), None)
+        self._resolved[model_id] = price
+        return price
+
+    def set_budget(self, prompt_id: Any, budget: UsageBudget | None) -> None:
+        """
+        Задаёт или снимает (budget=None) квоту промпта.
+
+        Raises:
+            ValueError: Если окно квоты длиннее окна учёта.
+        """
+        if budget is None:
+            self._budgets.pop(_prompt_key(prompt_id), None)
+            return
+
+        if budget.window is not None and budget.window > self.window:
+            raise ValueError(f"Budget window {budget.window}s exceeds the ledger window {self.window}s")
+
+        self._budgets[_prompt_key(prompt_id)] = budget
+
+    def record(self, usage: LLMTokenUsage | None, llm_provider: LLMProvider, prompt_id: Any = None) -> None:
+        """
+        Учитывает расход запроса и дописывает его стоимость в usage.total_cost.
+
+        Ответы из кеша учитываются как запросы без стоимости.
+
+        Args:
+            usage (LLMTokenUsage | None): Расход токенов запроса.
+            llm_provider (LLMProvider): Провайдер, выполнивший запрос.
+            prompt_id (Any): Идентификатор промпта.
+        """
+        if usage is None:
+            return
+
+        if usage.cached:
+            cost = 0.0
+        elif usage.total_cost:
+            cost = usage.total_cost
+        elif (price := self.price(llm_provider.model_id)) is not None:
+            cost = usage.total_cost = price.cost(usage.prompt_tokens, usage.completion_tokens)
+        else:
+            cost = 0.0
+
+        prompt_key = _prompt_key(prompt_id)
+        key = (llm_provider.provider.value, llm_provider.model_id, prompt_key)
+        now = self.clock()
+
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _Series(self._bucket_count, self.resolution)
+        series.add(now, usage.prompt_tokens, usage.completion_tokens, cost, usage.cached)
+
+        series = self._prompts.get(prompt_key)
+        if series is None:
+            series = self._prompts[prompt_key] = _Series(self._bucket_count, self.resolution)
+        series.add(now, usage.prompt_tokens, usage.completion_tokens, cost, usage.cached)
+
+    def usage(self, prompt_id: Any = None, window: float | None = None) -> UsageCounter:
+        """
+        Возвращает расход промпта по всем провайдерам и моделям.
+
+        Args:
+            prompt_id (Any): Идентификатор промпта.
+            window (float | None): Скользящее окно в секундах, None - за всё время.
+
+        Returns:
+            UsageCounter: Суммарный расход.
+        """
+        series = self._prompts.get(_prompt_key(prompt_id))
+        return UsageCounter() if series is None else series.window(self.clock(), window)
+
+    def total(self, window: float | None = None) -> UsageCounter:
+        """Возвращает суммарный расход по всем ключам за окно window секунд (None - за всё время)."""
+        counter, now = UsageCounter(), self.clock()
+        for series in self._prompts.values():
+            counter.merge(series.window(now, window))
+        return counter
+
+    def snapshot(self, window: float | None = None) -> list[dict[str, Any]]:
+        """
+        Возвращает расход по ключам (provider, model, prompt_id).
+
+        Args:
+            window (float | None): Скользящее окно в секундах, None - за всё время.
+
+        Returns:
+            list[dict[str, Any]]: Строки с метками и счётчиками.
+        """
+        now = self.clock()
+
+        return [
+            {"provider": provider, "model": model, "prompt_id": prompt_id} | series.window(now, window).to_dict()
+            for (provider, model, prompt_id), series in self._series.items()
+        ]
+
+    def check(self, prompt_id: Any) -> float:
+        """
+        Проверяет квоту промпта.
+
+        Args:
+            prompt_id (Any): Идентификатор промпта.
+
+        Returns:
+            float: 0, если запрос можно отправить, иначе время в секундах, через которое
+                расход в окне квоты станет меньше лимита (inf для квоты без окна).
+        """
+        prompt_key = _prompt_key(prompt_id)
+        budget = self._budgets.get(prompt_key)
+        series = self._prompts.get(prompt_key)
+        if budget is None or series is None:
+            return 0.0
+
+        if budget.window is None:
+            return math.inf if self._exceeded(budget, series.total) else 0.0
+
+        now = self.clock()
+        live = series.live(now, budget.window)
+        used = UsageCounter()
+        for _, bucket in live:
+            used.merge(bucket)
+
+        if not self._exceeded(budget, used):
+            return 0.0
+
+        # Корзины выходят из окна от старых к новым, ищется первая, после выхода которой расход ниже лимита
+        span = min(self._bucket_count, math.ceil(budget.window / self.resolution))
+        for slot, bucket in live:
+            used.prompt_tokens -= bucket.prompt_tokens
+            used.completion_tokens -= bucket.completion_tokens
+            used.cost -= bucket.cost
+            if not self._exceeded(budget, used):
+                return max(0.0, (slot + span) * self.resolution - now)
+
+        return math.inf
+
+    async def acquire(self, prompt_id: Any) -> None:
+        """
+        Дожидается квоты промпта перед отправкой запроса.
+
+        Args:
+            prompt_id (Any): Идентификатор промпта.
+
+        Raises:
+            BudgetExceededError: Если квота исчерпана и действие квоты refuse, либо
+                ожидание превысило бы max_wait.
+        """
+        if not self._budgets:
+            return
+
+        waited = 0.0
+        while delay := self.check(prompt_id):
+            budget = self._budgets[_prompt_key(prompt_id)]
+
+            if budget.action == "refuse" or math.isinf(delay) or (
+                budget.max_wait is not None and waited + delay > budget.max_wait
+            ):
+                used = self.usage(prompt_id, budget.window)
+                raise BudgetExceededError(prompt_id, used.total_tokens, used.cost, budget.window, delay)
+
+            logger.debug("Budget of prompt %r exhausted, throttling for %.2fs", prompt_id, delay)
+            await asyncio.sleep(delay)
+            waited += delay
+
+    @staticmethod
+    def _exceeded(budget: UsageBudget, used: UsageCounter) -> bool:
+        return (
+            (budget.max_tokens is not None and used.total_tokens >= budget.max_tokens)
+            or (budget.max_cost is not None and used.cost >= budget.max_cost)
+        )
@@ -0,0 +1,339 @@
+import fnmatch
+import importlib.util
+import json
+import logging
+from functools import lru_cache
+from typing import Callable, Literal
+
+from pydantic import BaseModel
+
+from lightunillm.typization import LLMProvider, ProviderType, GenerationOptions
+from lightunillm.core.abstracts.TokenizerAbstract import TokenizerAbstract
+from lightunillm.core.routing import template_prefix
+from lightunillm.exceptions import ContextWindowExceededError
+from lightunillm.utils.cache import TTLCache
+from lightunillm.utils.tokenizers import HeuristicTokenizer, TiktokenTokenizer
+
+logger = logging.getLogger(__name__)
+
+TokenizerFactory = Callable[[], TokenizerAbstract]
+
+
+@lru_cache(maxsize=256)
+def output_schema_text(output_model: type[BaseModel]) -> str:
+    """Возвращает JSON схему модели структурированного вывода, которая передаётся модели вместе с промптом."""
+    return json.dumps(output_model.model_json_schema())
+
+
+class TokenCounter:
+    """
+    Локальный подсчёт токенов с токенизатором, выбираемым по ``LLMProvider.model_id``.
+
+    Токенизаторы регистрируются по шаблонам fnmatch (``gpt-4o*``, ``llama3*``),
+    позже зарегистрированные имеют приоритет. Можно передать фабрику, тогда
+    токенизатор создаётся при первом использовании. Для моделей без
+    токенизатора, а также если фабрика не смогла его создать, используется
+    быстрая эвристика. Результаты точных токенизаторов для повторяющихся
+    фрагментов (системные сообщения, статические начала шаблонов) кешируются.
+    """
+
+    _default: "TokenCounter | None" = None
+
+    # Начала шаблонов короче этого считаются вместе с остальным текстом
+    MIN_PREFIX_CHARS = 64
+
+    def __init__(self, fallback: TokenizerAbstract | None = None, cache_size: int = 4096):
+        """
+        Args:
+            fallback (TokenizerAbstract | None): Токенизатор для моделей без зарегистрированного.
+                По умолчанию HeuristicTokenizer.
+            cache_size (int): Максимальное количество закешированных подсчётов.
+        """
+        self.fallback = fallback or HeuristicTokenizer()
+
+        self._patterns: list[tuple[str, TokenizerAbstract | TokenizerFactory]] = []
+        self._resolved: dict[str, TokenizerAbstract] = {}
+        self._counts: TTLCache[tuple[int, str], int] = TTLCache(cache_size)
+
+    @classmethod
+    def default(cls) -> "TokenCounter":
+        """Общий для процесса счётчик. Если установлен ``tiktoken``, для моделей OpenAI используется он."""
+        if cls._default is None:
+            cls._default = cls()
+
+            if importlib.util.find_spec("tiktoken") is not None:
+                cls._default.register("gpt-3.5*", lambda: TiktokenTokenizer("cl100k_base"))
+                cls._default.register("gpt-4*", lambda: TiktokenTokenizer("cl100k_base"))
+                for pattern in ("gpt-4o*", "gpt-4.1*", "gpt-5*", "o[0-9]*"):
+                    cls._default.register(pattern, lambda: TiktokenTokenizer("o200k_base"))
+
+        return cls._default
+
+    def register(self, pattern: str, tokenizer: TokenizerAbstract | TokenizerFactory) -> None:
+        """
+        Регистрирует токенизатор для моделей, чей model_id подходит под pattern.
+
+        Args:
+            pattern (str): Шаблон fnmatch для model_id.
+            tokenizer (TokenizerAbstract | Callable[[], TokenizerAbstract]): Токенизатор или фабрика.
+        """
+        self._patterns.insert(0, (pattern, tokenizer))
+        self._resolved.clear()
+
+    def tokenizer(self, model_id: str) -> TokenizerAbstract:
+        """
+        Возвращает токенизатор для model_id.
+
+        Args:
+            model_id (str): Идентификатор модели.
+
+        Returns:
+            TokenizerAbstract: Зарегистрированный токенизатор или fallback.
+        """
+        tokenizer = self._resolved.get(model_id)
+        if tokenizer is not None:
+            return tokenizer
+
+        tokenizer = self.fallback
+        for index, (pattern, candidate) in enumerate(self._patterns):
+            if not fnmatch.fnmatchcase(model_id, pattern):
+                continue
+
+            if not isinstance(candidate, TokenizerAbstract):
+                try:
+                    candidate = candidate()
+                except Exception:
+                    logger.warning("Tokenizer for %r failed to load, using heuristic estimate", pattern, exc_info=True)
+                    candidate = self.fallback
+                self._patterns[index] = (pattern, candidate)
+
+            tokenizer = candidate
+            break
+
+        self._resolved[model_id] = tokenizer
+        return tokenizer
+
+    def count(self, text: str, model_id: str, cache: bool = False) -> int:
+        """
+        Возвращает количество токенов в text для модели model_id.
+
+        Args:
+            text (str): Текст.
+            model_id (str): Идентификатор модели.
+            cache (bool): Кешировать результат (для повторяющихся текстов).
+
+        Returns:
+            int: Количество токенов.
+        """
+        tokenizer = self.tokenizer(model_id)
+
+        if not cache or not tokenizer.cacheable:
+            return tokenizer.count(text)
+
+        key = (id(tokenizer), text)
+        tokens = self._counts.get(key)
+
+        if tokens is None:
+            tokens = tokenizer.count(text)
+            self._counts.set(key, tokens)
+
+        return tokens
+
+    def count_rendered(self, text: str, model_id: str, template: str | None = None) -> int:
+        """
+        Считает токены отрендеренного шаблона: статическое начало шаблона
+        берётся из кеша, токенизируется только остальной текст.
+
+        Args:
+            text (str): Отрендеренный текст.
+            model_id (str): Идентификатор модели.
+            template (str | None): Исходный шаблон. Без него кешируется весь текст.
+
+        Returns:
+            int: Количество токенов (на стыке возможна погрешность в один токен).
+        """
+        prefix = template_prefix(template) if template is not None else ""
+
+        if len(prefix) < self.MIN_PREFIX_CHARS or not text.startswith(prefix):
+            return self.count(text, model_id, cache=True)
+
+        return self.count(prefix, model_id, cache=True) + self.count(text[len(prefix):], model_id)
+
+
+class ContextPolicy(BaseModel):
+    """Проверка размера промпта и подбор контекстного окна перед отправкой запроса."""
+
+    # reject - ContextWindowExceededError, trim - обрезать пользовательское сообщение
+    overflow: Literal["reject", "trim"] = "reject"
+    # Подбирать num_ctx Ollama по длине промпта, если он не задан явно
+    auto_num_ctx: bool = True
+    # Резерв токенов под ответ, если max_tokens не задан
+    output_tokens: int = 512
+    # Минимальный подбираемый num_ctx
+    min_num_ctx: int = 1024
+    # Токены разметки чата на одно сообщение
+    message_overhead: int = 8
+
+
+class ContextManager:
+    """
+    Оценивает длину промпта до сетевого вызова, отклоняет или обрезает
+    промпты, не помещающиеся в контекстное окно, и подбирает ``num_ctx`` Ollama.
+
+    Окно модели - ``LLMProvider.context_window``, для Ollama без него -
+    ``num_ctx`` запроса или провайдера. Для остальных провайдеров без
+    ``context_window`` проверка не выполняется. Подобранный num_ctx
+    округляется вверх до степени двойки: Ollama перезагружает модель при
+    смене num_ctx, и округление ограничивает число разных значений.
+    Запрос может уйти на любого провайдера из списка переключения, поэтому
+    ``fit_all`` проверяет его по окну каждого из них.
+    """
+
+    def __init__(self, counter: TokenCounter | None = None, policy: ContextPolicy | None = None):
+        """
+        Args:
+            counter (TokenCounter | None): Счётчик токенов. По умолчанию общий для процесса.
+            policy (ContextPolicy | None): Политика. По умолчанию ContextPolicy().
+        """
+        self.counter = counter or TokenCounter.default()
+        self.policy = policy or ContextPolicy()
+
+    def budget(self, llm_provider: LLMProvider, options: GenerationOptions | None = None) -> int | None:
+        """
+        Возвращает размер контекстного окна для запроса или None, если он неизвестен.
+
+        Args:
+            llm_provider (LLMProvider): Провайдер запроса.
+            options (GenerationOptions | None): Параметры генерации запроса.
+
+        Returns:
+            int | None: Размер окна в токенах.
+        """
+        if llm_provider.provider == ProviderType.ollama:
+            if options is not None and options.num_ctx is not None:
+                return options.num_ctx
+            return llm_provider.context_window or llm_provider.num_ctx
+
+        return llm_provider.context_window
+
+    def fit(
+        self,
+        llm_provider: LLMProvider,
+        system_message: str,
+        human_message: str,
+        options: GenerationOptions,
+        template: str | None = None,
+        extra_tokens: int = 0
+    ) -> tuple[str, str, GenerationOptions]:
+        """
+        Проверяет, что запрос помещается в окно модели, и подбирает num_ctx.
+
+        Args:
+            llm_provider (LLMProvider): Провайдер запроса.
+            system_message (str): Системное сообщение.
+            human_message (str): Пользовательское сообщение.
+            options (GenerationOptions): Параметры генерации запроса.
+            template (str | None): Исходный шаблон системного сообщения, если известен.
+            extra_tokens (int): Дополнительные токены промпта (например, схема структурированного вывода).
+
+        Returns:
+            tuple[str, str, GenerationOptions]: Системное сообщение, пользовательское сообщение
+                (обрезанное при overflow="trim") и параметры с подобранным num_ctx.
+
+        Raises:
+            ContextWindowExceededError: Если запрос не помещается в окно и не может быть обрезан.
+        """
+        policy = self.policy
+        model_id = llm_provider.model_id
+        budget = self.budget(llm_provider, options)
+
+        output_tokens = options.max_tokens or policy.output_tokens
+        fixed_tokens = (
+            self.counter.count_rendered(system_message, model_id, template)
+            + 2 * policy.message_overhead + extra_tokens
+        )
+        prompt_tokens = fixed_tokens + self.counter.count(human_message, model_id)
+
+        if budget is not None and prompt_tokens + output_tokens > budget:
+            available = budget - output_tokens - fixed_tokens
+
+            if policy.overflow != "trim" or available <= 0:
+                raise ContextWindowExceededError(model_id, prompt_tokens, output_tokens, budget)
+
+            human_message = self.counter.tokenizer(model_id).truncate(human_message, available)
+            prompt_tokens = fixed_tokens + self.counter.count(human_message, model_id)
+
+        if policy.auto_num_ctx and llm_provider.provider == ProviderType.ollama and options.num_ctx is None:
+            required = prompt_tokens + output_tokens
+            num_ctx = max(policy.min_num_ctx, 1 << (required - 1).bit_length())
+            options = options.model_copy(update={"num_ctx": min(num_ctx, budget) if budget else num_ctx})
+
+        return system_message, human_message, options
+
+    def fit_all(
+        self,
+        llm_providers: list[LLMProvider],
+        system_message: str,
+        human_message: str,
+        options: GenerationOptions,
+        template: str | None = None,
+        extra_tokens: int = 0,
+        extra_text: str | None = None
+    ) -> tuple[str, str, GenerationOptions]:
+        """
+        Как fit, но по окнам всех провайдеров, на которых может уйти запрос (основной, реплики, резервные).
+
+        При overflow="reject" запрос отклоняется, если не помещается в окно хотя бы одного
+        провайдера, при overflow="trim" пользовательское сообщение обрезается под наименьшее окно.
+        num_ctx подбирается по первому провайдеру и не превышает окна ни одного провайдера Ollama.
+
+        Args:
+            llm_providers (list[LLMProvider]): Провайдеры в порядке переключения, первый - основной.
+            system_message (str): Системное сообщение.
+            human_message (str): Пользовательское сообщение.
+            options (GenerationOptions): Параметры генерации запроса.
+            template (str | None): Исходный шаблон системного сообщения, если известен.
+            extra_tokens (int): Дополнительные токены промпта.
+            extra_text (str | None): Дополнительный текст промпта (например, схема структурированного
+                вывода), считается токенизатором каждой модели.
+
+        Returns:
+            tuple[str, str, GenerationOptions]: Системное сообщение, пользовательское сообщение
+                и параметры с подобранным num_ctx.
+
+        Raises:
+            ContextWindowExceededError: Если запрос не помещается в окно одного из провайдеров
+                и не может быть обрезан.
+        """
+        fitted: GenerationOptions | None = None
+        seen: set[tuple] = set()
+
+        for llm_provider in llm_providers:
+            # Реплики отличаются только base_url и проверяются один раз
+            key = (llm_provider.provider, llm_provider.model_id, llm_provider.context_window, llm_provider.num_ctx)
+            if key in seen:
+                continue
+            seen.add(key)
+
+            tokens = extra_tokens
+            if extra_text:
+                tokens += self.counter.count(extra_text, llm_provider.model_id, cache=True)
+
+            system_message, human_message, provider_options = self.fit(
+                llm_provider, system_message, human_message, options, template, tokens
+            )
+            if fitted is None:
+                fitted = provider_options
+
+        if fitted is None:
+            return system_message, human_message, options
+
+        if options.num_ctx is None and fitted.num_ctx is not None:
+            budgets = [
+                budget for llm_provider in llm_providers
+                if llm_provider.provider == ProviderType.ollama and (budget := self.budget(llm_provider, options))
+            ]
+            if budgets and min(budgets) < fitted.num_ctx:
+                fitted = fitted.model_copy(update={"num_ctx": min(budgets)})
+
+        return system_message, human_message, fitted
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+from langchain_core.messages import BaseMessage
+
+from lightunillm.core.abstracts.HistoryPolicyAbstract import HistoryPolicyAbstract
+from lightunillm.core.Conversation import Conversation
+
+if TYPE_CHECKING:
+    from lightunillm.core.AIBaseHandler import AIBaseHandler
+
+logger = logging.getLogger(__name__)
+
+
+SUMMARY_SYSTEM_MESSAGE = (
+    "You maintain a running summary of a conversation. Merge the previous summary with the new "
+    "messages into a concise summary that keeps facts, decisions, names and open questions. "
+    "Reply with the summary only."
+)
+
+
+def _excess(conversation: Conversation, max_tokens: int, max_turns: int | None) -> int:
+    """Количество старых реплик, которые нужно убрать, чтобы окно уложилось в лимиты."""
+    window = conversation.window
+    tokens, count = conversation.tokens, 0
+
+    # Последняя реплика (текущий вопрос пользователя) всегда остаётся в окне
+    while count < len(window) - 1 and (tokens > max_tokens or (max_turns is not None and len(window) - count > max_turns)):
+        tokens -= window[count][1]
+        count += 1
+
+    # Окно начинается с реплики пользователя
+    while count < len(window) - 1 and window[count][0].type != "human":
+        count += 1
+
+    return count
+
+
+class SlidingWindowPolicy(HistoryPolicyAbstract):
+    """Отбрасывает самые старые реплики, пока окно не уложится в max_tokens и max_turns."""
+
+    def __init__(self, max_tokens: int, max_turns: int | None = None):
+        """
+        Args:
+            max_tokens (int): Бюджет токенов окна вместе с системным сообщением.
+            max_turns (int | None): Максимальное количество реплик в окне.
+        """
+        self.max_tokens = max_tokens
+        self.max_turns = max_turns
+
+    async def apply(self, conversation: Conversation) -> None:
+        count = _excess(conversation, self.max_tokens, self.max_turns)
+        if count:
+            await conversation.evict(count)
+
+
+class SummarizingPolicy(HistoryPolicyAbstract):
+    """
+    Сворачивает старые реплики в краткое содержание, которое добавляется к системному сообщению.
+
+    Когда окно превышает max_tokens, старые реплики сворачиваются, пока окно не
+    уменьшится до keep_tokens. Запрос к модели выполняется раз в
+    (max_tokens - keep_tokens) токенов диалога, поэтому в среднем на ход
+    приходится работа, пропорциональная новым репликам. Если запрос не удался,
+    реплики отбрасываются без краткого содержания.
+    """
+
+    def __init__(
+        self,
+        handler: AIBaseHandler,
+        max_tokens: int,
+        keep_tokens: int | None = None,
+        system_message: str = SUMMARY_SYSTEM_MESSAGE
+    ):
+        """
+        Args:
+            handler (AIBaseHandler): Обработчик, через который выполняется запрос краткого содержания.
+            max_tokens (int): Бюджет токенов окна вместе с системным сообщением.
+            keep_tokens (int | None): Размер окна после сворачивания. По умолчанию max_tokens // 2.
+            system_message (str): Системное сообщение запроса краткого содержания.
+        """
+        self.handler = handler
+        self.max_tokens = max_tokens
+        self.keep_tokens = keep_tokens if keep_tokens is not None else max_tokens // 2
+        self.system_message = system_message
+
+    async def apply(self, conversation: Conversation) -> None:
+        if conversation.tokens <= self.max_tokens:
+            return
+
+        count = _excess(conversation, self.keep_tokens, None)
+        if not count:
+            return
+
+        evicted = await conversation.evict(count)
+
+        try:
+            summary = await self.handler.send_request(
+                self._render(conversation.summary, evicted), self.system_message, temperature=0
+            )
+        except Exception:
+            logger.warning("Conversation summary failed, dropping %d messages", len(evicted), exc_info=True)
+            return
+
+        conversation.set_summary(summary.content)
+
+        # Краткое содержание само занимает место в окне
+        count = _excess(conversation, self.max_tokens, None)
+        if count:
+            await conversation.evict(count)
+
+    @staticmethod
+    def _render(summary: str | None, messages: list[BaseMessage]) -> str:
+        lines = [f"Previous summary:\n{summary}\n"] if summary else []
+        lines.append("New messages:")
+        lines.extend(f"{message.type}: {message.content}" for message in messages)
+
+        return "\n".join(lines)
@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import time
+from typing import Any, ClassVar, Iterable
+
+from lightunillm.typization import LLMProvider, LLMTokenUsage
+from lightunillm.core.abstracts.MetricsSinkAbstract import MetricsSinkAbstract
+
+logger = logging.getLogger(__name__)
+
+
+REQUEST = "lightunillm_request"
+ATTEMPT = "lightunillm_attempt"
+PROMPT_LOAD = "lightunillm_prompt_load"
+QUEUE_WAIT = "lightunillm_queue_wait_seconds"
+TIME_TO_FIRST_TOKEN = "lightunillm_time_to_first_token_seconds"
+TOKENS_PER_SECOND = "lightunillm_tokens_per_second"
+TOKENS = "lightunillm_tokens_total"
+COST = "lightunillm_cost_total"
+RESPONSE_CACHE = "lightunillm_response_cache_total"
+PROMPT_CACHE = "lightunillm_prompt_cache_total"
+COALESCED = "lightunillm_coalesced_total"
+
+
+class Span:
+    """
+    Интервал времени операции с метками.
+
+    Используется как контекстный менеджер или закрывается явно через ``finish``.
+    По закрытию метка status принимает значение ok, error или cancelled.
+    """
+
+    __slots__ = ("name", "labels", "start", "end", "error", "_instrumentation")
+
+    def __init__(self, instrumentation: "Instrumentation", name: str, labels: dict[str, str]):
+        self.name = name
+        self.labels = labels
+        self.start: float | None = None
+        self.end: float | None = None
+        self.error: BaseException | None = None
+        self._instrumentation = instrumentation
+
+    @property
+    def duration(self) -> float:
+        if self.start is None:
+            return 0.0
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def set_label(self, key: str, value: Any) -> None:
+        self.labels[key] = str(value)
+
+    def begin(self) -> "Span":
+        self.start = time.perf_counter()
+        self._instrumentation._emit("on_span_start", self)
+        return self
+
+    def finish(self, error: BaseException | None = None) -> None:
+        if self.end is not None:
+            return
+
+        self.end = time.perf_counter()
+        self.error = error
+        if error is None:
+            self.labels["status"] = "ok"
+        elif isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+            self.labels["status"] = "cancelled"
+        else:
+            self.labels["status"] = "error"
+        self._instrumentation._emit("on_span_end", self)
+
+    def __enter__(self) -> "Span":
+        return self.begin()
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.finish(exc)
+        return False
+
+
+class _NoopSpan:
+    """Спан, который ничего не записывает. Возвращается, когда нет ни одного приёмника."""
+
+    __slots__ = ()
+
+    name = ""
+    labels: dict[str, str] = {}
+    duration = 0.0
+
+    def set_label(self, key: str, value: Any) -> None:
+        pass
+
+    def begin(self) -> "_NoopSpan":
+        return self
+
+    def finish(self, error: BaseException | None = None) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Instrumentation:
+    """
+    Точка инструментирования LightUniLLM.
+
+    Передаёт спаны, гистограммы и счётчики подключённым приёмникам
+    (``MetricsSinkAbstract``). Пока приёмников нет, ``enabled`` равен False,
+    ``span`` возвращает общий пустой спан, а вызывающий код пропускает сбор
+    меток, поэтому накладные расходы сводятся к одной проверке атрибута.
+    """
+
+    _default: ClassVar["Instrumentation | None"] = None
+
+    def __init__(self, sinks: Iterable[MetricsSinkAbstract] = ()):
+        """
+        Args:
+            sinks (Iterable[MetricsSinkAbstract]): Приёмники метрик.
+        """
+        self.sinks: list[MetricsSinkAbstract] = list(sinks)
+        self.enabled: bool = bool(self.sinks)
+
+    @classmethod
+    def default(cls) -> "Instrumentation":
+        """Возвращает общую для процесса точку инструментирования."""
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+
+    def add_sink(self, sink: MetricsSinkAbstract) -> None:
+        self.sinks.append(sink)
+        self.enabled = True
+
+    def remove_sink(self, sink: MetricsSinkAbstract) -> None:
+        self.sinks.remove(sink)
+        self.enabled = bool(self.sinks)
+
+    def span(self, name: str, labels: dict[str, str] | None = None) -> Span | _NoopSpan:
+        """
+        Создаёт спан. Без приёмников возвращает пустой спан.
+
+        Args:
+            name (str): Имя спана.
+            labels (dict[str, str] | None): Метки спана.
+
+        Returns:
+            Span | _NoopSpan: Спан, который нужно открыть через with или begin.
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, labels if labels is not None else {})
+
+    def observe(self, name: str, value: float, labels: dict[str, str]) -> None:
+        if self.enabled:
+            self._emit("observe", name, value, labels)
+
+    def increment(self, name: str, value: float = 1.0, labels: dict[str, str] | None = None) -> None:
+        if self.enabled:
+            self._emit("increment", name, value, labels if labels is not None else {})
+
+    def record_usage(self, usage: LLMTokenUsage | None, labels: dict[str, str], duration: float | None = None) -> None:
+        """
+        Записывает расход токенов, стоимость и скорость генерации запроса.
+
+        Args:
+            usage (LLMTokenUsage | None): Расход токенов.
+            labels (dict[str, str]): Метки запроса.
+            duration (float | None): Длительность генерации в секундах для расчёта токенов в секунду.
+        """
+        if not self.enabled or usage is None:
+            return
+
+        self.increment(TOKENS, usage.prompt_tokens, labels | {"type": "prompt"})
+        self.increment(TOKENS, usage.completion_tokens, labels | {"type": "completion"})
+
+        if usage.total_cost:
+            self.increment(COST, usage.total_cost, labels)
+
+        if duration and usage.completion_tokens and not usage.cached:
+            self.observe(TOKENS_PER_SECOND, usage.completion_tokens / duration, labels)
+
+    @staticmethod
+    def labels(llm_provider: LLMProvider | None, kind: str, prompt_id: Any = None) -> dict[str, str]:
+        """
+        Возвращает метки запроса: провайдер, модель, prompt_id и вид запроса.
+
+        Args:
+            llm_provider (LLMProvider | None): Провайдер запроса.
+            kind (str): Вид запроса (request, structured, stream).
+            prompt_id (Any): Идентификатор промпта запроса, None - без prompt_id.
+
+        Returns:
+            dict[str, str]: Метки.
+        """
+        return {
+            "provider": llm_provider.provider.value if llm_provider else "",
+            "model": llm_provider.model_id if llm_provider else "",
+            "prompt_id": "" if prompt_id is None else str(prompt_id),
+            "kind": kind,
+        }
+
+    def _emit(self, method: str, *args) -> None:
+        for sink in self.sinks:
+            try:
+                getattr(sink, method)(*args)
+            except Exception:
+                logger.exception("Metrics sink %r failed in %s", sink, method)
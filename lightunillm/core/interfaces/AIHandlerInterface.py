@@ -1,8 +1,13 @@
-from typing import TypeVar, Generic, AsyncIterable
+import asyncio
+from typing import TypeVar, Generic, AsyncIterable, AsyncIterator, Iterable
 from abc import ABC, abstractmethod
 
-from lightunillm.typization import PromptSyncResult, PromptAsyncResult
+from lightunillm.typization import LLMProvider, PromptSyncResult, PromptAsyncResult, PromptStatus
 from lightunillm.core.AIBaseHandler import AIBaseHandler
+from lightunillm.core.Conversation import Conversation
+from lightunillm.core.abstracts.HistoryPolicyAbstract import HistoryPolicyAbstract
+from lightunillm.core.ProviderScheduler import Priority, use_priority
+from lightunillm.utils.concurrency import bounded_map
 
 T = TypeVar('T')
 
@@ -16,3 +21,105 @@ class AIHandlerInterface(AIBaseHandler, ABC, Generic[T]):
     @abstractmethod
     async def stream(self, *args, **kwargs) -> AsyncIterable[PromptAsyncResult[T]]:
         pass
+
+    async def apply_many(
+        self,
+        inputs: Iterable[dict] | AsyncIterable[dict],
+        concurrency: int = 16,
+        ordered: bool = False,
+        usage: PromptSyncResult | None = None
+    ) -> AsyncIterator[tuple[int, PromptSyncResult[T]]]:
+        """
+        Вызывает apply для каждого набора аргументов с ограничением конкурентности.
+
+        Args:
+            inputs (Iterable[dict] | AsyncIterable[dict]): Ключевые аргументы apply для каждого элемента.
+            concurrency (int, optional): Максимальное количество одновременных вызовов. По умолчанию 16.
+            ordered (bool, optional): Возвращать результаты в порядке входов. По умолчанию в порядке завершения.
+            usage (PromptSyncResult | None, optional): Результат, в который суммируется расход токенов.
+
+        Returns:
+            AsyncIterator[tuple[int, PromptSyncResult[T]]]: Пары (индекс входа, результат).
+        """
+        async def run(kwargs: dict) -> PromptSyncResult[T]:
+            try:
+                with use_priority(Priority.batch):
+                    return await self.apply(**kwargs)
+            except Exception as exc:
+                return PromptSyncResult[T](status=PromptStatus.error, error=str(exc))
+
+        async for index, result in bounded_map(run, inputs, concurrency, ordered):
+            if usage is not None:
+                usage.accumulate(result)
+
+            yield index, result
+
+    async def warm_up(
+        self,
+        connections: int = 1,
+        probe: bool = False,
+        fallbacks: bool = False,
+        timeout: float = 10.0
+    ) -> list[LLMProvider]:
+        """
+        Подготавливает обработчик к первому запросу по prompt_id.
+
+        Загружает промпт и провайдеров в кеш загрузчика, компилирует шаблоны,
+        создаёт клиентов и открывает соединения пулов (``LLMClientRegistry.warm_up``)
+        конкурентно для всех провайдеров. Без prompt_id прогреваются провайдеры,
+        переданные в конструктор. Для нескольких обработчиков используйте
+        ``lightunillm.warm_up``: он загружает промпты одним пакетным запросом.
+
+        Args:
+            connections (int, optional): Количество соединений на провайдера. По умолчанию 1.
+            probe (bool, optional): Загрузить модели Ollama пробным запросом. По умолчанию выключено.
+            fallbacks (bool, optional): Прогреть и резервных провайдеров. По умолчанию только основной и его реплики.
+            timeout (float, optional): Тайм-аут каждого запроса в секундах. По умолчанию 10.
+
+        Returns:
+            list[LLMProvider]: Прогретые провайдеры.
+        """
+        if self.prompt_id is not None:
+            bundle = await self.prompt_loader.get_bundle(self.prompt_id)
+            self.prompt_loader.get_template(bundle.prompt.system_message)
+            self.prompt_loader.get_template(bundle.prompt.human_message)
+            providers = bundle.llm_providers
+        elif self.llm_model.llm_provider is not None:
+            providers = [self.llm_model.llm_provider, *self.llm_model.fallback_providers]
+        else:
+            providers = []
+
+        providers = self.llm_model.expand_replicas(providers if fallbacks else providers[:1])
+        registry = self.llm_model.registry
+
+        await asyncio.gather(*(registry.warm_up(llm_provider, connections, probe, timeout) for llm_provider in providers))
+        return providers
+
+    async def start_conversation(
+        self,
+        policy: HistoryPolicyAbstract | None = None,
+        spill_path: str | None = None,
+        **kwargs
+    ) -> Conversation:
+        """
+        Создаёт диалог с системным сообщением промпта prompt_id, отрендеренным с kwargs.
+
+        Ходы диалога выполняются через ``chat`` и ``chat_stream``.
+
+        Args:
+            policy (HistoryPolicyAbstract | None, optional): Политика ограничения истории.
+            spill_path (str | None, optional): Файл для реплик, вышедших из окна диалога.
+            **kwargs: Аргументы шаблона системного сообщения.
+
+        Returns:
+            Conversation: Новый диалог.
+        """
+        await self.switch_model(self.prompt_id)
+        prompt = await self.prompt_loader.get_prompt(self.prompt_id, **kwargs)
+
+        return Conversation(
+            prompt.system_message,
+            policy=policy,
+            model_id=self.llm_model.llm_provider.model_id,
+            spill_path=spill_path
+        )
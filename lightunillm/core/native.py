@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, Any, AsyncIterator, Type
+
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from pydantic import BaseModel, ValidationError
+
+from lightunillm.typization import LLMProvider, ProviderType
+from lightunillm.exceptions import ProviderHTTPError
+from lightunillm.utils.http_stream import iter_ndjson, iter_sse
+
+if TYPE_CHECKING:
+    import httpx
+
+
+# Как у клиента openai: генерация длинного ответа может занимать минуты
+DEFAULT_TIMEOUT = 600.0
+
+_ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+
+
+def _usage(input_tokens: int | None, output_tokens: int | None) -> dict[str, int] | None:
+    if input_tokens is None or output_tokens is None:
+        return None
+
+    return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+
+_EMPTY_CHUNK = AIMessageChunk(content="")
+
+
+def _chunk(content: str, response_metadata: dict, usage_metadata: dict | None = None) -> AIMessageChunk:
+    # Копия готового фрагмента без валидации в несколько раз быстрее конструктора и model_construct.
+    # Изменяемые поля создаются заново, чтобы фрагменты не разделяли их с шаблоном.
+    return _EMPTY_CHUNK.model_copy(update={
+        "content": content,
+        "response_metadata": response_metadata,
+        "usage_metadata": usage_metadata,
+        "additional_kwargs": {},
+        "tool_calls": [],
+        "invalid_tool_calls": [],
+        "tool_call_chunks": [],
+    })
+
+
+def json_schema_format(output_model: Type[BaseModel]) -> dict[str, Any]:
+    """Формат ответа OpenAI (json_schema, strict) из pydantic модели, как в ChatOpenAI."""
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+
+    function = convert_to_openai_tool(output_model, strict=True)["function"]
+    json_schema = {"name": function["name"], "schema": function["parameters"], "strict": True}
+    if function.get("description"):
+        json_schema["description"] = function["description"]
+
+    return {"type": "json_schema", "json_schema": json_schema}
+
+
+class NativeChatModel:
+    """
+    Нативный клиент OpenAI-совместимого API и API Ollama без LangChain.
+
+    Запрос отправляется напрямую через общий ``httpx.AsyncClient`` реестра
+    клиентов, потоковый ответ разбирается побайтно (SSE для OpenAI, NDJSON
+    для Ollama) без callbacks и конфигурации раннаблов. Возвращаются те же
+    ``AIMessage``/``AIMessageChunk`` с response_metadata и usage_metadata, что
+    и у ChatOpenAI/ChatOllama, поэтому обработчик работает с обоими клиентами
+    одинаково. Поддерживается подмножество интерфейса LangChain, которое
+    использует библиотека: ainvoke, astream, bind, with_structured_output и
+    model_copy для параметров генерации.
+
+    Экземпляр неизменяем: bind и model_copy возвращают новый клиент.
+    """
+
+    __slots__ = ("llm_provider", "http_client", "params", "extra", "timeout", "_url", "_headers")
+
+    def __init__(
+        self,
+        llm_provider: LLMProvider,
+        http_client: httpx.AsyncClient,
+        params: dict[str, Any] | None = None,
+        extra: dict[str, Any] | None = None,
+        timeout: float | None = DEFAULT_TIMEOUT
+    ):
+        """
+        Args:
+            llm_provider (LLMProvider): Описание провайдера.
+            http_client (httpx.AsyncClient): HTTP клиент (пул соединений base_url).
+            params (dict[str, Any] | None): Параметры генерации в полях провайдера
+                (``GenerationOptions.to_model_fields``).
+            extra (dict[str, Any] | None): Дополнительные поля тела запроса (format, response_format).
+            timeout (float | None): Таймаут запроса в секундах.
+        """
+        self.llm_provider = llm_provider
+        self.http_client = http_client
+        self.params = params if params is not None else self._default_params(llm_provider)
+        self.extra = extra or {}
+        self.timeout = timeout
+
+        base_url = llm_provider.base_url.rstrip("/")
+        self._url = f"{base_url}/api/chat" if llm_provider.provider == ProviderType.ollama else f"{base_url}/chat/completions"
+        self._headers = {"content-type": "application/json"}
+        if llm_provider.api_key:
+            self._headers["authorization"] = f"Bearer {llm_provider.api_key}"
+
+    @staticmethod
+    def _default_params(llm_provider: LLMProvider) -> dict[str, Any]:
+        return {"num_ctx": llm_provider.num_ctx} if llm_provider.provider == ProviderType.ollama else {}
+
+    def model_copy(self, update: dict[str, Any] | None = None) -> NativeChatModel:
+        """Возвращает клиент с параметрами генерации, дополненными update (как ``BaseModel.model_copy``)."""
+        return NativeChatModel(self.llm_provider, self.http_client, self.params | (update or {}), self.extra, self.timeout)
+
+    def bind(self, **kwargs: Any) -> NativeChatModel:
+        """
+        Возвращает клиент с дополнительными полями тела запроса.
+
+        ``response_format`` может быть pydantic моделью, она переводится в формат json_schema.
+        """
+        response_format = kwargs.get("response_format")
+        if isinstance(response_format, type) and issubclass(response_format, BaseModel):
+            kwargs["response_format"] = json_schema_format(response_format)
+
+        return NativeChatModel(self.llm_provider, self.http_client, self.params, self.extra | kwargs, self.timeout)
+
+    def with_structured_output(
+        self,
+        schema: Type[BaseModel],
+        include_raw: bool = False,
+        **kwargs: Any
+    ) -> NativeStructuredModel:
+        """
+        Возвращает клиент структурированного вывода в schema.
+
+        Ответ ограничивается схемой через ``response_format`` (OpenAI) или
+        ``format`` (Ollama) и валидируется моделью schema.
+
+        Args:
+            schema (Type[BaseModel]): Модель структурированного вывода.
+            include_raw (bool): Возвращать словарь с ключами raw, parsed, parsing_error.
+            **kwargs: Параметры ChatOpenAI/ChatOllama (strict, method), не используются.
+        """
+        if self.llm_provider.provider == ProviderType.ollama:
+            model = self.bind(format=schema.model_json_schema())
+        else:
+            model = self.bind(response_format=schema)
+
+        return NativeStructuredModel(model, schema, include_raw)
+
+    async def ainvoke(self, messages: list[BaseMessage]) -> AIMessage:
+        """
+        Отправляет запрос и возвращает ответ целиком.
+
+        Args:
+            messages (list[BaseMessage]): Сообщения запроса.
+
+        Returns:
+            AIMessage: Ответ с response_metadata и usage_metadata.
+
+        Raises:
+            ProviderHTTPError: Если провайдер ответил ошибкой.
+        """
+        response = await self.http_client.post(
+            self._url, content=self._payload(messages, stream=False), headers=self._headers, timeout=self.timeout
+        )
+        if response.status_code >= 400:
+            raise self._error(response.status_code, response.content)
+
+        data = json.loads(response.content)
+
+        if self.llm_provider.provider == ProviderType.ollama:
+            return AIMessage(
+                content=(data.get("message") or {}).get("content") or "",
+                response_metadata=data,
+                usage_metadata=_usage(data.get("prompt_eval_count"), data.get("eval_count")),
+            )
+
+        choice = data["choices"][0]
+        token_usage = data.get("usage") or {}
+
+        return AIMessage(
+            content=choice["message"].get("content") or "",
+            id=data.get("id"),
+            response_metadata={
+                "token_usage": token_usage,
+                "model_name": data.get("model"),
+                "finish_reason": choice.get("finish_reason"),
+            },
+            usage_metadata=_usage(token_usage.get("prompt_tokens"), token_usage.get("completion_tokens")),
+        )
+
+    async def astream(self, messages: list[BaseMessage]) -> AsyncIterator[AIMessageChunk]:
+        """
+        Отправляет запрос и возвращает ответ по фрагментам.
+
+        Фрагменты повторяют ChatOpenAI/ChatOllama: finish_reason (OpenAI) или
+        done, done_reason (Ollama) в response_metadata, расход токенов в
+        usage_metadata последнего фрагмента.
+
+        Args:
+            messages (list[BaseMessage]): Сообщения запроса.
+
+        Returns:
+            AsyncIterator[AIMessageChunk]: Фрагменты ответа.
+
+        Raises:
+            ProviderHTTPError: Если провайдер ответил ошибкой.
+        """
+        async with self.http_client.stream(
+            "POST", self._url, content=self._payload(messages, stream=True), headers=self._headers, timeout=self.timeout
+        ) as response:
+            if response.status_code >= 400:
+                raise self._error(response.status_code, await response.aread())
+
+            if self.llm_provider.provider == ProviderType.ollama:
+                async for line in iter_ndjson(response.aiter_bytes()):
+                    event = json.loads(line)
+                    if "error" in event:
+                        raise self._error(500, line)
+
+                    content = (event.get("message") or {}).get("content") or ""
+
+                    if event.get("done"):
+                        yield _chunk(content, event, _usage(event.get("prompt_eval_count"), event.get("eval_count")))
+                        return
+
+                    yield _chunk(content, {})
+                return
+
+            async for data in iter_sse(response.aiter_bytes()):
+                if data == b"[DONE]":
+                    return
+
+                event = json.loads(data)
+                if "error" in event:
+                    raise self._error(500, data)
+
+                for choice in event.get("choices") or ():
+                    content = (choice.get("delta") or {}).get("content") or ""
+                    finish_reason = choice.get("finish_reason")
+
+                    yield _chunk(
+                        content,
+                        {"finish_reason": finish_reason, "model_name": event.get("model")} if finish_reason else {}
+                    )
+
+                if token_usage := event.get("usage"):
+                    yield _chunk("", {}, _usage(token_usage.get("prompt_tokens"), token_usage.get("completion_tokens")))
+
+    def _payload(self, messages: list[BaseMessage], stream: bool) -> bytes:
+        body: dict[str, Any] = {
+            "model": self.llm_provider.model_id,
+            "messages": [{"role": _ROLES.get(message.type, message.type), "content": message.content} for message in messages],
+            "stream": stream,
+        }
+
+        if self.llm_provider.provider == ProviderType.ollama:
+            body["options"] = self.params
+        else:
+            body |= self.params
+            if stream:
+                body["stream_options"] = {"include_usage": True}
+
+        body |= self.extra
+
+        return json.dumps(body, ensure_ascii=False).encode()
+
+    def _error(self, status_code: int, body: bytes) -> ProviderHTTPError:
+        message = body.decode(errors="replace")
+
+        try:
+            error = json.loads(body).get("error", message)
+        except (ValueError, AttributeError):
+            error = message
+
+        if isinstance(error, dict):
+            status_code = error.get("code") if isinstance(error.get("code"), int) else status_code
+            error = error.get("message", message)
+
+        return ProviderHTTPError(status_code, str(error), self._url)
+
+
+class NativeStructuredModel:
+    """Структурированный вывод нативного клиента: ответ валидируется моделью вывода."""
+
+    __slots__ = ("model", "schema", "include_raw")
+
+    def __init__(self, model: NativeChatModel, schema: Type[BaseModel], include_raw: bool = False):
+        self.model = model
+        self.schema = schema
+        self.include_raw = include_raw
+
+    async def ainvoke(self, messages: list[BaseMessage]) -> dict[str, Any] | BaseModel:
+        """
+        Returns:
+            dict[str, Any] | BaseModel: При include_raw словарь с ключами raw, parsed,
+                parsing_error, иначе экземпляр модели вывода.
+        """
+        raw = await self.model.ainvoke(messages)
+
+        try:
+            parsed, parsing_error = self.schema.model_validate_json(raw.content), None
+        except ValidationError as exc:
+            if not self.include_raw:
+                raise
+            parsed, parsing_error = None, exc
+
+        if not self.include_raw:
+            return parsed
+
+        return {"raw": raw, "parsed": parsed, "parsing_error": parsing_error}
@@ -0,0 +1,220 @@
+import asyncio
+import random
+import sys
+import time
+from collections import deque
+from typing import Awaitable, Callable, TypeVar
+
+from pydantic import BaseModel
+
+from lightunillm.typization import LLMProvider
+
+R = TypeVar('R')
+
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    Определяет, имеет ли смысл повторить запрос после ошибки.
+
+    Повторяются транспортные ошибки, таймауты, 429 и 5xx ответы.
+    """
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+
+    if getattr(exc, "status_code", None) in RETRYABLE_STATUS_CODES:
+        return True
+
+    # Ошибки httpx и openai возможны, только если модули уже загружены клиентами
+    httpx = sys.modules.get("httpx")
+    if httpx is not None and isinstance(exc, httpx.TransportError):
+        return True
+
+    openai = sys.modules.get("openai")
+    return openai is not None and isinstance(exc, openai.APIConnectionError)
+
+
+class RetryPolicy(BaseModel):
+    """Повтор запросов с экспоненциальной задержкой и случайным разбросом (full jitter)."""
+
+    max_attempts: int = 3
+    base_delay: float = 0.25
+    max_delay: float = 8.0
+    multiplier: float = 2.0
+    jitter: bool = True
+
+    def delay(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** attempt)
+        return random.uniform(0, delay) if self.jitter else delay
+
+
+class HedgePolicy(BaseModel):
+    """
+    Дублирующие (hedged) запросы: если ответ не получен за время, равное
+    квантилю quantile наблюдаемых задержек, тот же запрос отправляется на
+    следующую реплику и используется первый полученный ответ.
+    """
+
+    quantile: float = 0.95
+    min_delay: float = 0.05
+    max_delay: float | None = None
+    min_samples: int = 20
+
+
+class LatencyTracker:
+    """Скользящее окно задержек успешных запросов."""
+
+    __slots__ = ("_samples",)
+
+    def __init__(self, size: int = 256):
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def observe(self, latency: float) -> None:
+        self._samples.append(latency)
+
+    def quantile(self, q: float) -> float | None:
+        if not self._samples:
+            return None
+
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class ResilientExecutor:
+    """
+    Выполняет запрос с повторами, дублированием и переключением между провайдерами.
+
+    Провайдеры перебираются по порядку: к следующему переходим, когда на
+    текущем исчерпаны повторы для повторяемой ошибки. Неповторяемые ошибки
+    пробрасываются сразу.
+    """
+
+    def __init__(self, retry: RetryPolicy | None = None, hedge: HedgePolicy | None = None):
+        """
+        Args:
+            retry (RetryPolicy | None): Политика повторов. По умолчанию RetryPolicy().
+            hedge (HedgePolicy | None): Политика дублирования. None отключает дублирование.
+        """
+        self.retry = retry or RetryPolicy()
+        self.hedge = hedge
+        self._latencies: dict[tuple[str, str], LatencyTracker] = {}
+
+    def latency(self, llm_provider: LLMProvider) -> LatencyTracker:
+        key = (llm_provider.base_url, llm_provider.model_id)
+        tracker = self._latencies.get(key)
+
+        if tracker is None:
+            tracker = self._latencies[key] = LatencyTracker()
+
+        return tracker
+
+    def hedge_delay(self, llm_provider: LLMProvider) -> float | None:
+        """Возвращает задержку перед дублирующим запросом или None, если статистики недостаточно."""
+        if self.hedge is None:
+            return None
+
+        tracker = self.latency(llm_provider)
+        if len(tracker) < self.hedge.min_samples:
+            return None
+
+        delay = max(self.hedge.min_delay, tracker.quantile(self.hedge.quantile))
+        return delay if self.hedge.max_delay is None else min(delay, self.hedge.max_delay)
+
+    async def run(
+        self,
+        providers: list[LLMProvider],
+        attempt: Callable[[LLMProvider], Awaitable[R]],
+        hedge: bool = True
+    ) -> R:
+        """
+        Выполняет attempt на провайдерах из списка по порядку.
+
+        Args:
+            providers (list[LLMProvider]): Провайдеры в порядке предпочтения.
+            attempt (Callable[[LLMProvider], Awaitable[R]]): Одна попытка запроса к провайдеру.
+            hedge (bool): Разрешить дублирующие запросы. Отключается для попыток,
+                результат которых удерживает ресурсы (например, открытый поток).
+
+        Returns:
+            R: Результат первой успешной попытки.
+
+        Raises:
+            ValueError: Если список провайдеров пуст.
+        """
+        if not providers:
+            raise ValueError("No LLM providers to run the request on")
+
+        last_error: BaseException | None = None
+
+        for index, llm_provider in enumerate(providers):
+            hedge_provider = providers[index + 1] if hedge and index + 1 < len(providers) else None
+
+            try:
+                return await self._with_retry(llm_provider, hedge_provider, attempt)
+            except Exception as exc:
+                if not is_retryable(exc):
+                    raise
+                last_error = exc
+
+        raise last_error
+
+    async def _with_retry(
+        self,
+        llm_provider: LLMProvider,
+        hedge_provider: LLMProvider | None,
+        attempt: Callable[[LLMProvider], Awaitable[R]]
+    ) -> R:
+        for attempt_number in range(self.retry.max_attempts):
+            try:
+                return await self._hedged(llm_provider, hedge_provider, attempt)
+            except Exception as exc:
+                if not is_retryable(exc) or attempt_number + 1 >= self.retry.max_attempts:
+                    raise
+
+            await asyncio.sleep(self.retry.delay(attempt_number))
+
+    async def _hedged(
+        self,
+        llm_provider: LLMProvider,
+        hedge_provider: LLMProvider | None,
+        attempt: Callable[[LLMProvider], Awaitable[R]]
+    ) -> R:
+        delay = self.hedge_delay(llm_provider) if hedge_provider is not None else None
+        if delay is None:
+            return await self._timed(llm_provider, attempt)
+
+        pending = {asyncio.ensure_future(self._timed(llm_provider, attempt))}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return done.pop().result()
+
+            pending.add(asyncio.ensure_future(self._timed(hedge_provider, attempt)))
+
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+
+            raise error
+        finally:
+            # Проигравшие попытки дожидаются отмены, чтобы освободить слоты планировщика и соединения
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _timed(self, llm_provider: LLMProvider, attempt: Callable[[LLMProvider], Awaitable[R]]) -> R:
+        started = time.monotonic()
+        result = await attempt(llm_provider)
+        self.latency(llm_provider).observe(time.monotonic() - started)
+
+        return result
@@ -0,0 +1,339 @@
+import bisect
+import hashlib
+import itertools
+import logging
+import re
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Literal
+
+from lightunillm.typization import LLMProvider
+from lightunillm.core.abstracts.ProviderRouterAbstract import ProviderRouterAbstract
+from lightunillm.core.resilience import is_retryable
+
+logger = logging.getLogger(__name__)
+
+
+_TEMPLATE_TAG = re.compile(r"\{[{%#]")
+
+
+@lru_cache(maxsize=1024)
+def template_prefix(source: str) -> str:
+    """
+    Возвращает статическое начало шаблона Jinja - текст до первого ``{{``, ``{%`` или ``{#``.
+
+    Args:
+        source (str): Исходный текст шаблона.
+
+    Returns:
+        str: Общее для всех рендеров начало шаблона.
+    """
+    match = _TEMPLATE_TAG.search(source)
+    return source if match is None else source[:match.start()]
+
+
+def stable_hash(text: str) -> int:
+    """Хеш, одинаковый во всех процессах (в отличие от встроенного ``hash``)."""
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "big")
+
+
+def _tiers(providers: list[LLMProvider]) -> list[list[LLMProvider]]:
+    """Группирует провайдеров по модели в порядке первого появления. Реплики одной модели взаимозаменяемы."""
+    tiers: dict[str, list[LLMProvider]] = {}
+
+    for llm_provider in providers:
+        tiers.setdefault(llm_provider.model_id, []).append(llm_provider)
+
+    return list(tiers.values())
+
+
+class PrefixRouter(ProviderRouterAbstract):
+    """
+    Маршрутизация по префиксу системного промпта для бэкендов с кешем префиксов (vLLM).
+
+    Запросы с одинаковым началом системного сообщения отправляются на одну
+    и ту же реплику (консистентное хеширование), поэтому попадают в её кеш
+    KV. Ключом служит статическое начало шаблона системного сообщения, если
+    оно не короче min_prefix_chars, иначе всё отрендеренное сообщение. При
+    добавлении или удалении реплики меняется маршрут только ~1/N ключей.
+
+    Кольцо строится для реплик каждой модели отдельно: порядок между моделями
+    (основная, затем резервные) сохраняется. Резервные попытки идут на
+    следующие реплики по кольцу, поэтому тоже стабильны для ключа.
+    """
+
+    def __init__(self, virtual_nodes: int = 64, min_prefix_chars: int = 64, max_rings: int = 64):
+        """
+        Args:
+            virtual_nodes (int): Количество точек каждой реплики на кольце.
+            min_prefix_chars (int): Минимальная длина статического префикса шаблона,
+                чтобы использовать его как ключ.
+            max_rings (int): Количество кешируемых колец для разных наборов реплик.
+        """
+        self.virtual_nodes = virtual_nodes
+        self.min_prefix_chars = min_prefix_chars
+        self.max_rings = max_rings
+
+        self._rings: OrderedDict[tuple, tuple[list[int], list[int]]] = OrderedDict()
+
+    def key(self, system_message: str, template: str | None = None) -> str | None:
+        if template is not None:
+            prefix = template_prefix(template)
+            if len(prefix) >= self.min_prefix_chars and system_message.startswith(prefix):
+                system_message = prefix
+
+        return hashlib.blake2b(system_message.encode(), digest_size=8).hexdigest()
+
+    def order(self, providers: list[LLMProvider], key: str | None = None) -> list[LLMProvider]:
+        if key is None or len(providers) < 2:
+            return providers
+
+        point = stable_hash(key)
+        ordered: list[LLMProvider] = []
+
+        for tier in _tiers(providers):
+            ordered.extend(self._ring_order(tier, point) if len(tier) > 1 else tier)
+
+        return ordered
+
+    def _ring_order(self, providers: list[LLMProvider], point: int) -> list[LLMProvider]:
+        points, owners = self._ring(providers)
+        start = bisect.bisect(points, point)
+
+        ordered: list[LLMProvider] = []
+        seen: set[int] = set()
+
+        for offset in range(len(points)):
+            owner = owners[(start + offset) % len(points)]
+            if owner not in seen:
+                seen.add(owner)
+                ordered.append(providers[owner])
+                if len(ordered) == len(providers):
+                    break
+
+        return ordered
+
+    def _ring(self, providers: list[LLMProvider]) -> tuple[list[int], list[int]]:
+        identity = tuple((llm_provider.base_url, llm_provider.model_id) for llm_provider in providers)
+        ring = self._rings.get(identity)
+
+        if ring is None:
+            nodes = sorted(
+                (stable_hash(f"{base_url}|{model_id}#{replica}"), index)
+                for index, (base_url, model_id) in enumerate(identity)
+                for replica in range(self.virtual_nodes)
+            )
+            ring = self._rings[identity] = ([point for point, _ in nodes], [index for _, index in nodes])
+
+            while len(self._rings) > self.max_rings:
+                self._rings.popitem(last=False)
+        else:
+            self._rings.move_to_end(identity)
+
+        return ring
+
+
+class RoundRobinRouter(ProviderRouterAbstract):
+    """
+    Распределяет запросы по репликам каждой модели по кругу.
+
+    Резервные провайдеры другой модели остаются после реплик основной.
+    """
+
+    def __init__(self):
+        self._turns = itertools.count()
+
+    def order(self, providers: list[LLMProvider], key: str | None = None) -> list[LLMProvider]:
+        if len(providers) < 2:
+            return providers
+
+        turn = next(self._turns)
+        ordered: list[LLMProvider] = []
+
+        for tier in _tiers(providers):
+            shift = turn % len(tier)
+            ordered.extend(tier[shift:] + tier[:shift])
+
+        return ordered
+
+
+class ReplicaStats:
+    """Нагрузка, задержки и состояние здоровья одной реплики с точки зрения LoadAwareRouter."""
+
+    __slots__ = ("outstanding", "latency", "throughput", "failures", "ejections", "ejected_until")
+
+    def __init__(self):
+        self.outstanding = 0
+        self.latency: float | None = None
+        self.throughput: float | None = None
+        self.failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+
+    @property
+    def ejected(self) -> bool:
+        return self.ejected_until > time.monotonic()
+
+
+class LoadAwareRouter(ProviderRouterAbstract):
+    """
+    Маршрутизация по нагрузке между репликами одной модели (least outstanding requests или EWMA).
+
+    Роутер считает незавершённые запросы каждой реплики и сглаживает (EWMA)
+    время ответа - до первого фрагмента для потоковых запросов - и скорость
+    генерации потоков. Стратегия least_outstanding выбирает реплику с
+    наименьшим числом незавершённых запросов, ewma - с наименьшей оценкой
+    (outstanding + 1) * (latency + expected_tokens / throughput), то есть
+    учитывает и нагрузку, и скорость реплики.
+
+    Пассивная проверка здоровья: после max_failures подряд повторяемых ошибок
+    реплика исключается на ejection_time секунд, при повторных исключениях
+    срок удваивается до max_ejection_time. По истечении срока реплика снова
+    получает запросы, но исключается после первой же ошибки, пока не ответит
+    успешно. Исключённые реплики ставятся в конец порядка попыток, после
+    резервных провайдеров, поэтому используются, только если остальные
+    недоступны.
+
+    Реплики группируются по model_id: порядок между группами (основная модель,
+    затем резервные) сохраняется, внутри группы реплики упорядочиваются по
+    нагрузке. Статистика хранится по (base_url, model_id) и общая для всех
+    обработчиков, использующих роутер.
+    """
+
+    def __init__(
+        self,
+        strategy: Literal["ewma", "least_outstanding"] = "ewma",
+        decay: float = 0.3,
+        expected_tokens: int = 128,
+        max_failures: int = 3,
+        ejection_time: float = 10.0,
+        max_ejection_time: float = 300.0
+    ):
+        """
+        Args:
+            strategy (Literal["ewma", "least_outstanding"]): Стратегия выбора реплики.
+            decay (float): Вес нового замера в EWMA задержки и скорости генерации.
+            expected_tokens (int): Ожидаемая длина ответа в токенах для оценки времени генерации.
+            max_failures (int): Количество ошибок подряд, после которого реплика исключается.
+            ejection_time (float): Срок первого исключения в секундах.
+            max_ejection_time (float): Максимальный срок исключения в секундах.
+        """
+        if strategy not in ("ewma", "least_outstanding"):
+            raise ValueError(f"Unknown load balancing strategy: {strategy!r}")
+
+        self.strategy = strategy
+        self.decay = decay
+        self.expected_tokens = expected_tokens
+        self.max_failures = max_failures
+        self.ejection_time = ejection_time
+        self.max_ejection_time = max_ejection_time
+
+        self._stats: dict[tuple[str, str], ReplicaStats] = {}
+
+    def stats(self, llm_provider: LLMProvider) -> ReplicaStats:
+        key = (llm_provider.base_url, llm_provider.model_id)
+        stats = self._stats.get(key)
+
+        if stats is None:
+            stats = self._stats[key] = ReplicaStats()
+
+        return stats
+
+    def order(self, providers: list[LLMProvider], key: str | None = None) -> list[LLMProvider]:
+        if len(providers) < 2:
+            return providers
+
+        now = time.monotonic()
+        ordered: list[LLMProvider] = []
+        ejected: list[tuple[float, LLMProvider]] = []
+
+        for tier in _tiers(providers):
+            healthy: list[tuple[LLMProvider, ReplicaStats]] = []
+
+            for llm_provider in tier:
+                stats = self.stats(llm_provider)
+                if stats.ejected_until > now:
+                    ejected.append((stats.ejected_until, llm_provider))
+                else:
+                    healthy.append((llm_provider, stats))
+
+            if len(healthy) > 1:
+                score = self._least_outstanding if self.strategy == "least_outstanding" else self._ewma_scorer(healthy)
+                healthy.sort(key=lambda item: score(item[1]))
+
+            ordered.extend(llm_provider for llm_provider, _ in healthy)
+
+        ejected.sort(key=lambda item: item[0])
+        ordered.extend(llm_provider for _, llm_provider in ejected)
+
+        return ordered
+
+    def on_start(self, llm_provider: LLMProvider) -> None:
+        self.stats(llm_provider).outstanding += 1
+
+    def on_response(self, llm_provider: LLMProvider, latency: float) -> None:
+        stats = self.stats(llm_provider)
+        stats.latency = self._smooth(stats.latency, latency)
+
+    def on_throughput(self, llm_provider: LLMProvider, tokens_per_second: float) -> None:
+        stats = self.stats(llm_provider)
+        stats.throughput = self._smooth(stats.throughput, tokens_per_second)
+
+    def on_end(self, llm_provider: LLMProvider, error: BaseException | None = None) -> None:
+        stats = self.stats(llm_provider)
+        stats.outstanding = max(0, stats.outstanding - 1)
+
+        if error is None:
+            stats.failures = 0
+            stats.ejections = 0
+            return
+
+        # Отмена (проигравший дублирующий запрос, закрытый поток) и ошибки запроса - не сбой реплики
+        if not is_retryable(error):
+            return
+
+        stats.failures += 1
+
+        now = time.monotonic()
+        if stats.ejected_until > now:
+            return
+
+        # Реплика после исключения (ejections > 0) исключается снова после первой ошибки
+        if stats.failures >= self.max_failures or stats.ejections:
+            duration = min(self.ejection_time * 2 ** stats.ejections, self.max_ejection_time)
+            stats.ejected_until = now + duration
+            stats.ejections += 1
+            stats.failures = 0
+
+            logger.warning(
+                "Ejecting replica %s (%s) for %.1fs after %r",
+                llm_provider.base_url, llm_provider.model_id, duration, error
+            )
+
+    def _smooth(self, current: float | None, sample: float) -> float:
+        return sample if current is None else current + self.decay * (sample - current)
+
+    @staticmethod
+    def _least_outstanding(stats: ReplicaStats) -> tuple[int, float]:
+        return stats.outstanding, stats.latency or 0.0
+
+    def _ewma_scorer(self, replicas: list[tuple[LLMProvider, ReplicaStats]]) -> Callable[[ReplicaStats], float]:
+        latencies = [stats.latency for _, stats in replicas if stats.latency is not None]
+        throughputs = [stats.throughput for _, stats in replicas if stats.throughput is not None]
+
+        # Реплики без замеров оцениваются оптимистично, как лучшая из известных, чтобы получить запросы
+        best_latency = min(latencies) if latencies else None
+        best_throughput = max(throughputs) if throughputs else None
+
+        def score(stats: ReplicaStats) -> float:
+            latency = stats.latency if stats.latency is not None else best_latency
+            cost = latency if latency is not None else 1.0
+
+            throughput = stats.throughput if stats.throughput is not None else best_throughput
+            if throughput:
+                cost += self.expected_tokens / throughput
+
+            return (stats.outstanding + 1) * cost
+
+        return score
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    from lightunillm.core.interfaces.AIHandlerInterface import AIHandlerInterface
+    from lightunillm.utils.PromptLoader import PromptLoader
+
+logger = logging.getLogger(__name__)
+
+
+async def warm_up(
+    handlers: Iterable[AIHandlerInterface],
+    connections: int = 1,
+    probe: bool = False,
+    fallbacks: bool = False,
+    timeout: float = 10.0
+) -> dict[AIHandlerInterface, Exception]:
+    """
+    Прогревает обработчики при старте сервиса, чтобы первые запросы не ждали
+    хранилище промптов, создание клиентов и установку соединений.
+
+    Промпты обработчиков с общим загрузчиком загружаются одним пакетным
+    запросом (``PromptLoader.preload``), затем все обработчики прогреваются
+    конкурентно (``AIHandlerInterface.warm_up``). Общие провайдеры прогреваются
+    один раз. Ошибка одного обработчика не прерывает прогрев остальных.
+
+    Args:
+        handlers (Iterable[AIHandlerInterface]): Обработчики.
+        connections (int): Количество соединений на провайдера.
+        probe (bool): Загрузить модели Ollama пробным запросом.
+        fallbacks (bool): Прогреть и резервных провайдеров.
+        timeout (float): Тайм-аут каждого запроса в секундах.
+
+    Returns:
+        dict[AIHandlerInterface, Exception]: Ошибки прогрева по обработчикам, пустой словарь - все прогреты.
+    """
+    handlers = list(handlers)
+    started = time.monotonic()
+
+    prompt_ids: dict[int, tuple[PromptLoader, set]] = {}
+    for handler in handlers:
+        loader = handler.prompt_loader
+        if handler.prompt_id is not None and loader.cache_enabled:
+            prompt_ids.setdefault(id(loader), (loader, set()))[1].add(handler.prompt_id)
+
+    preloads = await asyncio.gather(
+        *(loader.preload(ids) for loader, ids in prompt_ids.values()), return_exceptions=True
+    )
+    for result in preloads:
+        # Промпты, которые не загрузились пакетом, обработчики загрузят по одному
+        if isinstance(result, Exception):
+            logger.warning("Prompt preload failed: %r", result)
+
+    results = await asyncio.gather(
+        *(handler.warm_up(connections, probe, fallbacks, timeout) for handler in handlers), return_exceptions=True
+    )
+
+    errors = {}
+    for handler, result in zip(handlers, results):
+        if isinstance(result, Exception):
+            logger.warning("Warm-up of %s (prompt_id=%r) failed: %r", type(handler).__name__, handler.prompt_id, result)
+            errors[handler] = result
+
+    logger.info(
+        "Warmed up %d of %d handlers in %.2fs", len(handlers) - len(errors), len(handlers), time.monotonic() - started
+    )
+    return errors
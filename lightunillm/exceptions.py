@@ -0,0 +1,70 @@
+class LightUniLLMError(Exception):
+    """Базовое исключение LightUniLLM."""
+
+
+class ContextWindowExceededError(LightUniLLMError, ValueError):
+    """Промпт вместе с ожидаемым ответом не помещается в контекстное окно модели."""
+
+    def __init__(self, model_id: str, prompt_tokens: int, output_tokens: int, budget: int):
+        """
+        Args:
+            model_id (str): Модель, для которой выполнялась проверка.
+            prompt_tokens (int): Оценка количества токенов промпта.
+            output_tokens (int): Зарезервировано токенов под ответ.
+            budget (int): Размер контекстного окна.
+        """
+        super().__init__(
+            f"Prompt of {prompt_tokens} tokens plus {output_tokens} output tokens "
+            f"exceeds the context window of {budget} tokens for model {model_id!r}"
+        )
+        self.model_id = model_id
+        self.prompt_tokens = prompt_tokens
+        self.output_tokens = output_tokens
+        self.budget = budget
+
+
+class ProviderHTTPError(LightUniLLMError):
+    """Провайдер ответил ошибкой HTTP (нативный транспорт)."""
+
+    def __init__(self, status_code: int, message: str, url: str = ""):
+        """
+        Args:
+            status_code (int): HTTP статус ответа.
+            message (str): Текст ошибки из ответа провайдера.
+            url (str): Адрес запроса.
+        """
+        super().__init__(f"Error code: {status_code} - {message}" + (f" ({url})" if url else ""))
+        self.status_code = status_code
+        self.message = message
+        self.url = url
+
+
+class BudgetExceededError(LightUniLLMError):
+    """Промпт исчерпал квоту токенов или стоимости (``UsageBudget``)."""
+
+    def __init__(self, prompt_id, used_tokens: int, used_cost: float, window: float | None, retry_after: float):
+        """
+        Args:
+            prompt_id (Any): Идентификатор промпта.
+            used_tokens (int): Израсходовано токенов в окне квоты.
+            used_cost (float): Израсходовано в окне квоты в единицах валюты.
+            window (float | None): Окно квоты в секундах, None - за всё время.
+            retry_after (float): Через сколько секунд квота освободится (inf, если не освободится).
+        """
+        period = "in total" if window is None else f"in the last {window:g}s"
+        super().__init__(
+            f"Budget of prompt {prompt_id!r} exceeded: {used_tokens} tokens, cost {used_cost:.6g} {period}"
+        )
+        self.prompt_id = prompt_id
+        self.used_tokens = used_tokens
+        self.used_cost = used_cost
+        self.window = window
+        self.retry_after = retry_after
+
+
+__all__ = [
+    "LightUniLLMError",
+    "ContextWindowExceededError",
+    "ProviderHTTPError",
+    "BudgetExceededError"
+]
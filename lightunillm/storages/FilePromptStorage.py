@@ -0,0 +1,159 @@
+import asyncio
+import json
+import os
+from typing import Any, Iterable
+
+from lightunillm.typization import Prompt, LLMProvider, PromptBundle
+from lightunillm.core.abstracts.PromptStorageAbstract import PromptStorageAbstract
+from lightunillm.storages.records import bundle_from_record
+
+EXTENSIONS = (".json", ".yaml", ".yml")
+
+
+class FilePromptStorage(PromptStorageAbstract):
+    """
+    Хранилище промптов в каталоге файлов ``<prompt_id>.json`` / ``.yaml`` / ``.yml``.
+
+    Формат файла описан в ``lightunillm.storages.records.bundle_from_record``.
+    Версия промпта - время изменения и размер файла, поэтому ревалидация
+    в PromptLoader стоит одного ``stat``. Файлы читаются в потоках, не более
+    max_concurrency одновременно. В режиме preload весь каталог читается
+    в память одним проходом при первом обращении (или явно через ``reload``).
+    Идентификатор промпта - имя файла (``str(prompt_id)``), поэтому ``1`` и
+    ``"1"`` - один и тот же промпт. Для YAML нужен пакет ``pyyaml``.
+    """
+
+    def __init__(self, directory: str, preload: bool = False, max_concurrency: int = 8):
+        """
+        Args:
+            directory (str): Каталог с файлами промптов.
+            preload (bool): Держать весь каталог промптов в памяти.
+            max_concurrency (int): Максимальное количество одновременно читаемых файлов.
+        """
+        self.directory = directory
+        self.preload = preload
+
+        self._memory: dict[str, PromptBundle] | None = None
+        self._loading = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def get_prompt(self, prompt_id: any) -> Prompt:
+        return (await self.get_prompt_bundle(prompt_id)).prompt
+
+    async def get_llm_provider(self, prompt_id: any) -> LLMProvider:
+        return (await self.get_prompt_bundle(prompt_id)).llm_provider
+
+    async def get_llm_providers(self, prompt_id: any) -> list[LLMProvider]:
+        return (await self.get_prompt_bundle(prompt_id)).llm_providers
+
+    async def get_version(self, prompt_id: any) -> any:
+        if self.preload:
+            bundle = (await self._loaded()).get(str(prompt_id))
+            return bundle.version if bundle else None
+
+        path = self._path(str(prompt_id))
+        if path is None:
+            return None
+
+        stat = await asyncio.to_thread(os.stat, path)
+        return stat.st_mtime_ns, stat.st_size
+
+    async def get_prompt_bundle(self, prompt_id: any) -> PromptBundle:
+        if self.preload:
+            bundle = (await self._loaded()).get(str(prompt_id))
+            if bundle is None:
+                raise KeyError(f"Prompt not found: {prompt_id!r}")
+            return bundle
+
+        path = self._path(str(prompt_id))
+        if path is None:
+            raise KeyError(f"Prompt not found: {prompt_id!r}")
+
+        async with self._semaphore:
+            return await asyncio.to_thread(self._read, path)
+
+    async def get_prompt_bundles(self, prompt_ids: Iterable[any]) -> dict[any, PromptBundle]:
+        prompt_ids = list(prompt_ids)
+        bundles = await asyncio.gather(*(self.get_prompt_bundle(prompt_id) for prompt_id in prompt_ids))
+
+        return dict(zip(prompt_ids, bundles))
+
+    async def get_prompts(self, prompt_ids: Iterable[any]) -> dict[any, Prompt]:
+        bundles = await self.get_prompt_bundles(prompt_ids)
+        return {prompt_id: bundle.prompt for prompt_id, bundle in bundles.items()}
+
+    async def list_prompt_ids(self) -> list[any]:
+        if self.preload:
+            return list(await self._loaded())
+
+        return sorted(await asyncio.to_thread(self._scan))
+
+    async def reload(self) -> int:
+        """
+        Перечитывает весь каталог в память одним проходом (режим preload).
+
+        Returns:
+            int: Количество загруженных промптов.
+        """
+        def read_all() -> dict[str, PromptBundle]:
+            return {prompt_id: self._read(path) for prompt_id, path in self._scan().items()}
+
+        self._memory = await asyncio.to_thread(read_all)
+        return len(self._memory)
+
+    async def __aenter__(self) -> "FilePromptStorage":
+        if self.preload:
+            await self._loaded()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def _loaded(self) -> dict[str, PromptBundle]:
+        if self._memory is None:
+            async with self._loading:
+                if self._memory is None:
+                    await self.reload()
+
+        return self._memory
+
+    def _path(self, prompt_id: str) -> str | None:
+        if os.sep in prompt_id or (os.altsep and os.altsep in prompt_id) or prompt_id.startswith("."):
+            raise ValueError(f"Invalid prompt id: {prompt_id!r}")
+
+        for extension in EXTENSIONS:
+            path = os.path.join(self.directory, prompt_id + extension)
+            if os.path.isfile(path):
+                return path
+
+        return None
+
+    def _scan(self) -> dict[str, str]:
+        paths: dict[str, str] = {}
+
+        for name in os.listdir(self.directory):
+            prompt_id, extension = os.path.splitext(name)
+            if extension in EXTENSIONS and prompt_id not in paths:
+                paths[prompt_id] = os.path.join(self.directory, name)
+
+        return paths
+
+    @staticmethod
+    def _read(path: str) -> PromptBundle:
+        with open(path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            data = file.read()
+
+        return bundle_from_record(_parse(path, data), (stat.st_mtime_ns, stat.st_size))
+
+
+def _parse(path: str, data: bytes) -> dict[str, Any]:
+    if path.endswith(".json"):
+        return json.loads(data)
+
+    try:
+        import yaml
+    except ImportError as exc:
+        raise ImportError("YAML prompt files require 'pyyaml': pip install pyyaml") from exc
+
+    return yaml.safe_load(data)
@@ -0,0 +1,225 @@
+import asyncio
+import json
+import queue
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator, TypeVar
+
+from lightunillm.typization import Prompt, LLMProvider, PromptBundle
+from lightunillm.core.abstracts.PromptStorageAbstract import PromptStorageAbstract
+from lightunillm.storages.records import bundle_from_record, record_from_bundle
+
+R = TypeVar('R')
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS prompts ("
+    "prompt_id TEXT PRIMARY KEY, system_message TEXT NOT NULL, human_message TEXT NOT NULL, "
+    "llm_providers TEXT NOT NULL, version INTEGER NOT NULL)"
+)
+
+# Ограничение SQLite на количество параметров в одном запросе
+MAX_VARIABLES = 500
+
+
+class _ConnectionPool:
+    """Пул соединений SQLite для выполнения запросов в потоках."""
+
+    def __init__(self, path: str, size: int):
+        self._connections: queue.Queue[sqlite3.Connection] = queue.Queue()
+
+        for _ in range(size):
+            connection = sqlite3.connect(path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(SCHEMA)
+            connection.commit()
+            self._connections.put(connection)
+
+        self.size = size
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        connection = self._connections.get()
+        try:
+            yield connection
+        finally:
+            self._connections.put(connection)
+
+    async def run(self, fn: Callable[[sqlite3.Connection], R]) -> R:
+        def call() -> R:
+            with self.connection() as connection:
+                return fn(connection)
+
+        return await asyncio.to_thread(call)
+
+    def close(self) -> None:
+        for _ in range(self.size):
+            self._connections.get().close()
+
+
+class SQLitePromptStorage(PromptStorageAbstract):
+    """
+    Хранилище промптов в SQLite.
+
+    Запросы выполняются в потоках на пуле соединений, поэтому не блокируют
+    event loop. Пакетные методы читают несколько промптов одним запросом.
+    В режиме preload весь каталог читается в память при первом обращении
+    (или явно через ``reload``), и дальнейшие запросы не обращаются к базе.
+
+    Идентификаторы промптов хранятся строками (``str(prompt_id)``), поэтому
+    ``1`` и ``"1"`` - один и тот же промпт. Пакетные методы возвращают его
+    под каждым запрошенным идентификатором.
+    """
+
+    def __init__(self, path: str, pool_size: int = 4, preload: bool = False):
+        """
+        Args:
+            path (str): Путь к файлу базы данных.
+            pool_size (int): Количество соединений в пуле.
+            preload (bool): Держать весь каталог промптов в памяти.
+        """
+        self.path = path
+        self.preload = preload
+
+        self._pool = _ConnectionPool(path, pool_size)
+        self._memory: dict[str, PromptBundle] | None = None
+        self._loading = asyncio.Lock()
+
+    async def get_prompt(self, prompt_id: any) -> Prompt:
+        return (await self.get_prompt_bundle(prompt_id)).prompt
+
+    async def get_llm_provider(self, prompt_id: any) -> LLMProvider:
+        return (await self.get_prompt_bundle(prompt_id)).llm_provider
+
+    async def get_llm_providers(self, prompt_id: any) -> list[LLMProvider]:
+        return (await self.get_prompt_bundle(prompt_id)).llm_providers
+
+    async def get_version(self, prompt_id: any) -> any:
+        if self.preload:
+            bundle = (await self._loaded()).get(str(prompt_id))
+            return bundle.version if bundle else None
+
+        def select(connection: sqlite3.Connection) -> Any:
+            row = connection.execute("SELECT version FROM prompts WHERE prompt_id = ?", (str(prompt_id),)).fetchone()
+            return row[0] if row else None
+
+        return await self._pool.run(select)
+
+    async def get_prompt_bundle(self, prompt_id: any) -> PromptBundle:
+        bundles = await self.get_prompt_bundles([prompt_id])
+        return bundles[prompt_id]
+
+    async def get_prompt_bundles(self, prompt_ids: Iterable[any]) -> dict[any, PromptBundle]:
+        prompt_ids = list(prompt_ids)
+        keys = list(dict.fromkeys(str(prompt_id) for prompt_id in prompt_ids))
+
+        if self.preload:
+            memory = await self._loaded()
+            found = {key: memory[key] for key in keys if key in memory}
+        else:
+            found = await self._pool.run(lambda connection: self._select(connection, keys))
+
+        missing = [prompt_id for prompt_id in prompt_ids if str(prompt_id) not in found]
+        if missing:
+            raise KeyError(f"Prompts not found: {missing!r}")
+
+        return {prompt_id: found[str(prompt_id)] for prompt_id in prompt_ids}
+
+    async def get_prompts(self, prompt_ids: Iterable[any]) -> dict[any, Prompt]:
+        bundles = await self.get_prompt_bundles(prompt_ids)
+        return {prompt_id: bundle.prompt for prompt_id, bundle in bundles.items()}
+
+    async def list_prompt_ids(self) -> list[any]:
+        if self.preload:
+            return list(await self._loaded())
+
+        return await self._pool.run(
+            lambda connection: [row[0] for row in connection.execute("SELECT prompt_id FROM prompts ORDER BY prompt_id")]
+        )
+
+    async def put(self, prompt_id: any, prompt: Prompt, llm_providers: list[LLMProvider]) -> None:
+        """
+        Добавляет или заменяет промпт.
+
+        Args:
+            prompt_id (any): Идентификатор промпта.
+            prompt (Prompt): Промпт.
+            llm_providers (list[LLMProvider]): Провайдеры в порядке переключения.
+        """
+        version = time.time_ns()
+        providers = json.dumps(record_from_bundle(prompt, llm_providers)["llm_providers"])
+
+        def upsert(connection: sqlite3.Connection) -> None:
+            connection.execute(
+                "INSERT OR REPLACE INTO prompts (prompt_id, system_message, human_message, llm_providers, version) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (str(prompt_id), prompt.system_message, prompt.human_message, providers, version)
+            )
+            connection.commit()
+
+        await self._pool.run(upsert)
+
+        if self._memory is not None:
+            self._memory[str(prompt_id)] = PromptBundle(prompt=prompt, llm_providers=llm_providers, version=version)
+
+    async def delete(self, prompt_id: any) -> None:
+        def remove(connection: sqlite3.Connection) -> None:
+            connection.execute("DELETE FROM prompts WHERE prompt_id = ?", (str(prompt_id),))
+            connection.commit()
+
+        await self._pool.run(remove)
+
+        if self._memory is not None:
+            self._memory.pop(str(prompt_id), None)
+
+    async def reload(self) -> int:
+        """
+        Перечитывает весь каталог в память одним запросом (режим preload).
+
+        Returns:
+            int: Количество загруженных промптов.
+        """
+        self._memory = await self._pool.run(lambda connection: self._select(connection, None))
+        return len(self._memory)
+
+    async def aclose(self) -> None:
+        self._pool.close()
+
+    async def __aenter__(self) -> "SQLitePromptStorage":
+        if self.preload:
+            await self._loaded()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def _loaded(self) -> dict[str, PromptBundle]:
+        if self._memory is None:
+            async with self._loading:
+                if self._memory is None:
+                    await self.reload()
+
+        return self._memory
+
+    @staticmethod
+    def _select(connection: sqlite3.Connection, keys: list[str] | None) -> dict[str, PromptBundle]:
+        query = "SELECT prompt_id, system_message, human_message, llm_providers, version FROM prompts"
+
+        if keys is None:
+            rows = connection.execute(query).fetchall()
+        else:
+            rows = []
+            for start in range(0, len(keys), MAX_VARIABLES):
+                batch = keys[start:start + MAX_VARIABLES]
+                rows += connection.execute(
+                    f"{query} WHERE prompt_id IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+
+        return {
+            prompt_id: bundle_from_record({
+                "system_message": system_message,
+                "human_message": human_message,
+                "llm_providers": json.loads(llm_providers),
+            }, version)
+            for prompt_id, system_message, human_message, llm_providers, version in rows
+        }
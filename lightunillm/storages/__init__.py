@@ -0,0 +1,11 @@
+from lightunillm.storages.SQLitePromptStorage import SQLitePromptStorage
+from lightunillm.storages.FilePromptStorage import FilePromptStorage
+from lightunillm.storages.records import bundle_from_record, record_from_bundle
+
+
+__all__ = [
+    "SQLitePromptStorage",
+    "FilePromptStorage",
+    "bundle_from_record",
+    "record_from_bundle"
+]
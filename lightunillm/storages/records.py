@@ -0,0 +1,40 @@
+from typing import Any
+
+from lightunillm.typization import Prompt, LLMProvider, PromptBundle
+
+
+def bundle_from_record(record: dict[str, Any], version: Any = None) -> PromptBundle:
+    """
+    Собирает PromptBundle из словаря хранилища.
+
+    Формат записи::
+
+        {
+            "system_message": "...",
+            "human_message": "...",
+            "llm_providers": [{"model_id": "...", "base_url": "...", "api_key": "...", "provider": "openai"}]
+        }
+
+    Вместо списка ``llm_providers`` допускается один ``llm_provider``.
+    """
+    llm_providers = record.get("llm_providers")
+    if llm_providers is None:
+        llm_providers = [record["llm_provider"]] if record.get("llm_provider") else []
+
+    if not llm_providers:
+        raise ValueError("Prompt record has no llm_providers")
+
+    return PromptBundle(
+        prompt=Prompt(system_message=record["system_message"], human_message=record["human_message"]),
+        llm_providers=[LLMProvider.model_validate(llm_provider) for llm_provider in llm_providers],
+        version=version
+    )
+
+
+def record_from_bundle(prompt: Prompt, llm_providers: list[LLMProvider]) -> dict[str, Any]:
+    """Обратное преобразование для записи в хранилище."""
+    return {
+        "system_message": prompt.system_message,
+        "human_message": prompt.human_message,
+        "llm_providers": [llm_provider.model_dump(mode="json", exclude_none=True) for llm_provider in llm_providers],
+    }
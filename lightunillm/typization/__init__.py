@@ -1,22 +1,32 @@
 from lightunillm.typization.typization import (
     Prompt,
     LLMProvider,
+    PromptBundle,
+    GenerationOptions,
     LLMWithStructuredOutput,
     LLMTokenUsage,
     ProviderType,
+    TransportType,
     PromptStatus,
     PromptSyncResult,
-    PromptAsyncResult
+    PromptAsyncResult,
+    StreamChunk,
+    StreamAccumulator
 )
 
 
 __all__ = [
     "Prompt",
     "LLMProvider",
+    "PromptBundle",
+    "GenerationOptions",
     "LLMWithStructuredOutput",
     "LLMTokenUsage",
     "ProviderType",
+    "TransportType",
     "PromptStatus",
     "PromptSyncResult",
-    "PromptAsyncResult"
+    "PromptAsyncResult",
+    "StreamChunk",
+    "StreamAccumulator"
 ]
@@ -3,8 +3,9 @@ from __future__ import annotations
 from langchain_core.messages import AIMessage, AIMessageChunk
 from pydantic import ValidationError
 from typing import Optional, Any
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 from enum import Enum
+from functools import lru_cache
 
 
 class Prompt(BaseModel):
@@ -16,18 +17,84 @@ class ProviderType(str, Enum):
     openai = "openai"
     ollama = "ollama"
 
+class TransportType(str, Enum):
+    """Клиент запросов к провайдеру: LangChain (ChatOpenAI/ChatOllama) или нативный HTTP клиент."""
+
+    langchain = "langchain"
+    native = "native"
+
 class LLMProvider(BaseModel):
     model_id: str
     base_url: str
     api_key: str
     provider: ProviderType
     num_ctx: int = 2048
+    max_in_flight: Optional[int] = None
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+    context_window: Optional[int] = None
+    replicas: Optional[list[str]] = None
+    transport: TransportType = TransportType.langchain
+
+class PromptBundle(BaseModel):
+    """Промпт, провайдеры в порядке переключения и версия - всё, что нужно для запроса по prompt_id."""
+
+    prompt: Prompt
+    llm_providers: list[LLMProvider]
+    version: Optional[Any] = None
+
+    @property
+    def llm_provider(self) -> LLMProvider:
+        return self.llm_providers[0]
+
+class GenerationOptions(BaseModel):
+    """Неизменяемые параметры генерации для одного запроса."""
+
+    model_config = ConfigDict(frozen=True)
+
+    temperature: Optional[float] = None
+    num_ctx: Optional[int] = None
+    max_tokens: Optional[int] = None
+    stop: Optional[tuple[str, ...]] = None
+    top_p: Optional[float] = None
+    seed: Optional[int] = None
+
+    def merge(self, other: GenerationOptions | None) -> GenerationOptions:
+        """Возвращает новые параметры, где заданные в other значения перекрывают текущие."""
+        if other is None:
+            return self
+
+        return self.model_copy(update=other.model_dump(exclude_none=True))
+
+    def to_model_fields(self, provider: ProviderType) -> dict[str, Any]:
+        """Переводит параметры в поля клиента языковой модели указанного провайдера."""
+        fields = {
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "seed": self.seed,
+            "stop": list(self.stop) if self.stop else None,
+        }
+
+        match provider:
+            case ProviderType.ollama:
+                fields |= {"num_ctx": self.num_ctx, "num_predict": self.max_tokens}
+            case _:
+                fields |= {"max_tokens": self.max_tokens}
+
+        return {key: value for key, value in fields.items() if value is not None}
+
 
 class LLMWithStructuredOutput[T](BaseModel):
     raw: AIMessage
     parsed: Optional[T]
     parsing_error: Optional[Any]
 
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def of(output_model: type[T]) -> type[LLMWithStructuredOutput[T]]:
+        """Возвращает закешированную специализацию ``LLMWithStructuredOutput[output_model]``."""
+        return LLMWithStructuredOutput[output_model]
+
 
 class LLMTokenUsage(BaseModel):
     completion_tokens: int
@@ -35,9 +102,40 @@ class LLMTokenUsage(BaseModel):
     total_tokens: int
     total_cost: Optional[float] = None
     provider: ProviderType
+    cached: bool = False
+
+    def __add__(self, other: LLMTokenUsage) -> LLMTokenUsage:
+        if not isinstance(other, LLMTokenUsage):
+            return NotImplemented
+
+        return LLMTokenUsage(
+            completion_tokens=self.completion_tokens + other.completion_tokens,
+            prompt_tokens=self.prompt_tokens + other.prompt_tokens,
+            total_tokens=self.total_tokens + other.total_tokens,
+            total_cost=None if self.total_cost is None and other.total_cost is None else (self.total_cost or 0) + (other.total_cost or 0),
+            provider=self.provider,
+            cached=self.cached and other.cached
+        )
 
     @staticmethod
     def from_structured_output(llm: LLMWithStructuredOutput[Any], provider: ProviderType, is_stream: bool = False) -> LLMTokenUsage | None:
+        return LLMTokenUsage._mark_cached(
+            LLMTokenUsage._from_structured_output(llm, provider, is_stream), getattr(llm, "raw", None)
+        )
+
+    @staticmethod
+    def from_message(message: AIMessage, provider: ProviderType, is_stream: bool = False) -> LLMTokenUsage | None:
+        return LLMTokenUsage._mark_cached(LLMTokenUsage._from_message(message, provider, is_stream), message)
+
+    @staticmethod
+    def _mark_cached(usage: LLMTokenUsage | None, message: AIMessage | None) -> LLMTokenUsage | None:
+        if usage is not None and message is not None and message.response_metadata.get("cache_hit"):
+            usage.cached = True
+
+        return usage
+
+    @staticmethod
+    def _from_structured_output(llm: LLMWithStructuredOutput[Any], provider: ProviderType, is_stream: bool = False) -> LLMTokenUsage | None:
         try:
             match provider:
                 case ProviderType.ollama:
@@ -72,7 +170,7 @@ class LLMTokenUsage(BaseModel):
 
 
     @staticmethod
-    def from_message(message: AIMessage, provider: ProviderType, is_stream: bool = False) -> LLMTokenUsage | None:
+    def _from_message(message: AIMessage, provider: ProviderType, is_stream: bool = False) -> LLMTokenUsage | None:
         try:
             match provider:
                 case ProviderType.ollama:
@@ -111,7 +209,7 @@ class PromptStatus(str, Enum):
 
 class PromptSyncResult[T](BaseModel):
     content: Optional[T] = None
-    token_usages: list[LLMTokenUsage] = []
+    token_usages: list[LLMTokenUsage] = Field(default_factory=list)
     status: PromptStatus = PromptStatus.success
     error: Optional[str] = None
 
@@ -124,9 +222,29 @@ class PromptSyncResult[T](BaseModel):
 
         return self
 
+    def accumulate(self, other: PromptSyncResult[Any]) -> PromptSyncResult:
+        """
+        Как ``|``, но суммирует расход токенов в одну запись на провайдера,
+        поэтому размер результата не растёт с количеством объединённых ответов.
+        """
+        if isinstance(other, PromptSyncResult):
+            for usage in other.token_usages:
+                for index, own in enumerate(self.token_usages):
+                    if own.provider == usage.provider:
+                        self.token_usages[index] = own + usage
+                        break
+                else:
+                    self.token_usages.append(usage.model_copy())
+
+            if other.status == PromptStatus.error and self.status == PromptStatus.success:
+                self.status = other.status
+                self.error = other.error
+
+        return self
+
 class PromptAsyncResult[T](BaseModel):
     content: Optional[T] = None
-    token_usages: list[LLMTokenUsage] = []
+    token_usages: list[LLMTokenUsage] = Field(default_factory=list)
     status: PromptStatus = PromptStatus.success
     done: bool = False
 
@@ -138,13 +256,98 @@ class PromptAsyncResult[T](BaseModel):
         return self
 
 
+class StreamChunk:
+    """
+    Лёгкий фрагмент потокового ответа без валидации pydantic.
+
+    Используется в быстром потоковом режиме (``AIBaseHandler.stream_chunks``),
+    в ``PromptAsyncResult`` переводится через ``to_result``.
+    """
+
+    __slots__ = ("content", "done", "status", "usage")
+
+    def __init__(self, content: str, done: bool = False, status: PromptStatus = PromptStatus.success, usage: LLMTokenUsage | None = None):
+        self.content = content
+        self.done = done
+        self.status = status
+        self.usage = usage
+
+    def to_result(self) -> PromptAsyncResult[str]:
+        # Конструктор с валидацией быстрее model_construct (benchmarks/bench_types.py, "result construction")
+        return PromptAsyncResult(
+            content=self.content,
+            token_usages=[self.usage] if self.usage else [],
+            status=self.status,
+            done=self.done
+        )
+
+    def __repr__(self) -> str:
+        return f"StreamChunk(content={self.content!r}, done={self.done}, status={self.status.value}, usage={self.usage!r})"
+
+
+class StreamAccumulator:
+    """
+    Накопитель потокового ответа.
+
+    В отличие от ``response |= chunk`` для ``PromptAsyncResult``, который
+    копирует весь накопленный текст на каждом фрагменте, складывает фрагменты
+    в список и склеивает их один раз при чтении ``content``.
+    """
+
+    __slots__ = ("_parts", "token_usages", "status", "done")
+
+    def __init__(self):
+        self._parts: list[str] = []
+        self.token_usages: list[LLMTokenUsage] = []
+        self.status: PromptStatus = PromptStatus.success
+        self.done: bool = False
+
+    def add(self, chunk: StreamChunk | PromptAsyncResult) -> StreamAccumulator:
+        if isinstance(chunk, StreamChunk):
+            usages = (chunk.usage,) if chunk.usage else ()
+        else:
+            usages = chunk.token_usages
+
+        if self.status == PromptStatus.success == chunk.status:
+            if chunk.content:
+                self._parts.append(chunk.content)
+        else:
+            self.status = PromptStatus.error
+
+        self.token_usages.extend(usages)
+        self.done = self.done or chunk.done
+
+        return self
+
+    __ior__ = add
+
+    @property
+    def content(self) -> str:
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+
+        return self._parts[0] if self._parts else ""
+
+    def to_result(self) -> PromptAsyncResult[str]:
+        return PromptAsyncResult[str](
+            content=self.content,
+            token_usages=self.token_usages,
+            status=self.status,
+            done=self.done
+        )
+
+
 
 __all__ = [
     "Prompt",
     "LLMProvider",
+    "PromptBundle",
+    "GenerationOptions",
     "LLMWithStructuredOutput",
     "LLMTokenUsage",
     "PromptStatus",
     "PromptSyncResult",
-    "PromptAsyncResult"
+    "PromptAsyncResult",
+    "StreamChunk",
+    "StreamAccumulator"
 ]
\ No newline at end of file
@@ -0,0 +1,190 @@
+import bisect
+import math
+from collections import deque
+from typing import Iterable
+
+from lightunillm.core.abstracts.MetricsSinkAbstract import MetricsSinkAbstract
+from lightunillm.core.instrumentation import TOKENS_PER_SECOND
+
+
+LabelsKey = tuple[tuple[str, str], ...]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+RATE_BUCKETS = (1.0, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0, 2500.0)
+
+
+class Histogram:
+    """
+    Гистограмма с кумулятивными корзинами (для Prometheus) и скользящим окном
+    последних значений для расчёта перцентилей.
+    """
+
+    __slots__ = ("buckets", "counts", "count", "sum", "_samples")
+
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS, reservoir_size: int = 1024):
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets))
+        self.counts: list[int] = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._samples: deque[float] = deque(maxlen=reservoir_size)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self._samples.append(value)
+
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+
+    def quantile(self, q: float) -> float | None:
+        if not self._samples:
+            return None
+
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self) -> dict[str, float | None]:
+        ordered = sorted(self._samples)
+
+        def pick(q: float) -> float | None:
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": pick(0.5),
+            "p90": pick(0.9),
+            "p99": pick(0.99),
+        }
+
+
+class MetricsAggregator(MetricsSinkAbstract):
+    """
+    Приёмник метрик, агрегирующий их в памяти процесса.
+
+    Гистограммы и счётчики хранятся по имени и набору меток (provider, model,
+    prompt_id, ...). Снимок с перцентилями возвращает ``snapshot``, текст в
+    формате Prometheus - ``to_prometheus``.
+    """
+
+    def __init__(
+        self,
+        buckets: dict[str, Iterable[float]] | None = None,
+        reservoir_size: int = 1024
+    ):
+        """
+        Args:
+            buckets (dict[str, Iterable[float]] | None): Границы корзин по имени гистограммы.
+                По умолчанию корзины задержек в секундах.
+            reservoir_size (int): Количество последних значений для расчёта перцентилей.
+        """
+        self.buckets: dict[str, tuple[float, ...]] = {TOKENS_PER_SECOND: RATE_BUCKETS}
+        self.buckets.update({name: tuple(value) for name, value in (buckets or {}).items()})
+        self.reservoir_size = reservoir_size
+
+        self.histograms: dict[str, dict[LabelsKey, Histogram]] = {}
+        self.counters: dict[str, dict[LabelsKey, float]] = {}
+
+    def observe(self, name: str, value: float, labels: dict[str, str]) -> None:
+        series = self.histograms.get(name)
+        if series is None:
+            series = self.histograms[name] = {}
+
+        key = tuple(sorted(labels.items()))
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(self.buckets.get(name, LATENCY_BUCKETS), self.reservoir_size)
+
+        histogram.observe(value)
+
+    def increment(self, name: str, value: float, labels: dict[str, str]) -> None:
+        series = self.counters.get(name)
+        if series is None:
+            series = self.counters[name] = {}
+
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0.0) + value
+
+    def histogram(self, name: str, **labels: str) -> Histogram | None:
+        """Возвращает гистограмму с точным набором меток или None."""
+        return self.histograms.get(name, {}).get(tuple(sorted(labels.items())))
+
+    def counter(self, name: str, **labels: str) -> float:
+        """Возвращает сумму счётчика по всем рядам, метки которых содержат заданные."""
+        wanted = labels.items()
+
+        return sum(
+            value for key, value in self.counters.get(name, {}).items()
+            if wanted <= dict(key).items()
+        )
+
+    def snapshot(self) -> dict[str, list[dict]]:
+        """
+        Возвращает текущие значения всех метрик.
+
+        Returns:
+            dict[str, list[dict]]: Ряды по имени метрики: метки и значение счётчика
+                или count/sum/mean/p50/p90/p99 гистограммы.
+        """
+        result: dict[str, list[dict]] = {}
+
+        for name, series in self.histograms.items():
+            result[name] = [{"labels": dict(key)} | histogram.summary() for key, histogram in series.items()]
+
+        for name, series in self.counters.items():
+            result[name] = [{"labels": dict(key), "value": value} for key, value in series.items()]
+
+        return result
+
+    def to_prometheus(self) -> str:
+        """
+        Возвращает метрики в текстовом формате Prometheus (exposition format 0.0.4).
+
+        Returns:
+            str: Текст для ответа на /metrics.
+        """
+        lines: list[str] = []
+
+        for name, series in sorted(self.counters.items()):
+            lines.append(f"# TYPE {name} counter")
+            for key, value in series.items():
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+
+        for name, series in sorted(self.histograms.items()):
+            lines.append(f"# TYPE {name} histogram")
+            for key, histogram in series.items():
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(key, le=_format_value(bound))} {cumulative}")
+
+                lines.append(f"{name}_bucket{_format_labels(key, le='+Inf')} {histogram.count}")
+                lines.append(f"{name}_sum{_format_labels(key)} {_format_value(histogram.sum)}")
+                lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        self.histograms.clear()
+        self.counters.clear()
+
+
+def _format_labels(key: LabelsKey, **extra: str) -> str:
+    pairs = [*key, *extra.items()]
+    if not pairs:
+        return ""
+
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+
+    return repr(float(value))
@@ -1,22 +1,236 @@
-from jinja2 import Template
+from __future__ import annotations
 
-from lightunillm.typization import LLMProvider, Prompt
+from typing import TYPE_CHECKING, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable
+
+from lightunillm.typization import LLMProvider, Prompt, PromptBundle
 from lightunillm.core.abstracts.PromptStorageAbstract import PromptStorageAbstract
+from lightunillm.core.instrumentation import Instrumentation, PROMPT_CACHE, PROMPT_LOAD
+from lightunillm.utils.cache import TTLCache, SingleFlight
+from lightunillm.utils.concurrency import aiter_any
+
+if TYPE_CHECKING:
+    from jinja2 import Template
+
+    from lightunillm.utils.offload import OffloadExecutor
 
 
 class PromptLoader:
-    def __init__(self, prompt_storage: PromptStorageAbstract):
+    """
+    Загрузчик промптов и провайдеров из хранилища.
+
+    Промпт и провайдеры загружаются из хранилища одним вызовом
+    ``PromptStorageAbstract.get_prompt_bundle`` и кешируются (LRU + TTL),
+    скомпилированные шаблоны Jinja кешируются по исходному тексту. По истечении
+    TTL запись ревалидируется через ``PromptStorageAbstract.get_version``: если
+    версия не изменилась, повторная загрузка не выполняется. Конкурентные
+    промахи по одному prompt_id приводят к одному запросу в хранилище.
+    ``preload`` загружает весь каталог промптов одним пакетным запросом.
+    """
+
+    def __init__(
+        self,
+        prompt_storage: PromptStorageAbstract,
+        cache_size: int = 1024,
+        cache_ttl: float | None = 60.0,
+        cache_enabled: bool = True,
+        instrumentation: Instrumentation | None = None,
+        offload: OffloadExecutor | None = None
+    ):
+        """
+        Args:
+            prompt_storage (PromptStorageAbstract): Хранилище промптов.
+            cache_size (int): Максимальное количество записей в каждом кеше.
+            cache_ttl (float | None): Время жизни записи в секундах. None - без ограничения.
+            cache_enabled (bool): Кешировать ли объекты из хранилища.
+            instrumentation (Instrumentation | None): Точка инструментирования. По умолчанию общая для процесса.
+            offload (OffloadExecutor | None): Пул для рендеринга длинных шаблонов вне цикла событий.
+        """
         self.prompt_storage: PromptStorageAbstract = prompt_storage
+        self.cache_enabled = cache_enabled
+        self.instrumentation = instrumentation or Instrumentation.default()
+        self.offload = offload
+
+        self._bundles: TTLCache[any, PromptBundle] = TTLCache(cache_size, cache_ttl)
+        self._templates: TTLCache[str, Template] = TTLCache(cache_size * 2)
+        self._flight: SingleFlight = SingleFlight()
 
     async def get_prompt(self, prompt_id: any, **kwargs) -> Prompt:
-        prompt: Prompt = await self.prompt_storage.get_prompt(prompt_id=prompt_id)
+        if self.cache_enabled:
+            prompt: Prompt = (await self.get_bundle(prompt_id)).prompt
+        else:
+            prompt: Prompt = await self._fetch("prompt", prompt_id, self.prompt_storage.get_prompt)
+
+        if self.offload is not None and self.offload.accepts(len(prompt.system_message) + len(prompt.human_message)):
+            system_message, human_message = await self.offload.render(prompt.system_message, prompt.human_message, kwargs)
+            return prompt.model_copy(update={"system_message": system_message, "human_message": human_message})
+
+        return prompt.model_copy(update={
+            "system_message": self.get_template(prompt.system_message).render(**kwargs),
+            "human_message": self.get_template(prompt.human_message).render(**kwargs),
+        })
+
+    async def render_many(
+        self,
+        prompt_id: any,
+        inputs: Iterable[dict] | AsyncIterable[dict]
+    ) -> AsyncIterator[Prompt]:
+        """
+        Лениво рендерит промпт для каждого набора аргументов шаблона.
+
+        Промпт загружается и шаблоны компилируются один раз на весь батч.
+
+        Args:
+            prompt_id (any): Идентификатор промпта.
+            inputs (Iterable[dict] | AsyncIterable[dict]): Аргументы шаблона для каждого элемента.
+
+        Returns:
+            AsyncIterator[Prompt]: Отрендеренные промпты в порядке входов.
+        """
+        prompt: Prompt = (await self.get_bundle(prompt_id)).prompt
+
+        if self.offload is not None and self.offload.accepts(len(prompt.system_message) + len(prompt.human_message)):
+            async for kwargs in aiter_any(inputs):
+                system_message, human_message = await self.offload.render(prompt.system_message, prompt.human_message, kwargs)
+                yield prompt.model_copy(update={"system_message": system_message, "human_message": human_message})
+            return
 
-        prompt.system_message = Template(prompt.system_message).render(**kwargs)
-        prompt.human_message = Template(prompt.human_message).render(**kwargs)
+        system_template = self.get_template(prompt.system_message)
+        human_template = self.get_template(prompt.human_message)
+
+        async for kwargs in aiter_any(inputs):
+            yield prompt.model_copy(update={
+                "system_message": system_template.render(**kwargs),
+                "human_message": human_template.render(**kwargs),
+            })
 
-        return prompt
-    
     async def get_llm_provider(self, prompt_id: any) -> LLMProvider:
-        llm_provider: LLMProvider = await self.prompt_storage.get_llm_provider(prompt_id=prompt_id)
+        if not self.cache_enabled:
+            return await self._fetch("llm_provider", prompt_id, self.prompt_storage.get_llm_provider)
+
+        return (await self.get_bundle(prompt_id)).llm_provider
+
+    async def get_llm_providers(self, prompt_id: any) -> list[LLMProvider]:
+        if not self.cache_enabled:
+            return await self._fetch("llm_providers", prompt_id, self.prompt_storage.get_llm_providers)
+
+        return (await self.get_bundle(prompt_id)).llm_providers
+
+    async def get_bundle(self, prompt_id: any) -> PromptBundle:
+        """
+        Возвращает промпт (без рендеринга), провайдеров и версию для prompt_id.
+
+        Args:
+            prompt_id (any): Идентификатор промпта.
+
+        Returns:
+            PromptBundle: Набор из кеша или хранилища.
+        """
+        if not self.cache_enabled:
+            return await self._fetch("bundle", prompt_id, self.prompt_storage.get_prompt_bundle)
+
+        bundle = self._bundles.get(prompt_id)
+
+        if self.instrumentation.enabled:
+            self.instrumentation.increment(PROMPT_CACHE, 1.0, {
+                "kind": "bundle", "prompt_id": str(prompt_id), "result": "miss" if bundle is None else "hit"
+            })
+
+        if bundle is not None:
+            return bundle
+
+        return await self._flight.do(prompt_id, lambda: self._refresh(prompt_id))
+
+    def cached_prompt(self, prompt_id: any) -> Prompt | None:
+        """
+        Возвращает промпт (без рендеринга) из кеша без обращения к хранилищу.
+
+        Args:
+            prompt_id (any): Идентификатор промпта.
+
+        Returns:
+            Prompt | None: Промпт или None, если его нет в кеше.
+        """
+        entry = self._bundles.peek(prompt_id)
+        return entry.value.prompt if entry is not None else None
+
+    async def preload(self, prompt_ids: Iterable[any] | None = None) -> int:
+        """
+        Загружает наборы промптов в кеш одним пакетным запросом и компилирует их шаблоны.
+
+        Вызывается при старте процесса, чтобы первые запросы не ждали хранилище.
+        Количество записей в кеше ограничено cache_size.
+
+        Args:
+            prompt_ids (Iterable[any] | None): Идентификаторы промптов. None - все промпты
+                хранилища (``PromptStorageAbstract.list_prompt_ids``).
+
+        Returns:
+            int: Количество загруженных промптов.
+        """
+        if prompt_ids is None:
+            prompt_ids = await self.prompt_storage.list_prompt_ids()
+
+        with self._span("preload", ""):
+            bundles = await self.prompt_storage.get_prompt_bundles(prompt_ids)
+
+        for prompt_id, bundle in bundles.items():
+            self._bundles.set(prompt_id, bundle, bundle.version)
+            self.get_template(bundle.prompt.system_message)
+            self.get_template(bundle.prompt.human_message)
+
+        return len(bundles)
+
+    def get_template(self, source: str) -> Template:
+        """
+        Возвращает скомпилированный шаблон Jinja для исходного текста.
+
+        Args:
+            source (str): Исходный текст шаблона.
+
+        Returns:
+            Template: Скомпилированный шаблон.
+        """
+        template = self._templates.get(source)
+
+        if template is None:
+            from jinja2 import Template
+
+            template = Template(source)
+            self._templates.set(source, template)
+
+        return template
+
+    def invalidate(self, prompt_id: any = None) -> None:
+        """
+        Сбрасывает кеш для prompt_id или весь кеш, если prompt_id не указан.
+
+        Args:
+            prompt_id (any): Идентификатор промпта.
+        """
+        self._bundles.invalidate(prompt_id)
+
+        if prompt_id is None:
+            self._templates.invalidate()
+
+    async def _fetch(self, kind: str, prompt_id: any, fetch: Callable[..., Awaitable]) -> any:
+        with self._span(kind, prompt_id):
+            return await fetch(prompt_id=prompt_id)
+
+    async def _refresh(self, prompt_id: any) -> PromptBundle:
+        entry = self._bundles.peek(prompt_id)
+
+        if entry is not None and entry.version is not None:
+            if await self.prompt_storage.get_version(prompt_id) == entry.version:
+                self._bundles.touch(prompt_id)
+                return entry.value
+
+        bundle: PromptBundle = await self._fetch("bundle", prompt_id, self.prompt_storage.get_prompt_bundle)
+        self._bundles.set(prompt_id, bundle, bundle.version)
+
+        return bundle
+
+    def _span(self, kind: str, prompt_id: any):
+        if not self.instrumentation.enabled:
+            return self.instrumentation.span(PROMPT_LOAD)
 
-        return llm_provider
+        return self.instrumentation.span(PROMPT_LOAD, {"kind": kind, "prompt_id": str(prompt_id)})
@@ -0,0 +1,198 @@
+import asyncio
+from contextlib import aclosing
+from typing import AsyncIterator, Awaitable, Callable, Generic, TypeVar
+
+from lightunillm.typization import GenerationOptions
+
+R = TypeVar('R')
+V = TypeVar('V')
+
+
+class _Call(Generic[R]):
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class _Multicast(Generic[V]):
+    """Один поток-источник, фрагменты которого раздаются всем подписчикам с начала."""
+
+    def __init__(self, source: AsyncIterator[V], on_done: Callable[[], None]):
+        self.buffer: list[V] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self.subscribers = 0
+
+        self._changed = asyncio.get_running_loop().create_future()
+        self._on_done = on_done
+        self._task = asyncio.ensure_future(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator[V]) -> None:
+        try:
+            async with aclosing(source):
+                async for item in source:
+                    self.buffer.append(item)
+                    self._notify()
+        except asyncio.CancelledError:
+            self.error = asyncio.CancelledError()
+        except BaseException as exc:
+            self.error = exc
+        finally:
+            self.done = True
+            self._on_done()
+            self._notify()
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.get_running_loop().create_future()
+        changed.set_result(None)
+
+    def subscribe(self) -> "_Subscription[V]":
+        """Подписчик учитывается сразу, ещё до начала итерации."""
+        return _Subscription(self)
+
+    def _unsubscribe(self) -> None:
+        self.subscribers -= 1
+        if self.subscribers == 0 and not self.done:
+            self._on_done()
+            self._task.cancel()
+
+
+class _Subscription(Generic[V]):
+    """
+    Итератор одного подписчика ``_Multicast``.
+
+    Держит подписку от создания до исчерпания, ошибки или ``aclose``, поэтому
+    подписчик, получивший итератор, но ещё не начавший итерацию, не даёт
+    отменить источник.
+    """
+
+    __slots__ = ("_multicast", "_index", "_closed")
+
+    def __init__(self, multicast: _Multicast[V]):
+        self._multicast = multicast
+        self._index = 0
+        self._closed = False
+        multicast.subscribers += 1
+
+    def __aiter__(self) -> "_Subscription[V]":
+        return self
+
+    async def __anext__(self) -> V:
+        multicast = self._multicast
+
+        try:
+            while not self._closed:
+                if self._index < len(multicast.buffer):
+                    self._index += 1
+                    return multicast.buffer[self._index - 1]
+                elif multicast.done:
+                    if multicast.error is not None:
+                        raise multicast.error
+                    break
+                else:
+                    await asyncio.shield(multicast._changed)
+        except BaseException:
+            self._close()
+            raise
+
+        self._close()
+        raise StopAsyncIteration
+
+    async def aclose(self) -> None:
+        self._close()
+
+    def _close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._multicast._unsubscribe()
+
+
+class RequestCoalescer:
+    """
+    Объединение одинаковых конкурентных запросов (single-flight).
+
+    Пока выполняется запрос с некоторым ключом, остальные запросы с тем же
+    ключом не отправляются, а ожидают его результат. Запрос выполняется в
+    отдельной задаче и отменяется, только когда отменены все ожидающие.
+    Потоковые ответы раздаются всем подписчикам: подключившийся позже
+    получает уже принятые фрагменты, затем новые. В отличие от кеша ответов,
+    после завершения запроса ничего не сохраняется. Результат общий для всех
+    ожидающих, поэтому его нельзя изменять.
+    """
+
+    def __init__(self, coalesce_nondeterministic: bool = False):
+        """
+        Args:
+            coalesce_nondeterministic (bool): Объединять запросы с ненулевой температурой.
+        """
+        self.coalesce_nondeterministic = coalesce_nondeterministic
+
+        self._calls: dict[str, _Call] = {}
+        self._streams: dict[str, _Multicast] = {}
+
+    def is_coalescable(self, options: GenerationOptions) -> bool:
+        return self.coalesce_nondeterministic or options.temperature == 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[R]]) -> R:
+        """
+        Выполняет fn или присоединяется к уже выполняющемуся вызову с ключом key.
+
+        Args:
+            key (str): Ключ запроса.
+            fn (Callable[[], Awaitable[R]]): Запрос.
+
+        Returns:
+            R: Результат запроса.
+        """
+        call = self._calls.get(key)
+
+        if call is None:
+            call = self._calls[key] = _Call(asyncio.ensure_future(fn()))
+            call.task.add_done_callback(lambda _: self._forget(self._calls, key, call))
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if not call.task.done():
+                call.waiters -= 1
+                if call.waiters == 0:
+                    self._forget(self._calls, key, call)
+                    call.task.cancel()
+            raise
+
+    def stream(self, key: str, open_stream: Callable[[], AsyncIterator[V]]) -> AsyncIterator[V]:
+        """
+        Открывает поток или подписывается на уже открытый поток с ключом key.
+
+        Подписка учитывается сразу при вызове, поэтому возвращённый итератор
+        нужно дочитать или закрыть через ``aclose``.
+
+        Args:
+            key (str): Ключ запроса.
+            open_stream (Callable[[], AsyncIterator[V]]): Открывает поток-источник.
+
+        Returns:
+            AsyncIterator[V]: Все фрагменты потока с начала.
+        """
+        multicast = self._streams.get(key)
+
+        if multicast is None:
+            multicast = self._streams[key] = _Multicast(
+                open_stream(), lambda: self._forget(self._streams, key, multicast)
+            )
+
+        return multicast.subscribe()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._calls or key in self._streams
+
+    def __len__(self) -> int:
+        return len(self._calls) + len(self._streams)
+
+    @staticmethod
+    def _forget(registry: dict, key: str, value: object) -> None:
+        if registry.get(key) is value:
+            del registry[key]
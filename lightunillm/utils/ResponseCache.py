@@ -0,0 +1,207 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Type
+
+from langchain_core.messages import AIMessage, BaseMessage, message_to_dict, messages_from_dict
+from pydantic import BaseModel
+
+from lightunillm.typization import LLMProvider, GenerationOptions, LLMWithStructuredOutput
+from lightunillm.utils.cache import TTLCache
+
+
+ZERO_USAGE_METADATA = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+ZERO_TOKEN_USAGE = {"completion_tokens": 0, "prompt_tokens": 0, "total_tokens": 0}
+
+
+@lru_cache(maxsize=256)
+def _schema_fingerprint(output_model: Type[BaseModel]) -> str:
+    return json.dumps(output_model.model_json_schema(), sort_keys=True)
+
+
+def request_fingerprint(
+    messages: list[BaseMessage],
+    llm_provider: LLMProvider,
+    options: GenerationOptions,
+    output_model: Type[BaseModel] | None = None
+) -> str:
+    """
+    Возвращает хеш запроса: сообщений, провайдера и модели, параметров генерации
+    и JSON схемы модели структурированного вывода.
+    """
+    payload = json.dumps(
+        [
+            [(message.type, message.content) for message in messages],
+            llm_provider.provider.value,
+            llm_provider.model_id,
+            options.model_dump(exclude_none=True),
+            _schema_fingerprint(output_model) if output_model is not None else None,
+        ],
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str,
+    )
+
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class _SQLiteTier:
+    """Постоянный уровень кеша в SQLite с TTL и ограничением количества записей."""
+
+    def __init__(self, path: str, ttl: float | None, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        self._connection.commit()
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM responses WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, now)
+            ).fetchone()
+
+            if row is not None:
+                self._connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                self._connection.commit()
+
+        return row[0] if row else None
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, None if self.ttl is None else now + self.ttl, now)
+            )
+
+            self._writes += 1
+            if self._writes % 128 == 0:
+                self._trim(now)
+
+            self._connection.commit()
+
+    def _trim(self, now: float) -> None:
+        self._connection.execute("DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        self._connection.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM responses")
+            self._connection.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class ResponseCache:
+    """
+    Кеш ответов языковой модели для детерминированных запросов.
+
+    Состоит из LRU кеша в памяти и необязательного постоянного уровня в SQLite.
+    Ключ - хеш отрендеренных сообщений, провайдера и модели, параметров
+    генерации и JSON схемы модели структурированного вывода. Ответы из кеша
+    возвращаются с нулевым расходом токенов и отметкой ``cache_hit``, а в
+    ``UsageLedger`` обработчика учитываются как запросы без стоимости.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float | None = 3600.0,
+        path: str | None = None,
+        max_disk_entries: int = 100_000,
+        cache_nondeterministic: bool = False
+    ):
+        """
+        Args:
+            maxsize (int): Максимальное количество записей в памяти.
+            ttl (float | None): Время жизни записи в секундах. None - без ограничения.
+            path (str | None): Путь к файлу SQLite для постоянного уровня. None - только память.
+            max_disk_entries (int): Максимальное количество записей в постоянном уровне.
+            cache_nondeterministic (bool): Кешировать запросы с ненулевой температурой.
+        """
+        self.cache_nondeterministic = cache_nondeterministic
+
+        self._memory: TTLCache[str, str] = TTLCache(maxsize, ttl)
+        self._disk = _SQLiteTier(path, ttl, max_disk_entries) if path else None
+
+    def is_cacheable(self, options: GenerationOptions) -> bool:
+        return self.cache_nondeterministic or options.temperature == 0
+
+    async def get(self, key: str) -> str | None:
+        value = self._memory.get(key)
+
+        if value is None and self._disk is not None:
+            value = await asyncio.to_thread(self._disk.get, key)
+            if value is not None:
+                self._memory.set(key, value)
+
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        self._memory.set(key, value)
+
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.set, key, value)
+
+    def clear(self) -> None:
+        self._memory.invalidate()
+
+        if self._disk is not None:
+            self._disk.clear()
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+
+    @staticmethod
+    def dump_message(message: AIMessage) -> str:
+        return json.dumps(message_to_dict(message), ensure_ascii=False, default=str)
+
+    @staticmethod
+    def load_message(data: str | dict) -> AIMessage:
+        """Восстанавливает ответ из кеша с нулевым расходом токенов и отметкой cache_hit."""
+        message: AIMessage = messages_from_dict([json.loads(data) if isinstance(data, str) else data])[0]
+
+        message.usage_metadata = dict(ZERO_USAGE_METADATA)
+        message.response_metadata = message.response_metadata | {"token_usage": dict(ZERO_TOKEN_USAGE), "cache_hit": True}
+
+        return message
+
+    @staticmethod
+    def dump_structured(response: LLMWithStructuredOutput) -> str:
+        return json.dumps({
+            "raw": message_to_dict(response.raw),
+            "parsed": response.parsed.model_dump(mode="json"),
+        }, ensure_ascii=False, default=str)
+
+    @classmethod
+    def load_structured(cls, data: str, output_model: Type[BaseModel]) -> LLMWithStructuredOutput:
+        payload = json.loads(data)
+
+        return LLMWithStructuredOutput.of(output_model)(
+            raw=cls.load_message(payload["raw"]),
+            parsed=output_model.model_validate(payload["parsed"]),
+            parsing_error=None
+        )
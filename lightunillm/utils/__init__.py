@@ -1,6 +1,64 @@
-from lightunillm.utils.PromptLoader import PromptLoader
+"""
+Атрибуты загружаются лениво (PEP 562), как в ``lightunillm``: ``from
+lightunillm.utils import X`` загружает только модуль, в котором определён X.
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from lightunillm.utils.PromptLoader import PromptLoader
+    from lightunillm.utils.ResponseCache import ResponseCache
+    from lightunillm.utils.RequestCoalescer import RequestCoalescer
+    from lightunillm.utils.MetricsAggregator import MetricsAggregator
+    from lightunillm.utils.exporters import PrometheusExporter, OpenTelemetrySink
+    from lightunillm.utils.json_stream import IncrementalJSONParser, PartialValidator, partial_model
+    from lightunillm.utils.offload import OffloadExecutor
+    from lightunillm.utils.tokenizers import HeuristicTokenizer, TiktokenTokenizer, HuggingFaceTokenizer
+
+
+_ATTRIBUTES = {
+    "PromptLoader": "lightunillm.utils.PromptLoader",
+    "ResponseCache": "lightunillm.utils.ResponseCache",
+    "RequestCoalescer": "lightunillm.utils.RequestCoalescer",
+    "MetricsAggregator": "lightunillm.utils.MetricsAggregator",
+    "PrometheusExporter": "lightunillm.utils.exporters",
+    "OpenTelemetrySink": "lightunillm.utils.exporters",
+    "IncrementalJSONParser": "lightunillm.utils.json_stream",
+    "PartialValidator": "lightunillm.utils.json_stream",
+    "partial_model": "lightunillm.utils.json_stream",
+    "OffloadExecutor": "lightunillm.utils.offload",
+    "HeuristicTokenizer": "lightunillm.utils.tokenizers",
+    "TiktokenTokenizer": "lightunillm.utils.tokenizers",
+    "HuggingFaceTokenizer": "lightunillm.utils.tokenizers",
+}
+
+
+def __getattr__(name: str):
+    if name not in _ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    # Следующие обращения не проходят через __getattr__
+    value = globals()[name] = getattr(importlib.import_module(_ATTRIBUTES[name]), name)
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
 
 
 __all__ = [
-    "PromptLoader"
+    "PromptLoader",
+    "ResponseCache",
+    "RequestCoalescer",
+    "MetricsAggregator",
+    "PrometheusExporter",
+    "OpenTelemetrySink",
+    "IncrementalJSONParser",
+    "PartialValidator",
+    "partial_model",
+    "OffloadExecutor",
+    "HeuristicTokenizer",
+    "TiktokenTokenizer",
+    "HuggingFaceTokenizer"
 ]
@@ -0,0 +1,128 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+
+class CacheEntry(Generic[V]):
+    __slots__ = ("value", "version", "expires_at")
+
+    def __init__(self, value: V, version: any = None, expires_at: float | None = None):
+        self.value = value
+        self.version = version
+        self.expires_at = expires_at
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+
+class TTLCache(Generic[K, V]):
+    """LRU кеш с ограничением по размеру и времени жизни записей."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None):
+        """
+        Args:
+            maxsize (int): Максимальное количество записей.
+            ttl (float | None): Время жизни записи в секундах. None - без ограничения.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[K, CacheEntry[V]] = OrderedDict()
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        entry = self._data.get(key)
+
+        if entry is None or entry.expired:
+            return default
+
+        self._data.move_to_end(key)
+        return entry.value
+
+    def peek(self, key: K) -> CacheEntry[V] | None:
+        """Возвращает запись, в том числе просроченную, без обновления порядка LRU."""
+        return self._data.get(key)
+
+    def set(self, key: K, value: V, version: any = None) -> None:
+        self._data[key] = CacheEntry(value, version, self._expires_at())
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def touch(self, key: K) -> None:
+        """Продлевает время жизни записи."""
+        entry = self._data.get(key)
+
+        if entry is not None:
+            entry.expires_at = self._expires_at()
+            self._data.move_to_end(key)
+
+    def invalidate(self, key: K | None = None) -> None:
+        """Удаляет запись по ключу или все записи, если ключ не указан."""
+        if key is None:
+            self._data.clear()
+        else:
+            self._data.pop(key, None)
+
+    def _expires_at(self) -> float | None:
+        return None if self.ttl is None else time.monotonic() + self.ttl
+
+    def __contains__(self, key: K) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and not entry.expired
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(Generic[K, V]):
+    """
+    Дедупликация конкурентных вызовов: пока выполняется вызов с ключом,
+    остальные вызовы с тем же ключом ожидают и получают его результат.
+
+    Вызов выполняется в отдельной задаче и отменяется, только когда отменены
+    все ожидающие, поэтому отмена первого вызвавшего не отменяет остальных.
+    """
+
+    def __init__(self):
+        self._inflight: dict[K, _Flight] = {}
+
+    async def do(self, key: K, fn: Callable[[], Awaitable[V]]) -> V:
+        flight = self._inflight.get(key)
+
+        if flight is None:
+            flight = self._inflight[key] = _Flight(asyncio.ensure_future(fn()))
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not flight.task.done():
+                flight.waiters -= 1
+                if flight.waiters == 0:
+                    self._forget(key, flight)
+                    flight.task.cancel()
+            raise
+
+    def _forget(self, key: K, flight: _Flight) -> None:
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._inflight
+
+    def __len__(self) -> int:
+        return len(self._inflight)
@@ -0,0 +1,87 @@
+import asyncio
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, TypeVar
+
+X = TypeVar('X')
+Y = TypeVar('Y')
+
+
+async def aiter_any(items: Iterable[X] | AsyncIterable[X]) -> AsyncIterator[X]:
+    """Итерирует обычный или асинхронный итерируемый объект как асинхронный."""
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def bounded_map(
+    fn: Callable[[X], Awaitable[Y]],
+    inputs: Iterable[X] | AsyncIterable[X],
+    concurrency: int = 16,
+    ordered: bool = False,
+    window: int | None = None
+) -> AsyncIterator[tuple[int, Y]]:
+    """
+    Применяет корутину fn ко входам с ограничением конкурентности.
+
+    Входы читаются лениво: новый элемент берётся из inputs, только когда
+    освобождается слот, поэтому потребление памяти не зависит от размера входа.
+
+    Args:
+        fn (Callable[[X], Awaitable[Y]]): Корутина, применяемая к каждому входу.
+        inputs (Iterable[X] | AsyncIterable[X]): Входы.
+        concurrency (int): Максимальное количество одновременно выполняемых вызовов.
+        ordered (bool): Возвращать результаты в порядке входов, а не в порядке завершения.
+        window (int | None): Для ordered - максимум выполняемых и ожидающих выдачи результатов.
+            По умолчанию 2 * concurrency.
+
+    Returns:
+        AsyncIterator[tuple[int, Y]]: Пары (индекс входа, результат).
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    window = max(window or 2 * concurrency, concurrency) if ordered else concurrency
+
+    iterator = aiter_any(inputs)
+    pending: dict[asyncio.Future, int] = {}
+    buffered: dict[int, Y] = {}
+    next_index = 0
+    next_yield = 0
+    exhausted = False
+
+    try:
+        while True:
+            while not exhausted and len(pending) < concurrency and len(pending) + len(buffered) < window:
+                try:
+                    item = await anext(iterator)
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+
+                pending[asyncio.ensure_future(fn(item))] = next_index
+                next_index += 1
+
+            if not pending:
+                break
+
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in sorted(done, key=pending.__getitem__):
+                index = pending.pop(task)
+
+                if ordered:
+                    buffered[index] = task.result()
+                else:
+                    yield index, task.result()
+
+            while next_yield in buffered:
+                yield next_yield, buffered.pop(next_yield)
+                next_yield += 1
+    finally:
+        for task in pending:
+            task.cancel()
+
+        # Отменённые вызовы дожидаются здесь, чтобы они освободили ресурсы до возврата из генератора
+        await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,132 @@
+import asyncio
+from typing import Any
+
+from lightunillm.core.abstracts.MetricsSinkAbstract import MetricsSinkAbstract
+from lightunillm.core.instrumentation import Span
+from lightunillm.utils.MetricsAggregator import MetricsAggregator
+
+
+class PrometheusExporter:
+    """
+    HTTP эндпоинт ``/metrics`` с метриками ``MetricsAggregator`` в текстовом
+    формате Prometheus. Работает в текущем event loop без дополнительных зависимостей.
+    """
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, aggregator: MetricsAggregator, host: str = "127.0.0.1", port: int = 9464):
+        """
+        Args:
+            aggregator (MetricsAggregator): Источник метрик.
+            host (str): Адрес для прослушивания.
+            port (int): Порт. 0 - выбрать свободный.
+        """
+        self.aggregator = aggregator
+        self.host = host
+        self.port = port
+
+        self._server: asyncio.Server | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/metrics"
+
+    async def start(self) -> "PrometheusExporter":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "PrometheusExporter":
+        return await self.start()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()).strip():
+                pass
+
+            parts = request_line.decode("latin-1").split()
+            path = parts[1].split("?", 1)[0] if len(parts) > 1 else ""
+
+            if path == "/metrics":
+                status, body = "200 OK", self.aggregator.to_prometheus().encode()
+            else:
+                status, body = "404 Not Found", b"not found\n"
+
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {self.CONTENT_TYPE}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+class OpenTelemetrySink(MetricsSinkAbstract):
+    """
+    Приёмник, передающий спаны и метрики в OpenTelemetry.
+
+    Спаны LightUniLLM становятся спанами OTel, родителем которых будет текущий
+    спан OTel вызывающего кода. Гистограммы и счётчики создаются в meter по
+    имени метрики. Требует пакет ``opentelemetry-api``.
+    """
+
+    def __init__(self, tracer: Any = None, meter: Any = None):
+        """
+        Args:
+            tracer (Any): Трассировщик OTel. По умолчанию ``trace.get_tracer("lightunillm")``.
+            meter (Any): Meter OTel. По умолчанию ``metrics.get_meter("lightunillm")``.
+        """
+        try:
+            from opentelemetry import trace, metrics
+        except ImportError as exc:
+            raise ImportError("OpenTelemetrySink requires 'opentelemetry-api': pip install opentelemetry-api") from exc
+
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer("lightunillm")
+        self.meter = meter or metrics.get_meter("lightunillm")
+
+        self._spans: dict[int, Any] = {}
+        self._histograms: dict[str, Any] = {}
+        self._counters: dict[str, Any] = {}
+
+    def observe(self, name: str, value: float, labels: dict[str, str]) -> None:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = self.meter.create_histogram(name)
+
+        histogram.record(value, attributes=labels)
+
+    def increment(self, name: str, value: float, labels: dict[str, str]) -> None:
+        counter = self._counters.get(name)
+        if counter is None:
+            counter = self._counters[name] = self.meter.create_counter(name)
+
+        counter.add(value, attributes=labels)
+
+    def on_span_start(self, span: Span) -> None:
+        self._spans[id(span)] = self.tracer.start_span(span.name, attributes=span.labels)
+
+    def on_span_end(self, span: Span) -> None:
+        super().on_span_end(span)
+
+        otel_span = self._spans.pop(id(span), None)
+        if otel_span is None:
+            return
+
+        otel_span.set_attributes(span.labels)
+        if span.labels.get("status") == "error":
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR))
+            if span.error is not None:
+                otel_span.record_exception(span.error)
+
+        otel_span.end()
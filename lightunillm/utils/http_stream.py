@@ -0,0 +1,73 @@
+from typing import AsyncIterable, AsyncIterator
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """
+    Делит поток байтов на строки по ``\\n`` (``\\r`` в конце строки отбрасывается).
+
+    Каждый фрагмент входа делится один раз, склеивается только недочитанный
+    хвост строки, поэтому стоимость линейна по размеру потока.
+
+    Args:
+        chunks (AsyncIterable[bytes]): Тело ответа фрагментами произвольного размера.
+
+    Returns:
+        AsyncIterator[bytes]: Строки без разделителей, включая пустые.
+    """
+    tail = b""
+
+    async for chunk in chunks:
+        if tail:
+            chunk = tail + chunk
+
+        lines = chunk.split(b"\n")
+        tail = lines.pop()
+
+        for line in lines:
+            yield line[:-1] if line.endswith(b"\r") else line
+
+    if tail:
+        yield tail[:-1] if tail.endswith(b"\r") else tail
+
+
+async def iter_sse(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """
+    Разбирает поток Server-Sent Events и возвращает поле data каждого события.
+
+    Строки data одного события склеиваются через ``\\n``, событие завершается
+    пустой строкой. Комментарии и поля event, id, retry пропускаются.
+
+    Args:
+        chunks (AsyncIterable[bytes]): Тело ответа ``text/event-stream``.
+
+    Returns:
+        AsyncIterator[bytes]: Данные событий, например JSON фрагмента или ``[DONE]``.
+    """
+    data: list[bytes] = []
+
+    async for line in iter_lines(chunks):
+        if not line:
+            if data:
+                yield data[0] if len(data) == 1 else b"\n".join(data)
+                data = []
+        elif line.startswith(b"data:"):
+            value = line[5:]
+            data.append(value[1:] if value.startswith(b" ") else value)
+
+    if data:
+        yield b"\n".join(data)
+
+
+async def iter_ndjson(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """
+    Разбирает поток JSON Lines (NDJSON) и возвращает непустые строки.
+
+    Args:
+        chunks (AsyncIterable[bytes]): Тело ответа ``application/x-ndjson``.
+
+    Returns:
+        AsyncIterator[bytes]: JSON каждой строки.
+    """
+    async for line in iter_lines(chunks):
+        if line:
+            yield line
@@ -0,0 +1,434 @@
+import json
+import re
+import types
+from functools import lru_cache
+from typing import Annotated, Any, Optional, Union, get_args, get_origin
+
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, create_model
+
+
+_STRING_RUN = re.compile(r'[^"\\]*')
+_WHITESPACE = " \t\n\r"
+_SCALAR_END = ",]}" + _WHITESPACE
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+_START, _VALUE, _VALUE_OR_END, _KEY, _KEY_OR_END, _COLON, _COMMA_OR_END, _STRING, _KEY_STRING, _SCALAR, _END = range(11)
+
+
+class IncrementalJSONParser:
+    """
+    Потоковый парсер JSON.
+
+    Каждый символ входа обрабатывается один раз: ``feed`` продолжает разбор с
+    места остановки и достраивает дерево объектов в ``value`` на месте, поэтому
+    суммарная стоимость разбора линейна по размеру ответа. Незакрытые объекты
+    и массивы видны в ``value`` сразу, строки и числа появляются после того,
+    как значение прочитано целиком (строки - сразу, если ``partial_strings``).
+    Текст до первой ``{`` или ``[`` и после корневого значения игнорируется.
+    """
+
+    __slots__ = ("value", "completed", "partial_strings", "_state", "_stack", "_parts", "_escape", "_partial_attached")
+
+    def __init__(self, partial_strings: bool = False):
+        """
+        Args:
+            partial_strings (bool): Показывать в ``value`` недочитанные строки. Каждый ``feed``
+                тогда склеивает текущую строку целиком.
+        """
+        self.value: Any = None
+        self.completed: int = 0
+        self.partial_strings = partial_strings
+
+        self._state = _START
+        self._stack: list[list] = []
+        self._parts: list[str] = []
+        self._escape = ""
+        self._partial_attached = False
+
+    @property
+    def done(self) -> bool:
+        return self._state == _END
+
+    @property
+    def depth(self) -> int:
+        """Глубина читаемого значения: незакрытые объекты и массивы и недочитанная строка в ``value``."""
+        return len(self._stack) + self._partial_attached
+
+    def feed(self, text: str) -> Any:
+        """
+        Разбирает очередной фрагмент текста.
+
+        Args:
+            text (str): Фрагмент JSON.
+
+        Returns:
+            Any: Текущее (возможно, неполное) значение.
+
+        Raises:
+            ValueError: Если текст не является JSON.
+        """
+        index, length = 0, len(text)
+
+        while index < length:
+            state = self._state
+
+            if state == _STRING or state == _KEY_STRING:
+                index = self._read_string(text, index)
+                continue
+
+            char = text[index]
+
+            if state == _SCALAR:
+                if char in _SCALAR_END:
+                    self._finish_scalar()
+                    continue
+                self._parts.append(char)
+            elif char in _WHITESPACE:
+                pass
+            elif state == _START:
+                if char == "{" or char == "[":
+                    self._open(char)
+            elif state == _END:
+                pass
+            elif state == _VALUE or state == _VALUE_OR_END:
+                if char == "]" and state == _VALUE_OR_END:
+                    self._close()
+                elif char == "{" or char == "[":
+                    self._open(char)
+                elif char == '"':
+                    self._state = _STRING
+                elif char in "-0123456789tfn":
+                    self._state = _SCALAR
+                    self._parts.append(char)
+                else:
+                    raise self._error(char)
+            elif state == _KEY or state == _KEY_OR_END:
+                if char == '"':
+                    self._state = _KEY_STRING
+                elif char == "}" and state == _KEY_OR_END:
+                    self._close()
+                else:
+                    raise self._error(char)
+            elif state == _COLON:
+                if char != ":":
+                    raise self._error(char)
+                self._state = _VALUE
+            elif state == _COMMA_OR_END:
+                if char == ",":
+                    self._state = _KEY if isinstance(self._stack[-1][0], dict) else _VALUE
+                elif char == "}" or char == "]":
+                    self._close()
+                else:
+                    raise self._error(char)
+
+            index += 1
+
+        if self.partial_strings and self._state == _STRING:
+            self._set_partial_string()
+
+        return self.value
+
+    def close(self) -> Any:
+        """
+        Завершает разбор: дочитывает число или литерал в конце входа.
+
+        Returns:
+            Any: Итоговое значение.
+
+        Raises:
+            ValueError: Если JSON не завершён.
+        """
+        if self._state == _SCALAR:
+            self._finish_scalar()
+
+        if self._state != _END:
+            raise ValueError("Incomplete JSON document")
+
+        return self.value
+
+    def _read_string(self, text: str, index: int) -> int:
+        parts = self._parts
+
+        while index < len(text):
+            if self._escape:
+                self._escape += text[index]
+                index += 1
+
+                if self._escape[1] == "u":
+                    if len(self._escape) < 6:
+                        continue
+                    parts.append(chr(int(self._escape[2:], 16)))
+                elif self._escape[1] in _ESCAPES:
+                    parts.append(_ESCAPES[self._escape[1]])
+                else:
+                    raise self._error(self._escape)
+
+                self._escape = ""
+                continue
+
+            run = _STRING_RUN.match(text, index).end()
+            if run > index:
+                parts.append(text[index:run])
+                index = run
+
+            if index >= len(text):
+                break
+
+            if text[index] == "\\":
+                self._escape = "\\"
+                index += 1
+                continue
+
+            self._finish_string()
+            return index + 1
+
+        return index
+
+    def _finish_string(self) -> None:
+        value = "".join(self._parts)
+        self._parts.clear()
+
+        if any("\ud800" <= char <= "\udfff" for char in value):
+            value = value.encode("utf-16", "surrogatepass").decode("utf-16")
+
+        if self._state == _KEY_STRING:
+            self._stack[-1][1] = value
+            self._state = _COLON
+        else:
+            self._attach(value, replace=self._partial_attached)
+            self._partial_attached = False
+            self.completed += 1
+            self._after_value()
+
+    def _set_partial_string(self) -> None:
+        self._attach("".join(self._parts), replace=self._partial_attached)
+        self._partial_attached = True
+
+    def _finish_scalar(self) -> None:
+        token = "".join(self._parts)
+        self._parts.clear()
+
+        try:
+            value = json.loads(token)
+        except json.JSONDecodeError:
+            raise self._error(token) from None
+
+        self._attach(value)
+        self.completed += 1
+        self._after_value()
+
+    def _open(self, char: str) -> None:
+        container: dict | list = {} if char == "{" else []
+
+        if self._stack or self._state != _START:
+            self._attach(container)
+        else:
+            self.value = container
+
+        self._stack.append([container, None])
+        self._state = _KEY_OR_END if char == "{" else _VALUE_OR_END
+
+    def _close(self) -> None:
+        self._stack.pop()
+        self.completed += 1
+        self._after_value()
+
+    def _attach(self, value: Any, replace: bool = False) -> None:
+        container, key = self._stack[-1]
+
+        if isinstance(container, dict):
+            container[key] = value
+        elif replace:
+            container[-1] = value
+        else:
+            container.append(value)
+
+    def _after_value(self) -> None:
+        self._state = _COMMA_OR_END if self._stack else _END
+
+    def _error(self, token: str) -> ValueError:
+        return ValueError(f"Unexpected JSON token {token!r}")
+
+
+def partial_model(output_model: type[BaseModel]) -> type[BaseModel]:
+    """
+    Возвращает закешированную «частичную» версию модели: все поля необязательны
+    (None по умолчанию), вложенные модели тоже частичные, ограничения полей сняты.
+
+    Используется для валидации неполного структурированного ответа.
+
+    Args:
+        output_model (type[BaseModel]): Модель структурированного вывода.
+
+    Returns:
+        type[BaseModel]: Частичная модель.
+    """
+    return _partial_model(output_model)
+
+
+_building: set[type] = set()
+
+
+@lru_cache(maxsize=256)
+def _partial_model(output_model: type[BaseModel]) -> type[BaseModel]:
+    _building.add(output_model)
+    try:
+        fields = {
+            name: (Optional[_partial_annotation(field.annotation)], Field(default=None, alias=field.alias))
+            for name, field in output_model.model_fields.items()
+        }
+    finally:
+        _building.discard(output_model)
+
+    return create_model(
+        f"Partial{output_model.__name__}",
+        __config__=output_model.model_config | {"extra": "ignore", "populate_by_name": True},
+        **fields
+    )
+
+
+def _partial_annotation(annotation: Any) -> Any:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return Any if annotation in _building else _partial_model(annotation)
+
+    origin, args = get_origin(annotation), get_args(annotation)
+    if origin is None or not args:
+        return annotation
+
+    if origin is Annotated:
+        return _partial_annotation(args[0])
+
+    partial_args = tuple(_partial_annotation(arg) for arg in args)
+
+    if origin is Union or origin is types.UnionType:
+        return Union[partial_args]
+
+    try:
+        return origin[partial_args]
+    except TypeError:
+        return annotation
+
+
+class PartialValidator:
+    """
+    Валидация частичного ответа по мере разбора ``IncrementalJSONParser``.
+
+    Повторная валидация всего накопленного дерева на каждом дочитанном
+    значении делает поток квадратичным по размеру ответа. Здесь каждое
+    закрытое поле корневого объекта и каждый закрытый элемент списка в
+    корневом поле валидируются один раз, и результат переиспользуется.
+    Повторно валидируется только читаемое сейчас значение: поле, а если
+    это список - его последний незакрытый элемент. Частичный экземпляр
+    собирается из провалидированных полей без повторной валидации.
+    """
+
+    __slots__ = ("model", "_fields", "_values", "_items", "_failed")
+
+    def __init__(self, output_model: type[BaseModel]):
+        """
+        Args:
+            output_model (type[BaseModel]): Модель структурированного вывода.
+        """
+        self.model = partial_model(output_model)
+        self._fields = _field_validators(self.model)
+        self._values: dict[str, Any] = {}
+        self._items: dict[str, list] = {}
+        self._failed = False
+
+    def validate(self, parser: IncrementalJSONParser) -> BaseModel | None:
+        """
+        Валидирует текущее значение парсера.
+
+        Args:
+            parser (IncrementalJSONParser): Парсер ответа.
+
+        Returns:
+            BaseModel | None: Частичный экземпляр или None, если значение не проходит валидацию.
+        """
+        root = parser.value
+        if self._failed or not isinstance(root, dict):
+            return None
+
+        values = self._values
+        current: dict[str, Any] = {}
+        last = next(reversed(root), None) if parser.depth > 1 else None
+
+        try:
+            for key, value in root.items():
+                field = self._fields.get(key)
+                if field is None:
+                    continue
+
+                name, adapter, item_adapter = field
+                if key != last:
+                    if name not in values:
+                        values[name] = self._complete_field(name, value, adapter, item_adapter)
+                        self._items.pop(name, None)
+                elif item_adapter is not None and isinstance(value, list):
+                    current[name] = self._open_list(name, value, item_adapter, parser.depth > 2)
+                else:
+                    current[name] = adapter.validate_python(value)
+        except ValidationError:
+            # Закрытое значение уже не изменится, поэтому частичные экземпляры больше не строятся
+            if key != last:
+                self._failed = True
+            return None
+
+        # Не конструктор: валидация снова прошла бы по всем элементам провалидированных списков
+        return self.model.model_construct(**(values | current))
+
+    def _complete_field(self, name: str, value: Any, adapter: TypeAdapter, item_adapter: TypeAdapter | None) -> Any:
+        items = self._items.get(name)
+        if items is None or not isinstance(value, list):
+            return adapter.validate_python(value)
+
+        return self._open_list(name, value, item_adapter, False)
+
+    def _open_list(self, name: str, value: list, item_adapter: TypeAdapter, last_open: bool) -> list:
+        items = self._items.setdefault(name, [])
+        closed = len(value) - 1 if last_open else len(value)
+
+        for index in range(len(items), closed):
+            items.append(item_adapter.validate_python(value[index]))
+
+        if closed < len(value):
+            return [*items, item_adapter.validate_python(value[-1])]
+
+        return list(items)
+
+
+@lru_cache(maxsize=256)
+def _field_validators(model: type[BaseModel]) -> dict[str, tuple[str, TypeAdapter, TypeAdapter | None]]:
+    """Валидаторы полей частичной модели по ключам JSON: (имя поля, валидатор поля, валидатор элемента списка)."""
+    fields = {}
+
+    for name, field in model.model_fields.items():
+        item = _list_item(field.annotation)
+        validators = (
+            name, _adapter(field.annotation, model), None if item is None else _adapter(item, model)
+        )
+
+        fields[name] = validators
+        if field.alias is not None:
+            fields[field.alias] = validators
+
+    return fields
+
+
+def _adapter(annotation: Any, model: type[BaseModel]) -> TypeAdapter:
+    """Валидатор типа с настройками модели; у вложенных моделей настройки свои."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return TypeAdapter(annotation)
+
+    return TypeAdapter(annotation, config=model.model_config)
+
+
+def _list_item(annotation: Any) -> Any:
+    """Тип элемента для ``Optional[list[X]]``, иначе None."""
+    args = [arg for arg in get_args(annotation) if arg is not type(None)] \
+        if get_origin(annotation) in (Union, types.UnionType) else [annotation]
+
+    if len(args) == 1 and get_origin(args[0]) is list and len(get_args(args[0])) == 1:
+        return get_args(args[0])[0]
+
+    return None
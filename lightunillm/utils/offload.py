@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Literal, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+if TYPE_CHECKING:
+    from jinja2 import Template
+
+R = TypeVar('R')
+M = TypeVar('M', bound=BaseModel)
+
+OffloadMode = Literal["auto", "thread", "process"]
+
+
+def free_threaded() -> bool:
+    """Интерпретатор без GIL (free-threaded сборка CPython 3.13+ с выключенным GIL)."""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def resolve_mode(mode: OffloadMode) -> Literal["thread", "process"]:
+    """auto - потоки без GIL, процессы с GIL."""
+    if mode == "auto":
+        return "thread" if free_threaded() else "process"
+    return mode
+
+
+@lru_cache(maxsize=256)
+def _template(source: str) -> Template:
+    from jinja2 import Template
+
+    return Template(source)
+
+
+def render_templates(system_source: str, human_source: str, kwargs: dict[str, Any]) -> tuple[str, str]:
+    """Рендерит системный и пользовательский шаблоны промпта. Скомпилированные шаблоны кешируются в воркере."""
+    return _template(system_source).render(**kwargs), _template(human_source).render(**kwargs)
+
+
+def validate_json(output_model: type[M], data: str | bytes) -> M | None:
+    """
+    Разбирает и валидирует JSON моделью вывода.
+
+    Ошибка валидации не передаётся между процессами: возвращается None, и
+    вызывающий код повторяет разбор у себя, чтобы получить ValidationError.
+    """
+    try:
+        return output_model.model_validate_json(data)
+    except ValidationError:
+        return None
+
+
+class OffloadExecutor:
+    """
+    Пул для CPU-ёмкой обработки вне цикла событий: рендеринг шаблонов Jinja
+    и разбор и валидация структурированного вывода.
+
+    На сборках без GIL используются потоки, при этом строки ответа передаются
+    воркерам без копирования. С GIL потоки не дают параллельности, поэтому
+    используются процессы (``spawn``): аргументы и результат сериализуются
+    pickle, модели вывода и аргументы шаблонов должны сериализоваться, а
+    классы моделей - импортироваться по имени модуля. Данные короче min_chars
+    обрабатываются в цикле событий: передача в процесс стоит дороже разбора.
+    Пул создаётся при первом использовании.
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        mode: OffloadMode = "auto",
+        min_chars: int = 4096,
+        mp_context: str = "spawn"
+    ):
+        """
+        Args:
+            workers (int | None): Количество воркеров. По умолчанию количество ядер.
+            mode (Literal["auto", "thread", "process"]): Потоки, процессы или выбор по наличию GIL.
+            min_chars (int): Минимальный размер данных в символах для передачи в пул.
+            mp_context (str): Способ запуска процессов (spawn, forkserver, fork).
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.mode = resolve_mode(mode)
+        self.min_chars = min_chars
+        self.mp_context = mp_context
+
+        self._executor: Executor | None = None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "thread":
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="lightunillm-offload")
+            else:
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(self.mp_context))
+        return self._executor
+
+    def accepts(self, size: int) -> bool:
+        """Стоит ли передавать в пул данные размером size символов."""
+        return size >= self.min_chars
+
+    async def run(self, fn: Callable[..., R], *args: Any) -> R:
+        """
+        Выполняет fn(*args) в пуле.
+
+        Args:
+            fn (Callable[..., R]): Функция уровня модуля (для процессов).
+            *args: Аргументы.
+
+        Returns:
+            R: Результат fn.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def render(self, system_source: str, human_source: str, kwargs: dict[str, Any]) -> tuple[str, str]:
+        """
+        Рендерит системный и пользовательский шаблоны промпта в пуле.
+
+        Returns:
+            tuple[str, str]: Системное и пользовательское сообщения.
+        """
+        return await self.run(render_templates, system_source, human_source, kwargs)
+
+    async def parse(self, output_model: type[M], content: str | bytes) -> tuple[M | None, ValidationError | None]:
+        """
+        Разбирает ответ модели в output_model, в пуле, если ответ не короче min_chars.
+
+        Args:
+            output_model (type[M]): Модель вывода.
+            content (str | bytes): JSON ответа.
+
+        Returns:
+            tuple[M | None, ValidationError | None]: Модель или ошибка валидации.
+        """
+        if self.accepts(len(content)):
+            parsed = await self.run(validate_json, output_model, content)
+            if parsed is not None:
+                return parsed, None
+
+        try:
+            return output_model.model_validate_json(content), None
+        except ValidationError as exc:
+            return None, exc
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Останавливает пул. Следующий вызов создаст новый."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
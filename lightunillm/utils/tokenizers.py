@@ -0,0 +1,92 @@
+import math
+import os
+
+from lightunillm.core.abstracts.TokenizerAbstract import TokenizerAbstract
+
+
+class HeuristicTokenizer(TokenizerAbstract):
+    """
+    Быстрая оценка без словаря: один токен на bytes_per_token байт UTF-8.
+
+    Для английского текста это близко к BPE токенизаторам, для кириллицы
+    (два байта на символ) - оценка с запасом. Для ASCII строк длина в байтах
+    равна длине строки, поэтому кодирование не выполняется.
+    """
+
+    cacheable = False
+
+    def __init__(self, bytes_per_token: float = 4.0):
+        """
+        Args:
+            bytes_per_token (float): Среднее количество байт UTF-8 на токен.
+        """
+        self.bytes_per_token = bytes_per_token
+
+    def count(self, text: str) -> int:
+        size = len(text) if text.isascii() else len(text.encode())
+        return math.ceil(size / self.bytes_per_token)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        limit = max(int(max_tokens * self.bytes_per_token), 0)
+
+        if text.isascii():
+            return text[:limit]
+
+        return text.encode()[:limit].decode(errors="ignore")
+
+
+class TiktokenTokenizer(TokenizerAbstract):
+    """Токенизатор моделей OpenAI. Требует пакет ``tiktoken``."""
+
+    def __init__(self, encoding: str = "o200k_base"):
+        """
+        Args:
+            encoding (str): Имя кодировки tiktoken.
+        """
+        try:
+            import tiktoken
+        except ImportError as exc:
+            raise ImportError("TiktokenTokenizer requires 'tiktoken': pip install tiktoken") from exc
+
+        self._encoding = tiktoken.get_encoding(encoding)
+
+    def count(self, text: str) -> int:
+        return len(self._encoding.encode_ordinary(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        tokens = self._encoding.encode_ordinary(text)
+
+        if len(tokens) <= max_tokens:
+            return text
+
+        return self._encoding.decode(tokens[:max(max_tokens, 0)])
+
+
+class HuggingFaceTokenizer(TokenizerAbstract):
+    """Токенизатор моделей Hugging Face (Llama, Qwen, Mistral и др.). Требует пакет ``tokenizers``."""
+
+    def __init__(self, name_or_path: str):
+        """
+        Args:
+            name_or_path (str): Путь к ``tokenizer.json`` или имя репозитория на Hugging Face Hub.
+        """
+        try:
+            from tokenizers import Tokenizer
+        except ImportError as exc:
+            raise ImportError("HuggingFaceTokenizer requires 'tokenizers': pip install tokenizers") from exc
+
+        if os.path.isfile(name_or_path):
+            self._tokenizer = Tokenizer.from_file(name_or_path)
+        else:
+            self._tokenizer = Tokenizer.from_pretrained(name_or_path)
+
+    def count(self, text: str) -> int:
+        return len(self._tokenizer.encode(text, add_special_tokens=False).ids)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        encoding = self._tokenizer.encode(text, add_special_tokens=False)
+
+        if len(encoding.ids) <= max_tokens:
+            return text
+
+        return text[:encoding.offsets[max_tokens - 1][1]] if max_tokens > 0 else ""
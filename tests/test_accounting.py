@@ -0,0 +1,84 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+from lightunillm import AIBaseHandler, LLMClientRegistry, ModelPrice, ResponseCache, UsageLedger
+from lightunillm.storages import FilePromptStorage
+from lightunillm.typization import LLMProvider, ProviderType, TransportType
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from mock_server import MockServer  # noqa: E402
+
+
+class LedgerCacheTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_cache_hits_are_recorded_without_cost(self):
+        registry = LLMClientRegistry()
+        try:
+            async with MockServer(tokens=8) as server:
+                ledger = UsageLedger(prices={"mock": ModelPrice(input=1.0, output=2.0)})
+                handler = AIBaseHandler(
+                    prompt_storage=None, client_registry=registry, response_cache=ResponseCache(),
+                    ledger=ledger, llm_provider=LLMProvider(
+                        model_id="mock", base_url=server.base_url, api_key="mock",
+                        provider=ProviderType.openai, transport=TransportType.native
+                    )
+                )
+
+                for _ in range(3):
+                    await handler.send_request("What is the capital of France?", "Answer briefly.", temperature=0)
+
+                self.assertEqual(server.requests, 1)
+
+            usage = ledger.usage()
+            self.assertEqual(usage.requests, 3)
+            self.assertEqual(usage.cached, 2)
+            self.assertEqual(usage.completion_tokens, 8)
+            self.assertAlmostEqual(usage.cost, ledger.price("mock").cost(usage.prompt_tokens, 8))
+        finally:
+            await registry.aclose()
+
+
+
+class LedgerPromptIdTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_prompt_id_does_not_leak_to_other_handlers(self):
+        registry = LLMClientRegistry()
+        try:
+            async with MockServer(tokens=8) as server:
+                llm_provider = LLMProvider(
+                    model_id="mock", base_url=server.base_url, api_key="mock",
+                    provider=ProviderType.openai, transport=TransportType.native
+                )
+
+                with tempfile.TemporaryDirectory() as directory:
+                    with open(os.path.join(directory, "geo.json"), "w") as file:
+                        json.dump({
+                            "system_message": "Answer briefly.",
+                            "human_message": "{question}",
+                            "llm_providers": [llm_provider.model_dump(mode="json")]
+                        }, file)
+
+                    ledger = UsageLedger()
+                    prompted = AIBaseHandler(
+                        prompt_storage=FilePromptStorage(directory), client_registry=registry, ledger=ledger
+                    )
+                    plain = AIBaseHandler(
+                        prompt_storage=None, client_registry=registry, ledger=ledger, llm_provider=llm_provider
+                    )
+
+                    await prompted.switch_model("geo")
+                    await prompted.send_request("What is the capital of France?", "Answer briefly.")
+                    await plain.send_request("What is the capital of France?", "Answer briefly.")
+
+            self.assertEqual(ledger.usage("geo").requests, 1)
+            self.assertEqual(ledger.usage(None).requests, 1)
+        finally:
+            await registry.aclose()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import sys
+import unittest
+
+from lightunillm import AIBaseHandler, LLMClientRegistry
+from lightunillm.core.resilience import RetryPolicy
+from lightunillm.typization import LLMProvider, Prompt, PromptStatus, PromptSyncResult, ProviderType, TransportType
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from mock_server import MockServer  # noqa: E402
+
+PROMPTS = [Prompt(system_message="Answer briefly.", human_message=f"Question {index}") for index in range(5)]
+
+
+class SendBatchTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.registry = LLMClientRegistry()
+
+    async def asyncTearDown(self):
+        await self.registry.aclose()
+
+    async def test_results_and_usage(self):
+        async with MockServer(tokens=4) as server:
+            handler = AIBaseHandler(
+                prompt_storage=None, client_registry=self.registry, llm_provider=LLMProvider(
+                    model_id="mock", base_url=server.base_url, api_key="mock",
+                    provider=ProviderType.openai, transport=TransportType.native
+                )
+            )
+            usage = PromptSyncResult()
+
+            results = dict([item async for item in handler.send_batch(PROMPTS, concurrency=2, ordered=True, usage=usage)])
+
+        self.assertEqual(sorted(results), list(range(len(PROMPTS))))
+        self.assertTrue(all(result.status == PromptStatus.success for result in results.values()))
+        self.assertEqual(usage.token_usages[0].completion_tokens, 4 * len(PROMPTS))
+
+    async def test_usage_is_labelled_with_answering_provider(self):
+        async with MockServer(error_rate=1.0) as failing, MockServer(tokens=4) as healthy:
+            handler = AIBaseHandler(
+                prompt_storage=None, client_registry=self.registry,
+                retry_policy=RetryPolicy(max_attempts=1, base_delay=0.0)
+            )
+            handler.llm_model.switch_model(
+                LLMProvider(
+                    model_id="mock", base_url=failing.ollama_url, api_key="", provider=ProviderType.ollama,
+                    transport=TransportType.native
+                ),
+                [LLMProvider(
+                    model_id="mock", base_url=healthy.base_url, api_key="mock",
+                    provider=ProviderType.openai, transport=TransportType.native
+                )]
+            )
+
+            results = [result async for _, result in handler.send_batch(PROMPTS[:2])]
+
+        for result in results:
+            self.assertEqual(result.status, PromptStatus.success)
+            self.assertEqual([usage.provider for usage in result.token_usages], [ProviderType.openai])
+            self.assertEqual(result.token_usages[0].completion_tokens, 4)
+
+    async def test_handler_without_provider_returns_error_results(self):
+        handler = AIBaseHandler(prompt_storage=None, client_registry=self.registry)
+
+        results = [result async for _, result in handler.send_batch(PROMPTS)]
+
+        self.assertEqual(len(results), len(PROMPTS))
+        for result in results:
+            self.assertEqual(result.status, PromptStatus.error)
+            self.assertTrue(result.error)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import json
+import os
+import tempfile
+import unittest
+
+from lightunillm import AIHandlerInterface, BatchJob
+from lightunillm.typization import PromptStatus, PromptSyncResult
+
+ROWS = 50
+
+
+class Crash(BaseException):
+    """Аварийное завершение процесса посреди задания."""
+
+
+class EchoHandler(AIHandlerInterface[str]):
+
+    def __init__(self, crash_at: int | None = None):
+        super().__init__(prompt_storage=None)
+        self.crash_at = crash_at
+        self.calls: list[int] = []
+
+    async def apply(self, question: str, number: str) -> PromptSyncResult[str]:
+        number = int(number)
+        if number == self.crash_at:
+            raise Crash()
+
+        self.calls.append(number)
+        return PromptSyncResult(content=f"answer to {question}", status=PromptStatus.success)
+
+    async def stream(self, *args, **kwargs):
+        raise NotImplementedError
+
+
+class BatchJobResumeTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.directory.name, "input.jsonl")
+        self.output_path = os.path.join(self.directory.name, "output.jsonl")
+
+        with open(self.input_path, "w", encoding="utf-8") as file:
+            for number in range(ROWS):
+                file.write(json.dumps({"question": f"q{number}", "number": str(number)}) + "\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def job(self, handler: EchoHandler) -> BatchJob:
+        return BatchJob(
+            handler, self.input_path, self.output_path,
+            concurrency=1, checkpoint_every=20, checkpoint_interval=3600, progress_interval=3600,
+            on_progress=lambda _: None
+        )
+
+    async def crash(self) -> None:
+        with self.assertRaises(Crash):
+            await self.job(EchoHandler(crash_at=25)).run()
+
+        with open(self.output_path + ".checkpoint", encoding="utf-8") as file:
+            self.assertEqual(json.load(file)["done"], 20)
+
+    def output(self) -> list[dict]:
+        with open(self.output_path, "rb") as file:
+            return [json.loads(line) for line in file]
+
+    async def test_full_lines_after_checkpoint_are_replayed(self):
+        await self.crash()
+        self.assertEqual(len(self.output()), 25)
+
+        handler = EchoHandler()
+        progress = await self.job(handler).run()
+
+        self.assertEqual(handler.calls, list(range(25, ROWS)))
+        self.assertEqual((progress.done, progress.success, progress.errors), (ROWS, ROWS, 0))
+        self.assertEqual([record["row"] for record in self.output()], list(range(ROWS)))
+
+    async def test_partial_last_line_is_dropped(self):
+        await self.crash()
+        with open(self.output_path, "ab") as file:
+            file.write(b'{"row": 25, "content": "answ')
+
+        handler = EchoHandler()
+        await self.job(handler).run()
+
+        self.assertEqual(handler.calls, list(range(25, ROWS)))
+        records = self.output()
+        self.assertEqual([record["row"] for record in records], list(range(ROWS)))
+        self.assertEqual(records[25]["content"], "answer to q25")
+
+    async def test_output_shorter_than_checkpoint_raises(self):
+        await self.crash()
+        with open(self.output_path, "r+b") as file:
+            file.truncate(10)
+
+        with self.assertRaisesRegex(ValueError, "shorter than its checkpoint"):
+            await self.job(EchoHandler()).run()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import sys
+import unittest
+
+from lightunillm import AIBaseHandler, LLMClientRegistry, RetryPolicy
+from lightunillm.typization import LLMProvider, ProviderType, TransportType
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from mock_server import MockServer  # noqa: E402
+
+
+def provider(base_url: str, model_id: str = "mock") -> LLMProvider:
+    return LLMProvider(
+        model_id=model_id, base_url=base_url, api_key="mock", provider=ProviderType.openai, transport=TransportType.native
+    )
+
+
+class PoolLeaseTest(unittest.IsolatedAsyncioTestCase):
+
+    async def run_evicted_mid_request(self, registry: LLMClientRegistry, evict) -> None:
+        async with MockServer(latency=0.2) as server:
+            handler = AIBaseHandler(
+                prompt_storage=None,
+                llm_provider=provider(server.base_url),
+                client_registry=registry,
+                retry_policy=RetryPolicy(max_attempts=1),
+            )
+            pool = registry._pools[server.base_url]
+
+            request = asyncio.ensure_future(handler.send_request("What is the capital of France?", "Answer briefly."))
+            await asyncio.sleep(0.05)
+            evict()
+
+            self.assertNotIn(server.base_url, registry._pools)
+            self.assertFalse(pool.is_closed)
+
+            response = await request
+            await asyncio.sleep(0)
+
+        self.assertTrue(response.content.startswith("Paris"))
+        self.assertTrue(pool.is_closed)
+        self.assertEqual(server.errors, 0)
+
+    async def test_lru_eviction_waits_for_request(self):
+        registry = LLMClientRegistry(max_clients=1)
+        try:
+            await self.run_evicted_mid_request(registry, lambda: registry.get(provider("http://127.0.0.1:1/v1")))
+        finally:
+            await registry.aclose()
+
+    async def test_idle_eviction_waits_for_request(self):
+        registry = LLMClientRegistry(idle_ttl=0.01)
+        try:
+            await self.run_evicted_mid_request(registry, registry.evict_idle)
+        finally:
+            await registry.aclose()
+
+    async def test_pool_without_leases_is_closed_on_eviction(self):
+        registry = LLMClientRegistry(max_clients=1)
+        try:
+            registry.get(provider("http://127.0.0.1:1/v1"))
+            pool = registry._pools["http://127.0.0.1:1/v1"]
+
+            registry.get(provider("http://127.0.0.1:2/v1"))
+            await asyncio.sleep(0)
+
+            self.assertTrue(pool.is_closed)
+        finally:
+            await registry.aclose()
+
+    async def test_new_pool_is_created_while_old_one_is_leased(self):
+        registry = LLMClientRegistry(max_clients=1)
+        try:
+            first = provider("http://127.0.0.1:1/v1")
+            registry.get(first)
+            old = registry._pools[first.base_url]
+
+            with registry.lease(first):
+                registry.get(provider("http://127.0.0.1:2/v1"))
+                registry.get(first)
+                new = registry._pools[first.base_url]
+                await asyncio.sleep(0)
+
+                self.assertIsNot(new, old)
+                self.assertFalse(old.is_closed)
+
+            await asyncio.sleep(0)
+            self.assertTrue(old.is_closed)
+            self.assertFalse(new.is_closed)
+        finally:
+            await registry.aclose()
+
+
+if __name__ == "__main__":
+    unittest.main()
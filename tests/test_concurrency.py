@@ -0,0 +1,39 @@
+import asyncio
+import unittest
+from contextlib import aclosing
+
+from lightunillm.utils.concurrency import bounded_map
+
+
+class BoundedMapTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_ordered_results(self):
+        async def fn(item):
+            await asyncio.sleep(0.01 * (5 - item))
+            return item * 2
+
+        results = [item async for item in bounded_map(fn, range(5), concurrency=3, ordered=True)]
+
+        self.assertEqual(results, [(index, index * 2) for index in range(5)])
+
+    async def test_early_break_awaits_cancelled_calls(self):
+        released = []
+
+        async def fn(item):
+            try:
+                if item:
+                    await asyncio.sleep(10)
+                return item
+            finally:
+                released.append(item)
+
+        async with aclosing(bounded_map(fn, range(4), concurrency=4)) as results:
+            async for index, _ in results:
+                self.assertEqual(index, 0)
+                break
+
+        self.assertEqual(sorted(released), [0, 1, 2, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
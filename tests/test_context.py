@@ -0,0 +1,135 @@
+import os
+import sys
+import unittest
+
+from pydantic import BaseModel
+
+from lightunillm import AIBaseHandler, ContextManager, ContextPolicy, LLMClientRegistry, TokenCounter
+from lightunillm.exceptions import ContextWindowExceededError
+from lightunillm.typization import GenerationOptions, LLMProvider, ProviderType, TransportType
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from mock_server import MockServer  # noqa: E402
+
+SYSTEM = "Answer briefly."
+OPTIONS = GenerationOptions(max_tokens=100)
+
+
+def provider(kind: ProviderType = ProviderType.openai, **kwargs) -> LLMProvider:
+    kwargs.setdefault("base_url", "http://127.0.0.1:1")
+    return LLMProvider(model_id="mock", api_key="mock", provider=kind, **kwargs)
+
+
+def manager(**policy) -> ContextManager:
+    # Эвристика: один токен на 4 символа ASCII
+    return ContextManager(TokenCounter(), ContextPolicy(message_overhead=0, **policy))
+
+
+class ContextManagerTest(unittest.TestCase):
+
+    def test_prompt_within_window_is_unchanged(self):
+        human = "x" * 400
+
+        self.assertEqual(
+            manager().fit(provider(context_window=1000), SYSTEM, human, OPTIONS), (SYSTEM, human, OPTIONS)
+        )
+
+    def test_reject_raises(self):
+        with self.assertRaises(ContextWindowExceededError) as caught:
+            manager().fit(provider(context_window=300), SYSTEM, "x" * 1000, OPTIONS)
+
+        self.assertEqual(caught.exception.budget, 300)
+        self.assertEqual(caught.exception.output_tokens, 100)
+
+    def test_trim_shortens_human_message(self):
+        _, human, _ = manager(overflow="trim").fit(provider(context_window=300), SYSTEM, "x" * 1000, OPTIONS)
+
+        # 300 - 100 токенов ответа - 4 токена системного сообщения = 196 токенов
+        self.assertEqual(len(human), 196 * 4)
+
+    def test_trim_rejects_when_fixed_part_does_not_fit(self):
+        with self.assertRaises(ContextWindowExceededError):
+            manager(overflow="trim").fit(provider(context_window=100), SYSTEM, "x", OPTIONS)
+
+    def test_auto_num_ctx_rounds_up_to_power_of_two(self):
+        ollama = provider(ProviderType.ollama, context_window=32768)
+
+        _, _, small = manager().fit(ollama, SYSTEM, "x" * 100, OPTIONS)
+        _, _, large = manager().fit(ollama, SYSTEM, "x" * 8000, OPTIONS)
+
+        self.assertEqual(small.num_ctx, 1024)
+        # 4 + 2000 + 100 токенов округляются до 4096
+        self.assertEqual(large.num_ctx, 4096)
+
+    def test_auto_num_ctx_is_capped_and_optional(self):
+        ollama = provider(ProviderType.ollama, context_window=3000)
+
+        _, _, capped = manager().fit(ollama, SYSTEM, "x" * 8000, OPTIONS)
+        _, _, explicit = manager().fit(ollama, SYSTEM, "x" * 100, OPTIONS.model_copy(update={"num_ctx": 2048}))
+        _, _, disabled = manager(auto_num_ctx=False).fit(ollama, SYSTEM, "x" * 100, OPTIONS)
+        _, _, openai = manager().fit(provider(context_window=3000), SYSTEM, "x" * 100, OPTIONS)
+
+        self.assertEqual(capped.num_ctx, 3000)
+        self.assertEqual(explicit.num_ctx, 2048)
+        self.assertIsNone(disabled.num_ctx)
+        self.assertIsNone(openai.num_ctx)
+
+    def test_fit_all_checks_every_provider(self):
+        providers = [provider(context_window=10000), provider(context_window=300)]
+
+        with self.assertRaises(ContextWindowExceededError):
+            manager().fit_all(providers, SYSTEM, "x" * 1000, OPTIONS)
+
+        _, human, _ = manager(overflow="trim").fit_all(providers, SYSTEM, "x" * 1000, OPTIONS)
+        self.assertEqual(len(human), 196 * 4)
+
+    def test_fit_all_caps_num_ctx_by_smallest_ollama_window(self):
+        providers = [
+            provider(ProviderType.ollama, context_window=32768),
+            provider(ProviderType.ollama, context_window=3000)
+        ]
+
+        _, _, options = manager().fit_all(providers, SYSTEM, "x" * 8000, OPTIONS)
+
+        self.assertEqual(options.num_ctx, 3000)
+
+    def test_fit_all_counts_extra_text(self):
+        providers = [provider(context_window=300)]
+
+        manager().fit_all(providers, SYSTEM, "x" * 700, OPTIONS)
+        with self.assertRaises(ContextWindowExceededError):
+            manager().fit_all(providers, SYSTEM, "x" * 700, OPTIONS, extra_text="y" * 100)
+
+
+class Answer(BaseModel):
+    answer: str
+
+
+class HandlerContextTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_fallback_window_is_checked_before_dispatch(self):
+        registry = LLMClientRegistry()
+        try:
+            async with MockServer() as server:
+                handler = AIBaseHandler(prompt_storage=None, client_registry=registry, context_manager=manager())
+                handler.llm_model.switch_model(
+                    provider(base_url=server.base_url, context_window=100000, transport=TransportType.native),
+                    [provider(base_url=server.base_url, context_window=300, transport=TransportType.native)]
+                )
+
+                with self.assertRaises(ContextWindowExceededError):
+                    await handler.send_request("x" * 1000, SYSTEM, options=OPTIONS)
+                with self.assertRaises(ContextWindowExceededError):
+                    await handler.send_request_with_structured_output(Answer, "x" * 1000, SYSTEM, options=OPTIONS)
+
+                response = await handler.send_request("x" * 100, SYSTEM, options=OPTIONS)
+
+            self.assertTrue(response.content.startswith("Paris"))
+            self.assertEqual(server.requests, 1)
+        finally:
+            await registry.aclose()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import asyncio
+import tempfile
+import time
+import unittest
+
+from lightunillm.core.Conversation import Conversation
+from lightunillm.core.ConversationStore import ConversationStore
+
+
+class ConversationStoreTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    async def asyncTearDown(self):
+        self.directory.cleanup()
+
+    async def test_evicted_conversation_is_reloaded(self):
+        store = ConversationStore(max_in_memory=1, directory=self.directory.name)
+
+        first = await store.get("first", lambda: Conversation("system"))
+        first.add_user("What is the capital of France?")
+        await store.get("second", Conversation)
+
+        self.assertEqual(len(store), 1)
+        reloaded = await store.get("first")
+
+        self.assertIsNot(reloaded, first)
+        self.assertEqual(list(reloaded.history()), [("human", "What is the capital of France?")])
+
+    async def test_turn_during_snapshot_write_is_not_lost(self):
+        store = ConversationStore(max_in_memory=1, directory=self.directory.name)
+        write = store._write
+
+        def slow_write(path: str, data: dict) -> None:
+            time.sleep(0.1)
+            write(path, data)
+
+        store._write = slow_write
+
+        first = await store.get("first", lambda: Conversation("system"))
+        first.add_user("first turn")
+
+        eviction = asyncio.ensure_future(store.get("second", Conversation))
+        await asyncio.sleep(0.02)
+        async with first.lock:
+            first.add_assistant("answer written during the snapshot")
+        await eviction
+
+        self.assertIs(await store.get("first"), first)
+
+        await store.flush()
+        store._memory.clear()
+        reloaded = await store.get("first")
+        self.assertEqual(
+            list(reloaded.history()), [("human", "first turn"), ("ai", "answer written during the snapshot")]
+        )
+
+    async def test_locked_conversation_is_not_evicted(self):
+        store = ConversationStore(max_in_memory=1)
+
+        first = await store.get("first", Conversation)
+        async with first.lock:
+            await store.get("second", Conversation)
+
+        self.assertIs(await store.get("first"), first)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+import json
+import os
+import sys
+import unittest
+
+from pydantic import BaseModel, Field
+
+from lightunillm import AIBaseHandler, LLMClientRegistry
+from lightunillm.typization import LLMProvider, ProviderType, TransportType
+from lightunillm.utils.json_stream import IncrementalJSONParser, PartialValidator, partial_model
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from mock_server import MockServer  # noqa: E402
+
+
+class District(BaseModel):
+    name: str
+    population: int
+
+
+class City(BaseModel):
+    name: str
+    population: int
+    districts: list[District]
+
+
+class Report(BaseModel):
+    country: str
+    cities: list[City]
+    tags: list[str]
+    capital: City | None = None
+    summary: str = Field(alias="abstract")
+
+
+DOCUMENT = {
+    "country": "France",
+    "cities": [
+        {"name": f"city {index}", "population": index, "districts": [{"name": "centre", "population": index}]}
+        for index in range(5)
+    ],
+    "tags": ["europe", "republic"],
+    "capital": {"name": "Paris", "population": 2, "districts": []},
+    "abstract": "A country in Europe.",
+}
+
+
+def partials(document: str, chunk: int, partial_strings: bool) -> tuple[list, list]:
+    """Частичные экземпляры PartialValidator и полной валидации накопленного дерева на каждом шаге."""
+    parser = IncrementalJSONParser(partial_strings)
+    validator = PartialValidator(Report)
+    incremental, full = [], []
+
+    for index in range(0, len(document), chunk):
+        value = parser.feed(document[index:index + chunk])
+        if value is None:
+            continue
+
+        partial = validator.validate(parser)
+        incremental.append(None if partial is None else partial.model_dump())
+        full.append(partial_model(Report).model_validate(value).model_dump())
+
+    return incremental, full
+
+
+class PartialValidatorTest(unittest.TestCase):
+
+    def test_matches_full_validation(self):
+        document = json.dumps(DOCUMENT)
+
+        for chunk in (1, 3, 17, len(document)):
+            for partial_strings in (False, True):
+                with self.subTest(chunk=chunk, partial_strings=partial_strings):
+                    incremental, full = partials(document, chunk, partial_strings)
+                    self.assertEqual(incremental, full)
+                    self.assertEqual(incremental[-1], Report.model_validate(DOCUMENT).model_dump())
+
+    def test_closed_items_are_validated_once(self):
+        document = json.dumps({"country": "France", "cities": DOCUMENT["cities"] * 20})
+        parser = IncrementalJSONParser()
+        validator = PartialValidator(Report)
+        name, _, item_adapter = validator._fields["cities"]
+
+        calls = 0
+        validate_python = item_adapter.validate_python
+
+        def counting(value, *args, **kwargs):
+            nonlocal calls
+            calls += 1
+            return validate_python(value, *args, **kwargs)
+
+        item_adapter.validate_python = counting
+        try:
+            completed = 0
+            for char in document:
+                parser.feed(char)
+                if parser.completed != completed:
+                    completed = parser.completed
+                    validator.validate(parser)
+        finally:
+            del item_adapter.validate_python
+
+        items = len(DOCUMENT["cities"]) * 20
+        # Каждый элемент валидируется один раз закрытым и по разу на каждое дочитанное внутри него значение
+        self.assertLess(calls, items * 10)
+        self.assertEqual(len(validator.validate(parser).cities), items)
+
+    def test_invalid_closed_field_stops_partials(self):
+        parser = IncrementalJSONParser()
+        validator = PartialValidator(Report)
+
+        parser.feed('{"country": "France", "cities": [{"population": "many"}], "tags": [')
+        self.assertIsNone(validator.validate(parser))
+
+        parser.feed('"europe"]}')
+        self.assertIsNone(validator.validate(parser))
+
+
+class StreamStructuredTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_partials_grow_to_final_result(self):
+        registry = LLMClientRegistry()
+        try:
+            for provider in ProviderType:
+                for transport in TransportType:
+                    with self.subTest(provider=provider, transport=transport):
+                        async with MockServer(tokens=64) as server:
+                            handler = AIBaseHandler(
+                                prompt_storage=None, client_registry=registry, llm_provider=LLMProvider(
+                                    model_id="mock", api_key="mock", provider=provider, transport=transport,
+                                    base_url=server.ollama_url if provider == ProviderType.ollama else server.base_url
+                                )
+                            )
+
+                            results = [
+                                result async for result in handler.stream_structured(
+                                    Report, "Describe France.", "You are a geography assistant."
+                                )
+                            ]
+
+                        *partials, final = results
+                        self.assertTrue(final.done)
+                        self.assertIsInstance(final.content, Report)
+                        self.assertEqual(len(final.content.cities), 8)
+                        self.assertTrue(partials)
+
+                        cities = [len(partial.content.cities or []) for partial in partials]
+                        self.assertEqual(cities, sorted(cities))
+                        self.assertEqual(cities[-1], 8)
+        finally:
+            await registry.aclose()
+
+
+if __name__ == "__main__":
+    unittest.main()
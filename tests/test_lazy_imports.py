@@ -0,0 +1,40 @@
+import subprocess
+import sys
+import unittest
+
+import lightunillm
+import lightunillm.utils
+
+
+def loaded_modules(code: str) -> set[str]:
+    """Модули пакета, загруженные после выполнения code в новом интерпретаторе."""
+    probe = f"{code}\nimport sys\nprint('\\n'.join(name for name in sys.modules if name.startswith('lightunillm')))"
+    output = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True).stdout
+    return set(output.split())
+
+
+class LazyImportTest(unittest.TestCase):
+
+    def test_import_package_loads_nothing(self):
+        self.assertEqual(loaded_modules("import lightunillm"), {"lightunillm"})
+
+    def test_prompt_loader_does_not_load_other_utils(self):
+        modules = loaded_modules("from lightunillm import PromptLoader")
+
+        self.assertIn("lightunillm.utils.PromptLoader", modules)
+        for name in ("ResponseCache", "RequestCoalescer", "MetricsAggregator", "exporters", "tokenizers", "json_stream"):
+            self.assertNotIn(f"lightunillm.utils.{name}", modules)
+
+    def test_all_attributes_resolve(self):
+        for package in (lightunillm, lightunillm.utils):
+            for name in package.__all__:
+                with self.subTest(package=package.__name__, name=name):
+                    self.assertIsNotNone(getattr(package, name))
+
+    def test_unknown_attribute(self):
+        with self.assertRaises(AttributeError):
+            lightunillm.utils.missing
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+import asyncio
+import importlib.util
+import os
+import sys
+import unittest
+
+from lightunillm import AIBaseHandler, LLMClientRegistry, MetricsAggregator, OpenTelemetrySink, PrometheusExporter
+from lightunillm.core.instrumentation import REQUEST, TIME_TO_FIRST_TOKEN, TOKENS, Instrumentation
+from lightunillm.typization import LLMProvider, ProviderType, TransportType
+from lightunillm.utils.MetricsAggregator import Histogram
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from mock_server import MockServer  # noqa: E402
+
+LATENCY = 0.05
+LABELS = {"provider": "openai", "model": "mock", "prompt_id": ""}
+
+
+class HistogramTest(unittest.TestCase):
+
+    def test_buckets_and_quantiles(self):
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in range(1, 101):
+            histogram.observe(value / 100)
+
+        self.assertEqual(histogram.counts, [10, 90])
+        self.assertEqual(histogram.count, 100)
+        self.assertAlmostEqual(histogram.sum, 50.5)
+        self.assertEqual(histogram.quantile(0.5), 0.51)
+        self.assertEqual(histogram.summary()["p99"], 1.0)
+
+    def test_quantiles_use_recent_samples(self):
+        histogram = Histogram(reservoir_size=10)
+        for value in [100.0] * 10 + [1.0] * 10:
+            histogram.observe(value)
+
+        self.assertEqual(histogram.quantile(0.99), 1.0)
+        self.assertEqual(histogram.count, 20)
+
+
+class HandlerMetricsTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.registry = LLMClientRegistry()
+        self.aggregator = MetricsAggregator()
+
+    async def asyncTearDown(self):
+        await self.registry.aclose()
+
+    async def run_requests(self, requests: int = 3) -> None:
+        async with MockServer(latency=LATENCY, tokens=4) as server:
+            handler = AIBaseHandler(
+                prompt_storage=None, client_registry=self.registry, instrumentation=Instrumentation([self.aggregator]),
+                llm_provider=LLMProvider(
+                    model_id="mock", base_url=server.base_url, api_key="mock",
+                    provider=ProviderType.openai, transport=TransportType.native
+                )
+            )
+
+            for _ in range(requests):
+                await handler.send_request("What is the capital of France?", "Answer briefly.")
+            async for _ in handler.stream_chunks("What is the capital of France?", "Answer briefly."):
+                pass
+
+    async def test_latency_and_time_to_first_token(self):
+        await self.run_requests()
+
+        latency = self.aggregator.histogram(f"{REQUEST}_seconds", **LABELS, kind="request", status="ok")
+        self.assertEqual(latency.count, 3)
+        self.assertGreaterEqual(latency.quantile(0.5), LATENCY)
+
+        ttft = self.aggregator.histogram(TIME_TO_FIRST_TOKEN, **LABELS, kind="stream")
+        self.assertEqual(ttft.count, 1)
+        self.assertGreaterEqual(ttft.sum, LATENCY)
+
+        self.assertEqual(self.aggregator.counter(TOKENS, kind="request", type="completion"), 12)
+        self.assertEqual(self.aggregator.counter(TOKENS, kind="stream", type="completion"), 4)
+
+    async def test_prometheus_text(self):
+        await self.run_requests()
+        text = self.aggregator.to_prometheus()
+        lines = text.splitlines()
+
+        self.assertIn(f"# TYPE {TIME_TO_FIRST_TOKEN} histogram", lines)
+        self.assertIn(f"# TYPE {TOKENS} counter", lines)
+
+        labels = 'kind="request",model="mock",prompt_id="",provider="openai",status="ok"'
+        self.assertIn(f'{REQUEST}_seconds_bucket{{{labels},le="+Inf"}} 3', lines)
+        self.assertIn(f"{REQUEST}_seconds_count{{{labels}}} 3", lines)
+        # Задержка не меньше LATENCY, поэтому в корзину 0.025 запросы не попадают
+        self.assertIn(f'{REQUEST}_seconds_bucket{{{labels},le="0.025"}} 0', lines)
+        self.assertIn(
+            f'{TOKENS}{{kind="request",model="mock",prompt_id="",provider="openai",type="completion"}} 12.0', lines
+        )
+
+    async def test_exporter_serves_metrics(self):
+        await self.run_requests(requests=1)
+
+        async with PrometheusExporter(self.aggregator, port=0) as exporter:
+            status, body = await self.fetch(exporter, "/metrics")
+            missing, _ = await self.fetch(exporter, "/")
+
+        self.assertEqual(status, "200")
+        self.assertEqual(body, self.aggregator.to_prometheus())
+        self.assertEqual(missing, "404")
+
+    @staticmethod
+    async def fetch(exporter: PrometheusExporter, path: str) -> tuple[str, str]:
+        reader, writer = await asyncio.open_connection(exporter.host, exporter.port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {exporter.host}\r\n\r\n".encode())
+        response = await reader.read()
+        writer.close()
+        await writer.wait_closed()
+
+        head, _, body = response.decode().partition("\r\n\r\n")
+        return head.split()[1], body
+
+
+@unittest.skipUnless(importlib.util.find_spec("opentelemetry"), "opentelemetry-api is not installed")
+class OpenTelemetrySinkTest(unittest.TestCase):
+
+    def test_records_metrics_and_spans(self):
+        class Instrument:
+            def __init__(self):
+                self.values = []
+
+            def record(self, value, attributes):
+                self.values.append((value, attributes))
+
+            add = record
+
+        class Meter:
+            def __init__(self):
+                self.instruments = {}
+
+            def create_histogram(self, name):
+                return self.instruments.setdefault(name, Instrument())
+
+            create_counter = create_histogram
+
+        class OtelSpan:
+            def __init__(self, name):
+                self.name, self.ended, self.attributes = name, False, {}
+
+            def set_attributes(self, attributes):
+                self.attributes.update(attributes)
+
+            def end(self):
+                self.ended = True
+
+        class Tracer:
+            def __init__(self):
+                self.spans = []
+
+            def start_span(self, name, attributes):
+                self.spans.append(OtelSpan(name))
+                return self.spans[-1]
+
+        meter, tracer = Meter(), Tracer()
+        instrumentation = Instrumentation([OpenTelemetrySink(tracer=tracer, meter=meter)])
+
+        with instrumentation.span(REQUEST, {"kind": "request"}):
+            instrumentation.observe(TIME_TO_FIRST_TOKEN, 0.5, {"kind": "stream"})
+
+        self.assertEqual(meter.instruments[TIME_TO_FIRST_TOKEN].values, [(0.5, {"kind": "stream"})])
+        self.assertEqual(len(meter.instruments[f"{REQUEST}_seconds"].values), 1)
+        self.assertTrue(tracer.spans[0].ended)
+        self.assertEqual(tracer.spans[0].attributes["status"], "ok")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from pydantic import BaseModel, ValidationError
+
+from lightunillm import OffloadExecutor
+
+
+class Answer(BaseModel):
+    answer: str
+    confidence: float
+
+
+class OffloadExecutorTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_render_and_parse_in_threads_and_processes(self):
+        for mode in ("thread", "process"):
+            with self.subTest(mode=mode):
+                offload = OffloadExecutor(workers=1, mode=mode, min_chars=0)
+                try:
+                    system, human = await offload.render("Answer as {{ role }}.", "{{ question }}", {
+                        "role": "a geographer", "question": "Capital of France?"
+                    })
+                    parsed, error = await offload.parse(Answer, '{"answer": "Paris", "confidence": 0.9}')
+                finally:
+                    offload.shutdown()
+
+                self.assertEqual((system, human), ("Answer as a geographer.", "Capital of France?"))
+                self.assertEqual(parsed, Answer(answer="Paris", confidence=0.9))
+                self.assertIsNone(error)
+
+    async def test_invalid_output_returns_validation_error(self):
+        for min_chars in (0, 4096):
+            with self.subTest(min_chars=min_chars):
+                offload = OffloadExecutor(workers=1, mode="thread", min_chars=min_chars)
+                try:
+                    parsed, error = await offload.parse(Answer, '{"answer": "Paris"}')
+                finally:
+                    offload.shutdown()
+
+                self.assertIsNone(parsed)
+                self.assertIsInstance(error, ValidationError)
+
+    async def test_short_content_is_parsed_without_pool(self):
+        offload = OffloadExecutor(workers=1, mode="process", min_chars=4096)
+
+        parsed, error = await offload.parse(Answer, '{"answer": "Paris", "confidence": 1}')
+
+        self.assertEqual(parsed.answer, "Paris")
+        self.assertIsNone(offload._executor)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+import json
+import os
+import tempfile
+import unittest
+
+from lightunillm.storages import FilePromptStorage, SQLitePromptStorage, record_from_bundle
+from lightunillm.typization import LLMProvider, Prompt, ProviderType
+
+PROVIDER = LLMProvider(model_id="mock", base_url="http://127.0.0.1:1/v1", api_key="mock", provider=ProviderType.openai)
+
+
+def prompt(number: int) -> Prompt:
+    return Prompt(system_message=f"System {number}", human_message="{{ question }}")
+
+
+class StorageTests:
+    """Общие проверки хранилищ. Подклассы создают хранилище с промптами 1, 2 и 3."""
+
+    async def storage(self, preload: bool = False):
+        raise NotImplementedError
+
+    async def add(self, storage, prompt_id, value: Prompt, memory: bool = True) -> None:
+        raise NotImplementedError
+
+    async def test_bulk_fetch(self):
+        for preload in (False, True):
+            with self.subTest(preload=preload):
+                storage = await self.storage(preload)
+
+                bundles = await storage.get_prompt_bundles(["1", "3"])
+                prompts = await storage.get_prompts(["2"])
+
+                self.assertEqual(list(bundles), ["1", "3"])
+                self.assertEqual(bundles["3"].prompt, prompt(3))
+                self.assertEqual(bundles["1"].llm_providers, [PROVIDER])
+                self.assertIsNotNone(bundles["1"].version)
+                self.assertEqual(prompts, {"2": prompt(2)})
+                self.assertEqual(sorted(await storage.list_prompt_ids()), ["1", "2", "3"])
+
+    async def test_missing_ids_raise_key_error(self):
+        for preload in (False, True):
+            with self.subTest(preload=preload):
+                storage = await self.storage(preload)
+
+                with self.assertRaises(KeyError):
+                    await storage.get_prompt_bundles(["1", "404"])
+                with self.assertRaises(KeyError):
+                    await storage.get_prompt("404")
+
+    async def test_mixed_id_types_are_the_same_prompt(self):
+        for preload in (False, True):
+            with self.subTest(preload=preload):
+                storage = await self.storage(preload)
+
+                bundles = await storage.get_prompt_bundles([1, "1", 2])
+
+                self.assertEqual(list(bundles), [1, "1", 2])
+                self.assertEqual(bundles[1].prompt, prompt(1))
+                self.assertEqual(bundles["1"].prompt, prompt(1))
+
+    async def test_reload_picks_up_new_prompts(self):
+        storage = await self.storage(preload=True)
+        self.assertEqual(len(await storage.list_prompt_ids()), 3)
+
+        await self.add(storage, "4", prompt(4), memory=False)
+        with self.assertRaises(KeyError):
+            await storage.get_prompt("4")
+
+        self.assertEqual(await storage.reload(), 4)
+        self.assertEqual(await storage.get_prompt("4"), prompt(4))
+
+
+class FilePromptStorageTest(StorageTests, unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        for number in (1, 2, 3):
+            self.write(str(number), prompt(number))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, prompt_id: str, value: Prompt) -> None:
+        with open(os.path.join(self.directory.name, f"{prompt_id}.json"), "w", encoding="utf-8") as file:
+            json.dump(record_from_bundle(value, [PROVIDER]), file)
+
+    async def storage(self, preload: bool = False) -> FilePromptStorage:
+        return FilePromptStorage(self.directory.name, preload=preload)
+
+    async def add(self, storage, prompt_id, value: Prompt, memory: bool = True) -> None:
+        self.write(prompt_id, value)
+
+    async def test_version_changes_with_file(self):
+        storage = await self.storage()
+        version = await storage.get_version("1")
+
+        with open(os.path.join(self.directory.name, "1.json"), "a", encoding="utf-8") as file:
+            file.write(" ")
+
+        self.assertNotEqual(await storage.get_version("1"), version)
+        self.assertIsNone(await storage.get_version("404"))
+
+    async def test_path_traversal_is_rejected(self):
+        storage = await self.storage()
+
+        with self.assertRaises(ValueError):
+            await storage.get_prompt("../1")
+
+
+class SQLitePromptStorageTest(StorageTests, unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "prompts.db")
+        self.storages: list[SQLitePromptStorage] = []
+
+        storage = await self.storage()
+        for number in (1, 2, 3):
+            await storage.put(str(number), prompt(number), [PROVIDER])
+
+    async def asyncTearDown(self):
+        for storage in self.storages:
+            await storage.aclose()
+        self.directory.cleanup()
+
+    async def storage(self, preload: bool = False) -> SQLitePromptStorage:
+        storage = SQLitePromptStorage(self.path, pool_size=2, preload=preload)
+        self.storages.append(storage)
+        return storage
+
+    async def add(self, storage, prompt_id, value: Prompt, memory: bool = True) -> None:
+        # Без memory промпт добавляется другим экземпляром, мимо каталога в памяти storage
+        target = storage if memory else await self.storage()
+        await target.put(prompt_id, value, [PROVIDER])
+
+    async def test_put_and_delete_update_preloaded_catalog(self):
+        storage = await self.storage(preload=True)
+        await storage.get_prompt("1")
+
+        await storage.put("1", prompt(10), [PROVIDER])
+        await storage.put(5, prompt(5), [PROVIDER])
+        await storage.delete("2")
+
+        self.assertEqual(await storage.get_prompt("1"), prompt(10))
+        self.assertEqual(await storage.get_prompt("5"), prompt(5))
+        with self.assertRaises(KeyError):
+            await storage.get_prompt("2")
+
+        # Каталог в памяти совпадает с базой
+        fresh = await self.storage()
+        self.assertEqual(sorted(await fresh.list_prompt_ids()), sorted(await storage.list_prompt_ids()))
+
+    async def test_bulk_fetch_above_variable_limit(self):
+        storage = await self.storage()
+        for number in range(4, 600):
+            await storage.put(str(number), prompt(number), [PROVIDER])
+
+        bundles = await storage.get_prompt_bundles(str(number) for number in range(1, 600))
+
+        self.assertEqual(len(bundles), 599)
+        self.assertEqual(bundles["599"].prompt, prompt(599))
+
+
+if __name__ == "__main__":
+    unittest.main()
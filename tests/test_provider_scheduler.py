@@ -0,0 +1,74 @@
+import asyncio
+import time
+import unittest
+
+from lightunillm.core.ProviderScheduler import ProviderScheduler
+from lightunillm.typization import LLMTokenUsage, ProviderType
+
+
+def usage(total_tokens: int) -> LLMTokenUsage:
+    return LLMTokenUsage(
+        completion_tokens=total_tokens // 2, prompt_tokens=total_tokens - total_tokens // 2,
+        total_tokens=total_tokens, provider=ProviderType.openai
+    )
+
+
+class ProviderSchedulerTest(unittest.IsolatedAsyncioTestCase):
+
+    def scheduler(self, **limits) -> ProviderScheduler:
+        scheduler = ProviderScheduler(**limits)
+        scheduler.WINDOW = 0.05
+        return scheduler
+
+    async def test_release_corrects_estimate_within_window(self):
+        scheduler = self.scheduler(tokens_per_minute=1000)
+
+        async with scheduler.slot(100) as ticket:
+            ticket.observe(usage(300))
+
+        self.assertEqual(scheduler._window_tokens, 300)
+
+    async def test_request_longer_than_window_does_not_leak_tokens(self):
+        scheduler = self.scheduler(tokens_per_minute=1000)
+
+        async with scheduler.slot(100) as ticket:
+            await asyncio.sleep(scheduler.WINDOW * 2)
+            # Следующий запрос вытесняет из окна запись ещё не завершённого
+            async with scheduler.slot(50):
+                pass
+            ticket.observe(usage(900))
+
+        self.assertEqual(scheduler._window_tokens, 50)
+
+        await asyncio.sleep(scheduler.WINDOW * 2)
+        scheduler._prune(time.monotonic())
+        self.assertEqual(scheduler._window_tokens, 0)
+
+    async def test_window_tokens_match_window_records(self):
+        scheduler = self.scheduler(tokens_per_minute=1000)
+
+        for _ in range(5):
+            async with scheduler.slot(100) as ticket:
+                await asyncio.sleep(scheduler.WINDOW * 1.5)
+                async with scheduler.slot(10) as short:
+                    short.observe(usage(20))
+                ticket.observe(usage(900))
+
+        self.assertEqual(scheduler._window_tokens, sum(record[1] for record in scheduler._window))
+
+    async def test_requests_per_minute_waits_for_window(self):
+        scheduler = self.scheduler(requests_per_minute=1)
+
+        async with scheduler.slot(10):
+            pass
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        async with scheduler.slot(10):
+            pass
+
+        self.assertGreaterEqual(loop.time() - started, scheduler.WINDOW * 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import asyncio
+import unittest
+
+from lightunillm.utils.RequestCoalescer import RequestCoalescer
+
+
+class CoalescerDoTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_concurrent_calls_share_one_execution(self):
+        coalescer = RequestCoalescer()
+        calls = 0
+
+        async def fn():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "Paris"
+
+        results = await asyncio.gather(*(coalescer.do("key", fn) for _ in range(5)))
+
+        self.assertEqual(results, ["Paris"] * 5)
+        self.assertEqual(calls, 1)
+        self.assertEqual(len(coalescer), 0)
+
+    async def test_cancelled_waiter_does_not_cancel_others(self):
+        coalescer = RequestCoalescer()
+        gate = asyncio.Event()
+
+        async def fn():
+            await gate.wait()
+            return "Paris"
+
+        first = asyncio.ensure_future(coalescer.do("key", fn))
+        second = asyncio.ensure_future(coalescer.do("key", fn))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        gate.set()
+
+        self.assertEqual(await second, "Paris")
+        self.assertTrue(first.cancelled())
+
+    async def test_call_is_cancelled_when_all_waiters_are_cancelled(self):
+        coalescer = RequestCoalescer()
+        cancelled = asyncio.Event()
+
+        async def fn():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiters = [asyncio.ensure_future(coalescer.do("key", fn)) for _ in range(3)]
+        await asyncio.sleep(0)
+
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+
+        await asyncio.wait_for(cancelled.wait(), 1.0)
+        self.assertNotIn("key", coalescer)
+
+
+class CoalescerStreamTest(unittest.IsolatedAsyncioTestCase):
+
+    def source(self, items: list[str], opened: list, gate: asyncio.Event | None = None):
+        async def stream():
+            opened.append(True)
+            for index, item in enumerate(items):
+                if gate is not None and index == 1:
+                    await gate.wait()
+                yield item
+
+        return stream
+
+    async def test_fan_out_opens_source_once(self):
+        coalescer = RequestCoalescer()
+        opened = []
+        open_stream = self.source(["a", "b", "c"], opened)
+
+        async def read():
+            return [item async for item in coalescer.stream("key", open_stream)]
+
+        results = await asyncio.gather(*(read() for _ in range(3)))
+
+        self.assertEqual(results, [["a", "b", "c"]] * 3)
+        self.assertEqual(len(opened), 1)
+        self.assertEqual(len(coalescer), 0)
+
+    async def test_late_joiner_replays_buffered_items(self):
+        coalescer = RequestCoalescer()
+        opened, gate = [], asyncio.Event()
+        open_stream = self.source(["a", "b", "c"], opened, gate)
+
+        first = coalescer.stream("key", open_stream)
+        self.assertEqual(await anext(first), "a")
+
+        late = coalescer.stream("key", open_stream)
+        gate.set()
+
+        self.assertEqual([item async for item in late], ["a", "b", "c"])
+        self.assertEqual([item async for item in first], ["b", "c"])
+        self.assertEqual(len(opened), 1)
+
+    async def test_joiner_that_has_not_started_keeps_source_alive(self):
+        coalescer = RequestCoalescer()
+        opened, gate = [], asyncio.Event()
+        open_stream = self.source(["a", "b"], opened, gate)
+
+        first = coalescer.stream("key", open_stream)
+        self.assertEqual(await anext(first), "a")
+
+        joiner = coalescer.stream("key", open_stream)
+        await first.aclose()
+        gate.set()
+
+        self.assertEqual([item async for item in joiner], ["a", "b"])
+
+    async def test_source_is_cancelled_when_all_subscribers_close(self):
+        coalescer = RequestCoalescer()
+        cancelled = asyncio.Event()
+
+        async def open_stream():
+            try:
+                yield "a"
+                await asyncio.sleep(10)
+                yield "b"
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        subscribers = [coalescer.stream("key", open_stream) for _ in range(2)]
+        for subscriber in subscribers:
+            self.assertEqual(await anext(subscriber), "a")
+
+        for subscriber in subscribers:
+            await subscriber.aclose()
+
+        await asyncio.wait_for(cancelled.wait(), 1.0)
+        self.assertNotIn("key", coalescer)
+
+
+if __name__ == "__main__":
+    unittest.main()
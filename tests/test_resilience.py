@@ -0,0 +1,169 @@
+import asyncio
+import os
+import sys
+import unittest
+
+from lightunillm import AIBaseHandler, HedgePolicy, LLMClientRegistry, RetryPolicy
+from lightunillm.core.resilience import ResilientExecutor
+from lightunillm.typization import LLMProvider, ProviderType, TransportType
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from mock_server import MockServer  # noqa: E402
+
+NO_DELAY = RetryPolicy(max_attempts=3, base_delay=0.0, jitter=False)
+
+
+def provider(name: str, base_url: str = "http://127.0.0.1:1/v1", transport: TransportType = TransportType.native) -> LLMProvider:
+    return LLMProvider(model_id=name, base_url=base_url, api_key="mock", provider=ProviderType.openai, transport=transport)
+
+
+class ResilientExecutorTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_retries_retryable_errors(self):
+        calls = []
+
+        async def attempt(llm_provider: LLMProvider) -> str:
+            calls.append(llm_provider.model_id)
+            if len(calls) < 3:
+                raise ConnectionError("reset")
+            return "ok"
+
+        result = await ResilientExecutor(NO_DELAY).run([provider("a"), provider("b")], attempt)
+
+        self.assertEqual(result, "ok")
+        self.assertEqual(calls, ["a", "a", "a"])
+
+    async def test_non_retryable_error_is_raised_at_once(self):
+        calls = []
+
+        async def attempt(llm_provider: LLMProvider) -> str:
+            calls.append(llm_provider.model_id)
+            raise ValueError("bad request")
+
+        with self.assertRaises(ValueError):
+            await ResilientExecutor(NO_DELAY).run([provider("a"), provider("b")], attempt)
+
+        self.assertEqual(calls, ["a"])
+
+    async def test_fails_over_in_order(self):
+        calls = []
+
+        async def attempt(llm_provider: LLMProvider) -> str:
+            calls.append(llm_provider.model_id)
+            if llm_provider.model_id != "c":
+                raise TimeoutError()
+            return llm_provider.model_id
+
+        result = await ResilientExecutor(NO_DELAY).run([provider("a"), provider("b"), provider("c")], attempt)
+
+        self.assertEqual(result, "c")
+        self.assertEqual(calls, ["a"] * 3 + ["b"] * 3 + ["c"])
+
+    async def test_last_error_is_raised_when_all_providers_fail(self):
+        async def attempt(llm_provider: LLMProvider) -> str:
+            raise ConnectionError(llm_provider.model_id)
+
+        with self.assertRaisesRegex(ConnectionError, "b"):
+            await ResilientExecutor(NO_DELAY).run([provider("a"), provider("b")], attempt)
+
+    async def test_empty_providers(self):
+        async def attempt(llm_provider: LLMProvider) -> str:
+            return "ok"
+
+        with self.assertRaises(ValueError):
+            await ResilientExecutor().run([], attempt)
+
+    async def test_hedge_wins_and_loser_is_awaited(self):
+        executor = ResilientExecutor(NO_DELAY, HedgePolicy(min_delay=0.01, min_samples=1))
+        primary, replica = provider("a"), provider("b")
+        executor.latency(primary).observe(0.01)
+        finished = []
+
+        async def attempt(llm_provider: LLMProvider) -> str:
+            try:
+                await asyncio.sleep(1.0 if llm_provider is primary else 0.0)
+                return llm_provider.model_id
+            finally:
+                finished.append(llm_provider.model_id)
+
+        result = await executor.run([primary, replica], attempt)
+
+        self.assertEqual(result, "b")
+        self.assertCountEqual(finished, ["a", "b"])
+
+    async def test_no_hedge_without_latency_samples(self):
+        executor = ResilientExecutor(NO_DELAY, HedgePolicy(min_samples=5))
+        calls = []
+
+        async def attempt(llm_provider: LLMProvider) -> str:
+            calls.append(llm_provider.model_id)
+            await asyncio.sleep(0.02)
+            return llm_provider.model_id
+
+        self.assertEqual(await executor.run([provider("a"), provider("b")], attempt), "a")
+        self.assertEqual(calls, ["a"])
+
+
+class HandlerResilienceTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.registry = LLMClientRegistry()
+
+    async def asyncTearDown(self):
+        await self.registry.aclose()
+
+    def handler(self, primary: LLMProvider, fallbacks: list[LLMProvider], **kwargs) -> AIBaseHandler:
+        kwargs.setdefault("retry_policy", NO_DELAY)
+        handler = AIBaseHandler(prompt_storage=None, client_registry=self.registry, **kwargs)
+        handler.llm_model.switch_model(primary, fallbacks)
+        return handler
+
+    async def test_retry_recovers_from_server_errors(self):
+        for transport in TransportType:
+            with self.subTest(transport=transport):
+                async with MockServer(error_rate=0.5, seed=3) as server:
+                    handler = self.handler(
+                        provider("a", server.base_url, transport), [],
+                        retry_policy=RetryPolicy(max_attempts=10, base_delay=0.0)
+                    )
+
+                    response = await handler.send_request("What is the capital of France?", "You are a geography assistant.")
+
+                    self.assertEqual(response.content, "Paris")
+                    self.assertGreater(server.errors, 0)
+                    self.assertEqual(server.requests, server.errors + 1)
+
+    async def test_fails_over_to_fallback_provider(self):
+        for transport in TransportType:
+            with self.subTest(transport=transport):
+                async with MockServer(error_rate=1.0) as failing, MockServer() as healthy:
+                    handler = self.handler(
+                        provider("primary", failing.base_url, transport), [provider("fallback", healthy.base_url, transport)]
+                    )
+
+                    response = await handler.send_request("What is the capital of France?", "You are a geography assistant.")
+
+                    self.assertEqual(response.content, "Paris")
+                    self.assertEqual(failing.requests, NO_DELAY.max_attempts)
+                    self.assertEqual(healthy.requests, 1)
+
+    async def test_hedged_request_uses_faster_replica(self):
+        async with MockServer(latency=0.3) as slow, MockServer() as fast:
+            primary = provider("mock", slow.base_url)
+            handler = self.handler(primary, [provider("mock", fast.base_url)], hedge_policy=HedgePolicy(min_samples=1))
+            handler.executor.latency(primary).observe(0.01)
+
+            response = await asyncio.wait_for(
+                handler.send_request("What is the capital of France?", "You are a geography assistant."), 0.2
+            )
+
+            self.assertEqual(response.content, "Paris")
+            self.assertEqual(fast.requests, 1)
+
+            # Mock-сервер дорабатывает отменённый запрос
+            await asyncio.sleep(slow.latency)
+
+
+if __name__ == "__main__":
+    unittest.main()
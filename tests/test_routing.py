@@ -0,0 +1,158 @@
+import asyncio
+import os
+import sys
+import unittest
+
+from lightunillm import AIBaseHandler, LLMClientRegistry, RetryPolicy
+from lightunillm.core.routing import LoadAwareRouter, PrefixRouter, RoundRobinRouter
+from lightunillm.typization import LLMProvider, ProviderType
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from mock_server import MockServer  # noqa: E402
+
+
+def provider(model_id: str, replica: int) -> LLMProvider:
+    return LLMProvider(
+        model_id=model_id, base_url=f"http://replica-{replica}:8000/v1", api_key="mock", provider=ProviderType.openai
+    )
+
+
+PRIMARY = [provider("primary", replica) for replica in range(4)]
+FALLBACK = [provider("fallback", replica) for replica in range(3)]
+
+
+class PrefixRouterTest(unittest.TestCase):
+
+    def test_fallback_model_stays_after_primary_replicas(self):
+        router = PrefixRouter()
+
+        for index in range(200):
+            ordered = router.order(PRIMARY + FALLBACK, router.key(f"system prompt {index}"))
+
+            self.assertEqual([llm_provider.model_id for llm_provider in ordered], ["primary"] * 4 + ["fallback"] * 3)
+            self.assertCountEqual(ordered, PRIMARY + FALLBACK)
+
+    def test_same_key_routes_to_same_replica(self):
+        router = PrefixRouter()
+        key = router.key("You are a geography assistant.")
+
+        self.assertEqual(router.order(PRIMARY + FALLBACK, key), router.order(PRIMARY + FALLBACK, key))
+
+    def test_keys_spread_over_primary_replicas(self):
+        router = PrefixRouter()
+        first = {router.order(PRIMARY + FALLBACK, router.key(f"prompt {index}"))[0].base_url for index in range(200)}
+
+        self.assertEqual(first, {llm_provider.base_url for llm_provider in PRIMARY})
+
+    def test_removing_replica_moves_only_its_keys(self):
+        router = PrefixRouter()
+        keys = [router.key(f"prompt {index}") for index in range(500)]
+
+        before = [router.order(PRIMARY, key)[0] for key in keys]
+        after = [router.order(PRIMARY[:-1], key)[0] for key in keys]
+
+        for old, new in zip(before, after):
+            if old is not PRIMARY[-1]:
+                self.assertIs(old, new)
+
+    def test_without_key_order_is_unchanged(self):
+        self.assertEqual(PrefixRouter().order(PRIMARY + FALLBACK), PRIMARY + FALLBACK)
+
+
+class RoundRobinRouterTest(unittest.TestCase):
+
+    def test_rotates_replicas_within_model(self):
+        router = RoundRobinRouter()
+        firsts = [router.order(PRIMARY + FALLBACK)[0] for _ in range(len(PRIMARY))]
+
+        self.assertEqual(firsts, PRIMARY)
+
+
+class LoadAwareRouterTest(unittest.IsolatedAsyncioTestCase):
+    STRATEGIES = ("least_outstanding", "ewma")
+
+    @staticmethod
+    def handler(router: LoadAwareRouter, servers: list[MockServer], registry: LLMClientRegistry) -> AIBaseHandler:
+        return AIBaseHandler(
+            prompt_storage=None,
+            llm_provider=LLMProvider(
+                model_id="mock",
+                base_url=servers[0].base_url,
+                api_key="mock",
+                provider=ProviderType.openai,
+                replicas=[server.base_url for server in servers[1:]],
+            ),
+            client_registry=registry,
+            retry_policy=RetryPolicy(max_attempts=1),
+            router=router,
+        )
+
+    async def test_traffic_moves_away_from_slow_replica(self):
+        for strategy in self.STRATEGIES:
+            with self.subTest(strategy=strategy):
+                registry = LLMClientRegistry()
+                # Медленная реплика первая, чтобы при равных оценках роутер выбирал её
+                servers = [MockServer(latency=0.1), MockServer(latency=0.005), MockServer(latency=0.005)]
+                try:
+                    for server in servers:
+                        await server.start()
+
+                    handler = self.handler(LoadAwareRouter(strategy=strategy), servers, registry)
+                    semaphore = asyncio.Semaphore(4)
+
+                    async def one() -> None:
+                        async with semaphore:
+                            await handler.send_request("What is the capital of France?", "Answer briefly.")
+
+                    await asyncio.gather(*(one() for _ in range(90)))
+                finally:
+                    for server in servers:
+                        await server.stop()
+                    await registry.aclose()
+
+                slow, *fast = [server.requests for server in servers]
+                self.assertEqual(slow + sum(fast), 90)
+                self.assertLess(slow, 90 // 6)
+                for count in fast:
+                    self.assertGreater(count, slow)
+
+    async def test_ejected_replica_recovers_after_backoff(self):
+        for strategy in self.STRATEGIES:
+            with self.subTest(strategy=strategy):
+                registry = LLMClientRegistry()
+                router = LoadAwareRouter(strategy=strategy, max_failures=1, ejection_time=0.2)
+                broken, healthy = servers = [MockServer(error_rate=1.0), MockServer()]
+                try:
+                    for server in servers:
+                        await server.start()
+
+                    handler = self.handler(router, servers, registry)
+                    llm_provider, replica = handler.llm_model.providers
+
+                    for _ in range(5):
+                        await handler.send_request("What is the capital of France?", "Answer briefly.")
+
+                    # Первый запрос переключился на исправную реплику, остальные не трогали исключённую
+                    self.assertEqual(broken.requests, 1)
+                    self.assertEqual(healthy.requests, 5)
+                    self.assertTrue(router.stats(llm_provider).ejected)
+
+                    broken.error_rate = 0.0
+                    await asyncio.sleep(0.25)
+
+                    self.assertFalse(router.stats(llm_provider).ejected)
+                    for _ in range(5):
+                        await handler.send_request("What is the capital of France?", "Answer briefly.")
+                finally:
+                    for server in servers:
+                        await server.stop()
+                    await registry.aclose()
+
+                self.assertGreater(broken.requests, 1)
+                self.assertEqual(router.stats(llm_provider).ejections, 0)
+                self.assertEqual(broken.requests + healthy.requests, 11)
+
+
+if __name__ == "__main__":
+    unittest.main()
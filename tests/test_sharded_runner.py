@@ -0,0 +1,70 @@
+import asyncio
+import os
+import unittest
+
+from lightunillm import ShardedRunner
+
+ITEMS = list(range(20))
+
+
+async def double(item: int) -> int:
+    await asyncio.sleep(0)
+    return item * 2
+
+
+async def setup() -> int:
+    return 100
+
+
+async def add_state(state: int, item: int) -> int:
+    return state + item
+
+
+async def fail_on_three(item: int) -> int:
+    if item == 3:
+        raise ValueError("three")
+    return item
+
+
+async def crash_on_three(item: int) -> int:
+    if item == 3:
+        os._exit(1)
+    await asyncio.sleep(0.01)
+    return item
+
+
+class ShardedRunnerTest(unittest.IsolatedAsyncioTestCase):
+
+    async def collect(self, runner: ShardedRunner, items=ITEMS) -> dict[int, int]:
+        return dict([result async for result in runner.map(items)])
+
+    async def test_map_in_threads_and_processes(self):
+        for mode in ("thread", "process"):
+            with self.subTest(mode=mode):
+                runner = ShardedRunner(double, shards=2, concurrency=4, mode=mode)
+
+                self.assertEqual(await asyncio.wait_for(self.collect(runner), 60), {i: i * 2 for i in ITEMS})
+
+    async def test_setup_state_is_passed_to_worker(self):
+        runner = ShardedRunner(add_state, setup=setup, shards=2, mode="thread")
+
+        self.assertEqual(await self.collect(runner), {i: 100 + i for i in ITEMS})
+
+    async def test_worker_error_is_raised(self):
+        for mode in ("thread", "process"):
+            with self.subTest(mode=mode):
+                runner = ShardedRunner(fail_on_three, shards=2, mode=mode)
+
+                with self.assertRaisesRegex(ValueError, "three"):
+                    await asyncio.wait_for(self.collect(runner), 60)
+
+    async def test_dead_process_shard_is_detected(self):
+        runner = ShardedRunner(crash_on_three, shards=2, concurrency=2, mode="process")
+        runner.POLL_INTERVAL = 0.1
+
+        with self.assertRaisesRegex(RuntimeError, "Shard exited"):
+            await asyncio.wait_for(self.collect(runner), 60)
+
+
+if __name__ == "__main__":
+    unittest.main()
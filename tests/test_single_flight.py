@@ -0,0 +1,79 @@
+import asyncio
+import unittest
+
+from lightunillm.utils.cache import SingleFlight
+
+
+class SingleFlightTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        calls = 0
+
+        async def fn() -> int:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return 42
+
+        results = await asyncio.gather(*(flight.do("key", fn) for _ in range(5)))
+
+        self.assertEqual(results, [42] * 5)
+        self.assertEqual(calls, 1)
+        self.assertEqual(len(flight), 0)
+
+    async def test_leader_cancellation_does_not_fail_followers(self):
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def fn() -> str:
+            await release.wait()
+            return "value"
+
+        leader = asyncio.ensure_future(flight.do("key", fn))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", fn))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        self.assertEqual(await follower, "value")
+        with self.assertRaises(asyncio.CancelledError):
+            await leader
+
+    async def test_call_is_cancelled_when_all_waiters_are_cancelled(self):
+        flight = SingleFlight()
+        cancelled = asyncio.Event()
+
+        async def fn() -> None:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiters = [asyncio.ensure_future(flight.do("key", fn)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for waiter in waiters:
+            waiter.cancel()
+
+        await asyncio.wait_for(cancelled.wait(), 1.0)
+        self.assertNotIn("key", flight)
+
+    async def test_error_is_shared_and_key_is_released(self):
+        flight = SingleFlight()
+
+        async def fail() -> None:
+            await asyncio.sleep(0)
+            raise LookupError("missing")
+
+        results = await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+
+        self.assertTrue(all(isinstance(result, LookupError) for result in results))
+        self.assertNotIn("key", flight)
+
+
+if __name__ == "__main__":
+    unittest.main()